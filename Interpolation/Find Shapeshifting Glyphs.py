@@ -5,7 +5,12 @@ __doc__ = """
 Finds glyphs that change the number of visible shapes and countershapes while interpolating, so-called ‘shapeshifters’. Often unintended. Opens a new tab and reports to Macro Window.
 """
 
-import vanilla
+import vanilla, os, sys
+
+# import from enclosing folder:
+sys.path.insert(1, os.path.realpath(os.path.pardir))
+from outlinegeometry import ContourNesting
+
 tempMarker = "###DELETEME###"
 
 def instanceIsActive(instance):
@@ -14,6 +19,16 @@ def instanceIsActive(instance):
 	else:
 		return instance.active
 
+def shapeCounts(thisLayer):
+	"""
+	Returns (counters, shapes) of the layer, from how its paths are nested inside each other.
+	"""
+	paths = thisLayer.paths
+	nesting = ContourNesting([[(n.x, n.y, n.type) for n in p.nodes] for p in paths], [p.closed for p in paths])
+	contours = [i for i, area in enumerate(nesting.areas) if area]
+	countOfCounters = len([i for i in contours if nesting.isCounter(i)])
+	return countOfCounters, len(contours) - countOfCounters
+
 def glyphInterpolation(thisGlyphName, thisInstance):
 	"""
 	Yields a layer.
@@ -294,9 +309,7 @@ class FindShapeshiftingGlyphs(object):
 								interpolation.decomposeComponents()
 							if len(interpolation.paths) > 1:
 								interpolation.removeOverlap()
-							countOfCWPaths = len([p for p in interpolation.paths if p.direction == 1])
-							countOfCCWPaths = len(interpolation.paths) - countOfCWPaths
-							pathCounts.append((countOfCWPaths, countOfCCWPaths), )
+							pathCounts.append(shapeCounts(interpolation))
 						else:
 							print("❌ ERROR: %s has no interpolation for '%s'." % (thisGlyphName, thisInstance.name))
 
@@ -3,11 +3,13 @@
 from __future__ import division, print_function, unicode_literals
 __doc__ = """
 Specify a minimum distance, left and right glyphs, and Auto Bumper will add the minimum necessary kerning for the current master.
+Works on LTR kerning only: distances are measured with the LTR kerning, and the kerning is added as LTR kerning, also when the current tab is RTL.
 """
 
 import vanilla
 from timeit import default_timer as timer
 from kernanalysis import *
+from kernresolver import PlannedKerning, writeKerningPlan
 from AppKit import NSColor
 defaultStrings = """
 iíĭǐîïịìỉīįĩjĵ
@@ -70,7 +72,7 @@ class Bumper(object):
 
 		# Window 'self.w':
 		windowWidth = 500
-		windowHeight = 365
+		windowHeight = 389
 		windowWidthResize = 500 # user can resize width by this value
 		windowHeightResize = 500 # user can resize height by this value
 		self.w = vanilla.FloatingWindow(
@@ -144,7 +146,9 @@ class Bumper(object):
 		intervalIndex = Glyphs.defaults["com.mekkablue.Bumper.speedPopup"]
 		if intervalIndex is None:
 			intervalIndex = 0
-		self.w.text_speedExplanation = vanilla.TextBox((inset + 42 + 90, linePos + 3, -15, 14), "Measuring every %i units." % intervalList[intervalIndex], sizeStyle='small')
+		self.w.text_speedExplanation = vanilla.TextBox((inset + 42 + 90, linePos + 3, 160, 14), "Measuring every %i units." % intervalList[intervalIndex], sizeStyle='small')
+		self.w.adaptive = vanilla.CheckBox((inset + 300, linePos + 1, -inset, 17), "Refine near contact", value=False, sizeStyle='small', callback=self.SavePreferences)
+		self.w.adaptive.getNSButton().setToolTip_("If enabled, measures at the chosen speed first, then refines to 1 unit around the heights where the glyphs come closest, and around extremum points. Almost as accurate as ‘very slow’, at the cost of the chosen speed.")
 		linePos += lineHeight
 
 		self.w.text_6 = vanilla.TextBox((inset, linePos + 3, 130, 14), "Ignore height intervals:", sizeStyle='small')
@@ -154,9 +158,11 @@ class Bumper(object):
 		linePos += lineHeight
 
 		self.w.keepExistingKerning = vanilla.CheckBox(
-			(inset + 5, linePos, -inset, 17), "Keep (don’t overwrite) existing kerning", value=True, sizeStyle='small', callback=self.SavePreferences
+			(inset + 5, linePos, 220, 17), "Keep (don’t overwrite) existing kerning", value=True, sizeStyle='small', callback=self.SavePreferences
 			)
 		self.w.keepExistingKerning.getNSButton().setToolTip_("If the kern pair already exists in the font, it will not be overwritten.")
+		self.w.exact = vanilla.CheckBox((inset + 230, linePos, -inset, 17), "Exact distances (ignore speed)", value=False, sizeStyle='small', callback=self.SavePreferences)
+		self.w.exact.getNSButton().setToolTip_("If enabled, computes the true distances from the outline segments instead of measuring every few units. Results do not depend on the speed setting.")
 		linePos += lineHeight
 
 		self.w.excludeNonExporting = vanilla.CheckBox((inset + 5, linePos, 200, 17), "Exclude non-exporting glyphs", value=True, sizeStyle='small', callback=self.SavePreferences)
@@ -181,6 +187,12 @@ class Bumper(object):
 			)
 		linePos += lineHeight
 
+		self.w.dryRun = vanilla.CheckBox((inset + 5, linePos, 200, 17), "Dry run (plan only, do not kern)", value=False, sizeStyle='small', callback=self.SavePreferences)
+		self.w.dryRun.getNSButton().setToolTip_("If enabled, calculates and reports all kerning changes, but does not apply them to the font. Useful for reviewing, especially together with the export option.")
+		self.w.exportPlan = vanilla.CheckBox((inset + 230, linePos, -inset, 17), "Export plan as CSV/JSON", value=False, sizeStyle='small', callback=self.SavePreferences)
+		self.w.exportPlan.getNSButton().setToolTip_("If enabled, asks for a file to save the kerning plan in: every pair with its old value, new value, and the reason for the change. Choose the .csv or .json suffix for the format.")
+		linePos += lineHeight
+
 		# Progress Bar:
 		self.w.bar = vanilla.ProgressBar((inset, linePos, -inset, 16))
 		linePos += lineHeight
@@ -244,6 +256,8 @@ class Bumper(object):
 			Glyphs.defaults["com.mekkablue.Bumper.maxDistance"] = self.w.maxDistance.get()
 			Glyphs.defaults["com.mekkablue.Bumper.roundFactor"] = self.w.roundFactor.get()
 			Glyphs.defaults["com.mekkablue.Bumper.speedPopup"] = self.w.speedPopup.get()
+			Glyphs.defaults["com.mekkablue.Bumper.adaptive"] = self.w.adaptive.get()
+			Glyphs.defaults["com.mekkablue.Bumper.exact"] = self.w.exact.get()
 			Glyphs.defaults["com.mekkablue.Bumper.ignoreIntervals"] = self.w.ignoreIntervals.get()
 			Glyphs.defaults["com.mekkablue.Bumper.keepExistingKerning"] = self.w.keepExistingKerning.get()
 			Glyphs.defaults["com.mekkablue.Bumper.excludeNonExporting"] = self.w.excludeNonExporting.get()
@@ -252,6 +266,8 @@ class Bumper(object):
 			Glyphs.defaults["com.mekkablue.Bumper.reuseCurrentTab"] = self.w.reuseCurrentTab.get()
 			Glyphs.defaults["com.mekkablue.Bumper.avoidZeroKerning"] = self.w.avoidZeroKerning.get()
 			Glyphs.defaults["com.mekkablue.Bumper.suffix"] = self.w.suffix.get()
+			Glyphs.defaults["com.mekkablue.Bumper.dryRun"] = self.w.dryRun.get()
+			Glyphs.defaults["com.mekkablue.Bumper.exportPlan"] = self.w.exportPlan.get()
 
 			Glyphs.defaults["com.mekkablue.Bumper.kernStrings"] = self.w.kernStrings.get()
 
@@ -274,6 +290,8 @@ class Bumper(object):
 	def updateUI(self, sender=None):
 		# enable/disable options based on settings:
 		self.w.reuseCurrentTab.enable(onOff=Glyphs.defaults["com.mekkablue.Bumper.openNewTabWithKernPairs"])
+		self.w.speedPopup.enable(onOff=not Glyphs.defaults["com.mekkablue.Bumper.exact"])
+		self.w.adaptive.enable(onOff=not Glyphs.defaults["com.mekkablue.Bumper.exact"])
 
 		# update speed explanation:
 		if sender == self.w.speedPopup:
@@ -292,6 +310,8 @@ class Bumper(object):
 		Glyphs.registerDefault("com.mekkablue.Bumper.maxDistance", 200)
 		Glyphs.registerDefault("com.mekkablue.Bumper.roundFactor", 10)
 		Glyphs.registerDefault("com.mekkablue.Bumper.speedPopup", 2)
+		Glyphs.registerDefault("com.mekkablue.Bumper.adaptive", 0)
+		Glyphs.registerDefault("com.mekkablue.Bumper.exact", 0)
 		Glyphs.registerDefault("com.mekkablue.Bumper.ignoreIntervals", "")
 		Glyphs.registerDefault("com.mekkablue.Bumper.keepExistingKerning", 1)
 		Glyphs.registerDefault("com.mekkablue.Bumper.excludeNonExporting", 1)
@@ -300,6 +320,8 @@ class Bumper(object):
 		Glyphs.registerDefault("com.mekkablue.Bumper.reuseCurrentTab", 1)
 		Glyphs.registerDefault("com.mekkablue.Bumper.avoidZeroKerning", 1)
 		Glyphs.registerDefault("com.mekkablue.Bumper.suffix", "")
+		Glyphs.registerDefault("com.mekkablue.Bumper.dryRun", 0)
+		Glyphs.registerDefault("com.mekkablue.Bumper.exportPlan", 0)
 
 		Glyphs.registerDefault("com.mekkablue.Bumper.kernStrings", defaultStrings)
 
@@ -314,6 +336,8 @@ class Bumper(object):
 			self.w.maxDistance.set(Glyphs.defaults["com.mekkablue.Bumper.maxDistance"])
 			self.w.roundFactor.set(Glyphs.defaults["com.mekkablue.Bumper.roundFactor"])
 			self.w.speedPopup.set(Glyphs.defaults["com.mekkablue.Bumper.speedPopup"])
+			self.w.adaptive.set(Glyphs.defaults["com.mekkablue.Bumper.adaptive"])
+			self.w.exact.set(Glyphs.defaults["com.mekkablue.Bumper.exact"])
 			self.w.ignoreIntervals.set(Glyphs.defaults["com.mekkablue.Bumper.ignoreIntervals"])
 			self.w.keepExistingKerning.set(Glyphs.defaults["com.mekkablue.Bumper.keepExistingKerning"])
 			self.w.excludeNonExporting.set(Glyphs.defaults["com.mekkablue.Bumper.excludeNonExporting"])
@@ -321,6 +345,8 @@ class Bumper(object):
 			self.w.openNewTabWithKernPairs.set(Glyphs.defaults["com.mekkablue.Bumper.openNewTabWithKernPairs"])
 			self.w.reuseCurrentTab.set(Glyphs.defaults["com.mekkablue.Bumper.reuseCurrentTab"])
 			self.w.suffix.set(Glyphs.defaults["com.mekkablue.Bumper.suffix"])
+			self.w.dryRun.set(Glyphs.defaults["com.mekkablue.Bumper.dryRun"])
+			self.w.exportPlan.set(Glyphs.defaults["com.mekkablue.Bumper.exportPlan"])
 
 			self.w.kernStrings.set(Glyphs.defaults["com.mekkablue.Bumper.kernStrings"])
 
@@ -333,39 +359,55 @@ class Bumper(object):
 
 		return True
 
-	def addMissingKerning(self, thisFont, thisMasterID, leftSide, rightSide, minMaxDistance, distanceBetweenShapes, existingKerning=0):
-		# query user settings:
-		shouldReportInMacroWindow = Glyphs.defaults["com.mekkablue.Bumper.reportInMacroWindow"]
-		shouldKeepExistingKerning = bool(Glyphs.defaults["com.mekkablue.Bumper.keepExistingKerning"])
-		avoidZeroKerning = Glyphs.defaults["com.mekkablue.Bumper.avoidZeroKerning"]
+	def runSettings(self):
+		# read the preferences needed for every pair only once per run:
 		try:
 			roundValue = float(Glyphs.defaults["com.mekkablue.Bumper.roundFactor"])
 		except:
 			roundValue = 1.0
-		roundValue = max(roundValue, 1.0)
-
-		# check for existing kerning:
-		#existingKerning = thisFont.kerningForPair( thisMasterID, leftSide, rightSide )
-		kerningExists = existingKerning < 1000000 # NSNotDefined constant
+		return {
+			"shouldReportInMacroWindow": bool(Glyphs.defaults["com.mekkablue.Bumper.reportInMacroWindow"]),
+			"shouldKeepExistingKerning": bool(Glyphs.defaults["com.mekkablue.Bumper.keepExistingKerning"]),
+			"avoidZeroKerning": bool(Glyphs.defaults["com.mekkablue.Bumper.avoidZeroKerning"]),
+			"roundValue": max(roundValue, 1.0),
+			"adaptive": bool(Glyphs.defaults["com.mekkablue.Bumper.adaptive"]),
+			"exact": bool(Glyphs.defaults["com.mekkablue.Bumper.exact"]),
+			}
+
+	def planMissingKerning(self, leftSide, rightSide, minMaxDistance, distanceBetweenShapes, existingKerning, settings, reason):
+		"""
+		Returns a PlannedKerning row for the pair. Its apply attribute tells if the kerning should be set.
+		existingKerning is None if no kerning applies to the pair yet.
+		"""
+		kerningExists = existingKerning is not None
 		if not kerningExists:
 			existingKerning = 0
+		roundValue = settings["roundValue"]
 		newKernValue = round((minMaxDistance - distanceBetweenShapes + existingKerning) / roundValue, 0) * roundValue
 
 		# add only if it is OK:
-		if newKernValue == 0.0 and avoidZeroKerning:
-			if shouldReportInMacroWindow:
+		if newKernValue == 0.0 and settings["avoidZeroKerning"]:
+			if settings["shouldReportInMacroWindow"]:
 				print("- %s %s: zero kerning, not added." % (leftSide, rightSide))
-			return False # do not increase kern count
+			return PlannedKerning(leftSide, rightSide, existingKerning if kerningExists else None, newKernValue, "%s, but zero kerning" % reason, False)
+		elif kerningExists and settings["shouldKeepExistingKerning"]:
+			if settings["shouldReportInMacroWindow"]:
+				print("- %s %s: keeps existing %i (instead of new %i)." % (leftSide, rightSide, existingKerning, newKernValue))
+			return PlannedKerning(leftSide, rightSide, existingKerning, newKernValue, "%s, but keeps existing kerning" % reason, False)
 		else:
-			if kerningExists and shouldKeepExistingKerning:
-				if shouldReportInMacroWindow:
-					print("- %s %s: keeps existing %i (instead of new %i)." % (leftSide, rightSide, existingKerning, newKernValue))
-				return False # do not increase kern count
-			else:
-				thisFont.setKerningForPair(thisMasterID, leftSide, rightSide, newKernValue)
-				if shouldReportInMacroWindow:
-					print("- %s %s: %i" % (leftSide, rightSide, newKernValue))
-				return True # increase kern count
+			if settings["shouldReportInMacroWindow"]:
+				print("- %s %s: %i" % (leftSide, rightSide, newKernValue))
+			return PlannedKerning(leftSide, rightSide, existingKerning if kerningExists else None, newKernValue, reason, True)
+
+	def applyKerningPlan(self, thisFont, thisMasterID, plan):
+		# write all kerning in one go, without updating the UI for every pair:
+		thisFont.disableUpdateInterface()
+		try:
+			for row in plan:
+				if row.apply:
+					thisFont.setKerningForPair(thisMasterID, row.leftSide, row.rightSide, row.newValue)
+		finally:
+			thisFont.enableUpdateInterface()
 
 	def distanceBetweenCharacters(self, thisFont, thisMaster, chars, step=5):
 		if len(chars)>=2:
@@ -490,8 +532,17 @@ class Bumper(object):
 					print("⬅️ L glyphs:\n%s\n" % ", ".join([g.name for g in firstGlyphList]))
 					print("➡️ R glyphs:\n%s\n" % ", ".join([g.name for g in secondGlyphList]))
 
-				# CREATE KERNING DATA:
+				# CREATE KERNING PLAN:
 
+				settings = self.runSettings()
+				leftIsGroups = Glyphs.defaults["com.mekkablue.Bumper.leftIsGroups"]
+				rightIsGroups = Glyphs.defaults["com.mekkablue.Bumper.rightIsGroups"]
+
+				# resolve existing kerning in memory, planned values are added as we go.
+				# The plan is written as LTR kerning, so it is measured against LTR kerning, also in RTL tabs:
+				resolver = kerningResolver(thisFont, thisMasterID)
+
+				plan = []
 				tabString = ""
 				kernCount = 0
 				numOfGlyphs = len(firstGlyphList)
@@ -502,7 +553,7 @@ class Bumper(object):
 					leftGlyph = firstGlyphList[index]
 					leftLayer = leftGlyph.layers[thisMasterID]
 					leftGroup = leftGlyph.rightKerningGroup
-					if Glyphs.defaults["com.mekkablue.Bumper.leftIsGroups"]:
+					if leftIsGroups:
 						if leftGroup:
 							leftSide = "@MMK_L_%s" % leftGroup
 						else:
@@ -517,7 +568,7 @@ class Bumper(object):
 						for rightGlyph in secondGlyphList:
 							rightLayer = rightGlyph.layers[thisMasterID]
 							rightGroup = rightGlyph.leftKerningGroup
-							if Glyphs.defaults["com.mekkablue.Bumper.rightIsGroups"]:
+							if rightIsGroups:
 								if rightGroup:
 									rightSide = "@MMK_R_%s" % rightGroup
 								else:
@@ -528,26 +579,49 @@ class Bumper(object):
 
 							# only continue if we could establish a right side:
 							if rightSide:
-								kerning = effectiveKerning(leftGlyph.name, rightGlyph.name, thisFont, thisMasterID)
+								kerning = resolver.kerningForPair(leftGlyph.name, rightGlyph.name, default=None)
 								distanceBetweenShapes = minDistanceBetweenTwoLayers(
-									leftLayer, rightLayer, interval=step, kerning=kerning, report=False, ignoreIntervals=ignoreIntervals
+									leftLayer, rightLayer, interval=step, kerning=kerning or 0.0, report=False, ignoreIntervals=ignoreIntervals, adaptive=settings["adaptive"], exact=settings["exact"]
 									)
 
+								plannedKerning = None
 								# positive kerning (if desired):
 								if minDistance and (not distanceBetweenShapes is None) and (distanceBetweenShapes < minDistance):
-									if self.addMissingKerning(thisFont, thisMasterID, leftSide, rightSide, minDistance, distanceBetweenShapes, existingKerning=kerning):
-										kernCount += 1
-										tabString += "/%s/%s  " % (leftGlyph.name, rightGlyph.name)
+									reason = "%s%s too close: %i < %i" % (leftGlyph.name, rightGlyph.name, distanceBetweenShapes, minDistance)
+									plannedKerning = self.planMissingKerning(leftSide, rightSide, minDistance, distanceBetweenShapes, kerning, settings, reason)
 
 								# negative kerning (if desired):
 								if maxDistance and (not distanceBetweenShapes is None) and (distanceBetweenShapes > maxDistance):
-									if self.addMissingKerning(thisFont, thisMasterID, leftSide, rightSide, maxDistance, distanceBetweenShapes, existingKerning=kerning):
+									reason = "%s%s too far: %i > %i" % (leftGlyph.name, rightGlyph.name, distanceBetweenShapes, maxDistance)
+									plannedKerning = self.planMissingKerning(leftSide, rightSide, maxDistance, distanceBetweenShapes, kerning, settings, reason)
+
+								if plannedKerning:
+									plan.append(plannedKerning)
+									if plannedKerning.apply:
 										kernCount += 1
 										tabString += "/%s/%s  " % (leftGlyph.name, rightGlyph.name)
+										resolver.setKerningForPair(leftSide, rightSide, plannedKerning.newValue)
 
 					tabString = tabString.strip()
 					tabString += "\n"
 
+				# EXPORT AND APPLY PLAN:
+
+				if Glyphs.defaults["com.mekkablue.Bumper.exportPlan"] and plan:
+					planPath = GetSaveFile(
+						message="Export Auto Bumper kerning plan (.csv or .json)",
+						ProposedFileName="%s %s Auto Bumper.csv" % (thisFont.familyName, thisMaster.name),
+						filetypes=["csv", "json"],
+						)
+					if planPath:
+						writeKerningPlan(plan, planPath)
+						if shouldReportInMacroWindow:
+							print("\n💾 Exported kerning plan: %s" % planPath)
+
+				isDryRun = Glyphs.defaults["com.mekkablue.Bumper.dryRun"]
+				if not isDryRun:
+					self.applyKerningPlan(thisFont, thisMasterID, plan)
+
 				# FINISH UP AND REPORT:
 
 				# update progress bar:
@@ -561,12 +635,20 @@ class Bumper(object):
 					tabString = tabString.replace("\n\n", "\n")
 
 				# Report number of new kern pairs:
-				if kernCount:
+				if kernCount and isDryRun:
+					report = 'Dry run: would add %i kern pairs. Time elapsed: %s.' % (kernCount, timereport)
+				elif kernCount:
 					report = 'Added %i kern pairs. Time elapsed: %s.' % (kernCount, timereport)
 				# or report that nothing was found:
 				else:
 					report = 'No kerning added. Time elapsed: %s. Congrats!' % timereport
 
+				# warn before export if the kern lookup gets too big:
+				if kernCount and not isDryRun:
+					sizeWarnings = kernSizeWarnings(thisFont)
+					if sizeWarnings:
+						report += "\n\n⚠️ Kerning may overflow GPOS at export:\n%s" % "\n".join(sizeWarnings)
+
 				# Floating notification:
 				notificationTitle = "Bumper: %s (%s)" % (thisFont.familyName, thisMaster.name)
 				Message(
@@ -0,0 +1,49 @@
+#MenuTitle: Build Pair Frequency Index
+# -*- coding: utf-8 -*-
+from __future__ import division, print_function, unicode_literals
+__doc__ = """
+Asks you for one or more text files (UTF-8), counts how often every pair of characters occurs in them, and saves the result as an index file. KernCrasher, GapFinder, Sample String Maker and Kern Flattener can then put the most frequent pairs first. Only counts characters encoded in the frontmost font, if a font is open. For corpora of several GB, consider the command line: python3 bigramindex.py --help
+"""
+
+from timeit import default_timer as timer
+from bigramindex import buildBigramIndex
+from kernanalysis import BIGRAM_INDEX_PREF
+
+Glyphs.clearLog()
+thisFont = Glyphs.font
+try:
+	corpusPaths = GetOpenFile(message="Select text corpus files (UTF-8):", allowsMultipleSelection=True, filetypes=["txt", "text", "md", "csv"])
+	if corpusPaths:
+		if isinstance(corpusPaths, str):
+			corpusPaths = [corpusPaths]
+		indexPath = GetSaveFile(message="Save pair frequency index", ProposedFileName="corpus.bigrams", filetypes=["bigrams"])
+		if indexPath:
+			characters = None
+			if thisFont:
+				characters = set(chr(int(g.unicode, 16)) for g in thisFont.glyphs if g.unicode)
+				print("Counting pairs of the %i characters encoded in %s." % (len(characters), thisFont.familyName))
+
+			start = timer()
+			print("Reading %i file%s:" % (len(corpusPaths), "" if len(corpusPaths) == 1 else "s"))
+			for corpusPath in corpusPaths:
+				print("- %s" % corpusPath)
+			index = buildBigramIndex(corpusPaths, indexPath, characters=characters)
+			Glyphs.defaults[BIGRAM_INDEX_PREF] = indexPath
+			pairCount = len(index)
+
+			print("\n%i pairs saved in %s (%.1f seconds)." % (pairCount, indexPath, timer() - start))
+			print("\nMost frequent pairs:")
+			for left, right, frequency in index.mostCommon(30):
+				print("  %s%s %i" % (left, right, frequency))
+			index.close()
+
+			Glyphs.showMacroWindow()
+			Glyphs.showNotification("Pair Frequency Index", "Saved %i pairs. Details in Macro Window." % pairCount)
+
+except Exception as e:
+	Glyphs.showMacroWindow()
+	print("\n⚠️ Script Error:\n")
+	import traceback
+	print(traceback.format_exc())
+	print()
+	raise e
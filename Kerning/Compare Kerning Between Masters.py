@@ -6,6 +6,7 @@ Report differences in kerning structures between two masters.
 """
 
 import vanilla, sys
+from kernanalysis import kerningTable, groupIndex, GLYPH_GLYPH, GLYPH_GROUP, GROUP_GLYPH, GROUP_GROUP
 
 class CompareKerningBetweenMasters(object):
 	prefID = "com.mekkablue.CompareKerningBetweenMasters"
@@ -144,37 +145,9 @@ class CompareKerningBetweenMasters(object):
 			print(traceback.format_exc())
 			return False
 	
-	def namesForGroupName(self, groupName, font, isLeft=True):
-		names = []
-		for g in font.glyphs:
-			if isLeft: # left side = right group
-				if groupName[7:] == g.rightKerningGroup:
-					names.append(g.name) 
-			else:
-				if groupName[7:] == g.leftKerningGroup:
-					names.append(g.name)
-		return names
-		
-	def glyphNameForKerningName(self, name, font, isLeft=True):
-		glyphName = None
-		if name[0]=="@":
-			names = self.namesForGroupName(name, font, isLeft=isLeft)
-			if name.startswith("@MMK_"):
-				glyphName = name.split("_")[2]
-				if glyphName == "KO":
-					glyphName = name.split("_")[3]
-				if not font.glyphs[glyphName] or not glyphName in names:
-					glyphName = None
-			if not glyphName:
-				for name in names:
-					if font.glyphs[name]:
-						glyphName = name
-						break
-		else:
-			glyph = font.glyphForId_(name)
-			if glyph:
-				glyphName = glyph.name
-		
+	def glyphNameForKerningName(self, name, index):
+		# index: KerningGroupIndex of the font, built once per run
+		glyphName = index.glyphNameForKey(name)
 		if glyphName:
 			return glyphName
 		else:
@@ -230,62 +203,42 @@ class CompareKerningBetweenMasters(object):
 				firstMasterChoice = self.w.firstMaster.getItems()[firstMaster]
 				firstMasterID = firstMasterChoice.split("(ID: ")[1][:-1]
 				firstMaster = thisFont.masters[firstMasterID]
-				firstKerning = thisFont.kerning[firstMaster.id]
 				
 				secondMasterChoice = self.w.secondMaster.getItems()[secondMaster]
 				secondMasterID = secondMasterChoice.split("(ID: ")[1][:-1]
 				secondMaster = thisFont.masters[secondMasterID]
-				secondKerning = thisFont.kerning[secondMaster.id]
 				
 				missingKernCount = 0
 				
-				for L in set(firstKerning.keys()+secondKerning.keys()):
-					LisGroup = L[0]=="@"
-					RKeys = []
-					for kerning in (firstKerning, secondKerning):
-						if L in kerning.keys():
-							RKeys.extend(kerning[L].keys())
-					for R in set(RKeys):
-						RisGroup = R[0]=="@"
-						Lname = L if LisGroup else thisFont.glyphForId_(L).name
-						Rname = R if RisGroup else thisFont.glyphForId_(R).name
-						kerningInFirstMaster = thisFont.kerningForPair(firstMasterID, Lname, Rname)
-						kerningInSecondMaster = thisFont.kerningForPair(secondMasterID, Lname, Rname)
-						if kerningInFirstMaster is None or kerningInSecondMaster is None:
-							missingKernCount += 1
-							targetList = None
-							if LisGroup and RisGroup and  group2group:
-								if kerningInFirstMaster is None:
-									targetList = group2groupLayersMissingFirst
-								if kerningInSecondMaster is None:
-									targetList = group2groupLayersMissingSecond
-							if LisGroup and not RisGroup and group2glyph:
-								if kerningInFirstMaster is None:
-									targetList = group2glyphLayersMissingFirst
-								if kerningInSecondMaster is None:
-									targetList = group2glyphLayersMissingSecond
-							if not LisGroup and not RisGroup and glyph2glyph:
-								if kerningInFirstMaster is None:
-									targetList = glyph2glyphLayersMissingFirst
-								if kerningInSecondMaster is None:
-									targetList = glyph2glyphLayersMissingSecond
-							if not LisGroup and RisGroup and glyph2group:
-								if kerningInFirstMaster is None:
-									targetList = glyph2groupLayersMissingFirst
-								if kerningInSecondMaster is None:
-									targetList = glyph2groupLayersMissingSecond
-							
-							if targetList != None:
-								glyphNameOnLSide = self.glyphNameForKerningName(L, thisFont, isLeft=True)
-								glyphNameOnRSide = self.glyphNameForKerningName(R, thisFont, isLeft=False)
-								glyphOnLSide = thisFont.glyphs[glyphNameOnLSide]
-								glyphOnRSide = thisFont.glyphs[glyphNameOnRSide]
-								targetList.append(glyphOnLSide.layers[firstMaster.id])
-								targetList.append(glyphOnRSide.layers[firstMaster.id])
-								targetList.append(thisFont.glyphs["space"].layers[firstMaster.id])
-								targetList.append(glyphOnLSide.layers[secondMaster.id])
-								targetList.append(glyphOnRSide.layers[secondMaster.id])
-								targetList.append(GSControlLayer.newline())
+				# both masters side by side, one value column per master:
+				table = kerningTable(thisFont, masterIDs=(firstMasterID, secondMasterID))
+				index = groupIndex(thisFont)
+				targetLists = {
+					# kind: (include?, list for pairs missing in first master, list for pairs missing in second master)
+					GROUP_GROUP: (group2group, group2groupLayersMissingFirst, group2groupLayersMissingSecond),
+					GROUP_GLYPH: (group2glyph, group2glyphLayersMissingFirst, group2glyphLayersMissingSecond),
+					GLYPH_GROUP: (glyph2group, glyph2groupLayersMissingFirst, glyph2groupLayersMissingSecond),
+					GLYPH_GLYPH: (glyph2glyph, glyph2glyphLayersMissingFirst, glyph2glyphLayersMissingSecond),
+				}
+				
+				for missingInFirst, missingMasterID in ((True, firstMasterID), (False, secondMasterID)):
+					for row in table.rowsInMask(table.missingMask(missingMasterID)):
+						missingKernCount += 1
+						include, missingFirstList, missingSecondList = targetLists[table.kinds[row]]
+						if not include:
+							continue
+						targetList = missingFirstList if missingInFirst else missingSecondList
+						L, R = table.pair(row)
+						glyphNameOnLSide = self.glyphNameForKerningName(L, index)
+						glyphNameOnRSide = self.glyphNameForKerningName(R, index)
+						glyphOnLSide = thisFont.glyphs[glyphNameOnLSide]
+						glyphOnRSide = thisFont.glyphs[glyphNameOnRSide]
+						targetList.append(glyphOnLSide.layers[firstMaster.id])
+						targetList.append(glyphOnRSide.layers[firstMaster.id])
+						targetList.append(thisFont.glyphs["space"].layers[firstMaster.id])
+						targetList.append(glyphOnLSide.layers[secondMaster.id])
+						targetList.append(glyphOnRSide.layers[secondMaster.id])
+						targetList.append(GSControlLayer.newline())
 				
 				if not missingKernCount:
 					Message(
@@ -6,18 +6,7 @@ Compresses all instances of a glyph to its respective group kerning.
 """
 
 import vanilla, sys
-
-def match(first, second):
-	# https://www.geeksforgeeks.org/wildcard-character-matching/
-	if len(first) == 0 and len(second) == 0:
-		return True
-	if len(first) > 1 and first[0] == '*' and len(second) == 0:
-		return False
-	if (len(first) > 1 and first[0] == '?') or (len(first) != 0 and len(second) != 0 and first[0] == second[0]):
-		return match(first[1:], second[1:])
-	if len(first) != 0 and first[0] == '*':
-		return match(first[1:], second) or match(first, second[1:])
-	return False
+from kernanalysis import namesMatchingPatterns
 
 class CompressGlyph(object):
 	prefID = "com.mekkablue.CompressGlyph"
@@ -50,7 +39,7 @@ class CompressGlyph(object):
 		linePos += lineHeight
 		
 		self.w.glyphName = vanilla.ComboBox((inset, linePos-4, -inset-25, 24), (), sizeStyle="regular", callback=self.SavePreferences)
-		self.w.glyphName.getNSComboBox().setToolTip_("The name of the glyph you want to compress. Use * as wildcard for matching many glyphs.")
+		self.w.glyphName.getNSComboBox().setToolTip_("The name of the glyph you want to compress. Use * and ? as wildcards for matching many glyphs, re: for a regular expression, or @Category:Subcategory, e.g. @Letter:Uppercase.")
 		self.w.updateButton = vanilla.SquareButton((-inset-20, linePos, -inset, 18), "↺", sizeStyle="regular", callback=self.update)
 		linePos += lineHeight + 3
 
@@ -156,13 +145,7 @@ class CompressGlyph(object):
 						)
 					return
 				
-				glyphNames = []
-				if "*" in glyphName:
-					for g in thisFont.glyphs:
-						if match(glyphName, g.name):
-							glyphNames.append(g.name)
-				else:
-					glyphNames.append(glyphName)
+				glyphNames = namesMatchingPatterns(thisFont, (glyphName, ))
 				
 				if not glyphNames:
 					Message(
@@ -186,34 +169,38 @@ class CompressGlyph(object):
 							continue
 						print(f"Ⓜ️ Scanning {m.name}...")
 						kerning = fontKerning[m.id]
-						for leftKey in kerning.keys():
+						# look up the glyph instead of walking all pairs:
+						if compressLeft and glyph.rightKerningGroup and gID in kerning:
+							leftKey = gID
 							for rightKey in kerning[leftKey].keys():
-								if compressLeft and leftKey == gID and glyph.rightKerningGroup:
-									deletePairs.append((m.id, leftKey, rightKey))
-									rightSide = None
-									if rightKey.startswith("@"):
-										rightSide = rightKey
-									else:
-										rightGlyph = thisFont.glyphForId_(rightKey)
-										if rightGlyph:
-											rightSide = rightGlyph.name
-									if rightSide:
-										value = kerning[leftKey][rightKey]
-										addPairs.append((m.id, f"@MMK_L_{glyph.rightKerningGroup}", rightSide, value))
-									
-								
-								if compressRight and rightKey == gID and glyph.leftKerningGroup:
-									deletePairs.append((m.id, leftKey, rightKey))
-									leftSide = None
-									if leftKey.startswith("@"):
-										leftSide = leftKey
-									else:
-										leftGlyph = thisFont.glyphForId_(leftKey)
-										if leftGlyph:
-											leftSide = leftGlyph.name
-									if leftSide:
-										value = kerning[leftKey][rightKey]
-										addPairs.append((m.id, leftSide, f"@MMK_R_{glyph.leftKerningGroup}", value))
+								deletePairs.append((m.id, leftKey, rightKey))
+								rightSide = None
+								if rightKey.startswith("@"):
+									rightSide = rightKey
+								else:
+									rightGlyph = thisFont.glyphForId_(rightKey)
+									if rightGlyph:
+										rightSide = rightGlyph.name
+								if rightSide:
+									value = kerning[leftKey][rightKey]
+									addPairs.append((m.id, f"@MMK_L_{glyph.rightKerningGroup}", rightSide, value))
+
+						if compressRight and glyph.leftKerningGroup:
+							rightKey = gID
+							for leftKey in kerning.keys():
+								if not rightKey in kerning[leftKey]:
+									continue
+								deletePairs.append((m.id, leftKey, rightKey))
+								leftSide = None
+								if leftKey.startswith("@"):
+									leftSide = leftKey
+								else:
+									leftGlyph = thisFont.glyphForId_(leftKey)
+									if leftGlyph:
+										leftSide = leftGlyph.name
+								if leftSide:
+									value = kerning[leftKey][rightKey]
+									addPairs.append((m.id, leftSide, f"@MMK_R_{glyph.leftKerningGroup}", value))
 				
 					for addPair in addPairs:
 						try:
@@ -7,13 +7,15 @@ Compares every exception to the group kerning available for the same pair. If th
 
 import vanilla
 from AppKit import NSBeep
+from kernanalysis import groupIndex, kerningByName
+from kernoptimizer import optimizeKerning
 
 class DeleteExceptionsTooCloseToGroupKerning(object):
 
 	def __init__(self):
 		# Window 'self.w':
 		windowWidth = 430
-		windowHeight = 190
+		windowHeight = 212
 		windowWidthResize = 100 # user can resize width by this value
 		windowHeightResize = 0 # user can resize height by this value
 		self.w = vanilla.FloatingWindow(
@@ -47,6 +49,14 @@ class DeleteExceptionsTooCloseToGroupKerning(object):
 		).setToolTip_("If enabled, respects your current glyph selection. Will only process kern pairs if one or both of the involved glyphs are in your selection.")
 		line += lineHeight
 
+		self.w.allMasters = vanilla.CheckBox(
+			(inset, line, -inset, lineHeight), "Across all masters (only if redundant in every master)", value=False, callback=self.SavePreferences, sizeStyle='small'
+			)
+		self.w.allMasters.getNSButton().setToolTip_(
+			"If enabled, only deletes exceptions that are below the threshold in all masters, so all masters keep the same kerning structure. Also proposes group kerning values that would make more exceptions unnecessary, and estimates how many bytes the GPOS table of each exported font will shrink by. Details in Macro Window."
+			)
+		line += lineHeight
+
 		self.w.onlyReportDontDelete = vanilla.CheckBox(
 			(inset, line, -inset, lineHeight), "Only report, do not delete pairs yet", value=False, callback=self.SavePreferences, sizeStyle='small'
 			)
@@ -95,6 +105,7 @@ class DeleteExceptionsTooCloseToGroupKerning(object):
 			Glyphs.defaults["com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.selectedGlyphsOnly"] = self.w.selectedGlyphsOnly.get()
 			Glyphs.defaults["com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.threshold"] = int(self.w.threshold.get())
 			Glyphs.defaults["com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.onlyReportDontDelete"] = self.w.onlyReportDontDelete.get()
+			Glyphs.defaults["com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.allMasters"] = self.w.allMasters.get()
 			Glyphs.defaults["com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.openTab"] = self.w.openTab.get()
 			Glyphs.defaults["com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.reuseTab"] = self.w.reuseTab.get()
 
@@ -109,12 +120,14 @@ class DeleteExceptionsTooCloseToGroupKerning(object):
 			Glyphs.registerDefault("com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.selectedGlyphsOnly", 0)
 			Glyphs.registerDefault("com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.threshold", 10)
 			Glyphs.registerDefault("com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.onlyReportDontDelete", 0)
+			Glyphs.registerDefault("com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.allMasters", 0)
 			Glyphs.registerDefault("com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.reuseTab", 1)
 			Glyphs.registerDefault("com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.openTab", 1)
 
 			self.w.selectedGlyphsOnly.set(Glyphs.defaults["com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.selectedGlyphsOnly"])
 			self.w.threshold.set(Glyphs.defaults["com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.threshold"])
 			self.w.onlyReportDontDelete.set(Glyphs.defaults["com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.onlyReportDontDelete"])
+			self.w.allMasters.set(Glyphs.defaults["com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.allMasters"])
 			self.w.reuseTab.set(Glyphs.defaults["com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.reuseTab"])
 			self.w.openTab.set(Glyphs.defaults["com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.openTab"])
 		except:
@@ -122,16 +135,13 @@ class DeleteExceptionsTooCloseToGroupKerning(object):
 
 		return True
 
-	def glyphNameForKernSide(self, thisFont, kernSideName, isTheLeftSide=True):
+	def glyphNameForKernSide(self, thisFont, index, kernSideName, isTheLeftSide=True):
+		# index: KerningGroupIndex of thisFont, built once per run
 		if kernSideName.startswith("@"):
 			groupName = kernSideName.replace("@MMK_L_", "").replace("@MMK_R_", "").replace("@", "")
-			for thisGlyph in thisFont.glyphs:
-				if isTheLeftSide:
-					if thisGlyph.rightKerningGroup == groupName:
-						return thisGlyph.name
-				else:
-					if thisGlyph.leftKerningGroup == groupName:
-						return thisGlyph.name
+			glyphName = index.representative(groupName, isLeftSide=isTheLeftSide)
+			if glyphName:
+				return glyphName
 			print(
 				"⚠️ No glyph found for %s group: @%s" % (
 					"right" if isTheLeftSide else "left", # if it is on the left side, we are looking for the right group and vice versa
@@ -146,6 +156,48 @@ class DeleteExceptionsTooCloseToGroupKerning(object):
 				print("⚠️ Glyph not found: %s" % kernSideName)
 				return None
 
+	def OptimizeAllMasters(self, thisFont, threshold, selectedGlyphs, onlyReportDontDelete):
+		# exceptions redundant in all masters, and group values absorbing more exceptions:
+		index = groupIndex(thisFont)
+		selectedNames = set(g.name for g in selectedGlyphs or ())
+
+		def involvesSelectedGlyphs(leftKey, rightKey):
+			return bool(selectedNames.intersection(index.membersForKey(leftKey) + index.membersForKey(rightKey)))
+
+		pairFilter = involvesSelectedGlyphs if selectedNames else None
+		optimization = optimizeKerning(kerningByName(thisFont), index, threshold=threshold, pairFilter=pairFilter)
+
+		for redundant in optimization.redundant:
+			print("- Redundant in all masters: %s-%s (%i bytes)" % (redundant.leftKey, redundant.rightKey, redundant.bytes))
+		if not onlyReportDontDelete:
+			thisFont.disableUpdateInterface()
+			try:
+				for thisMaster in thisFont.masters:
+					for redundant in optimization.redundant:
+						thisFont.removeKerningForPair(thisMaster.id, redundant.leftKey, redundant.rightKey)
+			finally:
+				thisFont.enableUpdateInterface()
+
+		if optimization.proposals:
+			print("\nGroup kerning that would make more exceptions unnecessary:")
+			for proposal in optimization.proposals:
+				print(
+					"- %s-%s: %s instead of %s, %i instead of %i exported pairs (%i bytes less)" % (
+						proposal.leftKey,
+						proposal.rightKey,
+						", ".join("%s: %i" % (thisFont.masters[m].name, v) for m, v in proposal.proposedValues.items()),
+						", ".join("%i" % v for v in proposal.currentValues.values()),
+						proposal.recordsAfter,
+						proposal.recordsBefore,
+						proposal.bytesSaved,
+						)
+					)
+		print(
+			"\nRemoving the redundant exceptions saves approx. %i bytes per exported font, the proposals another %i bytes." %
+			(optimization.bytesSaved, sum(p.bytesSaved for p in optimization.proposals))
+			)
+		return [(r.leftKey, r.rightKey) for r in optimization.redundant]
+
 	def DeleteExceptionsTooCloseToGroupKerningMain(self, sender):
 		try:
 			if not self.SavePreferences(self):
@@ -187,8 +239,15 @@ class DeleteExceptionsTooCloseToGroupKerning(object):
 			print()
 
 			# collect unnecessary kerning exceptions:
+			index = groupIndex(thisFont)
 			unnecessaryKernPairs = []
-			for leftSide in thisFont.kerning[thisMasterID].keys():
+			leftSidesToCheck = thisFont.kerning[thisMasterID].keys()
+			allMasters = Glyphs.defaults["com.mekkablue.DeleteExceptionsTooCloseToGroupKerning.allMasters"]
+			if allMasters:
+				# already removed from all masters, unless only reporting:
+				unnecessaryKernPairs = self.OptimizeAllMasters(thisFont, threshold, selectedGlyphs, onlyReportDontDelete)
+				leftSidesToCheck = ()
+			for leftSide in leftSidesToCheck:
 				if leftSide.startswith("@"):
 					# group on the left side
 
@@ -295,6 +354,12 @@ class DeleteExceptionsTooCloseToGroupKerning(object):
 											)
 										unnecessaryKernPairs.append((leftGlyph.name, rightSideName))
 
+			# report orphaned groups:
+			orphanedLeftKeys, orphanedRightKeys = index.orphans(thisFont.kerning[thisMasterID])
+			for orphanedKey in orphanedLeftKeys + orphanedRightKeys:
+				if orphanedKey.startswith("@"):
+					print("- Warning: no glyphs in group %s, consider cleaning up kerning" % orphanedKey)
+
 			if not unnecessaryKernPairs:
 				Message(
 					title="No insignificant exceptions found",
@@ -311,7 +376,7 @@ class DeleteExceptionsTooCloseToGroupKerning(object):
 					leftSide, rightSide = kernPair
 
 					# DELETE
-					if not onlyReportDontDelete:
+					if not onlyReportDontDelete and not allMasters:
 						print("- Removing: %s-%s" % (leftSide, rightSide))
 						if leftSide.startswith("@") and not leftSide.startswith("@MMK_L_"):
 							leftSide = "@MMK_L_%s" % leftSide[1:]
@@ -320,8 +385,8 @@ class DeleteExceptionsTooCloseToGroupKerning(object):
 						thisFont.removeKerningForPair(thisMasterID, leftSide, rightSide)
 
 					# COLLECT FOR REPORT
-					leftGlyphName = self.glyphNameForKernSide(thisFont, leftSide, isTheLeftSide=True)
-					rightGlyphName = self.glyphNameForKernSide(thisFont, rightSide, isTheLeftSide=False)
+					leftGlyphName = self.glyphNameForKernSide(thisFont, index, leftSide, isTheLeftSide=True)
+					rightGlyphName = self.glyphNameForKernSide(thisFont, index, rightSide, isTheLeftSide=False)
 					if not leftGlyphName is None and not rightGlyphName is None:
 						tabString += "/%s/%s " % (leftGlyphName, rightGlyphName)
 
@@ -7,7 +7,7 @@ Opens a new tab with kerning combos that have large gaps in the current fontmast
 
 import vanilla
 from timeit import default_timer as timer
-from Foundation import NSNotFound
+from kernanalysis import glyphIndex, namesForCategory, pairingProfiles, minDistanceBetweenProfiles, measurementShards, runShards, mergedShardResults, pythonExecutable, kerningResolver, pairFrequency, sortedByFrequency
 intervalList = (1, 3, 5, 10, 20)
 categoryList = (
 	"Letter:Uppercase",
@@ -23,19 +23,12 @@ categoryList = (
 	"Number:Fraction",
 	)
 
-if Glyphs.versionNumber >= 3:
-	caseDict = {
-		"Uppercase": GSUppercase,
-		"Lowercase": GSLowercase,
-		"Smallcaps": GSSmallcaps,
-		}
-
 class GapFinder(object):
 
 	def __init__(self):
 		# Window 'self.w':
 		windowWidth = 410
-		windowHeight = 260
+		windowHeight = 304
 		windowWidthResize = 800 # user can resize width by this value
 		windowHeightResize = 0 # user can resize height by this value
 		self.w = vanilla.FloatingWindow(
@@ -85,6 +78,22 @@ class GapFinder(object):
 		self.w.excludeNonExporting = vanilla.CheckBox((inset, linePos, -inset, 20), "Exclude non-exporting glyphs", value=True, sizeStyle='small', callback=self.SavePreferences)
 		linePos += lineHeight
 
+		self.w.sortByFrequency = vanilla.CheckBox(
+			(inset, linePos, -inset, 20), "Most frequent pairs first (needs a pair frequency index)", value=False, sizeStyle='small', callback=self.SavePreferences
+			)
+		self.w.sortByFrequency.getNSButton().setToolTip_(
+			"If enabled, sorts the pairs with gaps by how often they occur in real text, most frequent first. Build the index from a text corpus with Kerning > Build Pair Frequency Index. Ignored if there is no index."
+			)
+		linePos += lineHeight
+
+		self.w.allMasters = vanilla.CheckBox(
+			(inset, linePos, -inset, 20), "All masters of all open fonts (uses all processor cores)", value=False, sizeStyle='small', callback=self.SavePreferences
+			)
+		self.w.allMasters.getNSButton().setToolTip_(
+			"If enabled, checks every master of every open font in one go, and opens a tab with the gaps in each font. Measurements are split into chunks and spread over all processor cores where possible. Timings per chunk are reported in the Macro Window."
+			)
+		linePos += lineHeight
+
 		self.w.reportGapsInMacroWindow = vanilla.CheckBox(
 			(inset, linePos, -inset, 20), "Also report in Macro Window (slower)", value=False, sizeStyle='small', callback=self.SavePreferences
 			)
@@ -124,6 +133,8 @@ class GapFinder(object):
 			Glyphs.defaults["com.mekkablue.GapFinder.maxDistance"] = self.w.maxDistance.get()
 			Glyphs.defaults["com.mekkablue.GapFinder.reportGapsInMacroWindow"] = self.w.reportGapsInMacroWindow.get()
 			Glyphs.defaults["com.mekkablue.GapFinder.reuseCurrentTab"] = self.w.reuseCurrentTab.get()
+			Glyphs.defaults["com.mekkablue.GapFinder.allMasters"] = self.w.allMasters.get()
+			Glyphs.defaults["com.mekkablue.GapFinder.sortByFrequency"] = self.w.sortByFrequency.get()
 		except Exception as e:
 			return False
 
@@ -147,6 +158,8 @@ class GapFinder(object):
 			Glyphs.registerDefault("com.mekkablue.GapFinder.excludeNonExporting", 1)
 			Glyphs.registerDefault("com.mekkablue.GapFinder.reportGapsInMacroWindow", 0)
 			Glyphs.registerDefault("com.mekkablue.GapFinder.reuseCurrentTab", 1)
+			Glyphs.registerDefault("com.mekkablue.GapFinder.allMasters", 0)
+			Glyphs.registerDefault("com.mekkablue.GapFinder.sortByFrequency", 0)
 
 			self.w.maxDistance.set(Glyphs.defaults["com.mekkablue.GapFinder.maxDistance"])
 			self.w.popupScript.set(Glyphs.defaults["com.mekkablue.GapFinder.popupScript"])
@@ -157,6 +170,8 @@ class GapFinder(object):
 			self.w.excludeNonExporting.set(Glyphs.defaults["com.mekkablue.GapFinder.excludeNonExporting"])
 			self.w.reportGapsInMacroWindow.set(Glyphs.defaults["com.mekkablue.GapFinder.reportGapsInMacroWindow"])
 			self.w.reuseCurrentTab.set(Glyphs.defaults["com.mekkablue.GapFinder.reuseCurrentTab"])
+			self.w.allMasters.set(Glyphs.defaults["com.mekkablue.GapFinder.allMasters"])
+			self.w.sortByFrequency.set(Glyphs.defaults["com.mekkablue.GapFinder.sortByFrequency"])
 		except:
 			return False
 
@@ -173,47 +188,6 @@ class GapFinder(object):
 			offset = glyphName.find(".")
 			return glyphName[:offset]
 
-	def effectiveKerning(self, leftGlyphName, rightGlyphName, thisFont, thisFontMasterID):
-		leftLayer = thisFont.glyphs[leftGlyphName].layers[thisFontMasterID]
-		rightLayer = thisFont.glyphs[rightGlyphName].layers[thisFontMasterID]
-		if Glyphs.versionNumber >= 3:
-			effectiveKerning = leftLayer.nextKerningForLayer_direction_(
-				rightLayer,
-				0 # LTR
-				)
-		else:
-			effectiveKerning = leftLayer.rightKerningForLayer_(rightLayer)
-		if effectiveKerning < NSNotFound:
-			return effectiveKerning
-		else:
-			return 0.0
-
-	def listOfNamesForCategories(self, thisFont, requiredCategory, requiredSubCategory, requiredScript, excludedGlyphNameParts, excludeNonExporting):
-		nameList = []
-		for thisGlyph in thisFont.glyphs:
-			thisScript = thisGlyph.script
-			glyphName = thisGlyph.name
-			nameIsOK = True
-
-			if excludedGlyphNameParts:
-				for thisNamePart in excludedGlyphNameParts:
-					nameIsOK = nameIsOK and not thisNamePart in glyphName
-
-			if nameIsOK and (thisGlyph.export or not excludeNonExporting):
-				if thisScript == None or thisScript == requiredScript:
-					if thisGlyph.category == requiredCategory:
-						if requiredSubCategory:
-							if Glyphs.versionNumber >= 3 and requiredSubCategory in caseDict:
-								requiredCase = caseDict[requiredSubCategory]
-								if thisGlyph.case == requiredCase:
-									nameList.append(glyphName)
-							else:
-								if thisGlyph.subCategory == requiredSubCategory:
-									nameList.append(glyphName)
-						else:
-							nameList.append(glyphName)
-		return nameList
-
 	def splitString(self, string, delimiter=":", Maximum=2):
 		# split string into a list:
 		returnList = string.split(delimiter)
@@ -231,43 +205,65 @@ class GapFinder(object):
 
 		return returnList
 
-	def measureLayerAtHeightFromLeftOrRight(self, thisLayer, height, leftSide=True):
-		try:
-			if leftSide:
-				measurement = thisLayer.lsbAtHeight_(height)
-			else:
-				measurement = thisLayer.rsbAtHeight_(height)
-			if measurement < NSNotFound:
-				return measurement
-			else:
-				return None
-		except:
-			return None
-
-	def minDistanceBetweenTwoLayers(self, leftLayer, rightLayer, interval=5.0, kerning=0.0, report=False):
-		# correction = leftLayer.RSB+rightLayer.LSB
-		topY = min(leftLayer.bounds.origin.y + leftLayer.bounds.size.height, rightLayer.bounds.origin.y + rightLayer.bounds.size.height)
-		bottomY = max(leftLayer.bounds.origin.y, rightLayer.bounds.origin.y)
-		distance = topY - bottomY
-		minDist = None
-		for i in range(int(distance // interval)):
-			height = bottomY + i * interval
-			left = self.measureLayerAtHeightFromLeftOrRight(leftLayer, height, leftSide=False)
-			right = self.measureLayerAtHeightFromLeftOrRight(rightLayer, height, leftSide=True)
-			try: # avoid gaps like in i or j
-				total = left + right + kerning # +correction
-				if minDist == None or minDist > total:
-					minDist = total
-			except:
-				pass
-		return minDist
-
 	def queryPrefs(self):
 		script = Glyphs.defaults["com.mekkablue.GapFinder.popupScript"]
 		firstCategory, firstSubCategory = self.splitString(self.w.popupLeftCat.getItems()[Glyphs.defaults["com.mekkablue.GapFinder.popupLeftCat"]])
 		secondCategory, secondSubCategory = self.splitString(self.w.popupRightCat.getItems()[Glyphs.defaults["com.mekkablue.GapFinder.popupRightCat"]])
 		return script, firstCategory, firstSubCategory, secondCategory, secondSubCategory
 
+	def GapFinderAllMasters(self, start, step, maxDistance, script, firstCategory, firstSubCategory, secondCategory, secondSubCategory, excludedGlyphNameParts, excludeNonExporting):
+		# collect profiles and kerning in the app, one shard per chunk of left glyphs:
+		shards = []
+		fonts = Glyphs.fonts
+		for fontIndex, thisFont in enumerate(fonts):
+			self.w.bar.set(int(80 * (float(fontIndex) / len(fonts))))
+			index = glyphIndex(thisFont)
+			firstList = namesForCategory(thisFont, firstCategory, firstSubCategory, script, excludedGlyphNameParts, excludeNonExporting, index=index)
+			secondList = namesForCategory(thisFont, secondCategory, secondSubCategory, script, excludedGlyphNameParts, excludeNonExporting, index=index)
+			for thisMaster in thisFont.masters:
+				leftProfiles, rightProfiles = pairingProfiles([thisFont.glyphs[n].layers[thisMaster.id] for n in firstList], [thisFont.glyphs[n].layers[thisMaster.id] for n in secondList], step=step)
+				kerningMatrix = kerningResolver(thisFont, thisMaster.id).kerningMatrix(firstList, secondList)
+				shards.extend(measurementShards(fontIndex, thisMaster.id, firstList, leftProfiles, secondList, rightProfiles, kerningMatrix, above=maxDistance))
+
+		# measure in all processor cores:
+		self.w.bar.set(80)
+		gaps, timings = mergedShardResults(runShards(shards, executable=pythonExecutable()))
+		self.w.bar.set(100)
+
+		# report:
+		gapCount = 0
+		shouldReport = Glyphs.defaults["com.mekkablue.GapFinder.reportGapsInMacroWindow"]
+		for fontIndex, thisFont in enumerate(fonts):
+			tabPairs, seenPairs = [], set()
+			frequency = pairFrequency(thisFont) if Glyphs.defaults["com.mekkablue.GapFinder.sortByFrequency"] else None
+			for thisMaster in thisFont.masters:
+				masterGaps = gaps.get((fontIndex, thisMaster.id), [])
+				if frequency:
+					masterGaps = sortedByFrequency(masterGaps, frequency)
+				gapCount += len(masterGaps)
+				if shouldReport:
+					print("\n%s, master %s: %i gaps" % (thisFont.familyName, thisMaster.name, len(masterGaps)))
+				for firstGlyphName, secondGlyphName, distanceBetweenShapes in masterGaps:
+					if shouldReport:
+						print("- %s %s: %i" % (firstGlyphName, secondGlyphName, distanceBetweenShapes))
+					pair = "/%s/%s" % (firstGlyphName, secondGlyphName)
+					if not pair in seenPairs:
+						seenPairs.add(pair)
+						tabPairs.append(pair)
+			if tabPairs:
+				thisFont.newTab("/space".join(tabPairs))
+
+		if shouldReport:
+			print("\nTimings per chunk:")
+			for fontIndex, masterID, chunkIndex, seconds in timings:
+				print("- %s, master %s, chunk %i: %.2f seconds" % (fonts[fontIndex].familyName, fonts[fontIndex].masters[masterID].name, chunkIndex + 1, seconds))
+
+		report = "%i kerning gaps in %i fonts. Time elapsed: %.1f seconds." % (gapCount, len(fonts), timer() - start)
+		Glyphs.showNotification("GapFinder: all masters", report)
+		if shouldReport:
+			print(report)
+			Glyphs.showMacroWindow()
+
 	def GapFinderMain(self, sender):
 		try:
 			# update settings to the latest user input:
@@ -309,8 +305,9 @@ class GapFinder(object):
 				print("Note: GapFinder could not write preferences.")
 
 			# get list of glyph names:
-			firstList = self.listOfNamesForCategories(thisFont, firstCategory, firstSubCategory, script, excludedGlyphNameParts, excludeNonExporting)
-			secondList = self.listOfNamesForCategories(thisFont, secondCategory, secondSubCategory, script, excludedGlyphNameParts, excludeNonExporting)
+			index = glyphIndex(thisFont)
+			firstList = namesForCategory(thisFont, firstCategory, firstSubCategory, script, excludedGlyphNameParts, excludeNonExporting, index=index)
+			secondList = namesForCategory(thisFont, secondCategory, secondSubCategory, script, excludedGlyphNameParts, excludeNonExporting, index=index)
 
 			if not firstList or not secondList:
 				Message(
@@ -324,28 +321,39 @@ class GapFinder(object):
 					OKButton=None,
 					)
 
+			if Glyphs.defaults["com.mekkablue.GapFinder.allMasters"]:
+				self.GapFinderAllMasters(start, step, maxDistance, script, firstCategory, firstSubCategory, secondCategory, secondSubCategory, excludedGlyphNameParts, excludeNonExporting)
+				return
+
 			if Glyphs.defaults["com.mekkablue.GapFinder.reportGapsInMacroWindow"]:
 				print("Maximum Distance: %i\n" % maxDistance)
 				print("Left glyphs:\n%s\n" % ", ".join(firstList))
 				print("Right glyphs:\n%s\n" % ", ".join(secondList))
 
+			# resolve kerning from the kerning dict, instead of asking the app for every pair:
+			resolver = kerningResolver(thisFont, thisFontMasterID)
+
+			# sample every glyph only once, reuse the profiles for all pairings:
+			leftProfiles, rightProfiles = pairingProfiles([thisFont.glyphs[n].layers[thisFontMasterID] for n in firstList], [thisFont.glyphs[n].layers[thisFontMasterID] for n in secondList], step=step)
+
 			tabString = "\n"
 			gapCount = 0
+			gaps = []
 			numOfGlyphs = len(firstList)
 			for index in range(numOfGlyphs):
 				# update progress bar:
 				self.w.bar.set(int(100 * (float(index) / numOfGlyphs)))
 				# determine left glyph:
 				firstGlyphName = firstList[index]
-				leftLayer = thisFont.glyphs[firstGlyphName].layers[thisFontMasterID]
+				leftProfile = leftProfiles[index]
 
 				# cycle through right glyphs:
-				for secondGlyphName in secondList:
-					rightLayer = thisFont.glyphs[secondGlyphName].layers[thisFontMasterID]
-					kerning = self.effectiveKerning(firstGlyphName, secondGlyphName, thisFont, thisFontMasterID)
-					distanceBetweenShapes = self.minDistanceBetweenTwoLayers(leftLayer, rightLayer, interval=step, kerning=kerning, report=False)
+				kerningRow = resolver.kerningRow(firstGlyphName, secondList)
+				for secondGlyphName, rightProfile, kerning in zip(secondList, rightProfiles, kerningRow):
+					distanceBetweenShapes = minDistanceBetweenProfiles(leftProfile, rightProfile, kerning=kerning)
 					if (not distanceBetweenShapes is None) and (distanceBetweenShapes > maxDistance):
 						gapCount += 1
+						gaps.append((firstGlyphName, secondGlyphName, distanceBetweenShapes))
 						tabString += "/%s/%s/space" % (firstGlyphName, secondGlyphName)
 						if Glyphs.defaults["com.mekkablue.GapFinder.reportGapsInMacroWindow"]:
 							print("- %s %s: %i" % (firstGlyphName, secondGlyphName, distanceBetweenShapes))
@@ -357,6 +365,11 @@ class GapFinder(object):
 				tabString = tabString.replace("\n\n", "\n")
 			tabString = tabString[1:]
 
+			# most frequent pairs first, across all left glyphs:
+			frequency = pairFrequency(thisFont) if Glyphs.defaults["com.mekkablue.GapFinder.sortByFrequency"] else None
+			if frequency and gaps:
+				tabString = "/space".join("/%s/%s" % (firstGlyphName, secondGlyphName) for firstGlyphName, secondGlyphName, distanceBetweenShapes in sortedByFrequency(gaps, frequency))
+
 			# update progress bar:
 			self.w.bar.set(100)
 
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 from __future__ import division, print_function, unicode_literals
 __doc__ = """
-Choose an .fea file containing a kern feature in AFDKO code, and this script will attempt to import the kerning values into the frontmost font master (see Window > Kerning).
+Choose an .fea file containing a kern feature in AFDKO code, and this script will attempt to import the kerning values into the frontmost font master (see Window > Kerning). Understands glyph classes, enum pos, value records, multi-line statements, comments and include() files. Named classes become kerning groups for glyphs that do not have a kerning group yet, existing groups are kept (glyph kerning is imported for those glyphs instead). Detailed report in Macro Window.
 """
 """
 importFea.py
@@ -12,74 +12,73 @@ Copyright (c) 2010 schriftgestaltung.de. All rights reserved.
 """
 
 import sys, os
+from timeit import default_timer as timer
+from feakerning import readFeaKerning
 
 def importfea_file(Doc, filePath):
 	if os.path.isfile(filePath):
-		f = open(filePath)
-
+		start = timer()
 		Font = Doc.font
-		FontMasterIndex = Doc.windowControllers()[0].masterIndex()
-		print(FontMasterIndex)
-		GlyphsInfo = GSGlyphsInfo.sharedManager()
-		FontMaster = Font.masters[FontMasterIndex]
-		KerningLines = []
-		Line = f.readline()
-		while (len(Line) > 0):
-
-			if (Line[0] == "@"):
-				key = Line[0:Line.find(" ")]
-				GlyphNames = Line[Line.find("[") + 1:-4].split(" ")
-				Left = True #1ST
-				Right = True
-				if key.find("_1ST") > 0:
-					Right = False
-				elif key.find("_2ND") > 0:
-					Left = False
+		FontMaster = Font.selectedFontMaster
+		print("Importing kerning from %s\ninto %s, master %s:\n" % (filePath, Font.familyName, FontMaster.name))
 
-				key = key.split("_")[1]
-				key = GlyphsInfo.niceGlpyhNameForName_(key)
+		# production names (uni0041) and the like are converted into nice names:
+		niceNames = {}
 
-				for GlyphName in GlyphNames:
-					GlyphName = GlyphsInfo.niceGlpyhNameForName_(GlyphName)
-					Glyph = Font.glyphForName_(GlyphName)
-					if Glyph:
-						if Left:
-							Glyph.setRightKerningGroup_(key)
-						if Right:
-							Glyph.setLeftKerningGroup_(key)
-			elif Line.strip().find("pos") == 0:
-				KerningLines.append(Line.strip())
+		def niceName(GlyphName):
+			if not GlyphName in niceNames:
+				niceNames[GlyphName] = GlyphName if Font.glyphs[GlyphName] else Glyphs.niceGlyphName(GlyphName)
+			return niceNames[GlyphName]
 
-			Line = f.readline()
+		glyphNames = set(g.name for g in Font.glyphs)
+		# existing kerning groups are kept, glyphs in other groups get glyph kerning:
+		existingLeftGroups = {g.name: g.rightKerningGroup for g in Font.glyphs if g.rightKerningGroup}
+		existingRightGroups = {g.name: g.leftKerningGroup for g in Font.glyphs if g.leftKerningGroup}
+		feaKerning = readFeaKerning(filePath, glyphNames=glyphNames, renameGlyph=niceName, existingLeftGroups=existingLeftGroups, existingRightGroups=existingRightGroups)
 
-		if len(KerningLines) > 0:
-			for i in range(len(KerningLines) - 1, -1, -1):
-				Line = KerningLines[i]
-				Keys = Line.split(" ")
-				LeftKey = Keys[1]
-				RightKey = Keys[2]
-				Value = Keys[3]
-				if LeftKey[0] == "@":
-					pass
-				else:
-					LeftKey = LeftKey.strip("[]")
-					LeftKey = Font.glyphs[LeftKey].id
+		# apply everything in one go, without updating the UI for every pair:
+		Font.disableUpdateInterface()
+		try:
+			for GlyphName, Group in feaKerning.leftGroups.items():
+				Font.glyphs[GlyphName].rightKerningGroup = Group
+			for GlyphName, Group in feaKerning.rightGroups.items():
+				Font.glyphs[GlyphName].leftKerningGroup = Group
 
-				if RightKey[0] == "@":
-					pass
-				else:
-					RightKey = RightKey.strip("[]")
-					RightKey = Font.glyphs[RightKey].id
+			PairCount = 0
+			for LeftKey, RightDict in feaKerning.kerning.items():
+				for RightKey, Value in RightDict.items():
+					Font.setKerningForPair(FontMaster.id, LeftKey, RightKey, Value)
+					PairCount += 1
+		finally:
+			Font.enableUpdateInterface()
 
-				Value = float(Value.replace(";", ""))
-				Font.setKerningForFontMasterID_LeftKey_RightKey_Value_(FontMaster.id, LeftKey, RightKey, Value)
+		print("New kerning groups: %i glyphs (left side of pairs), %i glyphs (right side of pairs)." % (len(feaKerning.leftGroups), len(feaKerning.rightGroups)))
+		for GlyphName, Group in sorted(feaKerning.leftGroups.items()):
+			print("- %s: right group @%s (was empty)" % (GlyphName, Group))
+		for GlyphName, Group in sorted(feaKerning.rightGroups.items()):
+			print("- %s: left group @%s (was empty)" % (GlyphName, Group))
+		if feaKerning.skipped:
+			print("\nSkipped %i statements that are not pair kerning or use glyphs missing in the font:" % len(feaKerning.skipped))
+			for Statement in feaKerning.skipped:
+				print("- %s" % Statement)
+		Report = "Imported %i kerning pairs in %.1f seconds." % (PairCount, timer() - start)
+		print("\n%s" % Report)
+		Glyphs.showNotification("Kerning imported: %s" % Font.familyName, Report)
 
 def main():
 	Doc = Glyphs.currentDocument
 	if (Doc):
 		result = GetFile("Choose fea file.", False, ["fea"])
 		if result is not None:
-			importfea_file(Doc, result)
+			Glyphs.clearLog()
+			try:
+				importfea_file(Doc, result)
+			except Exception as e:
+				Glyphs.showMacroWindow()
+				print("\n⚠️ Error importing %s:\n" % result)
+				import traceback
+				print(traceback.format_exc())
+				raise e
 	else:
 		Message("Please open a document", "")
 
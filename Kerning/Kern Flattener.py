@@ -5,9 +5,17 @@ __doc__ = """
 Duplicates your font, flattens kerning to glyph-to-glyph kerning only, deletes all group kerning and keeps only relevant Latin pairs, adds a Write Kern Table parameter.
 
 WARNING: DO THIS ONLY FOR MAKING YOUR KERNING COMPATIBLE WITH OUTDATED AND BROKEN SOFTWARE LIKE POWERPOINT.
+
+Keeps the most frequent pairs that fit into the kern table. To rank pairs by your own text corpus (plain text file), run this in the Macro window first:
+Glyphs.defaults["com.mekkablue.KernFlattener.corpusPath"] = "/path/to/corpus.txt"
+Without a corpus, uses the index made with Build Pair Frequency Index, if there is one, otherwise a built-in list of Latin pairs.
+Optionally, limit the number of pairs with Glyphs.defaults["com.mekkablue.KernFlattener.maxPairs"].
 """
 
+import os
 from GlyphsApp import GSLTR
+from kernanalysis import groupIndex, kerningByName, bigramIndex
+from kernflattener import BigramTable, flattenKerning, KERN_MAX_PAIRS
 
 # list according to https://github.com/andre-fuchs/kerning-pairs
 
@@ -158,27 +166,37 @@ for master in thisFont.masters:
 	newKerning[master.id] = {}
 
 print("KERN FLATTENER\nRebuilding kerning with encoded glyphs only in old-style kern table, plus settings for MS Office compatibility\n")
-for i, line in enumerate(worthKeepingText.splitlines()):
-	if line: # skip empties
-		# print(i+7, len(line), line[:19]) # DEBUG
-		for i in range(0, len(line), 2):
-			leftChar, rightChar = line[i], line[i + 1]
-			leftUnicode, rightUnicode = "%04X" % ord(leftChar), "%04X" % ord(rightChar)
-			leftGlyph, rightGlyph = thisFont.glyphForUnicode_(leftUnicode), thisFont.glyphForUnicode_(rightUnicode)
-			if leftGlyph and leftGlyph.unicode and rightGlyph and rightGlyph.unicode:
-				leftID, rightID = leftGlyph.id, rightGlyph.id
-				for thisMaster in thisFont.masters:
-					mID = thisMaster.id
-					leftLayer, rightLayer = leftGlyph.layers[thisMaster.id], rightGlyph.layers[thisMaster.id]
-					kernValue = thisFont.kerningFirstLayer_secondLayer_(leftLayer, rightLayer)
-					if kernValue and kernValue < 10000:
-						if not leftID in newKerning[mID].keys():
-							newKerning[mID][leftID] = {
-								rightID: kernValue
-								}
-						else:
-							newKerning[mID][leftID][rightID] = kernValue
-						count += 1
+
+# rank pairs by a corpus, or by the built-in list:
+corpusPath = Glyphs.defaults["com.mekkablue.KernFlattener.corpusPath"]
+if corpusPath and os.path.exists(corpusPath):
+	print("Counting pairs in corpus: %s" % corpusPath)
+	bigrams = BigramTable.fromFile(corpusPath)
+elif bigramIndex():
+	bigrams = bigramIndex()
+	print("Ranking pairs by pair frequency index: %s" % bigrams.path)
+else:
+	bigrams = BigramTable.fromPairList(worthKeepingText)
+maxPairs = Glyphs.defaults["com.mekkablue.KernFlattener.maxPairs"] or KERN_MAX_PAIRS
+
+characterForGlyph = {}
+for thisGlyph in thisFont.glyphs:
+	if thisGlyph.unicode and thisGlyph.export:
+		characterForGlyph[thisGlyph.name] = chr(int(thisGlyph.unicode, 16))
+
+flattened = flattenKerning(
+	kerningByName(thisFont),
+	groupIndex(thisFont),
+	bigrams.glyphFrequency(characterForGlyph),
+	maxPairs=int(maxPairs),
+	glyphs=set(characterForGlyph),
+	)
+idForName = {thisGlyph.name: thisGlyph.id for thisGlyph in thisFont.glyphs}
+for mID, masterKerning in flattened.kerning.items():
+	for leftName, rightDict in masterKerning.items():
+		newKerning[mID][idForName[leftName]] = {idForName[rightName]: kernValue for rightName, kernValue in rightDict.items()}
+		count += len(rightDict)
+print("Kept the %i most frequent pairs, kern table: about %i bytes." % (len(flattened.pairs), flattened.bytes))
 
 print("Flattened to %i kern values in %i masters." % (count, len(thisFont.masters)))
 thisFont.kerning = newKerning
@@ -7,16 +7,8 @@ Opens a new tab with Kerning Combos that crash in the current fontmaster.
 
 import vanilla
 from timeit import default_timer as timer
-from Foundation import NSNotFound
 from kernanalysis import *
 
-if Glyphs.versionNumber >= 3:
-	caseDict = {
-		"Uppercase": GSUppercase,
-		"Lowercase": GSLowercase,
-		"Smallcaps": GSSmallcaps,
-		}
-
 class KernCrasher(object):
 	prefID = "com.mekkablue.KernCrasher"
 	prefDict = {
@@ -35,12 +27,17 @@ class KernCrasher(object):
 		"limitRightSuffixes": "",
 		"limitLeftSuffixes": "",
 		"directionSensitive": "",
+		"allMasters": 0,
+		"incremental": 0,
+		"adaptive": 0,
+		"exact": 0,
+		"sortByFrequency": 0,
 	}
 	
 	def __init__(self):
 		# Window 'self.w':
 		windowWidth = 410
-		windowHeight = 370
+		windowHeight = 458
 		windowWidthResize = 800 # user can resize width by this value
 		windowHeightResize = 0 # user can resize height by this value
 		self.w = vanilla.FloatingWindow(
@@ -150,6 +147,42 @@ class KernCrasher(object):
 		self.w.directionSensitive.getNSButton().setToolTip_("If enabled, will determine writing direction based on settings in current tab. If disabled, LTR will be used")
 		linePos += lineHeight
 
+		self.w.adaptive = vanilla.CheckBox(
+			(inset, linePos, 260, 20), "Refine to 1 unit where glyphs come closest", value=False, sizeStyle='small', callback=self.SavePreferences
+			)
+		self.w.adaptive.getNSButton().setToolTip_(
+			"If enabled, measures at the speed setting above first, then every unit, but only around the heights where the glyphs come closest, and around extremum points. Almost as accurate as ‘very slow’ at the cost of the speed setting. Current master only, ignored for incremental checks."
+			)
+		self.w.exact = vanilla.CheckBox((inset + 265, linePos, -inset, 20), "Exact", value=False, sizeStyle='small', callback=self.SavePreferences)
+		self.w.exact.getNSButton().setToolTip_(
+			"If enabled, ignores the speed setting and computes the true distances from the outline segments rather than from measurements. Results do not depend on any step size. Current master only, ignored for incremental checks."
+			)
+		linePos += lineHeight
+
+		self.w.incremental = vanilla.CheckBox(
+			(inset, linePos, -inset, 20), "Only measure pairs that changed since the last run", value=False, sizeStyle='small', callback=self.SavePreferences
+			)
+		self.w.incremental.getNSButton().setToolTip_(
+			"If enabled, remembers all measurements (per font file, master and speed setting), and only measures again where one of the glyphs or the kerning of the pair has changed since. Makes the fix-and-check-again loop much faster. Current master only."
+			)
+		linePos += lineHeight
+
+		self.w.sortByFrequency = vanilla.CheckBox(
+			(inset, linePos, -inset, 20), "Most frequent pairs first (needs a pair frequency index)", value=False, sizeStyle='small', callback=self.SavePreferences
+			)
+		self.w.sortByFrequency.getNSButton().setToolTip_(
+			"If enabled, sorts the crashing pairs by how often they occur in real text, most frequent first, so you can fix the ones that matter most first. Build the index from a text corpus with Kerning > Build Pair Frequency Index. Ignored if there is no index."
+			)
+		linePos += lineHeight
+
+		self.w.allMasters = vanilla.CheckBox(
+			(inset, linePos, -inset, 20), "All masters of all open fonts (uses all processor cores)", value=False, sizeStyle='small', callback=self.SavePreferences
+			)
+		self.w.allMasters.getNSButton().setToolTip_(
+			"If enabled, checks every master of every open font in one go, and opens a tab with the crashes in each font. Measurements are split into chunks and spread over all processor cores where possible. Timings per chunk are reported in the Macro Window."
+			)
+		linePos += lineHeight
+
 		self.w.reportCrashesInMacroWindow = vanilla.CheckBox(
 			(inset, linePos, -inset, 20), "Verbose report in Macro Window", value=False, sizeStyle='small', callback=self.SavePreferences
 			)
@@ -210,6 +243,10 @@ class KernCrasher(object):
 					intervalIndex = 0
 				self.w.text_speedExplanation.set("Measuring every %i units." % intervalList[intervalIndex])
 			
+			# exact distances do not need measurements:
+			self.w.popupSpeed.enable(not self.pref("exact"))
+			self.w.adaptive.enable(not self.pref("exact"))
+			
 			return True
 		except:
 			import traceback
@@ -223,6 +260,8 @@ class KernCrasher(object):
 				Glyphs.registerDefault(self.domain(prefName), self.prefDict[prefName])
 				# load previously written prefs:
 				getattr(self.w, prefName).set( self.pref(prefName) )
+			self.w.popupSpeed.enable(not self.pref("exact"))
+			self.w.adaptive.enable(not self.pref("exact"))
 			return True
 		except:
 			import traceback
@@ -236,41 +275,6 @@ class KernCrasher(object):
 			offset = glyphName.find(".")
 			return glyphName[:offset]
 
-	def listOfNamesForCategories(self, thisFont, requiredCategory, requiredSubCategory, requiredScript, excludedGlyphNameParts, excludeNonExporting, pathGlyphsOnly, mustContain):
-		nameList = []
-		for thisGlyph in thisFont.glyphs:
-			thisScript = thisGlyph.script
-			glyphName = thisGlyph.name
-			nameIsOK = True
-
-			if nameIsOK and excludedGlyphNameParts:
-				for thisNamePart in excludedGlyphNameParts:
-					nameIsOK = nameIsOK and not (thisNamePart in glyphName)
-
-			if nameIsOK and mustContain:
-				nameIsOK = False
-				for thisNamePart in mustContain:
-					if thisNamePart in glyphName:
-						nameIsOK = True
-
-			if nameIsOK and (thisGlyph.export or not excludeNonExporting):
-				if thisScript == None or thisScript == requiredScript:
-					if thisGlyph.category == requiredCategory:
-						if requiredSubCategory:
-							if Glyphs.versionNumber >= 3 and requiredSubCategory in caseDict:
-								requiredCase = caseDict[requiredSubCategory]
-								if thisGlyph.case == requiredCase:
-									if (not pathGlyphsOnly) or thisGlyph.layers[0].paths:
-										nameList.append(glyphName)
-							else:
-								if thisGlyph.subCategory == requiredSubCategory or (requiredSubCategory == "Other" and thisGlyph.subCategory is None):
-									if (not pathGlyphsOnly) or thisGlyph.layers[0].paths:
-										nameList.append(glyphName)
-						else:
-							if (not pathGlyphsOnly) or thisGlyph.layers[0].paths:
-								nameList.append(glyphName)
-		return nameList
-
 	def masterSwitch(self, sender=None):
 		if sender is self.w.nextButton:
 			Glyphs.font.masterIndex += 1
@@ -292,48 +296,6 @@ class KernCrasher(object):
 
 		return returnList
 
-	def measureLayerAtHeightFromLeftOrRight(self, thisLayer, height, leftSide=True):
-		try:
-			if leftSide:
-				measurement = thisLayer.lsbAtHeight_(height)
-			else:
-				measurement = thisLayer.rsbAtHeight_(height)
-			if measurement < NSNotFound:
-				return measurement
-			else:
-				return None
-		except Exception as e:
-			raise e
-			return None
-
-	def isHeightInIntervals(self, height, ignoreIntervals):
-		if ignoreIntervals:
-			for interval in ignoreIntervals:
-				if height <= interval[1] and height >= interval[0]:
-					return True
-		return False
-
-	def minDistanceBetweenTwoLayers(self, leftLayer, rightLayer, interval=5.0, kerning=0.0, report=False, ignoreIntervals=[]):
-		# correction = leftLayer.RSB+rightLayer.LSB
-		if Glyphs.versionNumber>=3.2:
-			leftBounds, rightBounds = leftLayer.fastBounds(), rightLayer.fastBounds()
-		else:
-			leftBounds, rightBounds = leftLayer.bounds, rightLayer.bounds
-		topY = min(leftBounds.origin.y + leftBounds.size.height, rightBounds.origin.y + rightBounds.size.height)
-		bottomY = max(leftLayer.bounds.origin.y, rightLayer.bounds.origin.y)
-		distance = topY - bottomY
-		minDist = None
-		for i in range(int(distance / interval)):
-			height = bottomY + i * interval
-			if not self.isHeightInIntervals(height, ignoreIntervals) or not ignoreIntervals:
-				left = leftLayer.rsbAtHeight_(height)
-				right = rightLayer.lsbAtHeight_(height)
-				if left < NSNotFound and right < NSNotFound: # avoid gaps like in i or j
-					total = left + right + kerning # +correction
-					if minDist == None or minDist > total:
-						minDist = total
-		return minDist
-
 	def queryPrefs(self):
 		script = self.pref("popupScript")
 		firstCategory, firstSubCategory = self.splitString(self.w.popupLeftCat.getItems()[self.pref("popupLeftCat")])
@@ -360,6 +322,72 @@ class KernCrasher(object):
 	#
 	# 	return ignoreIntervals
 
+	def KernCrasherAllMasters(
+		self, start, step, minDistance, ignoreIntervals, directionSensitive, script, firstCategory, firstSubCategory, secondCategory, secondSubCategory,
+		excludedGlyphNameParts, excludeNonExporting, pathGlyphsOnly, limitLeftSuffixes, limitRightSuffixes
+		):
+		# collect profiles and kerning in the app, one shard per chunk of left glyphs:
+		shards = []
+		fonts = Glyphs.fonts
+		for fontIndex, thisFont in enumerate(fonts):
+			self.w.bar.set(int(80 * (float(fontIndex) / len(fonts))))
+			index = glyphIndex(thisFont)
+			firstList = namesForCategory(
+				thisFont, firstCategory, firstSubCategory, script, excludedGlyphNameParts, excludeNonExporting, pathGlyphsOnly=pathGlyphsOnly, mustContain=limitLeftSuffixes, index=index
+				)
+			secondList = namesForCategory(
+				thisFont, secondCategory, secondSubCategory, script, excludedGlyphNameParts, excludeNonExporting, pathGlyphsOnly=pathGlyphsOnly, mustContain=limitRightSuffixes, index=index
+				)
+			for thisMaster in thisFont.masters:
+				leftProfiles, rightProfiles = pairingProfiles(
+					[thisFont.glyphs[n].layers[thisMaster.id] for n in firstList], [thisFont.glyphs[n].layers[thisMaster.id] for n in secondList], step=step, decompose=True
+					)
+				kerningMatrix = effectiveKerningMatrix(thisFont, thisMaster.id, firstList, secondList, directionSensitive)
+				shards.extend(
+					measurementShards(
+						fontIndex, thisMaster.id, firstList, leftProfiles, secondList, rightProfiles, kerningMatrix, below=minDistance, ignoreIntervals=ignoreIntervals
+						)
+					)
+
+		# measure in all processor cores:
+		self.w.bar.set(80)
+		crashes, timings = mergedShardResults(runShards(shards, executable=pythonExecutable()))
+		self.w.bar.set(100)
+
+		# report:
+		crashCount = 0
+		shouldReport = self.pref("reportCrashesInMacroWindow")
+		for fontIndex, thisFont in enumerate(fonts):
+			tabPairs, seenPairs = [], set()
+			frequency = pairFrequency(thisFont) if self.pref("sortByFrequency") else None
+			for thisMaster in thisFont.masters:
+				masterCrashes = crashes.get((fontIndex, thisMaster.id), [])
+				if frequency:
+					masterCrashes = sortedByFrequency(masterCrashes, frequency)
+				crashCount += len(masterCrashes)
+				if shouldReport:
+					print("\n%s, master %s: %i crashes" % (thisFont.familyName, thisMaster.name, len(masterCrashes)))
+				for firstGlyphName, secondGlyphName, distanceBetweenShapes in masterCrashes:
+					if shouldReport:
+						print("- %s %s: %i" % (firstGlyphName, secondGlyphName, distanceBetweenShapes))
+					pair = "/%s/%s" % (firstGlyphName, secondGlyphName)
+					if not pair in seenPairs:
+						seenPairs.add(pair)
+						tabPairs.append(pair)
+			if tabPairs:
+				thisFont.newTab("/space".join(tabPairs))
+
+		if shouldReport:
+			print("\nTimings per chunk:")
+			for fontIndex, masterID, chunkIndex, seconds in timings:
+				print("- %s, master %s, chunk %i: %.2f seconds" % (fonts[fontIndex].familyName, fonts[fontIndex].masters[masterID].name, chunkIndex + 1, seconds))
+
+		report = "%i kerning crashes in %i fonts. Time elapsed: %.1f seconds." % (crashCount, len(fonts), timer() - start)
+		Glyphs.showNotification("KernCrasher: all masters", report)
+		if shouldReport:
+			print(report)
+			Glyphs.showMacroWindow()
+
 	def KernCrasherMain(self, sender):
 		try:
 			# update settings to the latest user input:
@@ -405,11 +433,12 @@ class KernCrasher(object):
 				print("Note: KernCrasher could not write preferences.")
 
 			# get list of glyph names:
-			firstList = self.listOfNamesForCategories(
-				thisFont, firstCategory, firstSubCategory, script, excludedGlyphNameParts, excludeNonExporting, pathGlyphsOnly, limitLeftSuffixes
+			index = glyphIndex(thisFont)
+			firstList = namesForCategory(
+				thisFont, firstCategory, firstSubCategory, script, excludedGlyphNameParts, excludeNonExporting, pathGlyphsOnly=pathGlyphsOnly, mustContain=limitLeftSuffixes, index=index
 				)
-			secondList = self.listOfNamesForCategories(
-				thisFont, secondCategory, secondSubCategory, script, excludedGlyphNameParts, excludeNonExporting, pathGlyphsOnly, limitRightSuffixes
+			secondList = namesForCategory(
+				thisFont, secondCategory, secondSubCategory, script, excludedGlyphNameParts, excludeNonExporting, pathGlyphsOnly=pathGlyphsOnly, mustContain=limitRightSuffixes, index=index
 				)
 
 			directionSensitive = False
@@ -428,40 +457,79 @@ class KernCrasher(object):
 					OKButton=None,
 					)
 
+			if self.pref("allMasters"):
+				self.KernCrasherAllMasters(
+					start, step, minDistance, ignoreIntervals, directionSensitive, script, firstCategory, firstSubCategory, secondCategory, secondSubCategory,
+					excludedGlyphNameParts, excludeNonExporting, pathGlyphsOnly, limitLeftSuffixes, limitRightSuffixes
+					)
+				return
+
 			if self.pref("reportCrashesInMacroWindow"):
 				print("Minimum Distance: %i\n" % minDistance)
 				print("Left glyphs:\n%s\n" % ", ".join(firstList))
 				print("Right glyphs:\n%s\n" % ", ".join(secondList))
 
-			tabString = "\n"
-			crashCount = 0
-			numOfGlyphs = len(firstList)
-			for index in range(numOfGlyphs):
-				# update progress bar:
-				self.w.bar.set(int(100 * (float(index) / numOfGlyphs)))
-				# determine left glyph:
-				firstGlyphName = firstList[index]
-				leftLayer = thisFont.glyphs[firstGlyphName].layers[thisFontMasterID].copyDecomposedLayer()
-				leftLayer.decomposeSmartOutlines()
-
-				# cycle through right glyphs:
-				for secondGlyphName in secondList:
-					rightLayer = thisFont.glyphs[secondGlyphName].layers[thisFontMasterID].copyDecomposedLayer()
-					rightLayer.decomposeSmartOutlines()
-					kerning = effectiveKerning(firstGlyphName, secondGlyphName, thisFont, thisFontMasterID, directionSensitive)
-					distanceBetweenShapes = self.minDistanceBetweenTwoLayers(leftLayer, rightLayer, interval=step, kerning=kerning, report=False, ignoreIntervals=ignoreIntervals)
-					if (not distanceBetweenShapes is None) and (distanceBetweenShapes < minDistance):
+			# collect kerning for all pairings:
+			kerningMatrix = effectiveKerningMatrix(thisFont, thisFontMasterID, firstList, secondList, directionSensitive)
+			self.w.bar.set(30)
+
+			if self.pref("incremental"):
+				# only measure pairs that changed since the last run:
+				distanceMatrix, measuredCount = incrementalDistanceMatrix(
+					thisFont, thisFontMasterID, firstList, secondList, kerningMatrix, step=step, ignoreIntervals=ignoreIntervals, decompose=True
+					)
+				if self.pref("reportCrashesInMacroWindow"):
+					print("Measured %i of %i pairs, reused the others from the last run.\n" % (measuredCount, len(firstList) * len(secondList)))
+			elif self.pref("exact"):
+				# exact distances between the outline segments:
+				leftPieces = [layerPieces(thisFont.glyphs[n].layers[thisFontMasterID], decompose=True) for n in firstList]
+				rightPieces = [layerPieces(thisFont.glyphs[n].layers[thisFontMasterID], decompose=True) for n in secondList]
+				distanceMatrix = pairwiseDistanceMatrix(leftPieces, rightPieces, exactMinDistanceBetweenPieces, kerningMatrix=kerningMatrix, ignoreIntervals=ignoreIntervals)
+			elif self.pref("adaptive"):
+				# coarse profiles, refined to 1 unit where it matters:
+				leftProfiles = [adaptiveLayerProfile(thisFont.glyphs[n].layers[thisFontMasterID], step=1.0, coarseStep=step, decompose=True) for n in firstList]
+				rightProfiles = [adaptiveLayerProfile(thisFont.glyphs[n].layers[thisFontMasterID], step=1.0, coarseStep=step, decompose=True) for n in secondList]
+				distanceMatrix = pairwiseDistanceMatrix(leftProfiles, rightProfiles, minDistanceBetweenAdaptiveProfiles, kerningMatrix=kerningMatrix, ignoreIntervals=ignoreIntervals)
+			else:
+				# sample every glyph only once, reuse the profiles for all pairings:
+				leftProfiles, rightProfiles = pairingProfiles(
+					[thisFont.glyphs[n].layers[thisFontMasterID] for n in firstList], [thisFont.glyphs[n].layers[thisFontMasterID] for n in secondList], step=step, decompose=True
+					)
+				# measure all pairings in one go:
+				distanceMatrix = minDistanceMatrix(leftProfiles, rightProfiles, kerningMatrix=kerningMatrix, ignoreIntervals=ignoreIntervals)
+			crashes = [[] for firstGlyphName in firstList]
+			for leftIndex, rightIndex, distanceBetweenShapes in pairsInMatrix(distanceMatrix, below=minDistance):
+				crashes[leftIndex].append((secondList[rightIndex], distanceBetweenShapes))
+
+			frequency = pairFrequency(thisFont) if self.pref("sortByFrequency") else None
+			if frequency:
+				# most frequent pairs first, across all left glyphs:
+				sortedCrashes = sortedByFrequency(
+					[(firstGlyphName, secondGlyphName, distanceBetweenShapes) for firstGlyphName, crashingGlyphs in zip(firstList, crashes)
+						for secondGlyphName, distanceBetweenShapes in crashingGlyphs],
+					frequency,
+					)
+				crashCount = len(sortedCrashes)
+				if self.pref("reportCrashesInMacroWindow"):
+					for firstGlyphName, secondGlyphName, distanceBetweenShapes in sortedCrashes:
+						print("- %s %s: %i (frequency %i)" % (firstGlyphName, secondGlyphName, distanceBetweenShapes, frequency(firstGlyphName, secondGlyphName)))
+				tabString = "/space".join("/%s/%s" % (firstGlyphName, secondGlyphName) for firstGlyphName, secondGlyphName, distanceBetweenShapes in sortedCrashes)
+			else:
+				tabString = "\n"
+				crashCount = 0
+				for firstGlyphName, crashingGlyphs in zip(firstList, crashes):
+					for secondGlyphName, distanceBetweenShapes in crashingGlyphs:
 						crashCount += 1
 						tabString += "/%s/%s/space" % (firstGlyphName, secondGlyphName)
 						if self.pref("reportCrashesInMacroWindow"):
 							print("- %s %s: %i" % (firstGlyphName, secondGlyphName, distanceBetweenShapes))
-				tabString += "\n"
+					tabString += "\n"
 
-			# clean up the tab string:
-			tabString = tabString[:-6].replace("/space\n", "\n")
-			while "\n\n" in tabString:
-				tabString = tabString.replace("\n\n", "\n")
-			tabString = tabString[1:]
+				# clean up the tab string:
+				tabString = tabString[:-6].replace("/space\n", "\n")
+				while "\n\n" in tabString:
+					tabString = tabString.replace("\n\n", "\n")
+				tabString = tabString[1:]
 
 			# update progress bar:
 			self.w.bar.set(100)
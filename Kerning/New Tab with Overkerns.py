@@ -6,6 +6,7 @@ Asks a threshold percentage, and opens a new tab with all kern pairs going beyon
 """
 
 import vanilla, sys
+from kernanalysis import kerningAudit
 
 def roundedDownBy(value, base):
 	return base * round(value // base)
@@ -155,107 +156,43 @@ class NewTabwithOverkernedPairs(object):
 				else:
 					theseMasters = (thisFont.selectedFontMaster, )
 				
-				layers = []
-				for thisMaster in theseMasters:
-					print(f"\n\tⓂ️ Master ‘{thisMaster.name}’")
-					masterKerning = thisFont.kerning[thisMaster.id] # kerning dictionary
-					tabText = "" # the text appearing in the new tab
-
-					# collect minimum widths for every kerning group:
-					leftGroupMinimumWidths = {}
-					leftGroupNarrowestGlyphs = {}
-					rightGroupMinimumWidths = {}
-					rightGroupNarrowestGlyphs = {}
-					if limitToExportingGlyphs:
-						theseGlyphs = [g for g in thisFont.glyphs if g.export]
-					else:
-						theseGlyphs = thisFont.glyphs
-					for thisGlyph in theseGlyphs:
-						thisLayer = thisGlyph.layers[thisMaster.id]
-
-						# left side of the glyph (= right side of kern pair)
-						if thisGlyph.leftKerningGroup:
-							if thisGlyph.leftKerningGroup in leftGroupMinimumWidths.keys():
-								if thisLayer.width < leftGroupMinimumWidths[thisGlyph.leftKerningGroup]:
-									leftGroupMinimumWidths[thisGlyph.leftKerningGroup] = thisLayer.width
-									leftGroupNarrowestGlyphs[thisGlyph.leftKerningGroup] = thisGlyph.name
-							else:
-								leftGroupMinimumWidths[thisGlyph.leftKerningGroup] = thisLayer.width
-								leftGroupNarrowestGlyphs[thisGlyph.leftKerningGroup] = thisGlyph.name
-
-						# right side of the glyph (= left side of kern pair)
-						if thisGlyph.rightKerningGroup:
-							if thisGlyph.rightKerningGroup in rightGroupMinimumWidths.keys():
-								if thisLayer.width < rightGroupMinimumWidths[thisGlyph.rightKerningGroup]:
-									rightGroupMinimumWidths[thisGlyph.rightKerningGroup] = thisLayer.width
-									rightGroupNarrowestGlyphs[thisGlyph.rightKerningGroup] = thisGlyph.name
-							else:
-								rightGroupMinimumWidths[thisGlyph.rightKerningGroup] = thisLayer.width
-								rightGroupNarrowestGlyphs[thisGlyph.rightKerningGroup] = thisGlyph.name
-
-					# go through kern values and collect them in tabText:
-					for leftKey in masterKerning.keys():
-						for rightKey in masterKerning[leftKey].keys():
-							kernValue = masterKerning[leftKey][rightKey]
-							if kernValue < 0:
-								leftWidth = None
-								rightWidth = None
+				# one pass over the kerning of all masters:
+				audit = kerningAudit(thisFont, masterIDs=[m.id for m in theseMasters], exportingOnly=bool(limitToExportingGlyphs))
+				for missingKey in sorted(audit.missingKeys):
+					side = "left" if missingKey.startswith("@MMK_L_") else "right"
+					print(f"⚠️ Warning: The {side} group ‘{missingKey[7:]}’ found in your kerning data does not appear in any {'exporting ' if limitToExportingGlyphs else ''}glyph. Clean up your kerning, and run the script again.")
+					Glyphs.showMacroWindow()
 
-								try:
-									# collect widths for comparison
-									if leftKey[0] == "@":
-										# leftKey is a group name like "@MMK_L_y"
-										groupName = leftKey[7:]
-										leftWidth = rightGroupMinimumWidths[groupName]
-										leftGlyphName = rightGroupNarrowestGlyphs[groupName]
-									else:
-										# leftKey is a glyph ID like "59B740DA-A4F4-43DF-B6DD-1DFA213FFFE7"
-										leftGlyph = thisFont.glyphForId_(leftKey)
-										# exclude if non-exporting and user limited to exporting glyphs:
-										if limitToExportingGlyphs and not leftGlyph.export:
-											kernValue = 0.0
-										leftWidth = leftGlyph.layers[thisMaster.id].width
-										leftGlyphName = leftGlyph.name
-
-									if rightKey[0] == "@":
-										# rightKey is a group name like "@MMK_R_y"
-										groupName = rightKey[7:]
-										rightWidth = leftGroupMinimumWidths[groupName]
-										rightGlyphName = leftGroupNarrowestGlyphs[groupName]
-									else:
-										# rightKey is a glyph ID like "59B740DA-A4F4-43DF-B6DD-1DFA213FFFE7"
-										rightGlyph = thisFont.glyphForId_(rightKey)
-										# exclude if non-exporting and user limited to exporting glyphs:
-										if limitToExportingGlyphs and not rightGlyph.export:
-											kernValue = 0.0
-										rightWidth = rightGlyph.layers[thisMaster.id].width
-										rightGlyphName = rightGlyph.name
-
-									# compare widths and collect overkern if it is one:
-									# (kernValue of excluded glyphs will be 0.0 and not trigger the if clause)
-									maxPossibleKernValue = min(thresholdFactor * leftWidth, thresholdFactor * rightWidth)
-									if abs(kernValue) > maxPossibleKernValue:
-										overKernCount += 1
-										layers.append(thisFont.glyphs[leftGlyphName].layers[thisMaster.id])
-										layers.append(thisFont.glyphs[rightGlyphName].layers[thisMaster.id])
-										print(f"\tOverkern: {leftGlyphName} ↔️ {rightGlyphName} ({kernValue:.0f} vs. max {maxPossibleKernValue:.1f})")
-										if thisFont.glyphs["space"]:
-											layers.append(thisFont.glyphs["space"].layers[thisMaster.id])
-										if shouldFix:
-											masterKerning[leftKey][rightKey] = -roundedDownBy(maxPossibleKernValue, rounding)
-
-								except Exception as e:
-									# probably a kerning group name found in the kerning data, but no glyph assigned to it:
-									# brings macro window to front and reports warning:
-									import traceback
-									errormsg = traceback.format_exc()
-									for side in ("left", "right"):
-										if not side in errormsg.lower():
-											print(f"⚠️ Warning: The {side} group ‘{groupName}’ found in your kerning data does not appear in any glyph. Clean up your kerning, and run the script again.")
-											Glyphs.showMacroWindow()
+				layers = []
+				if shouldFix:
+					thisFont.disableUpdateInterface()
+				try:
+					for thisMaster in theseMasters:
+						print(f"\n\tⓂ️ Master ‘{thisMaster.name}’")
+						for overkern in audit.overkerns(thresholdFactor, masterIds=[thisMaster.id]):
+							overKernCount += 1
+							maxPossibleKernValue = thresholdFactor * overkern.width
+							layers.append(thisFont.glyphs[overkern.leftGlyph].layers[thisMaster.id])
+							layers.append(thisFont.glyphs[overkern.rightGlyph].layers[thisMaster.id])
+							print(f"\tOverkern: {overkern.leftGlyph} ↔️ {overkern.rightGlyph} ({overkern.value:.0f} vs. max {maxPossibleKernValue:.1f})")
+							if thisFont.glyphs["space"]:
+								layers.append(thisFont.glyphs["space"].layers[thisMaster.id])
+							if shouldFix:
+								thisFont.setKerningForPair(thisMaster.id, overkern.leftKey, overkern.rightKey, -roundedDownBy(maxPossibleKernValue, rounding))
+
+						if layers:
+							layers.append(GSControlLayer.newline())
+				finally:
+					if shouldFix:
+						thisFont.enableUpdateInterface()
+
+				# pairs kerned in opposite directions in different masters:
+				if audit.signFlips:
+					print(f"\n\tNote: {len(audit.signFlips)} pairs are kerned negative in one master and positive in another:")
+					for signFlip in audit.signFlips:
+						values = ", ".join(f"{thisFont.masters[masterID].name}: {value:.0f}" for masterID, value in signFlip.values.items())
+						print(f"\t{audit.index.glyphNameForKey(signFlip.leftKey)} ↔️ {audit.index.glyphNameForKey(signFlip.rightKey)} ({values})")
 
-					if layers:
-						layers.append(GSControlLayer.newline())
 				if layers:
 					tab = thisFont.newTab()
 					tab.layers = layers
@@ -2,9 +2,11 @@
 # -*- coding: utf-8 -*-
 from __future__ import division, print_function, unicode_literals
 __doc__ = """
-Finds kern pairs for symmetric letters like ATA AVA TOT WIW etc. and sees if AT is the same as TA, etc.
+Finds kern pairs for symmetric letters like ATA AVA TOT WIW etc. and sees if AT is the same as TA, etc. Compares the effective kerning (group kerning and exceptions) of the current master.
 """
 
+from kernanalysis import kerningAudit
+
 UC = "AHIMNOTUVWXY"
 SC = ["%s.sc" % x.lower() for x in UC]
 LC = "ilovwx"
@@ -27,41 +29,34 @@ for x in allDottedGlyphNames:
 		if x.startswith("%s." % L) and not x in SC and not x in extraSC:
 			extraLC.append(x)
 
-tabString = ""
+glyphSets = []
 for glyphnames in (list(UC) + extraUC + SY, list(LC) + extraLC + SY, SC + extraSC + SY):
 	print(glyphnames)
-	for i, glyphname1 in enumerate(glyphnames):
-		for glyphname2 in glyphnames[i:]:
-			if glyphname1 != glyphname2: # AAA makes no sense
-				if not thisFont.glyphs[glyphname1] or not thisFont.glyphs[glyphname2]:
-					for g in (glyphname1, glyphname2):
-						if not thisFont[g]:
-							print(u"⚠️ glyph '%s' does not exist" % g)
-				else:
-					# kerning exceptions:
-					leftKern = Font.kerningForPair(m.id, glyphname1, glyphname2)
-					rightKern = Font.kerningForPair(m.id, glyphname2, glyphname1)
-					if leftKern != rightKern:
-						print("%s-%s-%s: exception not symmetric: %s vs. %s" % (glyphname1, glyphname2, glyphname1, leftKern, rightKern))
-						tabString += "/%s/%s/%s\n" % (glyphname1, glyphname2, glyphname1)
-					else:
-						glyph1 = thisFont.glyphs[glyphname1]
-						glyph2 = thisFont.glyphs[glyphname2]
-						if glyph1.rightKerningGroup and glyph2.leftKerningGroup and glyph2.rightKerningGroup and glyph1.leftKerningGroup:
-							# group kerning:
-							leftKern = Font.kerningForPair(m.id, "@MMK_L_" + glyph1.rightKerningGroup, "@MMK_R_" + glyph2.leftKerningGroup)
-							rightKern = Font.kerningForPair(m.id, "@MMK_L_" + glyph2.rightKerningGroup, "@MMK_R_" + glyph1.leftKerningGroup)
-							if leftKern != rightKern:
-								print("@%s-@%s-@%s: group kerning not symmetric: %s vs. %s" % (
-									glyph1.name,
-									glyph2.name,
-									glyph1.name,
-									leftKern,
-									rightKern,
-									))
-								tabString += "/%s/%s/%s\n" % (glyphname1, glyphname2, glyphname1)
-						else:
-							print(u"⚠️ missing kerning groups in glyphs: %s, %s" % (glyphname1, glyphname2))
+	for g in glyphnames:
+		if not thisFont.glyphs[g]:
+			print(u"⚠️ glyph '%s' does not exist" % g)
+	glyphSets.append([g for g in glyphnames if thisFont.glyphs[g]])
+
+# effective kerning of all pairs and their mirrored pairs in one pass:
+audit = kerningAudit(thisFont, masterIDs=[m.id], exportingOnly=False, symmetricGlyphs=glyphSets)
+
+def describeKeys(keys):
+	if keys is None:
+		return "no kerning"
+	return "%s %s" % tuple(k if k.startswith("@") else "/" + k for k in keys)
+
+tabString = ""
+for pair in audit.unevenPairsInMaster(m.id):
+	print("%s-%s-%s: kerning not symmetric: %s (%s) vs. %s (%s)" % (
+		pair.firstGlyph,
+		pair.secondGlyph,
+		pair.firstGlyph,
+		pair.value,
+		describeKeys(pair.keys),
+		pair.mirroredValue,
+		describeKeys(pair.mirroredKeys),
+		))
+	tabString += "/%s/%s/%s\n" % (pair.firstGlyph, pair.secondGlyph, pair.firstGlyph)
 
 if tabString:
 	# opens new Edit tab:
@@ -2,10 +2,12 @@
 # -*- coding: utf-8 -*-
 from __future__ import division, print_function, unicode_literals
 __doc__="""
-Compress kerning, but for certain glyphs only.
+Compress kerning, but for certain glyphs only. Comma-separated search strings match anywhere in the glyph name. *, ? and [...] are wildcards (any run of characters, one character, one of the bracketed characters), so search for [*] to match a literal asterisk. Also understands re: regular expressions and @Category:Subcategory. Other search strings starting with @, e.g. @MMK_L_A, match kerning group names.
 """
 
 import vanilla, sys
+from kernanalysis import namesMatchingPatterns
+from glyphpatterns import PatternSet
 
 class PartialCompress(object):
 	prefID = "com.mekkablue.PartialCompress"
@@ -36,6 +38,7 @@ class PartialCompress(object):
 		linePos += lineHeight
 		
 		self.w.searchFor = vanilla.EditText((inset, linePos, -inset, 19), ".dnom", callback=self.SavePreferences, sizeStyle="small")
+		self.w.searchFor.getNSTextField().setToolTip_("Comma-separated name parts. Use *, ? and [...] as wildcards ([*] for a literal asterisk), re: for a regular expression, or @Category:Subcategory, e.g. @Number:Fraction. Other @ strings match kerning groups, e.g. @MMK_L_A.")
 		linePos += lineHeight
 		
 		self.w.allMasters = vanilla.CheckBox((inset, linePos-1, 125, 20), "⚠️ on ALL masters", value=False, callback=self.SavePreferences, sizeStyle="small")
@@ -121,6 +124,12 @@ class PartialCompress(object):
 				print(f"Partial Compress Report for {reportName}")
 			
 				removeList = []
+				# one pass over the glyphs, then set lookups for every kern pair:
+				matchingNames = set(namesMatchingPatterns(thisFont, searchStrings, partial=True))
+				groupPatterns = PatternSet(searchStrings, partial=True)
+				
+				def isMatch(name):
+					return name in matchingNames or (name.startswith("@") and groupPatterns.matchesName(name))
 				
 				for m in thisFont.masters:
 					if not allFonts and (not allMasters and m != thisFont.selectedFontMaster):
@@ -158,13 +167,12 @@ class PartialCompress(object):
 							if bothAreGroups:
 								continue
 								
-							for searchString in searchStrings:
-								if not searchString in lName and not searchString in rName:
-									continue
-								
-								value = thisFont.kerning[m.id][lID][rID]
-								removeList.append((m.id, lName, rName))
-								thisFont.setKerningForPair(m.id, lGroup, rGroup, value)
+							if not isMatch(lName) and not isMatch(rName):
+								continue
+							
+							value = thisFont.kerning[m.id][lID][rID]
+							removeList.append((m.id, lName, rName))
+							thisFont.setKerningForPair(m.id, lGroup, rGroup, value)
 
 				print(f"Compressing {len(removeList)} pairs...")
 				for removeCandidate in removeList:
@@ -6,7 +6,6 @@ Creates kern strings for all kerning groups in user-defined categories and adds
 """
 
 import vanilla, sampleText, kernanalysis
-CASE = (None, "Uppercase", "Lowercase", "Smallcaps", "Minor")
 
 class SampleStringMaker(object):
 	prefID = "com.mekkablue.SampleStringMaker"
@@ -21,6 +20,7 @@ class SampleStringMaker(object):
 		"overrideContext": 0,
 		"contextGlyphs": "HOOH,noon",
 		"mirrorPair": 0,
+		"sortByFrequency": 0,
 		}
 
 	categoryList = (
@@ -53,7 +53,7 @@ class SampleStringMaker(object):
 	def __init__(self):
 		# Window 'self.w':
 		windowWidth = 340
-		windowHeight = 265
+		windowHeight = 287
 		windowWidthResize = 1000 # user can resize width by this value
 		windowHeightResize = 0 # user can resize height by this value
 		self.w = vanilla.FloatingWindow(
@@ -111,6 +111,14 @@ class SampleStringMaker(object):
 		).setToolTip_("If checked, will create a mirrored version of the kerning string. E.g., instead of just AV, it will show AVA between the context glyphs.")
 		linePos += lineHeight
 
+		self.w.sortByFrequency = vanilla.CheckBox(
+			(inset, linePos - 1, -inset, 20), "Most frequent glyphs first (pair frequency index)", value=False, callback=self.SavePreferences, sizeStyle='small'
+			)
+		self.w.sortByFrequency.getNSButton().setToolTip_(
+			"If checked, orders the glyphs on both sides by how often they occur next to the other side in real text, so the kern strings start with the pairs that matter most. Build the index from a text corpus with Kerning > Build Pair Frequency Index. Ignored if there is no index."
+			)
+		linePos += lineHeight
+
 		self.w.openTab = vanilla.CheckBox((inset, linePos - 1, 170, 20), "Open tab at first kern string", value=False, callback=self.SavePreferences, sizeStyle='small')
 		self.w.openTab.getNSButton().setToolTip_(
 			"If checked, a new tab will be opened with the first found kern string, and the cursor positioned accordingly, ready for group kerning and switching to the next sample string."
@@ -163,12 +171,8 @@ class SampleStringMaker(object):
 			print(traceback.format_exc())
 			return False
 
-	def glyphNameIsExcluded(self, glyphName):
-		forbiddenParts = [n.strip() for n in self.pref("excludedGlyphNameParts").split(",")]
-		for forbiddenPart in forbiddenParts:
-			if forbiddenPart in glyphName:
-				return True
-		return False
+	def excludedGlyphNameParts(self):
+		return [n.strip() for n in self.pref("excludedGlyphNameParts").split(",")]
 
 	def parseTheContextGlyphs(self):
 		separator = ","
@@ -204,30 +208,28 @@ class SampleStringMaker(object):
 
 			includeNonExporting = self.pref("includeNonExporting")
 
-			glyphNamesLeft, glyphNamesRight = [], []
-			for g in thisFont.glyphs:
-				glyphSubCategory = g.subCategory
-				if Glyphs.versionNumber >= 3:
-					if glyphSubCategory is None:
-						glyphSubCategory = CASE[g.case]
-
-				# LEFT
-				if g.category == leftCategory and \
-						(leftSubCategory is None or glyphSubCategory == leftSubCategory) and \
-						(g.script == chosenScript or (leftCategory != "Letter" and g.script is None)) and \
-						(g.export or includeNonExporting) and \
-						not g.name in self.exclusion and \
-						not self.glyphNameIsExcluded(g.name):
-					glyphNamesLeft.append(g.name)
-
-				# RIGHT
-				if g.category == rightCategory and \
-						(rightSubCategory is None or glyphSubCategory == rightSubCategory) and \
-						(g.script == chosenScript or (rightCategory != "Letter" and g.script is None)) and \
-						(g.export or includeNonExporting) and \
-						not g.name in self.exclusion and \
-						not self.glyphNameIsExcluded(g.name):
-					glyphNamesRight.append(g.name)
+			excludedGlyphNameParts = self.excludedGlyphNameParts()
+			index = kernanalysis.glyphIndex(thisFont)
+			glyphNamesLeft = [
+				n for n in kernanalysis.namesForCategory(
+					thisFont, leftCategory, leftSubCategory, chosenScript, excludedGlyphNameParts, excludeNonExporting=not includeNonExporting, includeScriptless=leftCategory != "Letter", index=index
+					) if not n in self.exclusion
+				]
+			glyphNamesRight = [
+				n for n in kernanalysis.namesForCategory(
+					thisFont, rightCategory, rightSubCategory, chosenScript, excludedGlyphNameParts, excludeNonExporting=not includeNonExporting, includeScriptless=rightCategory != "Letter", index=index
+					) if not n in self.exclusion
+				]
+
+			if self.pref("sortByFrequency"):
+				frequency = kernanalysis.pairFrequency(thisFont)
+				if frequency:
+					glyphNamesLeft, glyphNamesRight = (
+						kernanalysis.namesByFrequency(glyphNamesLeft, glyphNamesRight, frequency, isLeftSide=True),
+						kernanalysis.namesByFrequency(glyphNamesRight, glyphNamesLeft, frequency, isLeftSide=False),
+						)
+				else:
+					print("No pair frequency index found, keeping the glyph order. Build one with Kerning > Build Pair Frequency Index.")
 
 			numLeftGlyphs = len(glyphNamesLeft)
 			numRightGlyphs = len(glyphNamesRight)
@@ -6,7 +6,7 @@ Add group kernings with value zero for pairs that are missing in one master but
 """
 
 import vanilla
-from Foundation import NSNotFound
+from kernanalysis import kerningTable, GROUP_GROUP
 
 class ZeroKerner(object):
 
@@ -126,6 +126,9 @@ class ZeroKerner(object):
 
 				masterCountPart = 100.0 / len(thisFont.masters)
 
+				# all masters side by side, one value column per master:
+				table = kerningTable(thisFont)
+
 				if shouldRemoveZeroKerns:
 					# REMOVE ZERO KERNS
 					for i, thisMaster in enumerate(masters):
@@ -134,24 +137,14 @@ class ZeroKerner(object):
 							continue
 
 						masterCount = masterCountPart * i
-						kerningLength = len(thisFont.kerning[thisMaster.id])
-
 						self.w.progress.set(masterCount)
-						pairsToBeRemoved = []
-
-						for j, leftSide in enumerate(thisFont.kerning[thisMaster.id].keys()):
-							kernCount = j * masterCountPart / kerningLength
-							self.w.progress.set(masterCount + kernCount)
 
-							if leftSide.startswith("@"):
-								for rightSide in thisFont.kerning[thisMaster.id][leftSide].keys():
-
-									if rightSide.startswith("@") and thisFont.kerning[thisMaster.id][leftSide][rightSide] == 0:
-										pairsToBeRemoved.append((leftSide, rightSide))
-										self.report(
-											"%s: will remove @%s-@%s" % (thisMaster.name, leftSide[7:], rightSide[7:]),
-											reportInMacroWindow,
-											)
+						pairsToBeRemoved = table.pairsInMask(table.zeroMask(thisMaster.id, kinds=(GROUP_GROUP, )))
+						for leftSide, rightSide in pairsToBeRemoved:
+							self.report(
+								"%s: will remove @%s-@%s" % (thisMaster.name, leftSide[7:], rightSide[7:]),
+								reportInMacroWindow,
+								)
 
 						self.report(
 							"%s: removing %i zero kerns" % (thisMaster.name, len(pairsToBeRemoved)),
@@ -164,36 +157,18 @@ class ZeroKerner(object):
 
 				else:
 					# ADD ZERO KERNS
-					for i, otherMaster in enumerate(thisFont.masters):
+					for i, thisMaster in enumerate(masters):
 						masterCount = masterCountPart * i
 						self.w.progress.set(masterCount)
 
-						theseMasters = [m for m in masters if not m is otherMaster]
-						otherMasterKerning = thisFont.kerning[otherMaster.id]
-						kerningLength = len(otherMasterKerning)
-
-						for j, leftGroup in enumerate(otherMasterKerning.keys()):
-							kernCount = j * masterCountPart / kerningLength
-							self.w.progress.set(masterCount + kernCount)
-
-							if leftGroup.startswith("@"):
-								for rightGroup in otherMasterKerning[leftGroup].keys():
-									if rightGroup.startswith("@"):
-										if otherMasterKerning[leftGroup][rightGroup] != 0:
-											for j, thisMaster in enumerate(theseMasters):
-
-												self.report(
-													"Verifying @%s-@%s" % (leftGroup[7:], rightGroup[7:]),
-													reportInMacroWindow=False,
-													)
-
-												if not thisFont.kerningForPair(thisMaster.id, leftGroup,
-																				rightGroup) or thisFont.kerningForPair(thisMaster.id, leftGroup, rightGroup) >= NSNotFound:
-													thisFont.setKerningForPair(thisMaster.id, leftGroup, rightGroup, 0.0)
-													self.report(
-														"%s: zero kern @%s-@%s" % (thisMaster.name, leftGroup[7:], rightGroup[7:]),
-														reportInMacroWindow,
-														)
+						# group pairs missing in this master, but non-zero in at least one other:
+						missingPairs = table.pairsInMask(table.missingMask(thisMaster.id, kinds=(GROUP_GROUP, ), nonZeroOnly=True))
+						for leftGroup, rightGroup in missingPairs:
+							thisFont.setKerningForPair(thisMaster.id, leftGroup, rightGroup, 0.0)
+							self.report(
+								"%s: zero kern @%s-@%s" % (thisMaster.name, leftGroup[7:], rightGroup[7:]),
+								reportInMacroWindow,
+								)
 
 				self.w.progress.set(100.0)
 				self.w.status.set("Done.")
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Character pair frequencies of large text corpora, for checking the pairs that matter first.
+Does not need the Glyphs API. Corpora (UTF-8, any size) are read chunk by chunk,
+the counts are stored in a compact binary file (sorted pair keys plus counts)
+that is memory-mapped for lookups, so an index of a few GB of text opens instantly.
+For a big corpus, build the index on the command line:
+
+python3 bigramindex.py corpus1.txt corpus2.txt -o MyCorpus.bigrams --font MyFont.glyphs
+
+With a font, only characters in its cmap are counted. A BigramIndex has the same
+frequency() and glyphFrequency() methods as kernflattener.BigramTable.
+"""
+from __future__ import division, print_function
+
+import io, os, sys, mmap, struct, heapq
+from array import array
+from bisect import bisect_left
+from argparse import ArgumentParser
+from collections import Counter
+
+MAGIC = b"BGRM"
+VERSION = 1
+HEADER = struct.Struct("<4sIQ") # magic, version, number of pairs
+CHUNK_SIZE = 1 << 22 # characters per read
+
+def pairKey(leftCharacter, rightCharacter):
+	# code points have at most 21 bits
+	return ord(leftCharacter) << 21 | ord(rightCharacter)
+
+def charactersForKey(key):
+	return chr(key >> 21), chr(key & 0x1FFFFF)
+
+def withoutSkippedPairs(counts, characters=None):
+	"""
+	Removes pairs with whitespace from a Counter of (leftCharacter, rightCharacter),
+	and pairs with characters not in characters (e.g. the cmap), if given. Returns counts.
+	"""
+	for pair in list(counts):
+		left, right = pair
+		if left.isspace() or right.isspace() or (characters is not None and not (left in characters and right in characters)):
+			del counts[pair]
+	return counts
+
+def countTextBigrams(text, characters=None):
+	"""
+	Counter of (leftCharacter, rightCharacter) for one text, skipping pairs like countBigrams().
+	"""
+	return withoutSkippedPairs(Counter(zip(text, text[1:])), characters=characters)
+
+def countBigrams(paths, characters=None, chunkSize=CHUNK_SIZE, progress=None, encoding="utf-8"):
+	"""
+	Counter of (leftCharacter, rightCharacter) for all text files in paths.
+	Pairs with whitespace are skipped, and pairs with characters not in characters (e.g. the cmap), if given.
+	progress: optional function called with the number of characters read so far.
+	"""
+	counts = Counter()
+	charactersRead = 0
+	for path in paths:
+		with io.open(path, "r", encoding=encoding, errors="replace", newline="") as corpus:
+			previous = ""
+			while True:
+				chunk = corpus.read(chunkSize)
+				if not chunk:
+					break
+				text = previous + chunk
+				counts.update(zip(text, text[1:])) # counted in C, filtered once per distinct pair below
+				previous = text[-1]
+				charactersRead += len(chunk)
+				if progress:
+					progress(charactersRead)
+	return withoutSkippedPairs(counts, characters=characters)
+
+def writeBigramIndex(counts, path):
+	"""
+	Writes a Counter of character pairs into an index file.
+	"""
+	items = sorted((pairKey(left, right), count) for (left, right), count in counts.items())
+	keys = array("Q", [key for key, count in items])
+	values = array("Q", [count for key, count in items])
+	if sys.byteorder == "big":
+		keys.byteswap()
+		values.byteswap()
+	# write next to it and swap, so indexes still mapped elsewhere stay valid:
+	temporaryPath = path + ".tmp"
+	with open(temporaryPath, "wb") as indexFile:
+		indexFile.write(HEADER.pack(MAGIC, VERSION, len(items)))
+		keys.tofile(indexFile)
+		values.tofile(indexFile)
+	os.replace(temporaryPath, path)
+
+def buildBigramIndex(paths, outputPath, characters=None, chunkSize=CHUNK_SIZE, progress=None):
+	"""
+	Counts the corpus files in paths, writes the index file, returns it as BigramIndex.
+	"""
+	writeBigramIndex(countBigrams(paths, characters=characters, chunkSize=chunkSize, progress=progress), outputPath)
+	return BigramIndex(outputPath)
+
+class BigramIndex(object):
+	"""
+	Read-only, memory-mapped index file written by writeBigramIndex().
+	"""
+
+	def __init__(self, path):
+		self.path = path
+		self._file = open(path, "rb")
+		size = os.fstat(self._file.fileno()).st_size
+		self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+		magic, version, count = HEADER.unpack_from(self._map, 0) if size >= HEADER.size else (None, None, 0)
+		if magic != MAGIC or version != VERSION:
+			self.close()
+			raise ValueError("Not a bigram index (version %i): %s" % (VERSION, path))
+		if sys.byteorder == "big":
+			# rare: read into memory and swap
+			self.keys = array("Q", self._map[HEADER.size:HEADER.size + 8 * count])
+			self.counts = array("Q", self._map[HEADER.size + 8 * count:HEADER.size + 16 * count])
+			self.keys.byteswap()
+			self.counts.byteswap()
+		else:
+			view = memoryview(self._map)
+			self.keys = view[HEADER.size:HEADER.size + 8 * count].cast("Q")
+			self.counts = view[HEADER.size + 8 * count:HEADER.size + 16 * count].cast("Q")
+
+	def __len__(self):
+		return len(self.keys)
+
+	def close(self):
+		for attribute in ("keys", "counts"):
+			view = getattr(self, attribute, None)
+			if isinstance(view, memoryview):
+				view.release()
+		if isinstance(getattr(self, "_map", None), mmap.mmap):
+			self._map.close()
+		self._file.close()
+
+	def frequency(self, leftCharacter, rightCharacter):
+		if not leftCharacter or not rightCharacter:
+			return 0
+		key = pairKey(leftCharacter, rightCharacter)
+		i = bisect_left(self.keys, key)
+		if i < len(self.keys) and self.keys[i] == key:
+			return self.counts[i]
+		return 0
+
+	def glyphFrequency(self, characterForGlyph):
+		"""
+		frequency function for glyph names, characterForGlyph being {glyphName: character}.
+		"""
+
+		def frequency(leftName, rightName):
+			return self.frequency(characterForGlyph.get(leftName), characterForGlyph.get(rightName))
+
+		return frequency
+
+	def mostCommon(self, count=20):
+		"""
+		The count most frequent pairs as (leftCharacter, rightCharacter, frequency).
+		"""
+		top = heapq.nlargest(count, range(len(self.counts)), key=self.counts.__getitem__)
+		return [charactersForKey(self.keys[i]) + (self.counts[i], ) for i in top]
+
+parser = ArgumentParser(description="Count character pairs in UTF-8 text corpora and write a memory-mappable index for the kerning scripts.")
+parser.add_argument("corpora", nargs="+", metavar="corpus", help="UTF-8 text file")
+parser.add_argument("-o", "--output", required=True, help="Index file to write, e.g. MyCorpus.bigrams")
+parser.add_argument("--font", help="Only count characters encoded in this .glyphs file or .glyphspackage")
+parser.add_argument("--top", type=int, default=20, help="Number of most frequent pairs to report (default: 20)")
+
+def main(arguments=None):
+	arguments = parser.parse_args(arguments)
+	characters = None
+	if arguments.font:
+		sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+		from glyphsfile import readFont
+		font = readFont(arguments.font)
+		characters = set(chr(int(code, 16)) for glyph in font.glyphs.values() for code in glyph.unicodes)
+
+	def progress(charactersRead):
+		print("\r%i million characters" % (charactersRead // 1000000), end="")
+
+	index = buildBigramIndex(arguments.corpora, arguments.output, characters=characters, progress=progress)
+	print("\n%i pairs in %s" % (len(index), arguments.output))
+	for left, right, frequency in index.mostCommon(arguments.top):
+		print("%s%s %i" % (left, right, frequency))
+	index.close()
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
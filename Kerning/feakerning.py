@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+"""
+Reads pair kerning from AFDKO feature code (.fea), without the Glyphs API.
+Understands glyph class definitions, inline classes and glyph ranges, pos/position
+and enum pos statements with single values or value records, statements spanning
+several lines, comments, include() files, and standalone lookups referenced from
+the kern feature. Files are tokenized line by line, so large kern files stream through.
+
+Named classes become kerning groups (@MMK_L_/@MMK_R_ keys) where a glyph
+is in only one class per side, and is not in another group of the font already.
+Everything else becomes glyph kerning, so existing groups are never changed.
+Different classes always become different groups, e.g. @MMK_L_A -> A, @A_1ST -> A_1ST.
+Like in the compiled font, the first statement for a pair wins.
+"""
+from __future__ import division, print_function
+
+import io, os, re
+from collections import namedtuple
+
+FeaKerning = namedtuple("FeaKerning", ("kerning", "leftGroups", "rightGroups", "classes", "skipped"))
+
+KERN_FEATURES = ("kern", "dist")
+_skippedKeywords = ("cursive", "base", "ligature", "mark", "'")
+_classPrefixes = ("MMK_L_", "MMK_R_", "public.kern1.", "public.kern2.")
+_classSuffixes = ("_1ST", "_2ND", "_LEFT", "_RIGHT")
+
+_tokenPattern = re.compile(
+	r'''\s*(?:
+	include\s*\((?P<include>[^)]*)\)
+	|(?P<number>-?\d+(?:\.\d+)?)(?![\w.])
+	|(?P<class>@[\w.\-]+)
+	|(?P<name>\\?[A-Za-z_.\\][\w.\-+*:^`~]*|\\\d+)
+	|(?P<punctuation>[\[\]{};=<>'(),\-])
+	)''', re.VERBOSE
+	)
+
+def tokenizeLine(line):
+	"""
+	(kind, value) for every token in one line of feature code, comments stripped.
+	"""
+	line = line.split("#", 1)[0]
+	position, length = 0, len(line)
+	while position < length:
+		match = _tokenPattern.match(line, position)
+		if not match or match.end() == position:
+			if line[position:].strip():
+				raise ValueError("Cannot parse feature code: %r" % line[position:position + 20])
+			return
+		position = match.end()
+		kind = match.lastgroup
+		value = match.group(kind)
+		if kind == "name":
+			value = value.lstrip("\\") # escaped glyph names
+		yield kind, value
+
+def tokenizeFile(path, encoding="utf-8"):
+	"""
+	Tokens of a .fea file, line by line, with include() files resolved relative to the including file.
+	"""
+	with io.open(path, "r", encoding=encoding, errors="replace") as feaFile:
+		for line in feaFile:
+			for kind, value in tokenizeLine(line):
+				if kind == "include":
+					includePath = os.path.join(os.path.dirname(path), value.strip())
+					for token in tokenizeFile(includePath, encoding=encoding):
+						yield token
+				else:
+					yield kind, value
+
+def tokenizeText(text, directory=""):
+	for line in text.splitlines():
+		for kind, value in tokenizeLine(line):
+			if kind == "include":
+				for token in tokenizeFile(os.path.join(directory, value.strip())):
+					yield token
+			else:
+				yield kind, value
+
+def statements(tokens):
+	"""
+	Groups tokens into statements: lists of (kind, value) ending with ; or {,
+	and a single ("punctuation", "}") for the end of a block.
+	"""
+	statement = []
+	for kind, value in tokens:
+		if kind == "punctuation" and value == "}":
+			if statement:
+				yield statement
+				statement = []
+			yield [(kind, value)]
+		elif kind == "punctuation" and value in ";{":
+			statement.append((kind, value))
+			yield statement
+			statement = []
+		else:
+			statement.append((kind, value))
+	if statement:
+		yield statement
+
+def groupNameForClass(className):
+	"""
+	'@MMK_L_A' -> 'A', '@public.kern2.O' -> 'O', '@T_1ST' -> 'T'.
+	"""
+	name = className.lstrip("@")
+	for prefix in _classPrefixes:
+		if name.startswith(prefix):
+			name = name[len(prefix):]
+			break
+	for suffix in _classSuffixes:
+		if name.endswith(suffix) and len(name) > len(suffix):
+			name = name[:-len(suffix)]
+			break
+	return name
+
+def glyphRange(firstName, lastName):
+	"""
+	Glyph names of a range like a-z or A.sc-Z.sc (one character varies), None if it is not a range.
+	"""
+	if len(firstName) != len(lastName):
+		return None
+	differences = [i for i, (a, b) in enumerate(zip(firstName, lastName)) if a != b]
+	if not differences:
+		return [firstName]
+	start, end = differences[0], differences[-1] + 1
+	first, last = firstName[start:end], lastName[start:end]
+	if first.isdigit() and last.isdigit():
+		return [firstName[:start] + str(i).zfill(len(first)) + firstName[end:] for i in range(int(first), int(last) + 1)]
+	if len(first) == 1 and first.isalpha() and last.isalpha() and first.isupper() == last.isupper() and first <= last:
+		return [firstName[:start] + chr(i) + firstName[end:] for i in range(ord(first), ord(last) + 1)]
+	return None
+
+class FeaKerningParser(object):
+	"""
+	Collects classes and pair kerning from a stream of tokens.
+	glyphNames: optional set of glyph names in the font, for telling hyphenated names from ranges,
+	and for skipping glyphs the font does not have.
+	renameGlyph: optional function that turns names in the feature code into names in the font,
+	e.g. production names into nice names.
+	existingLeftGroups, existingRightGroups: optional {glyphName: group} of the font, for either side of a pair.
+	leftGroups and rightGroups only collect the groups of glyphs that have none yet on that side.
+	"""
+
+	def __init__(self, glyphNames=None, features=KERN_FEATURES, renameGlyph=None, existingLeftGroups=None, existingRightGroups=None):
+		self.glyphNames = glyphNames
+		self.renameGlyph = renameGlyph
+		self.features = features
+		self.classes = {}
+		self.lookups = {}
+		self.leftGroups = {}
+		self.rightGroups = {}
+		self.existingLeftGroups = existingLeftGroups or {}
+		self.existingRightGroups = existingRightGroups or {}
+		self.groupNames = {"@MMK_L_": {}, "@MMK_R_": {}} # per side: {group name: class name}
+		self.pairs = [] # (leftKey, rightKey, value), in order of precedence
+		self.skipped = []
+		self.hasFeatures = False
+
+	def parse(self, tokens):
+		blocks = [] # stack of (kind, name, pairs or None)
+		skipBlockEnd = False
+		for statement in statements(tokens):
+			kind, value = statement[0]
+			if skipBlockEnd:
+				# the label after }, as in: } kern;
+				skipBlockEnd = False
+				if kind == "name" and len(statement) == 2:
+					continue
+			if value == "}":
+				if blocks:
+					self._closeBlock(blocks.pop(), blocks)
+				skipBlockEnd = True
+			elif statement[-1][1] == "{":
+				blocks.append(self._openBlock(statement, blocks))
+			elif kind == "class" and len(statement) > 1 and statement[1][1] == "=":
+				self.classes[value] = self._glyphs(statement[2:-1])
+			elif value in ("pos", "position", "enum", "enumerate", "ignore"):
+				pairs = blocks[-1][2] if blocks else self.pairs
+				if pairs is not None:
+					self._posStatement(statement, pairs)
+			elif value == "lookup" and len(statement) == 3:
+				# reference to a lookup defined earlier:
+				pairs = blocks[-1][2] if blocks else None
+				if pairs is not None:
+					pairs.extend(self.lookups.get(statement[1][1], ()))
+		if not self.hasFeatures:
+			# a file with standalone lookups only:
+			for lookupPairs in self.lookups.values():
+				self.pairs.extend(lookupPairs)
+		return self
+
+	def _openBlock(self, statement, blocks):
+		kind = statement[0][1]
+		name = statement[1][1] if len(statement) > 2 else None
+		if kind == "feature":
+			self.hasFeatures = True
+			pairs = self.pairs if name in self.features else None
+		elif kind == "lookup":
+			# collected separately, and added where they are defined or referenced in a kern feature:
+			pairs = []
+		else:
+			pairs = None
+		return kind, name, pairs
+
+	def _closeBlock(self, block, blocks):
+		kind, name, pairs = block
+		if kind == "lookup":
+			self.lookups[name] = pairs
+			outerPairs = blocks[-1][2] if blocks else None
+			if outerPairs is not None:
+				outerPairs.extend(pairs)
+
+	def _glyphs(self, tokens):
+		"""
+		Glyph names of a glyph class definition, inline class or single glyph.
+		"""
+		glyphs = []
+		tokens = [t for t in tokens if not t[1] in ("[", "]")]
+		i = 0
+		while i < len(tokens):
+			kind, value = tokens[i]
+			if kind == "class":
+				glyphs.extend(self.classes.get(value, ()))
+			elif kind == "name":
+				if i + 2 < len(tokens) and tokens[i + 1][1] == "-" and tokens[i + 2][0] == "name":
+					glyphs.extend(glyphRange(value, tokens[i + 2][1]) or (value, tokens[i + 2][1]))
+					i += 2
+				elif value.count("-") == 1 and (self.glyphNames is None or not value in self.glyphNames):
+					# a-z, unless the font has a glyph with that name:
+					glyphs.extend(glyphRange(*value.split("-")) or (value, ))
+				else:
+					glyphs.append(value)
+			i += 1
+		if self.renameGlyph:
+			glyphs = [self.renameGlyph(name) for name in glyphs]
+		if self.glyphNames is not None:
+			glyphs = [name for name in glyphs if name in self.glyphNames]
+		return glyphs
+
+	def _side(self, tokens, position):
+		"""
+		(kind, value, glyphs, next position) for the glyph, class or inline class at position.
+		"""
+		kind, value = tokens[position]
+		if value == "[":
+			end = position
+			while end < len(tokens) and tokens[end][1] != "]":
+				end += 1
+			return "inline", None, self._glyphs(tokens[position:end + 1]), end + 1
+		if kind == "class":
+			return "class", value, self.classes.get(value, []), position + 1
+		return "glyph", value, self._glyphs([tokens[position]]), position + 1
+
+	def _posStatement(self, statement, pairs):
+		tokens = statement[:-1] if statement[-1][1] == ";" else statement
+		if tokens[0][1] == "ignore" or any(value in _skippedKeywords for kind, value in tokens):
+			self.skipped.append(" ".join(value for kind, value in statement))
+			return
+		isEnum = tokens[0][1] in ("enum", "enumerate")
+		position = 2 if isEnum else 1
+		try:
+			leftKind, leftName, leftGlyphs, position = self._side(tokens, position)
+			rightKind, rightName, rightGlyphs, position = self._side(tokens, position)
+			value = self._value(tokens[position:])
+		except (IndexError, ValueError):
+			self.skipped.append(" ".join(value for kind, value in statement))
+			return
+		leftKeys = self._keys(leftKind, leftName, leftGlyphs, self.leftGroups, self.existingLeftGroups, "@MMK_L_", isEnum)
+		rightKeys = self._keys(rightKind, rightName, rightGlyphs, self.rightGroups, self.existingRightGroups, "@MMK_R_", isEnum)
+		if not leftKeys or not rightKeys:
+			# none of the glyphs are in the font:
+			self.skipped.append(" ".join(value for kind, value in statement))
+			return
+		for leftKey in leftKeys:
+			for rightKey in rightKeys:
+				pairs.append((leftKey, rightKey, value))
+
+	def _value(self, tokens):
+		numbers = [float(value) for kind, value in tokens if kind == "number"]
+		if len(numbers) == 1 and tokens[0][0] == "number":
+			return numbers[0]
+		if len(numbers) == 1 and len(tokens) == 3 and tokens[0][1] == "<" and tokens[2][1] == ">":
+			return numbers[0] # <xAdvance>
+		if len(numbers) == 4 and tokens[0][1] == "<":
+			return numbers[2] # <xPlacement yPlacement xAdvance yAdvance>
+		raise ValueError("Unsupported value record")
+
+	def _groupName(self, className, prefix):
+		"""
+		Group name for a class on one side, different from the group names of all other classes on that side.
+		"""
+		classForGroup = self.groupNames[prefix]
+		candidates = [groupNameForClass(className), className.lstrip("@")]
+		candidates.extend("%s.%i" % (candidates[-1], i) for i in range(2, len(classForGroup) + 3))
+		for group in candidates:
+			if classForGroup.setdefault(group, className) == className:
+				return group
+
+	def _keys(self, kind, className, glyphs, groups, existingGroups, prefix, isEnum):
+		"""
+		Kerning keys for one side: the group key for glyphs that are in the group of the class
+		or can join it, glyph names for all others (glyphs already in another group on this side
+		in the font or in the feature code, inline classes, enum).
+		"""
+		if kind != "class" or isEnum:
+			return list(glyphs)
+		group = self._groupName(className, prefix)
+		keys = []
+		for glyphName in glyphs:
+			currentGroup = existingGroups.get(glyphName) or groups.setdefault(glyphName, group)
+			if currentGroup != group:
+				keys.append(glyphName)
+		if len(keys) < len(glyphs):
+			keys.insert(0, prefix + group)
+		return keys
+
+	def kerning(self):
+		"""
+		{leftKey: {rightKey: value}}, the first statement for a pair wins.
+		"""
+		kerning = {}
+		for leftKey, rightKey, value in self.pairs:
+			kerning.setdefault(leftKey, {}).setdefault(rightKey, value)
+		return kerning
+
+	def result(self):
+		return FeaKerning(self.kerning(), self.leftGroups, self.rightGroups, self.classes, self.skipped)
+
+def readFeaKerning(path, glyphNames=None, features=KERN_FEATURES, renameGlyph=None, existingLeftGroups=None, existingRightGroups=None):
+	"""
+	FeaKerning for a .fea file: kerning {leftKey: {rightKey: value}} with glyph names
+	and @MMK_L_/@MMK_R_ group keys, the new kerning groups {glyphName: group} for either side
+	(only for glyphs without a group in existingLeftGroups/existingRightGroups),
+	the glyph classes, and the pos statements that could not be imported.
+	"""
+	parser = FeaKerningParser(glyphNames=glyphNames, features=features, renameGlyph=renameGlyph, existingLeftGroups=existingLeftGroups, existingRightGroups=existingRightGroups)
+	return parser.parse(tokenizeFile(path)).result()
+
+def parseFeaKerning(text, glyphNames=None, features=KERN_FEATURES, renameGlyph=None, directory="", existingLeftGroups=None, existingRightGroups=None):
+	"""
+	Same as readFeaKerning, for feature code in a string, include() paths relative to directory.
+	"""
+	parser = FeaKerningParser(glyphNames=glyphNames, features=features, renameGlyph=renameGlyph, existingLeftGroups=existingLeftGroups, existingRightGroups=existingRightGroups)
+	return parser.parse(tokenizeText(text, directory)).result()
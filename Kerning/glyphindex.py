@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Index of glyph attributes for picking the left and right glyphs of kerning checks.
+Does not need the Glyphs API: kernanalysis.py builds it from the open font
+once per run, so every selection is a few set operations
+instead of a walk through all glyphs.
+"""
+from __future__ import division, print_function
+
+import re
+from functools import lru_cache
+from collections import defaultdict, namedtuple
+
+GlyphRecord = namedtuple("GlyphRecord", ("name", "category", "subCategory", "case", "script", "export"))
+
+@lru_cache(maxsize=64)
+def nameMatcher(nameParts, atEnd=False):
+	"""
+	Compiled regex matching glyph names that contain any of the (tuple of) nameParts,
+	or end with one of them if atEnd is set. None if there are no name parts.
+	"""
+	nameParts = [part for part in nameParts if part]
+	if not nameParts:
+		return None
+	pattern = "|".join(re.escape(part) for part in sorted(nameParts, key=len, reverse=True))
+	if atEnd:
+		pattern = "(?:%s)$" % pattern
+	return re.compile(pattern)
+
+class GlyphAttributeIndex(object):
+	"""
+	records: GlyphRecords in glyph order, case being a name like "Uppercase" or None.
+	hasPaths: optional function glyphName -> bool, only called the first time pathsOnly is queried.
+	"""
+
+	def __init__(self, records, hasPaths=None):
+		self.names = []
+		self.order = {}
+		self.byCategory = defaultdict(set)
+		self.bySubCategory = defaultdict(set) # subcategories and case names
+		self.byScript = defaultdict(set)
+		self.exporting = set()
+		self._hasPaths = hasPaths
+		self._withPaths = None
+		self._matches = {}
+		for record in records:
+			name = record.name
+			self.order[name] = len(self.names)
+			self.names.append(name)
+			self.byCategory[record.category].add(name)
+			self.bySubCategory[record.subCategory or "Other"].add(name)
+			if record.case:
+				self.bySubCategory[record.case].add(name)
+			self.byScript[record.script].add(name)
+			if record.export:
+				self.exporting.add(name)
+
+	def __len__(self):
+		return len(self.names)
+
+	def withPaths(self):
+		if self._withPaths is None:
+			hasPaths = self._hasPaths or (lambda name: True)
+			self._withPaths = set(name for name in self.names if hasPaths(name))
+		return self._withPaths
+
+	def matching(self, nameParts, atEnd=False):
+		"""
+		Set of glyph names containing (or ending with) any of nameParts, cached per index.
+		"""
+		key = (tuple(nameParts), atEnd)
+		if not key in self._matches:
+			matcher = nameMatcher(*key)
+			self._matches[key] = set(name for name in self.names if matcher and matcher.search(name))
+		return self._matches[key]
+
+	def sorted(self, names):
+		"""
+		names in glyph order.
+		"""
+		return sorted(names, key=self.order.__getitem__)
+
+	def select(
+		self,
+		category=None,
+		subCategory=None,
+		script=None,
+		includeScriptless=True,
+		excludeNonExporting=True,
+		pathsOnly=False,
+		excludedNameParts=(),
+		mustContain=(),
+		suffix=None,
+		):
+		"""
+		Returns the names of all glyphs matching every given criterion, in glyph order.
+		subCategory matches the subcategory or the case (e.g., "Uppercase"), "Other" matches glyphs without subcategory.
+		script: None for all scripts, glyphs without script are included if includeScriptless is set.
+		excludedNameParts, mustContain: glyph names must not contain any/must contain at least one of these.
+		suffix: glyph names must end with it.
+		"""
+		candidates = set(self.names) if category is None else set(self.byCategory.get(category, ()))
+		if subCategory:
+			candidates &= self.bySubCategory.get(subCategory, set())
+		if script is not None:
+			scripts = self.byScript.get(script, set())
+			if includeScriptless:
+				scripts = scripts | self.byScript.get(None, set())
+			candidates &= scripts
+		if excludeNonExporting:
+			candidates &= self.exporting
+		if pathsOnly:
+			candidates &= self.withPaths()
+		if excludedNameParts:
+			candidates -= self.matching(excludedNameParts)
+		if mustContain:
+			candidates &= self.matching(mustContain)
+		if suffix:
+			candidates &= self.matching((suffix, ), atEnd=True)
+		return self.sorted(candidates)
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Estimates the size of the compiled kern lookup and predicts offset overflows before export.
+Does not need the Glyphs API: works on plain kerning dicts with glyph names (see kernanalysis.py)
+and a KerningGroupIndex, e.g. on a build server:
+
+python3 gposestimate.py MyFont.glyphs
+
+Packing follows fontTools feaLib/otlLib: group-to-group kerning becomes class kerning
+(PairPos Format 2, one matrix cell per left and right class), exceptions are enumerated
+into glyph pairs (PairPos Format 1), glyph pairs before class pairs in one lookup.
+Subtables beyond 64K are halved like fontTools splitPairPos does, a lookup beyond 64K
+needs extension lookups. Sizes are estimates (within a few percent), enough to see
+an overflow coming.
+"""
+from __future__ import division, print_function
+
+import os, sys
+from argparse import ArgumentParser
+from collections import namedtuple, OrderedDict
+from groupindex import GroupRecord, KerningGroupIndex
+
+LIMIT = 0xFFFF # largest Offset16
+VALUE_RECORD_SIZE = 2 # XAdvance
+DEVICE_OFFSET_SIZE = 2 # XAdvDevice, for variable fonts
+VARIATION_INDEX_SIZE = 6
+EXTENSION_SIZE = 8
+LOOKUP_HEADER_SIZE = 6
+FORMAT1_HEADER_SIZE = 10
+FORMAT2_HEADER_SIZE = 16
+
+# overflow risks, in ascending order:
+RISK_OK, RISK_TIGHT, RISK_SPLIT, RISK_EXTENSION = 0, 1, 2, 3
+riskNames = {
+	RISK_OK: "ok",
+	RISK_TIGHT: "tight: little headroom for more kerning",
+	RISK_SPLIT: "subtable overflow: needs subtable breaks (automatic in fontTools)",
+	RISK_EXTENSION: "lookup overflow: needs extension lookups",
+	}
+
+VARIABLE = "variable" # key of the variable font estimate
+
+SubtableEstimate = namedtuple("SubtableEstimate", ("format", "bytes", "records", "firstCount", "secondCount"))
+KernSizeEstimate = namedtuple("KernSizeEstimate", ("subtables", "bytes", "risk", "fill", "pairRecords", "classRecords"))
+
+def _isGroup(key):
+	return key.startswith("@")
+
+def _runs(glyphIds, classForGlyph=None):
+	"""
+	Number of runs of consecutive glyph IDs (with the same class, if classForGlyph is given) in sorted glyphIds.
+	"""
+	runs, previous = 0, None
+	for glyphId in glyphIds:
+		if previous is None or glyphId != previous + 1 or (classForGlyph and classForGlyph[glyphId] != classForGlyph[previous]):
+			runs += 1
+		previous = glyphId
+	return runs
+
+def coverageSize(glyphIds):
+	"""
+	Bytes of the smaller Coverage format for glyphIds.
+	"""
+	glyphIds = sorted(set(glyphIds))
+	return min(4 + 2 * len(glyphIds), 4 + 6 * _runs(glyphIds))
+
+def classDefSize(classForGlyph):
+	"""
+	Bytes of the smaller ClassDef format for {glyphId: class}, class 0 is not stored.
+	"""
+	glyphIds = sorted(glyphId for glyphId, classIndex in classForGlyph.items() if classIndex)
+	if not glyphIds:
+		return 6
+	return min(6 + 2 * (glyphIds[-1] - glyphIds[0] + 1), 4 + 6 * _runs(glyphIds, classForGlyph))
+
+def _varies(vector):
+	return len(set(vector)) > 1
+
+def _valueCost(vectors):
+	"""
+	(bytes per value record, bytes of device tables) for the value vectors (one value per master) of a subtable.
+	"""
+	deltas = set(vector for vector in vectors if _varies(vector))
+	if not deltas:
+		return VALUE_RECORD_SIZE, 0
+	return VALUE_RECORD_SIZE + DEVICE_OFFSET_SIZE, VARIATION_INDEX_SIZE * len(deltas)
+
+def _halved(items, size):
+	"""
+	Splits items in halves until every part fits an Offset16, like fontTools splitPairPos.
+	"""
+	if len(items) > 1 and size(items) > LIMIT:
+		middle = len(items) // 2
+		return _halved(items[:middle], size) + _halved(items[middle:], size)
+	return [items]
+
+def collectPairs(kernings, index, glyphIds):
+	"""
+	kernings: list of {leftKey: {rightKey: value}}, one per master.
+	Returns (glyph pairs {leftGlyphId: {rightGlyphId: vector}}, class pairs {(leftGroupKey, rightGroupKey): vector}),
+	vectors holding one value per master. Exceptions with groups are enumerated, non-exporting glyphs skipped.
+	"""
+	masterCount = len(kernings)
+	glyphPairs, classPairs = OrderedDict(), OrderedDict()
+
+	def idsForKey(key):
+		return [glyphIds[name] for name in index.membersForKey(key) if name in glyphIds]
+
+	for i, masterKerning in enumerate(kernings):
+		for leftKey, rightDict in masterKerning.items():
+			leftIsGroup = _isGroup(leftKey)
+			leftIds = idsForKey(leftKey)
+			if not leftIds:
+				continue
+			for rightKey, value in rightDict.items():
+				if leftIsGroup and _isGroup(rightKey):
+					vector = classPairs.setdefault((leftKey, rightKey), [0.0] * masterCount)
+					vector[i] = value
+					continue
+				for leftId in leftIds:
+					rightVectors = glyphPairs.setdefault(leftId, OrderedDict())
+					for rightId in idsForKey(rightKey):
+						vector = rightVectors.setdefault(rightId, [None] * masterCount)
+						if vector[i] is None: # first rule wins, like in feaLib
+							vector[i] = value
+	for rightVectors in glyphPairs.values():
+		for rightId, vector in rightVectors.items():
+			rightVectors[rightId] = tuple(value or 0.0 for value in vector)
+	classPairs = OrderedDict((pair, tuple(vector)) for pair, vector in classPairs.items())
+	return glyphPairs, classPairs
+
+def format1Subtables(glyphPairs):
+	"""
+	SubtableEstimates for glyph pair kerning {leftGlyphId: {rightGlyphId: vector}}.
+	"""
+	if not glyphPairs:
+		return []
+
+	def size(leftIds):
+		vectors = [vector for leftId in leftIds for vector in glyphPairs[leftId].values()]
+		valueRecordSize, deviceBytes = _valueCost(vectors)
+		# identical PairSets (e.g., of the members of a group with the same exceptions) are stored once:
+		uniquePairSets = set(tuple(glyphPairs[leftId].items()) for leftId in leftIds)
+		pairSets = sum(2 + len(pairSet) * (2 + valueRecordSize) for pairSet in uniquePairSets)
+		return FORMAT1_HEADER_SIZE + 2 * len(leftIds) + pairSets + coverageSize(leftIds) + deviceBytes
+
+	subtables = []
+	for leftIds in _halved(sorted(glyphPairs), size):
+		records = sum(len(glyphPairs[leftId]) for leftId in leftIds)
+		rightCount = len(set(rightId for leftId in leftIds for rightId in glyphPairs[leftId]))
+		subtables.append(SubtableEstimate(1, size(leftIds), records, len(leftIds), rightCount))
+	return subtables
+
+def format2Subtables(classPairs, index, glyphIds):
+	"""
+	SubtableEstimates for class kerning {(leftGroupKey, rightGroupKey): vector}.
+	Kerning groups do not overlap, so without overflows all classes fit into one subtable.
+	"""
+	if not classPairs:
+		return []
+	members = {}
+	for leftKey, rightKey in classPairs:
+		for key in (leftKey, rightKey):
+			if not key in members:
+				members[key] = sorted(glyphIds[name] for name in index.membersForKey(key) if name in glyphIds)
+	leftKeys = sorted(set(leftKey for leftKey, rightKey in classPairs if members[leftKey]), key=lambda key: members[key][0])
+	rightKeys = sorted(set(rightKey for leftKey, rightKey in classPairs if members[rightKey]), key=lambda key: members[key][0])
+	secondClasses = {}
+	for classIndex, rightKey in enumerate(rightKeys, 1):
+		for glyphId in members[rightKey]:
+			secondClasses[glyphId] = classIndex
+	classDef2Size = classDefSize(secondClasses)
+	class2Count = len(rightKeys) + 1 # class 0: all other glyphs
+
+	def size(keys):
+		keySet = set(keys)
+		vectors = [vector for (leftKey, rightKey), vector in classPairs.items() if leftKey in keySet]
+		valueRecordSize, deviceBytes = _valueCost(vectors)
+		# like otlLib, the largest left class becomes class 0 and is only in the coverage:
+		largest = max(keys, key=lambda key: len(members[key]))
+		firstClasses = {}
+		for classIndex, leftKey in enumerate(keys, 1):
+			for glyphId in members[leftKey]:
+				firstClasses[glyphId] = 0 if leftKey == largest else classIndex
+		matrix = len(keys) * class2Count * valueRecordSize
+		return FORMAT2_HEADER_SIZE + matrix + coverageSize(firstClasses) + classDefSize(firstClasses) + classDef2Size + deviceBytes
+
+	subtables = []
+	for keys in _halved(leftKeys, size):
+		subtables.append(SubtableEstimate(2, size(keys), len(keys) * class2Count, len(keys), class2Count))
+	return subtables
+
+def estimateKernSize(kernings, index, glyphOrder=None, tightRatio=0.75):
+	"""
+	kernings: list of {leftKey: {rightKey: value}}, one for a static font, one per master for a variable font.
+	glyphOrder: exporting glyph names in export order, defaults to the order of index.
+	Returns a KernSizeEstimate: its subtables, the bytes of the kern lookup,
+	the risk (RISK_OK ... RISK_EXTENSION), and how much of an Offset16 the largest span fills (fill).
+	"""
+	if glyphOrder is None:
+		glyphOrder = [name for name in index.glyphOrder if name in index.exporting]
+	glyphIds = {name: glyphId for glyphId, name in enumerate(glyphOrder)}
+	glyphPairs, classPairs = collectPairs(kernings, index, glyphIds)
+	pairSubtables = format1Subtables(glyphPairs)
+	classSubtables = format2Subtables(classPairs, index, glyphIds)
+	subtables = pairSubtables + classSubtables
+
+	lookupBytes = LOOKUP_HEADER_SIZE + 2 * len(subtables) + sum(subtable.bytes for subtable in subtables)
+	# the largest span an Offset16 has to cross: a whole subtable, or from the lookup to its last subtable
+	largestSpan = max([subtable.bytes for subtable in subtables] + [lookupBytes - subtables[-1].bytes if subtables else 0])
+	fill = largestSpan / LIMIT
+	if lookupBytes > LIMIT:
+		risk = RISK_EXTENSION
+		lookupBytes += EXTENSION_SIZE * len(subtables)
+	elif len(pairSubtables) > 1 or len(classSubtables) > 1:
+		risk = RISK_SPLIT
+	elif fill >= tightRatio:
+		risk = RISK_TIGHT
+	else:
+		risk = RISK_OK
+
+	return KernSizeEstimate(
+		subtables,
+		lookupBytes,
+		risk,
+		fill,
+		sum(subtable.records for subtable in pairSubtables),
+		sum(subtable.records for subtable in classSubtables),
+		)
+
+def estimateFontKernSize(kerning, index, masterIds=None, glyphOrder=None, tightRatio=0.75):
+	"""
+	kerning: {masterId: {leftKey: {rightKey: value}}}.
+	Returns {masterId: KernSizeEstimate} for static fonts of the masters,
+	plus one for a variable font under the key VARIABLE if there is more than one master.
+	Static instances between masters contain the pairs of both, so expect them to be a bit larger.
+	"""
+	masterIds = list(masterIds or kerning.keys())
+	estimates = OrderedDict()
+	for masterId in masterIds:
+		estimates[masterId] = estimateKernSize([kerning.get(masterId, {})], index, glyphOrder=glyphOrder, tightRatio=tightRatio)
+	if len(masterIds) > 1:
+		estimates[VARIABLE] = estimateKernSize([kerning.get(m, {}) for m in masterIds], index, glyphOrder=glyphOrder, tightRatio=tightRatio)
+	return estimates
+
+def worstRisk(estimates):
+	return max([estimate.risk for estimate in estimates.values()] or [RISK_OK])
+
+def describeEstimate(name, estimate):
+	"""
+	One line for the report, e.g.: 'Bold: 2 subtables, 41,520 bytes (63% of 64K), ok'.
+	"""
+	formats = ", ".join(
+		"%i× Format %i" % (count, subtableFormat) for subtableFormat, count in (
+			(1, sum(1 for s in estimate.subtables if s.format == 1)),
+			(2, sum(1 for s in estimate.subtables if s.format == 2)),
+			) if count
+		)
+	return "%s: %i subtable%s (%s), %s bytes (%i%% of 64K), %s" % (
+		name,
+		len(estimate.subtables),
+		"" if len(estimate.subtables) == 1 else "s",
+		formats or "no kerning",
+		"{:,}".format(estimate.bytes),
+		round(100 * estimate.fill),
+		riskNames[estimate.risk],
+		)
+
+# ESTIMATING WITHOUT THE APP
+
+def indexForHeadlessFont(font):
+	"""
+	KerningGroupIndex for a HeadlessFont from glyphsfile.py.
+	"""
+	return KerningGroupIndex([GroupRecord(g.name, None, g.leftKerningGroup, g.rightKerningGroup, g.export) for g in font.glyphs.values()])
+
+parser = ArgumentParser(description="Estimate the size of the kern lookup per master and predict GPOS offset overflows, without the Glyphs app.")
+parser.add_argument("font", help="A .glyphs file or .glyphspackage")
+parser.add_argument("--tight", type=float, default=0.75, help="Warn if an offset span fills more than this share of 64K (default: 0.75)")
+
+def main(arguments=None):
+	arguments = parser.parse_args(arguments)
+	sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+	from glyphsfile import readFont
+	font = readFont(arguments.font)
+	estimates = estimateFontKernSize(font.kerning, indexForHeadlessFont(font), masterIds=font.masterIds, tightRatio=arguments.tight)
+	masterNames = dict(font.masters)
+	for masterId, estimate in estimates.items():
+		print(describeEstimate(masterNames.get(masterId, masterId), estimate))
+	return 1 if worstRisk(estimates) >= RISK_SPLIT else 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Two-way index between kerning groups and their glyphs.
+Does not need the Glyphs API: kernanalysis.py builds it from the open font
+once per run, so kerning sides resolve without walking all glyphs.
+
+Naming follows the kerning dicts: the LEFT side of a pair is a glyph's RIGHT
+kerning group (@MMK_L_...), the RIGHT side of a pair its LEFT kerning group (@MMK_R_...).
+"""
+from __future__ import division, print_function
+
+from collections import namedtuple, OrderedDict
+
+GroupRecord = namedtuple("GroupRecord", ("name", "glyphId", "leftKerningGroup", "rightKerningGroup", "export"))
+
+LEFT_PREFIX, RIGHT_PREFIX = "@MMK_L_", "@MMK_R_"
+
+def groupNameForKey(key):
+	"""
+	'@MMK_L_A' -> 'A', None for keys that are not groups.
+	"""
+	if key.startswith(LEFT_PREFIX) or key.startswith(RIGHT_PREFIX):
+		return key[7:]
+	return None
+
+class KerningGroupIndex(object):
+	"""
+	records: GroupRecords in glyph order.
+	"""
+
+	def __init__(self, records):
+		self.glyphNames = set()
+		self.glyphOrder = []
+		self.glyphNameForId = {}
+		self.exporting = set()
+		self.leftSideMembers = OrderedDict() # group name -> glyph names with this right kerning group
+		self.rightSideMembers = OrderedDict() # group name -> glyph names with this left kerning group
+		self.leftSideGroup = {} # glyph name -> its group on the left side of a pair (right kerning group)
+		self.rightSideGroup = {} # glyph name -> its group on the right side of a pair (left kerning group)
+		for record in records:
+			name = record.name
+			self.glyphNames.add(name)
+			self.glyphOrder.append(name)
+			if record.glyphId:
+				self.glyphNameForId[record.glyphId] = name
+			if record.export:
+				self.exporting.add(name)
+			if record.rightKerningGroup:
+				self.leftSideMembers.setdefault(record.rightKerningGroup, []).append(name)
+				self.leftSideGroup[name] = record.rightKerningGroup
+			if record.leftKerningGroup:
+				self.rightSideMembers.setdefault(record.leftKerningGroup, []).append(name)
+				self.rightSideGroup[name] = record.leftKerningGroup
+		self._representatives = {}
+
+	def members(self, groupName, isLeftSide=True):
+		"""
+		Glyph names in the group, in glyph order.
+		isLeftSide: the group is on the left side of a pair, i.e., a right kerning group.
+		"""
+		membersByGroup = self.leftSideMembers if isLeftSide else self.rightSideMembers
+		return membersByGroup.get(groupName, [])
+
+	def membersForKey(self, key):
+		"""
+		Glyph names for a kerning key: members of @MMK_L_/@MMK_R_ groups, or the glyph itself.
+		"""
+		groupName = groupNameForKey(key)
+		if groupName is not None:
+			return self.members(groupName, isLeftSide=key.startswith(LEFT_PREFIX))
+		glyphName = self.glyphNameForId.get(key, key)
+		return [glyphName] if glyphName in self.glyphNames else []
+
+	def groupKey(self, glyphName, isLeftSide=True):
+		"""
+		@MMK key of the group the glyph belongs to on that side of a pair, None if it has no group.
+		"""
+		groupName = (self.leftSideGroup if isLeftSide else self.rightSideGroup).get(glyphName)
+		if not groupName:
+			return None
+		return (LEFT_PREFIX if isLeftSide else RIGHT_PREFIX) + groupName
+
+	def representative(self, groupName, isLeftSide=True):
+		"""
+		One glyph to show for the group: the glyph named like the group if it is a member,
+		otherwise the first exporting member, otherwise the first member. None for orphaned groups.
+		"""
+		cacheKey = (groupName, isLeftSide)
+		if not cacheKey in self._representatives:
+			members = self.members(groupName, isLeftSide=isLeftSide)
+			if groupName in members:
+				choice = groupName
+			else:
+				exportingMembers = [name for name in members if name in self.exporting]
+				choice = (exportingMembers or members or [None])[0]
+			self._representatives[cacheKey] = choice
+		return self._representatives[cacheKey]
+
+	def glyphNameForKey(self, key):
+		"""
+		Glyph name to show for a kerning key (group, glyph ID or glyph name), None if orphaned.
+		"""
+		groupName = groupNameForKey(key)
+		if groupName is not None:
+			return self.representative(groupName, isLeftSide=key.startswith(LEFT_PREFIX))
+		glyphName = self.glyphNameForId.get(key, key)
+		return glyphName if glyphName in self.glyphNames else None
+
+	def orphans(self, kerning):
+		"""
+		Keys in kerning ({leftKey: {rightKey: value}}) without glyphs in the font:
+		returns (orphaned left keys, orphaned right keys), each in order of appearance.
+		"""
+		orphanedLeftKeys, orphanedRightKeys = OrderedDict(), OrderedDict()
+		for leftKey, rightDict in kerning.items():
+			if not leftKey in orphanedLeftKeys and self.glyphNameForKey(leftKey) is None:
+				orphanedLeftKeys[leftKey] = True
+			for rightKey in rightDict:
+				if not rightKey in orphanedRightKeys and self.glyphNameForKey(rightKey) is None:
+					orphanedRightKeys[rightKey] = True
+		return list(orphanedLeftKeys), list(orphanedRightKeys)
@@ -1,10 +1,26 @@
 # -*- coding: utf-8 -*--- --
 from __future__ import print_function
-from GlyphsApp import Glyphs
+import os, sys
+from hashlib import md5
+from GlyphsApp import Glyphs, GSOFFCURVE
 
 if Glyphs.versionNumber >= 3.0:
 	from GlyphsApp import LTR
 from Foundation import NSNotFound
+from kernprofiles import *
+from kernresolver import KerningResolver
+from glyphindex import GlyphRecord, GlyphAttributeIndex
+from groupindex import GroupRecord, KerningGroupIndex
+from kerningtable import KerningTable, GLYPH_GLYPH, GLYPH_GROUP, GROUP_GLYPH, GROUP_GROUP
+from bigramindex import BigramIndex
+from kernaudit import KerningAudit
+from gposestimate import estimateFontKernSize, describeEstimate, VARIABLE, RISK_TIGHT
+
+# import from enclosing folder:
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from outlinegeometry import monotonePieces, exactMinDistance
+from workerprocesses import pythonExecutable
+from glyphpatterns import PatternSet, parseCategoryToken
 intervalList = (1, 3, 5, 10, 20)
 categoryList = (
 	"Letter:Uppercase",
@@ -42,6 +58,15 @@ if Glyphs.versionNumber >= 3:
 		"Uppercase": GSUppercase,
 		"uppercase": GSUppercase,
 		}
+	caseNames = {
+		GSUppercase: "Uppercase",
+		GSLowercase: "Lowercase",
+		GSMinor: "Minor",
+		GSSmallcaps: "Smallcaps",
+		GSNoCase: "NoCase",
+		}
+else:
+	cases, caseNames = {}, {}
 
 def stringToListOfGlyphsForFont(string, Font, report=True, excludeNonExporting=True, suffix=""):
 	# parse string into parseList:
@@ -78,14 +103,13 @@ def stringToListOfGlyphsForFont(string, Font, report=True, excludeNonExporting=T
 
 	# go through parseList and find corresponding glyph in Font:
 	glyphList = []
+	index = None
 	for parsedName in parseList:
 
 		if parsedName.startswith("@"):
 			# category and subcategory:
-			if ":" in parsedName:
-				category, subcategory = parsedName[1:].split(":")
-			else:
-				category, subcategory = parsedName[1:], None
+			category, subcategory = parseCategoryToken(parsedName)
+			index = index or glyphIndex(Font)
 			# TODO parse
 			categoryGlyphs = listOfNamesForCategories(
 				Font,
@@ -95,6 +119,7 @@ def stringToListOfGlyphsForFont(string, Font, report=True, excludeNonExporting=T
 				None, # excludedGlyphNameParts, # need to implement still
 				excludeNonExporting, #OK
 				suffix=suffix,
+				index=index,
 				)
 			if categoryGlyphs:
 				glyphList += categoryGlyphs
@@ -137,12 +162,7 @@ def effectiveKerning(leftGlyphName, rightGlyphName, thisFont, thisFontMasterID,
 	leftLayer = thisFont.glyphs[leftGlyphName].layers[thisFontMasterID]
 	rightLayer = thisFont.glyphs[rightGlyphName].layers[thisFontMasterID]
 	if Glyphs.versionNumber >= 3:
-		direction = 0 #LTR
-		if directionSensitive:
-			if thisFont.currentTab:
-				direction = thisFont.currentTab.direction
-			else: # no tab open
-				direction = Glyphs.userInterfaceLayoutDirection()
+		direction = kerningDirection(thisFont, directionSensitive)
 		effectiveKerning = leftLayer.nextKerningForLayer_direction_(rightLayer, direction)
 	else:
 		effectiveKerning = leftLayer.rightKerningForLayer_(rightLayer)
@@ -151,6 +171,98 @@ def effectiveKerning(leftGlyphName, rightGlyphName, thisFont, thisFontMasterID,
 	else:
 		return 0.0
 
+def kerningResolver(thisFont, thisFontMasterID):
+	"""
+	Reads kerning and kerning groups of a master once,
+	returns a KerningResolver for fast lookups of many pairs (LTR).
+	"""
+	index = groupIndex(thisFont)
+	masterKerning = {}
+	if thisFont.kerning and thisFontMasterID in thisFont.kerning:
+		for leftKey, rightDict in thisFont.kerning[thisFontMasterID].items():
+			masterKerning[leftKey] = {rightKey: float(value) for rightKey, value in rightDict.items()}
+	return KerningResolver(masterKerning, leftGroups=index.leftSideGroup, rightGroups=index.rightSideGroup, glyphNameForKey=index.glyphNameForId)
+
+def kerningTable(thisFont, masterIDs=None):
+	"""
+	Reads the kerning of all (or the given) masters once, returns a KerningTable
+	with one value column per master. Keys are the same as in thisFont.kerning (glyph IDs or @MMK groups).
+	"""
+	if masterIDs is None:
+		masterIDs = [m.id for m in thisFont.masters]
+	kerning = {}
+	for masterID in masterIDs:
+		kerning[masterID] = {}
+		if thisFont.kerning and masterID in thisFont.kerning:
+			for leftKey, rightDict in thisFont.kerning[masterID].items():
+				kerning[masterID][leftKey] = {rightKey: float(value) for rightKey, value in rightDict.items()}
+	return KerningTable(kerning, masterIds=masterIDs)
+
+def kerningByName(thisFont, masterIDs=None):
+	"""
+	{masterID: {leftKey: {rightKey: value}}} for all (or the given) masters,
+	with glyph names instead of glyph IDs, e.g. for kernoptimizer.py.
+	"""
+	if masterIDs is None:
+		masterIDs = [m.id for m in thisFont.masters]
+	glyphNameForId = groupIndex(thisFont).glyphNameForId
+	kerning = {}
+	for masterID in masterIDs:
+		kerning[masterID] = {}
+		if thisFont.kerning and masterID in thisFont.kerning:
+			for leftKey, rightDict in thisFont.kerning[masterID].items():
+				kerning[masterID][glyphNameForId.get(leftKey, leftKey)] = {glyphNameForId.get(k, k): float(v) for k, v in rightDict.items()}
+	return kerning
+
+def kerningAudit(thisFont, masterIDs=None, exportingOnly=True, symmetricGlyphs=(), tolerance=0.0):
+	"""
+	KerningAudit of all (or the given) masters: group width minima, overkern ratios, sign flips,
+	and uneven kerning within each list of glyph names in symmetricGlyphs.
+	exportingOnly: ignore non-exporting glyphs, and groups with only non-exporting members.
+	"""
+	if masterIDs is None:
+		masterIDs = [m.id for m in thisFont.masters]
+	glyphs = [g for g in thisFont.glyphs if g.export or not exportingOnly]
+	widths = {masterID: {g.name: g.layers[masterID].width for g in glyphs} for masterID in masterIDs}
+	table = KerningTable(kerningByName(thisFont, masterIDs), masterIds=masterIDs)
+	return KerningAudit(table, groupIndex(thisFont), widths, symmetricGlyphs=symmetricGlyphs, tolerance=tolerance)
+
+def kernSizeEstimates(thisFont, masterIDs=None):
+	"""
+	Estimated size of the compiled kern lookup, see gposestimate.py:
+	{masterID: KernSizeEstimate} for static fonts, plus VARIABLE for a variable font.
+	"""
+	if masterIDs is None:
+		masterIDs = [m.id for m in thisFont.masters]
+	return estimateFontKernSize(kerningByName(thisFont, masterIDs), groupIndex(thisFont), masterIds=masterIDs)
+
+def kernSizeWarnings(thisFont, masterIDs=None, minimumRisk=RISK_TIGHT):
+	"""
+	Report lines for all estimates with an overflow risk of minimumRisk or more, empty list if all is fine.
+	"""
+	masterNames = {m.id: m.name for m in thisFont.masters}
+	masterNames[VARIABLE] = "Variable font"
+	estimates = kernSizeEstimates(thisFont, masterIDs)
+	return [describeEstimate(masterNames.get(key, key), estimate) for key, estimate in estimates.items() if estimate.risk >= minimumRisk]
+
+def kerningDirection(thisFont, directionSensitive=True):
+	direction = 0 #LTR
+	if directionSensitive and Glyphs.versionNumber >= 3:
+		if thisFont.currentTab:
+			direction = thisFont.currentTab.direction
+		else: # no tab open
+			direction = Glyphs.userInterfaceLayoutDirection()
+	return direction
+
+def effectiveKerningMatrix(thisFont, thisFontMasterID, leftGlyphNames, rightGlyphNames, directionSensitive=True):
+	"""
+	Effective kerning for all pairings of leftGlyphNames and rightGlyphNames, as M×N list of lists.
+	Resolved in one go from the kerning dict for LTR, pair by pair through the app for RTL.
+	"""
+	if kerningDirection(thisFont, directionSensitive) == 0:
+		return kerningResolver(thisFont, thisFontMasterID).kerningMatrix(leftGlyphNames, rightGlyphNames)
+	return [[effectiveKerning(l, r, thisFont, thisFontMasterID, directionSensitive) for r in rightGlyphNames] for l in leftGlyphNames]
+
 # older version:
 # def effectiveKerning( leftGlyphName, rightGlyphName, thisFont, thisFontMasterID ):
 # leftLayer = thisFont.glyphs[leftGlyphName].layers[thisFontMasterID]
@@ -166,36 +278,141 @@ def effectiveKerning(leftGlyphName, rightGlyphName, thisFont, thisFontMasterID,
 # # else:
 # # 	return 0.0
 
-def listOfNamesForCategories(thisFont, requiredCategory, requiredSubCategory, requiredScript, excludedGlyphNameParts, excludeNonExporting, suffix=""):
-	nameList = []
-	for thisGlyph in thisFont.glyphs:
-		thisScript = thisGlyph.script
-		glyphName = thisGlyph.name
-		nameIsOK = True
-
-		if suffix:
-			nameIsOK = glyphName.endswith(suffix)
-
-		if nameIsOK and excludedGlyphNameParts:
-			for thisNamePart in excludedGlyphNameParts:
-				nameIsOK = nameIsOK and not thisNamePart in glyphName
-
-		if nameIsOK and (thisGlyph.export or not excludeNonExporting):
-			if thisScript == None or thisScript == requiredScript:
-				if thisGlyph.category == requiredCategory:
-					if Glyphs.versionNumber >= 3:
-						# GLYPHS 3
-						if requiredSubCategory is None or thisGlyph.subCategory == requiredSubCategory or (
-							requiredSubCategory in cases.keys() and thisGlyph.case == cases[requiredSubCategory]
-							):
-							nameList.append(glyphName)
-					else:
-						# GLYPHS 2
-						if requiredSubCategory is None or thisGlyph.subCategory == requiredSubCategory:
-							nameList.append(glyphName)
+def glyphIndex(thisFont):
+	"""
+	Builds a GlyphAttributeIndex for thisFont. Nothing is cached, so it reflects the current state of the font:
+	for several lookups in one run, build it once and pass it on (e.g., as index to namesForCategory).
+	"""
 
+	records = []
+	for thisGlyph in thisFont.glyphs:
+		case = caseNames.get(thisGlyph.case) if Glyphs.versionNumber >= 3 else None
+		records.append(GlyphRecord(thisGlyph.name, thisGlyph.category, thisGlyph.subCategory, case, thisGlyph.script, thisGlyph.export))
+
+	def hasPaths(glyphName):
+		return bool(thisFont.glyphs[glyphName].layers[0].paths)
+
+	return GlyphAttributeIndex(records, hasPaths=hasPaths)
+
+def groupIndex(thisFont):
+	"""
+	Builds a KerningGroupIndex for thisFont, for resolving kerning keys to glyphs and vice versa.
+	Like glyphIndex(), it is not cached.
+	"""
+	records = [GroupRecord(g.name, g.id, g.leftKerningGroup, g.rightKerningGroup, g.export) for g in thisFont.glyphs]
+	return KerningGroupIndex(records)
+
+def namesForCategory(
+	thisFont,
+	category,
+	subCategory=None,
+	script=None,
+	excludedGlyphNameParts=None,
+	excludeNonExporting=True,
+	pathGlyphsOnly=False,
+	mustContain=None,
+	suffix="",
+	includeScriptless=True,
+	index=None,
+	):
+	"""
+	Names of glyphs in thisFont matching the criteria, in glyph order.
+	See GlyphAttributeIndex.select() for details. index: glyphIndex(thisFont), if you already built it.
+	"""
+	if subCategory in cases:
+		subCategory = caseNames.get(cases[subCategory], subCategory)
+	return (index or glyphIndex(thisFont)).select(
+		category=category,
+		subCategory=subCategory,
+		script=script,
+		includeScriptless=includeScriptless,
+		excludeNonExporting=excludeNonExporting,
+		pathsOnly=pathGlyphsOnly,
+		excludedNameParts=tuple(excludedGlyphNameParts or ()),
+		mustContain=tuple(mustContain or ()),
+		suffix=suffix,
+		)
+
+def namesMatchingPatterns(thisFont, patterns, partial=False, index=None):
+	"""
+	Names of all glyphs matching any of the patterns (glyph names, globs, re: regexes, @Category:Subcategory),
+	in glyph order, see glyphpatterns.py. partial: names and globs may match anywhere in a glyph name.
+	"""
+	index = index or glyphIndex(thisFont)
+
+	def categoryMembers(category, subCategory):
+		return index.select(category=category, subCategory=subCategory, excludeNonExporting=False)
+
+	return PatternSet(patterns, partial=partial).select(index.names, categoryMembers)
+
+def listOfNamesForCategories(thisFont, requiredCategory, requiredSubCategory, requiredScript, excludedGlyphNameParts, excludeNonExporting, suffix="", index=None):
+	nameList = namesForCategory(
+		thisFont, requiredCategory, requiredSubCategory, requiredScript, excludedGlyphNameParts=excludedGlyphNameParts, excludeNonExporting=excludeNonExporting, suffix=suffix, index=index
+		)
 	return [thisFont.glyphs[n] for n in nameList]
 
+# corpus pair frequencies, see bigramindex.py:
+BIGRAM_INDEX_PREF = "com.mekkablue.BigramIndex.path"
+bigramIndexCache = {}
+
+def bigramIndex(path=None):
+	"""
+	The BigramIndex at path (default: the one last built with 'Build Pair Frequency Index'), None if there is none.
+	"""
+	path = path or Glyphs.defaults[BIGRAM_INDEX_PREF]
+	if not path or not os.path.exists(path):
+		return None
+	key = (path, os.path.getmtime(path))
+	if not key in bigramIndexCache:
+		# outdated indexes are only dropped, not closed: callers may still hold them (or their glyphFrequency).
+		# The index file is replaced, not overwritten, so their mapping stays valid until they are garbage-collected:
+		bigramIndexCache.clear()
+		bigramIndexCache[key] = BigramIndex(path)
+	return bigramIndexCache[key]
+
+def charactersForGlyphs(thisFont):
+	"""
+	{glyphName: character} for encoded glyphs, and for variants like a.sc or A.ss01 the character of their base glyph.
+	"""
+	characterForGlyph = {}
+	for thisGlyph in thisFont.glyphs:
+		if thisGlyph.unicode:
+			characterForGlyph[thisGlyph.name] = chr(int(thisGlyph.unicode, 16))
+	for thisGlyph in thisFont.glyphs:
+		if not thisGlyph.name in characterForGlyph:
+			baseName = nameUntilFirstPeriod(thisGlyph.name)
+			if baseName in characterForGlyph:
+				characterForGlyph[thisGlyph.name] = characterForGlyph[baseName]
+	return characterForGlyph
+
+def pairFrequency(thisFont, path=None):
+	"""
+	Function (leftGlyphName, rightGlyphName) -> how often the pair occurs in the corpus, None without a bigram index.
+	"""
+	index = bigramIndex(path)
+	if index is None:
+		return None
+	return index.glyphFrequency(charactersForGlyphs(thisFont))
+
+def sortedByFrequency(pairs, frequency):
+	"""
+	(leftName, rightName, ...) tuples, most frequent pairs first, otherwise in their original order.
+	"""
+	return sorted(pairs, key=lambda pair: -frequency(pair[0], pair[1]))
+
+def namesByFrequency(glyphNames, otherGlyphNames, frequency, isLeftSide=True):
+	"""
+	glyphNames sorted by how often they occur next to otherGlyphNames (on the right if isLeftSide), most frequent first.
+	"""
+	otherGlyphNames = list(otherGlyphNames)
+
+	def total(glyphName):
+		if isLeftSide:
+			return sum(frequency(glyphName, otherName) for otherName in otherGlyphNames)
+		return sum(frequency(otherName, glyphName) for otherName in otherGlyphNames)
+
+	return sorted(glyphNames, key=lambda glyphName: -total(glyphName))
+
 def splitString(string, delimiter=":", minimum=2):
 	# split string into a list:
 	returnList = string.split(delimiter)
@@ -226,33 +443,246 @@ def measureLayerAtHeightFromLeftOrRight(thisLayer, height, leftSide=True):
 	except:
 		return None
 
-def isHeightInIntervals(height, ignoreIntervals):
-	if ignoreIntervals:
-		for interval in ignoreIntervals:
-			if height <= interval[1] and height >= interval[0]:
-				return True
-	return False
-
-def minDistanceBetweenTwoLayers(leftLayer, rightLayer, interval=5.0, kerning=0.0, report=False, ignoreIntervals=[]):
-	# correction = leftLayer.RSB+rightLayer.LSB
-	if Glyphs.versionNumber>=3.2:
-		leftBounds, rightBounds = leftLayer.fastBounds(), rightLayer.fastBounds()
-	else:
-		leftBounds, rightBounds = leftLayer.bounds, rightLayer.bounds
-	topY = min(leftBounds.origin.y + leftBounds.size.height, rightBounds.origin.y + rightBounds.size.height)
-	bottomY = max(leftBounds.origin.y, rightBounds.origin.y)
-	distance = topY - bottomY
-	minDist = None
-	for i in range(int(distance / interval)):
-		height = bottomY + i * interval
-		if not isHeightInIntervals(height, ignoreIntervals) or not ignoreIntervals:
-			left = leftLayer.rsbAtHeight_(height)
-			right = rightLayer.lsbAtHeight_(height)
-			if left < NSNotFound and right < NSNotFound: # avoid gaps like in i or j
-				total = left + right + kerning # +correction
-				if minDist == None or minDist > total:
-					minDist = total
-	return minDist
+def layerBounds(thisLayer):
+	if Glyphs.versionNumber >= 3.2:
+		return thisLayer.fastBounds()
+	return thisLayer.bounds
+
+# sampled profiles, keyed by (glyph id, layer id, step, decompose), most recently used ones only:
+profileCache = ProfileCache()
+
+def layerFingerprint(thisLayer):
+	"""
+	Cheap summary of the current state of a layer.
+	If it differs from the one stored with a cached profile, the profile is outdated.
+	Layers with components also include the state of their (nested) base glyphs,
+	which can change without touching the composite.
+	"""
+	bounds = layerBounds(thisLayer)
+	thisGlyph = thisLayer.parent
+	return (
+		str(getattr(thisGlyph, "lastChange", None)),
+		thisLayer.width,
+		bounds.origin.x,
+		bounds.origin.y,
+		bounds.size.width,
+		bounds.size.height,
+		layerContentHash(thisLayer) if thisLayer.components else None,
+		)
+
+def layerMeasure(thisLayer, decompose=False):
+	"""
+	Returns (bottom, top, measure) for thisLayer, measure(height) returning (lsb, rsb).
+	"""
+	if decompose:
+		thisLayer = thisLayer.copyDecomposedLayer()
+		thisLayer.decomposeSmartOutlines()
+	bounds = layerBounds(thisLayer)
+
+	def measure(height):
+		return (
+			measureLayerAtHeightFromLeftOrRight(thisLayer, height, leftSide=True),
+			measureLayerAtHeightFromLeftOrRight(thisLayer, height, leftSide=False),
+			)
+
+	return bounds.origin.y, bounds.origin.y + bounds.size.height, measure
+
+def sampleLayerProfile(thisLayer, step=5.0, decompose=False, phases=()):
+	"""
+	Measures lsb and rsb of thisLayer every step units from its bottom, and on the grids of phases,
+	and returns a SidebearingProfile.
+	"""
+	bottom, top, measure = layerMeasure(thisLayer, decompose=decompose)
+	profile = profileFromMeasurements(bottom, top, step, measure)
+	profile.addPhases(phases, measure)
+	return profile
+
+def cachedLayerProfile(thisLayer, key, sample):
+	"""
+	Returns the profile cached under key for thisLayer, calls sample() again
+	if the layer has changed since it was cached.
+	Layers that are not part of a glyph (e.g., decomposed copies) are not cached.
+	"""
+	thisGlyph = thisLayer.parent
+	if thisGlyph is None or not thisLayer.layerId:
+		return sample()
+
+	key = (thisGlyph.id or thisGlyph.name, thisLayer.layerId) + key
+	fingerprint = layerFingerprint(thisLayer)
+	profile = profileCache.get(key, fingerprint)
+	if profile is None:
+		profile = sample()
+		profileCache.set(key, fingerprint, profile)
+	return profile
+
+def layerProfile(thisLayer, step=5.0, decompose=False, phases=()):
+	"""
+	Returns the cached SidebearingProfile for thisLayer, measured at least on the grids of phases.
+	"""
+	profile = cachedLayerProfile(thisLayer, (step, bool(decompose)), lambda: sampleLayerProfile(thisLayer, step=step, decompose=decompose, phases=phases))
+	missingPhases = [phase for phase in phases if not phase in profile.grids]
+	if missingPhases:
+		profile.addPhases(missingPhases, layerMeasure(thisLayer, decompose=decompose)[2])
+	return profile
+
+def pairingProfiles(leftLayers, rightLayers, step=5.0, decompose=False):
+	"""
+	Returns (leftProfiles, rightProfiles), measured at all heights needed
+	for the pairings of leftLayers with rightLayers (see phasesForPairings).
+	"""
+	leftProfiles = [layerProfile(thisLayer, step=step, decompose=decompose) for thisLayer in leftLayers]
+	rightProfiles = [layerProfile(thisLayer, step=step, decompose=decompose) for thisLayer in rightLayers]
+	leftPhases, rightPhases = phasesForPairings(leftProfiles, rightProfiles)
+	return (
+		[layerProfile(thisLayer, step=step, decompose=decompose, phases=phases) for thisLayer, phases in zip(leftLayers, leftPhases)],
+		[layerProfile(thisLayer, step=step, decompose=decompose, phases=phases) for thisLayer, phases in zip(rightLayers, rightPhases)],
+		)
+
+def sampleAdaptiveLayerProfile(thisLayer, step=1.0, coarseStep=10.0, decompose=False):
+	"""
+	Measures thisLayer every coarseStep units and returns an AdaptiveProfile
+	that measures every step units later, only where needed.
+	"""
+	if decompose:
+		thisLayer = thisLayer.copyDecomposedLayer()
+		thisLayer.decomposeSmartOutlines()
+	bounds = layerBounds(thisLayer)
+	bottom = bounds.origin.y
+	top = bounds.origin.y + bounds.size.height
+	keyHeights = [node.position.y for thisPath in thisLayer.paths for node in thisPath.nodes if node.type != GSOFFCURVE]
+
+	def measure(height):
+		return (
+			measureLayerAtHeightFromLeftOrRight(thisLayer, height, leftSide=True),
+			measureLayerAtHeightFromLeftOrRight(thisLayer, height, leftSide=False),
+			)
+
+	return AdaptiveProfile(measure, bottom, top, fineStep=step, coarseStep=coarseStep, keyHeights=keyHeights)
+
+def adaptiveLayerProfile(thisLayer, step=1.0, coarseStep=10.0, decompose=False):
+	"""
+	Returns the cached AdaptiveProfile for thisLayer.
+	Fine measurements taken for one pairing are kept for the next ones.
+	"""
+	return cachedLayerProfile(
+		thisLayer, ("adaptive", step, coarseStep, bool(decompose)), lambda: sampleAdaptiveLayerProfile(thisLayer, step=step, coarseStep=coarseStep, decompose=decompose)
+		)
+
+def sampleLayerPieces(thisLayer, decompose=False):
+	"""
+	Returns (width, pieces) for exactMinDistance(), pieces being the outline of thisLayer
+	split into segments that are monotone in x and y.
+	"""
+	width = thisLayer.width
+	if decompose:
+		thisLayer = thisLayer.copyDecomposedLayer()
+		thisLayer.decomposeSmartOutlines()
+	pieces = []
+	for thisPath in thisLayer.paths:
+		nodes = [(node.position.x, node.position.y, node.type) for node in thisPath.nodes]
+		pieces.extend(monotonePieces(nodes, closed=thisPath.closed))
+	return width, pieces
+
+def layerPieces(thisLayer, decompose=False):
+	"""
+	Returns the cached (width, pieces) for thisLayer.
+	"""
+	return cachedLayerProfile(thisLayer, ("exact", bool(decompose)), lambda: sampleLayerPieces(thisLayer, decompose=decompose))
+
+def exactMinDistanceBetweenPieces(leftPieces, rightPieces, kerning=0.0, ignoreIntervals=()):
+	# leftPieces, rightPieces: (width, pieces) as returned by layerPieces()
+	return exactMinDistance(leftPieces[1], leftPieces[0], rightPieces[1], kerning=kerning, ignoreIntervals=ignoreIntervals)
+
+def pairwiseDistanceMatrix(leftProfiles, rightProfiles, minDistance, kerningMatrix=None, ignoreIntervals=()):
+	"""
+	Like minDistanceMatrix(), but for any kind of profile,
+	calling minDistance(leftProfile, rightProfile, kerning=..., ignoreIntervals=...) for every pairing.
+	"""
+	matrix = []
+	for i, leftProfile in enumerate(leftProfiles):
+		row = []
+		for j, rightProfile in enumerate(rightProfiles):
+			kerning = kerningMatrix[i][j] if kerningMatrix else 0.0
+			row.append(minDistance(leftProfile, rightProfile, kerning=kerning, ignoreIntervals=ignoreIntervals))
+		matrix.append(row)
+	return matrix
+
+def clearProfileCache():
+	profileCache.clear()
+
+def layerContentHash(thisLayer):
+	"""
+	Hash of everything in thisLayer that could affect a distance measurement: width, lastChange
+	of its glyph, and the same for all glyphs it uses as (nested) components, with their transforms.
+	Nothing is decomposed. Glyphs without a lastChange (older files) contribute their own nodes instead.
+	"""
+	description = []
+	visited = set()
+
+	def describe(layer):
+		thisGlyph = layer.parent
+		lastChange = getattr(thisGlyph, "lastChange", None) if thisGlyph else None
+		description.append("%s %s %s" % (thisGlyph.name if thisGlyph else None, layer.width, lastChange))
+		if lastChange is None:
+			for thisPath in layer.paths:
+				description.append(" ".join("%s,%s,%s" % (n.x, n.y, n.type) for n in thisPath.nodes))
+		for thisComponent in layer.components:
+			description.append("%s %s %s" % (thisComponent.componentName, tuple(thisComponent.transform), thisComponent.smartComponentValues))
+			componentLayer = thisComponent.componentLayer
+			if componentLayer is not None and not thisComponent.componentName in visited:
+				visited.add(thisComponent.componentName)
+				describe(componentLayer)
+
+	describe(thisLayer)
+	return md5("|".join(description).encode("utf-8")).hexdigest()
+
+measurementStoreFolder = os.path.expanduser("~/Library/Application Support/Glyphs 3/Temp/com.mekkablue.kernanalysis.measurements")
+
+def incrementalDistanceMatrix(thisFont, thisFontMasterID, leftNames, rightNames, kerningMatrix, step=5.0, ignoreIntervals=[], decompose=True, storeFolder=None):
+	"""
+	Like minDistanceMatrix(), but reuses the distances stored from previous runs
+	for all pairs where neither glyph nor kerning changed since.
+	Returns (distanceMatrix, number of measured pairs).
+	"""
+	storeFolder = storeFolder or measurementStoreFolder
+	store = MeasurementStore(storeFolder, thisFont.filepath or thisFont.familyName, thisFontMasterID)
+	settingsKey = "step=%s decompose=%i ignore=%s" % (step, bool(decompose), sorted(tuple(i) for i in ignoreIntervals or ()))
+	entry = store.entry(settingsKey)
+
+	def layer(glyphName):
+		return thisFont.glyphs[glyphName].layers[thisFontMasterID]
+
+	glyphHashes = {n: layerContentHash(layer(n)) for n in set(leftNames) | set(rightNames)}
+	store.updateGlyphHashes(entry, glyphHashes)
+	distanceMatrix, measuredCount = store.distanceMatrix(
+		entry,
+		leftNames,
+		rightNames,
+		kerningMatrix,
+		lambda glyphName, phases: layerProfile(layer(glyphName), step=step, decompose=decompose, phases=phases),
+		ignoreIntervals=ignoreIntervals,
+		)
+	store.save()
+	pruneMeasurementStores(storeFolder)
+	return distanceMatrix, measuredCount
+
+def minDistanceBetweenTwoLayers(leftLayer, rightLayer, interval=5.0, kerning=0.0, report=False, ignoreIntervals=[], adaptive=False, exact=False):
+	"""
+	Measures every interval units from the higher of the two bottoms, like the scripts always did (see kernprofiles.py).
+	With adaptive=True, interval is the coarse step, and the distance is refined to 1 unit
+	where the two glyphs come closest, or around outline extrema.
+	With exact=True, the distance is computed on the outline segments of the decomposed layers, and interval is ignored.
+	"""
+	if exact:
+		return exactMinDistanceBetweenPieces(layerPieces(leftLayer, decompose=True), layerPieces(rightLayer, decompose=True), kerning=kerning, ignoreIntervals=ignoreIntervals)
+	if adaptive:
+		leftProfile = adaptiveLayerProfile(leftLayer, step=1.0, coarseStep=max(interval, 1.0))
+		rightProfile = adaptiveLayerProfile(rightLayer, step=1.0, coarseStep=max(interval, 1.0))
+		return minDistanceBetweenAdaptiveProfiles(leftProfile, rightProfile, kerning=kerning, ignoreIntervals=ignoreIntervals)
+	phase = pairPhase(layerProfile(leftLayer, step=interval), layerProfile(rightLayer, step=interval))
+	leftProfile = layerProfile(leftLayer, step=interval, phases=(phase, ))
+	rightProfile = layerProfile(rightLayer, step=interval, phases=(phase, ))
+	return minDistanceBetweenProfiles(leftProfile, rightProfile, kerning=kerning, ignoreIntervals=ignoreIntervals)
 
 
 def sortedIntervalsFromString(intervals="", font=None, mID=None):
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+One analysis pass over the kerning of all masters, for the kerning QA scripts:
+narrowest glyph of every kerning group, overkern ratios (kerning relative to the
+narrower side of the pair), sign flips between masters, and uneven symmetric
+pairs (AT vs. TA in ATA, AVA, TOT...). Works on a KerningTable, so every check
+is one sweep over the value columns (vectorized with numpy if available).
+The scripts only filter the resulting KerningAudit.
+
+Does not need the Glyphs API: kernanalysis.py builds the audit from the open font.
+"""
+from __future__ import division, print_function
+
+from math import isnan
+from collections import namedtuple
+from kernresolver import KerningResolver
+from groupindex import groupNameForKey
+try:
+	import numpy
+except ImportError:
+	numpy = None # falls back to pure Python
+
+NaN = float("nan")
+INF = float("inf")
+
+Overkern = namedtuple("Overkern", ("masterId", "leftKey", "rightKey", "value", "leftGlyph", "rightGlyph", "width", "ratio"))
+SignFlip = namedtuple("SignFlip", ("leftKey", "rightKey", "values"))
+UnevenPair = namedtuple("UnevenPair", ("masterId", "firstGlyph", "secondGlyph", "value", "mirroredValue", "keys", "mirroredKeys"))
+
+def narrowestMembers(index, widths, keys):
+	"""
+	For every kerning key (glyph or @MMK group) in keys: (width, glyph name) of its narrowest glyph
+	in widths ({glyphName: width}), (NaN, None) if none of its glyphs has a width.
+	"""
+	narrowest = []
+	for key in keys:
+		members = [(widths[name], name) for name in index.membersForKey(key) if name in widths]
+		narrowest.append(min(members) if members else (NaN, None))
+	return narrowest
+
+class KerningAudit(object):
+	"""
+	table: KerningTable with glyph names and @MMK keys (e.g. from kernanalysis.kerningByName).
+	index: KerningGroupIndex of the font.
+	widths: {masterId: {glyphName: advance width}}, only with the glyphs to consider (e.g. exporting ones).
+	symmetricGlyphs: lists of glyph names whose pairs should kern the same in both orders, e.g. ['A', 'T', 'V'].
+	"""
+
+	def __init__(self, table, index, widths, symmetricGlyphs=(), tolerance=0.0):
+		self.table = table
+		self.index = index
+		self.masterIds = list(table.masterIds)
+		self.narrowestLeft, self.narrowestRight = {}, {}
+		self.limits, self.ratios = {}, {}
+		self.missingKeys = set()
+
+		leftRows = [leftId for leftId, rightId in table.rows]
+		rightRows = [rightId for leftId, rightId in table.rows]
+		if numpy is not None:
+			leftRows = numpy.array(leftRows, dtype=int)
+			rightRows = numpy.array(rightRows, dtype=int)
+
+		for masterId in self.masterIds:
+			masterWidths = widths.get(masterId, {})
+			self.narrowestLeft[masterId] = narrowestMembers(index, masterWidths, table.leftKeys)
+			self.narrowestRight[masterId] = narrowestMembers(index, masterWidths, table.rightKeys)
+			for keys, narrowest in ((table.leftKeys, self.narrowestLeft[masterId]), (table.rightKeys, self.narrowestRight[masterId])):
+				self.missingKeys.update(key for key, (width, name) in zip(keys, narrowest) if name is None and groupNameForKey(key) is not None)
+			leftWidths = [width for width, name in self.narrowestLeft[masterId]]
+			rightWidths = [width for width, name in self.narrowestRight[masterId]]
+			self.limits[masterId], self.ratios[masterId] = self._ratios(table.columns[masterId], leftWidths, rightWidths, leftRows, rightRows)
+
+		self.signFlips = self._signFlips()
+		self.unevenPairs = []
+		for glyphNames in symmetricGlyphs:
+			self.unevenPairs.extend(self._unevenPairs(glyphNames, tolerance))
+
+	def _ratios(self, column, leftWidths, rightWidths, leftRows, rightRows):
+		"""
+		Per pair: width of the narrower side, and negative kerning relative to it (0 for positive kerning, NaN if unknown).
+		"""
+		if numpy is not None:
+			limits = numpy.minimum(numpy.array(leftWidths, dtype=float)[leftRows], numpy.array(rightWidths, dtype=float)[rightRows]) # NaN propagates
+			with numpy.errstate(divide="ignore", invalid="ignore"):
+				ratios = numpy.where(column < 0, -column / limits, 0.0)
+			ratios[numpy.isnan(column) | numpy.isnan(limits)] = NaN
+			return limits, ratios
+
+		limits, ratios = [], []
+		for value, leftId, rightId in zip(column, leftRows, rightRows):
+			limit = NaN if isnan(leftWidths[leftId]) or isnan(rightWidths[rightId]) else min(leftWidths[leftId], rightWidths[rightId])
+			limits.append(limit)
+			if isnan(value) or isnan(limit):
+				ratios.append(NaN)
+			elif value >= 0:
+				ratios.append(0.0)
+			else:
+				ratios.append(-value / limit if limit > 0 else INF)
+		return limits, ratios
+
+	def _signFlips(self):
+		"""
+		Pairs kerned positive in one master and negative in another.
+		"""
+		columns = [self.table.columns[masterId] for masterId in self.masterIds]
+		if len(columns) < 2:
+			return []
+		if numpy is not None:
+			stacked = numpy.vstack(columns)
+			mask = numpy.any(stacked > 0, axis=0) & numpy.any(stacked < 0, axis=0) # NaN compares False
+			rows = numpy.flatnonzero(mask).tolist()
+		else:
+			rows = [row for row, values in enumerate(zip(*columns)) if any(v > 0 for v in values) and any(v < 0 for v in values)]
+		flips = []
+		for row in rows:
+			leftKey, rightKey = self.table.pair(row)
+			values = {masterId: float(column[row]) for masterId, column in zip(self.masterIds, columns) if not isnan(column[row])}
+			flips.append(SignFlip(leftKey, rightKey, values))
+		return flips
+
+	def masterKerning(self, masterId):
+		"""
+		{leftKey: {rightKey: value}} of one master, as read from the table.
+		"""
+		kerning = {}
+		column = self.table.columns[masterId]
+		for row, (leftId, rightId) in enumerate(self.table.rows):
+			value = column[row]
+			if not isnan(value):
+				kerning.setdefault(self.table.leftKeys[leftId], {})[self.table.rightKeys[rightId]] = float(value)
+		return kerning
+
+	def _unevenPairs(self, glyphNames, tolerance):
+		"""
+		Glyph pairs whose effective kerning differs from the mirrored pair by more than tolerance, in every master.
+		"""
+		glyphNames = [name for name in glyphNames if name in self.index.glyphNames]
+		uneven = []
+		for masterId in self.masterIds:
+			kerning = self.masterKerning(masterId)
+			resolver = KerningResolver(kerning, leftGroups=self.index.leftSideGroup, rightGroups=self.index.rightSideGroup)
+			matrix = resolver.kerningMatrix(glyphNames, glyphNames)
+			if numpy is not None:
+				matrix = numpy.array(matrix, dtype=float).reshape(len(glyphNames), len(glyphNames))
+				rows, columns = numpy.nonzero(numpy.triu(numpy.abs(matrix - matrix.T) > tolerance, 1))
+				candidates = zip(rows.tolist(), columns.tolist())
+			else:
+				candidates = [(i, j) for i in range(len(glyphNames)) for j in range(i + 1, len(glyphNames)) if abs(matrix[i][j] - matrix[j][i]) > tolerance]
+			for i, j in candidates:
+				first, second = glyphNames[i], glyphNames[j]
+				uneven.append(
+					UnevenPair(
+						masterId, first, second, float(matrix[i][j]), float(matrix[j][i]), resolver.keysForPair(first, second), resolver.keysForPair(second, first)
+						)
+					)
+		return uneven
+
+	def overkerns(self, threshold, masterIds=None):
+		"""
+		Overkerns in the masters (default: all): pairs with negative kerning beyond threshold
+		(e.g. 0.4 for 40%) of the width of the narrowest glyph on either side.
+		"""
+		overkerns = []
+		for masterId in masterIds if masterIds is not None else self.masterIds:
+			ratios, limits, column = self.ratios[masterId], self.limits[masterId], self.table.columns[masterId]
+			if numpy is not None:
+				with numpy.errstate(invalid="ignore"):
+					rows = numpy.flatnonzero(ratios > threshold).tolist() # NaN compares False
+			else:
+				rows = [row for row, ratio in enumerate(ratios) if ratio > threshold]
+			for row in rows:
+				leftId, rightId = self.table.rows[row]
+				overkerns.append(
+					Overkern(
+						masterId,
+						self.table.leftKeys[leftId],
+						self.table.rightKeys[rightId],
+						float(column[row]),
+						self.narrowestLeft[masterId][leftId][1],
+						self.narrowestRight[masterId][rightId][1],
+						float(limits[row]),
+						float(ratios[row]),
+						)
+					)
+		return overkerns
+
+	def groupMinimumWidths(self, masterId, isLeftSide=True):
+		"""
+		{group name: (width, glyph name)} of the narrowest member of every kerned group on that side of a pair.
+		"""
+		keys = self.table.leftKeys if isLeftSide else self.table.rightKeys
+		narrowest = self.narrowestLeft[masterId] if isLeftSide else self.narrowestRight[masterId]
+		return {groupNameForKey(key): entry for key, entry in zip(keys, narrowest) if groupNameForKey(key) is not None and entry[1] is not None}
+
+	def unevenPairsInMaster(self, masterId):
+		return [pair for pair in self.unevenPairs if pair.masterId == masterId]
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Flattens group kerning into the glyph-to-glyph pairs that matter most,
+for the legacy 'kern' table (format 0) that old software still reads.
+Does not need the Glyphs API: works on plain kerning dicts with glyph names
+(see kernanalysis.py) and a KerningGroupIndex.
+
+Group kerning is expanded lazily, one kerning entry at a time, and only the
+best pairs so far are kept in a bounded heap, so the full cross product of
+all groups never sits in memory. Pairs are ranked by a pluggable frequency
+function, e.g. bigram counts of a text corpus (BigramTable).
+"""
+from __future__ import division, print_function
+
+import heapq
+from collections import Counter, namedtuple
+from kernresolver import KerningResolver
+from bigramindex import countBigrams, countTextBigrams
+
+# 'kern' table version 0: table header, subtable header, binary search header:
+KERN_HEADER_SIZE = 4 + 6 + 8
+KERN_PAIR_SIZE = 6 # left, right, value
+# the subtable length is a uint16, which limits a format 0 subtable to 10920 pairs:
+KERN_MAX_PAIRS = (0xFFFF - 6 - 8) // KERN_PAIR_SIZE
+
+FlattenedKerning = namedtuple("FlattenedKerning", ("pairs", "kerning", "bytes"))
+
+def kernTableSize(pairCount):
+	return KERN_HEADER_SIZE + KERN_PAIR_SIZE * pairCount
+
+def pairBudget(maxPairs=None, byteBudget=None):
+	"""
+	Number of pairs that fit into one 'kern' subtable, maxPairs and byteBudget (in bytes) if given.
+	"""
+	budget = KERN_MAX_PAIRS
+	if maxPairs is not None:
+		budget = min(budget, maxPairs)
+	if byteBudget is not None:
+		budget = min(budget, max(0, (byteBudget - KERN_HEADER_SIZE) // KERN_PAIR_SIZE))
+	return budget
+
+class BigramTable(object):
+	"""
+	Frequencies of character pairs, e.g. counted in a text corpus.
+	Anything with a frequency(leftCharacter, rightCharacter) method can stand in for it.
+	"""
+
+	def __init__(self, counts=None):
+		self.counts = Counter(counts or {})
+
+	def __len__(self):
+		return len(self.counts)
+
+	def frequency(self, leftCharacter, rightCharacter):
+		if not leftCharacter or not rightCharacter:
+			return 0
+		return self.counts.get(leftCharacter + rightCharacter, 0)
+
+	def addCounts(self, counts):
+		"""
+		Adds a Counter of (leftCharacter, rightCharacter), see bigramindex.countBigrams().
+		"""
+		self.counts.update({left + right: count for (left, right), count in counts.items()})
+
+	def addText(self, text, previous=""):
+		"""
+		Counts all pairs of adjacent characters except whitespace. Returns the last character,
+		pass it as previous with the next chunk of the same text.
+		"""
+		text = previous + text
+		self.addCounts(countTextBigrams(text))
+		return text[-1:]
+
+	@classmethod
+	def fromFile(cls, path, encoding="utf-8", chunkSize=1 << 20):
+		"""
+		Counts a text file of any size, reading it in chunks.
+		"""
+		table = cls()
+		table.addCounts(countBigrams((path, ), chunkSize=chunkSize, encoding=encoding))
+		return table
+
+	@classmethod
+	def fromPairList(cls, text):
+		"""
+		Character pairs listed two by two, most frequent first (like Kern Flattener's built-in list).
+		Earlier pairs get higher frequencies.
+		"""
+		pairs = []
+		for line in text.splitlines():
+			pairs.extend(line[i:i + 2] for i in range(0, len(line) - 1, 2))
+		table = cls()
+		for rank, pair in enumerate(pairs):
+			if not pair in table.counts:
+				table.counts[pair] = len(pairs) - rank
+		return table
+
+	def glyphFrequency(self, characterForGlyph):
+		"""
+		frequency function for glyph names, characterForGlyph being {glyphName: character}.
+		"""
+
+		def frequency(leftName, rightName):
+			return self.frequency(characterForGlyph.get(leftName), characterForGlyph.get(rightName))
+
+		return frequency
+
+def glyphPairs(kerning, index, glyphs=None, skipZero=True):
+	"""
+	Generator of (leftName, rightName, value) for every glyph pair with kerning in one master,
+	kerning being {leftKey: {rightKey: value}} with glyph names or @MMK keys.
+	Groups are expanded entry by entry, each pair is yielded once with its effective value.
+	glyphs: optional set of glyph names to limit the expansion to, e.g. the encoded ones.
+	"""
+	resolver = KerningResolver(kerning, leftGroups=index.leftSideGroup, rightGroups=index.rightSideGroup)
+
+	def members(key):
+		names = index.membersForKey(key)
+		return [name for name in names if name in glyphs] if glyphs is not None else names
+
+	for leftKey, rightDict in kerning.items():
+		leftNames = members(leftKey)
+		if not leftNames:
+			continue
+		for rightKey, value in rightDict.items():
+			if skipZero and not value:
+				continue
+			rightNames = members(rightKey)
+			isException = not leftKey.startswith("@") and not rightKey.startswith("@")
+			for leftName in leftNames:
+				for rightName in rightNames:
+					# more specific entries win, they yield the pair themselves:
+					if isException or resolver.keysForPair(leftName, rightName) == (leftKey, rightKey):
+						yield leftName, rightName, value
+
+def flattenKerning(kerning, index, frequency, maxPairs=None, byteBudget=None, glyphs=None, minFrequency=1):
+	"""
+	kerning: {masterId: {leftKey: {rightKey: value}}}.
+	frequency: function (leftName, rightName) -> number, e.g. BigramTable.glyphFrequency().
+	Picks the same top pairs for all masters: most frequent first, then largest kerning in any master,
+	as many as fit into maxPairs and byteBudget (default: one 'kern' subtable).
+	Returns FlattenedKerning: the pairs (in order of rank), {masterId: {leftName: {rightName: value}}},
+	and the size of the resulting 'kern' table in bytes.
+	"""
+	budget = pairBudget(maxPairs, byteBudget)
+	resolvers = {masterId: KerningResolver(masterKerning, leftGroups=index.leftSideGroup, rightGroups=index.rightSideGroup) for masterId, masterKerning in kerning.items()}
+	heap, inHeap = [], set()
+	if budget:
+		for masterKerning in kerning.values():
+			for leftName, rightName, value in glyphPairs(masterKerning, index, glyphs=glyphs):
+				pair = (leftName, rightName)
+				if pair in inHeap:
+					continue
+				score = frequency(leftName, rightName)
+				if score < minFrequency or (len(heap) == budget and score < heap[0][0]):
+					continue
+				# the same rank whichever master yields the pair first, so an evicted pair does not come back:
+				largestValue = max(abs(resolver.kerningForPair(leftName, rightName)) for resolver in resolvers.values())
+				item = (score, largestValue, pair)
+				if len(heap) < budget:
+					heapq.heappush(heap, item)
+					inHeap.add(pair)
+				elif item > heap[0]:
+					inHeap.discard(heapq.heapreplace(heap, item)[2])
+					inHeap.add(pair)
+
+	pairs = [item[2] for item in sorted(heap, reverse=True)]
+	flattened = {}
+	for masterId, resolver in resolvers.items():
+		masterPairs = flattened[masterId] = {}
+		for leftName, rightName in pairs:
+			value = resolver.kerningForPair(leftName, rightName)
+			if value:
+				masterPairs.setdefault(leftName, {})[rightName] = value
+	pairCount = max([sum(len(rightDict) for rightDict in masterPairs.values()) for masterPairs in flattened.values()] or [0])
+	return FlattenedKerning(pairs, flattened, kernTableSize(pairCount))
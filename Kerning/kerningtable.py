@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar kerning for comparisons between masters.
+Every kern pair (left key, right key) gets one row, every master one value column,
+with NaN where the pair is missing in a master. Questions like 'which pairs are
+missing in this master but present in others' become one pass over the columns
+(vectorized with numpy if available) instead of probing nested dicts per pair and master.
+
+Does not need the Glyphs API: kernanalysis.py builds tables from the open font,
+the functions below from .glyphs files or compiled fonts, e.g. on a build server:
+
+python3 kerningtable.py MyFont.glyphs
+python3 kerningtable.py MyFont-Light.otf MyFont-Bold.otf
+"""
+from __future__ import division, print_function
+
+import os, sys
+from math import isnan
+from array import array
+from argparse import ArgumentParser
+try:
+	import numpy
+except ImportError:
+	numpy = None # falls back to pure Python
+
+NaN = float("nan")
+
+# pair kinds, bit 1: left side is a group, bit 0: right side is a group
+GLYPH_GLYPH, GLYPH_GROUP, GROUP_GLYPH, GROUP_GROUP = 0, 1, 2, 3
+
+def _isGroup(key):
+	return key.startswith("@")
+
+class KerningTable(object):
+	"""
+	kerning: {masterId: {leftKey: {rightKey: value}}}, keys being glyph names (or IDs) or @MMK_L_/@MMK_R_ groups.
+	masterIds: order of the value columns, defaults to the order of kerning.
+	"""
+
+	def __init__(self, kerning, masterIds=None):
+		self.masterIds = list(masterIds if masterIds is not None else kerning.keys())
+		self.leftKeys, self.rightKeys = [], []
+		self.rows = [] # (left key id, right key id)
+		self.kinds = array("b")
+		leftIds, rightIds, rowForPair = {}, {}, {}
+
+		# intern keys and pairs:
+		for masterId in self.masterIds:
+			for leftKey, rightDict in (kerning.get(masterId) or {}).items():
+				leftId = leftIds.get(leftKey)
+				if leftId is None:
+					leftId = leftIds[leftKey] = len(self.leftKeys)
+					self.leftKeys.append(leftKey)
+				for rightKey in rightDict:
+					rightId = rightIds.get(rightKey)
+					if rightId is None:
+						rightId = rightIds[rightKey] = len(self.rightKeys)
+						self.rightKeys.append(rightKey)
+					if not (leftId, rightId) in rowForPair:
+						rowForPair[leftId, rightId] = len(self.rows)
+						self.rows.append((leftId, rightId))
+						self.kinds.append(2 * _isGroup(leftKey) + _isGroup(rightKey))
+		self.rowForPair = rowForPair
+		self.leftIds, self.rightIds = leftIds, rightIds
+
+		# one value column per master:
+		self.columns = {}
+		for masterId in self.masterIds:
+			column = array("d", [NaN]) * len(self.rows)
+			for leftKey, rightDict in (kerning.get(masterId) or {}).items():
+				leftId = leftIds[leftKey]
+				for rightKey, value in rightDict.items():
+					column[rowForPair[leftId, rightIds[rightKey]]] = value
+			self.columns[masterId] = numpy.frombuffer(column, dtype=float) if numpy is not None else column
+
+	def __len__(self):
+		return len(self.rows)
+
+	def pair(self, row):
+		leftId, rightId = self.rows[row]
+		return self.leftKeys[leftId], self.rightKeys[rightId]
+
+	def pairs(self, rows):
+		return [self.pair(row) for row in rows]
+
+	def value(self, masterId, leftKey, rightKey):
+		"""
+		Kerning of the pair in the master, None if missing.
+		"""
+		row = self.rowForPair.get((self.leftIds.get(leftKey), self.rightIds.get(rightKey)))
+		if row is None:
+			return None
+		value = float(self.columns[masterId][row])
+		return None if isnan(value) else value
+
+	def _kindMask(self, kinds):
+		if kinds is None:
+			return None
+		kinds = set(kinds)
+		if numpy is not None:
+			return numpy.isin(numpy.frombuffer(self.kinds, dtype=numpy.int8), list(kinds))
+		return [kind in kinds for kind in self.kinds]
+
+	def presentMask(self, masterId):
+		column = self.columns[masterId]
+		if numpy is not None:
+			return ~numpy.isnan(column)
+		return [not isnan(value) for value in column]
+
+	def missingMask(self, masterId, otherMasterIds=None, kinds=None, nonZeroOnly=False):
+		"""
+		Mask of pairs missing in masterId, but present in at least one of otherMasterIds (default: all other masters).
+		kinds: optional list of pair kinds (GLYPH_GLYPH, GLYPH_GROUP, GROUP_GLYPH, GROUP_GROUP) to consider.
+		nonZeroOnly: only count pairs present with a value other than zero elsewhere.
+		"""
+		if otherMasterIds is None:
+			otherMasterIds = [m for m in self.masterIds if m != masterId]
+		otherMasterIds = [m for m in otherMasterIds if m != masterId]
+		kindMask = self._kindMask(kinds)
+
+		if numpy is not None:
+			elsewhere = numpy.zeros(len(self.rows), dtype=bool)
+			for otherMasterId in otherMasterIds:
+				column = self.columns[otherMasterId]
+				elsewhere |= (column != 0) & ~numpy.isnan(column) if nonZeroOnly else ~numpy.isnan(column)
+			mask = numpy.isnan(self.columns[masterId]) & elsewhere
+			return mask & kindMask if kindMask is not None else mask
+
+		columns = [self.columns[m] for m in otherMasterIds]
+		ownColumn = self.columns[masterId]
+		mask = []
+		for row in range(len(self.rows)):
+			if not isnan(ownColumn[row]) or (kindMask is not None and not kindMask[row]):
+				mask.append(False)
+				continue
+			values = [column[row] for column in columns]
+			mask.append(any(not isnan(v) and (v != 0 or not nonZeroOnly) for v in values))
+		return mask
+
+	def zeroMask(self, masterId, kinds=None):
+		"""
+		Mask of pairs with a value of exactly zero in masterId.
+		"""
+		kindMask = self._kindMask(kinds)
+		column = self.columns[masterId]
+		if numpy is not None:
+			mask = column == 0
+			return mask & kindMask if kindMask is not None else mask
+		return [value == 0 and (kindMask is None or kindMask[row]) for row, value in enumerate(column)]
+
+	def delta(self, masterId, otherMasterId):
+		"""
+		Per-pair difference otherMaster - master, NaN where either one is missing.
+		"""
+		first, second = self.columns[masterId], self.columns[otherMasterId]
+		if numpy is not None:
+			return second - first
+		return array("d", [b - a for a, b in zip(first, second)]) # NaN propagates
+
+	def rowsInMask(self, mask):
+		if numpy is not None:
+			return numpy.flatnonzero(mask).tolist()
+		return [row for row, flag in enumerate(mask) if flag]
+
+	def pairsInMask(self, mask):
+		return self.pairs(self.rowsInMask(mask))
+
+# LOADING WITHOUT THE APP
+
+def tableFromGlyphsFile(path):
+	"""
+	KerningTable for all masters of a .glyphs file or .glyphspackage, plus the HeadlessFont.
+	"""
+	sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+	from glyphsfile import readFont
+	font = readFont(path)
+	return KerningTable(font.kerning, masterIds=font.masterIds), font
+
+def kerningFromGPOS(ttFont):
+	"""
+	{leftKey: {rightKey: value}} from the 'kern' feature lookups in the GPOS table of a fontTools TTFont.
+	Class kerning gets @MMK_L_/@MMK_R_ keys named after the first glyph of the class (in glyph order).
+	Like in the compiled font, earlier subtables take precedence over later ones.
+	"""
+	kerning = {}
+	if not "GPOS" in ttFont:
+		return kerning
+	glyphOrder = {name: i for i, name in enumerate(ttFont.getGlyphOrder())}
+	gpos = ttFont["GPOS"].table
+	lookupIndexes = set()
+	for featureRecord in gpos.FeatureList.FeatureRecord:
+		if featureRecord.FeatureTag == "kern":
+			lookupIndexes.update(featureRecord.Feature.LookupListIndex)
+
+	def xAdvance(valueRecord):
+		return getattr(valueRecord, "XAdvance", 0) or 0 if valueRecord else 0
+
+	def classes(classDef, glyphs, side):
+		# {class index: group key}, and {glyph: class index} including class 0 for glyphs only in the coverage
+		classForGlyph = {glyph: classDef.classDefs.get(glyph, 0) for glyph in glyphs} if glyphs is not None else dict(classDef.classDefs)
+		members = {}
+		for glyph, classIndex in classForGlyph.items():
+			members.setdefault(classIndex, []).append(glyph)
+		keys = {classIndex: "@MMK_%s_%s" % (side, min(names, key=lambda n: glyphOrder.get(n, 0))) for classIndex, names in members.items()}
+		return keys, classForGlyph
+
+	for lookupIndex in sorted(lookupIndexes):
+		lookup = gpos.LookupList.Lookup[lookupIndex]
+		for subtable in lookup.SubTable:
+			if lookup.LookupType == 9:
+				subtable = subtable.ExtSubTable
+			if not hasattr(subtable, "PairSet") and not hasattr(subtable, "Class1Record"):
+				continue
+			if subtable.Format == 1:
+				for leftGlyph, pairSet in zip(subtable.Coverage.glyphs, subtable.PairSet):
+					rightDict = kerning.setdefault(leftGlyph, {})
+					for record in pairSet.PairValueRecord:
+						rightDict.setdefault(record.SecondGlyph, xAdvance(record.Value1))
+			elif subtable.Format == 2:
+				leftClassKeys, leftClasses = classes(subtable.ClassDef1, subtable.Coverage.glyphs, "L")
+				rightClassKeys, rightClasses = classes(subtable.ClassDef2, None, "R")
+				for leftClass, leftKey in leftClassKeys.items():
+					rightDict = kerning.setdefault(leftKey, {})
+					for rightClass, rightKey in rightClassKeys.items():
+						if rightClass == 0:
+							continue # class 0 on the right means 'all other glyphs'
+						value = xAdvance(subtable.Class1Record[leftClass].Class2Record[rightClass].Value1)
+						if value:
+							rightDict.setdefault(rightKey, value)
+	return {leftKey: rightDict for leftKey, rightDict in kerning.items() if rightDict}
+
+def tableFromCompiledFonts(paths):
+	"""
+	KerningTable with one column per compiled font (.otf/.ttf), e.g. for the static instances of a family.
+	The master IDs are the file names.
+	"""
+	from fontTools.ttLib import TTFont
+	kerning = {}
+	for path in paths:
+		kerning[os.path.basename(path)] = kerningFromGPOS(TTFont(path, lazy=True))
+	return KerningTable(kerning)
+
+parser = ArgumentParser(description="Report kern pairs missing in some masters (or fonts) but present in others, without the Glyphs app.")
+parser.add_argument("fonts", nargs="+", metavar="font", help="A .glyphs file or .glyphspackage, or several compiled fonts of a family")
+parser.add_argument("--groups-only", action="store_true", dest="groupsOnly", help="Only report group-to-group kerning")
+
+def main(arguments=None):
+	arguments = parser.parse_args(arguments)
+	if len(arguments.fonts) == 1 and arguments.fonts[0].rstrip("/").endswith((".glyphs", ".glyphspackage")):
+		table, font = tableFromGlyphsFile(arguments.fonts[0])
+		masterNames = dict(font.masters)
+	else:
+		table = tableFromCompiledFonts(arguments.fonts)
+		masterNames = {}
+
+	kinds = (GROUP_GROUP, ) if arguments.groupsOnly else None
+	missingCount = 0
+	for masterId in table.masterIds:
+		missing = table.pairsInMask(table.missingMask(masterId, kinds=kinds))
+		print("%s: %i pairs missing" % (masterNames.get(masterId, masterId), len(missing)))
+		for leftKey, rightKey in missing:
+			print("- %s %s" % (leftKey, rightKey))
+		missingCount += len(missing)
+	return 1 if missingCount else 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Finds kerning exceptions that are redundant in all masters at once,
+and group values that would make the most exceptions unnecessary.
+Does not need the Glyphs API: works on plain kerning dicts with glyph names
+(see kernanalysis.py) and a KerningGroupIndex.
+
+An exception is redundant if, in every master, it is less than the threshold
+away from the value the pair would fall back to without it (glyph-group and
+group-glyph exceptions fall back to group kerning, glyph-glyph exceptions to
+the next more general entry, or zero). Group-to-group kerning is never removed.
+"""
+from __future__ import division, print_function
+
+from collections import namedtuple, Counter
+from kernresolver import KerningResolver
+
+# bytes per exported glyph pair in PairPos Format 1: SecondGlyph + XAdvance
+PAIR_RECORD_SIZE = 4
+
+RedundantException = namedtuple("RedundantException", ("leftKey", "rightKey", "bytes"))
+GroupValueProposal = namedtuple("GroupValueProposal", ("leftKey", "rightKey", "currentValues", "proposedValues", "recordsBefore", "recordsAfter", "bytesSaved"))
+KerningOptimization = namedtuple("KerningOptimization", ("redundant", "proposals", "bytesSaved"))
+
+def _isGroup(key):
+	return key.startswith("@")
+
+def exportedPairCount(leftKey, rightKey, index):
+	"""
+	Number of glyph pairs an exception turns into in the compiled font ('enum pos').
+	"""
+	leftCount = len(index.membersForKey(leftKey)) if _isGroup(leftKey) else 1
+	rightCount = len(index.membersForKey(rightKey)) if _isGroup(rightKey) else 1
+	return leftCount * rightCount
+
+def fallbackValue(masterKerning, leftKey, rightKey, index):
+	"""
+	Value the pair leftKey-rightKey would get from more general kerning if its own entry did not exist.
+	"""
+	leftIsGroup, rightIsGroup = _isGroup(leftKey), _isGroup(rightKey)
+	leftGroupKey = leftKey if leftIsGroup else index.groupKey(leftKey, isLeftSide=True)
+	rightGroupKey = rightKey if rightIsGroup else index.groupKey(rightKey, isLeftSide=False)
+	if not leftIsGroup and not rightIsGroup:
+		candidates = ((leftKey, rightGroupKey), (leftGroupKey, rightKey), (leftGroupKey, rightGroupKey))
+	elif not leftIsGroup:
+		candidates = ((leftGroupKey, rightKey), )
+	elif not rightIsGroup:
+		candidates = ((leftKey, rightGroupKey), )
+	else:
+		candidates = ()
+	for left, right in candidates:
+		if left and right:
+			rightDict = masterKerning.get(left)
+			if rightDict and right in rightDict:
+				return rightDict[right]
+	return 0.0
+
+def _isClose(value, otherValue, threshold):
+	return value == otherValue or abs(value - otherValue) < threshold
+
+def redundantExceptions(kerning, index, threshold=1, pairFilter=None):
+	"""
+	kerning: {masterId: {leftKey: {rightKey: value}}}, glyph names or @MMK keys.
+	Returns RedundantExceptions that can be removed from all masters without changing any
+	effective kerning by threshold or more. Glyph-group and group-glyph exceptions are
+	decided first, glyph-glyph exceptions against the kerning without them.
+	pairFilter: optional function (leftKey, rightKey) -> bool to limit the pairs considered.
+	"""
+	working = {masterId: {left: dict(rightDict) for left, rightDict in masterKerning.items()} for masterId, masterKerning in kerning.items()}
+	allPairs = []
+	seen = set()
+	for masterKerning in kerning.values():
+		for leftKey, rightDict in masterKerning.items():
+			for rightKey in rightDict:
+				if not (leftKey, rightKey) in seen:
+					seen.add((leftKey, rightKey))
+					allPairs.append((leftKey, rightKey))
+
+	redundant = []
+	for glyphGlyphStage in (False, True):
+		stagePairs = []
+		for leftKey, rightKey in allPairs:
+			leftIsGroup, rightIsGroup = _isGroup(leftKey), _isGroup(rightKey)
+			if leftIsGroup and rightIsGroup:
+				continue
+			if glyphGlyphStage != (not leftIsGroup and not rightIsGroup):
+				continue
+			if pairFilter and not pairFilter(leftKey, rightKey):
+				continue
+			stagePairs.append((leftKey, rightKey))
+
+		# decide all pairs of a stage against the same kerning:
+		removable = []
+		for leftKey, rightKey in stagePairs:
+			for masterKerning in working.values():
+				rightDict = masterKerning.get(leftKey)
+				if rightDict and rightKey in rightDict:
+					if not _isClose(rightDict[rightKey], fallbackValue(masterKerning, leftKey, rightKey, index), threshold):
+						break
+			else:
+				removable.append((leftKey, rightKey))
+
+		for leftKey, rightKey in removable:
+			for masterKerning in working.values():
+				masterKerning.get(leftKey, {}).pop(rightKey, None)
+			redundant.append(RedundantException(leftKey, rightKey, PAIR_RECORD_SIZE * exportedPairCount(leftKey, rightKey, index)))
+	return redundant, working
+
+def groupValueProposals(kerning, index, masterIds=None, threshold=1):
+	"""
+	For every group pair with exceptions among its members, finds the per-master group values
+	matching the most member pairs. Proposes them where that needs fewer exported exception records
+	than the current group values. Returns a list of GroupValueProposals.
+	"""
+	masterIds = list(masterIds or kerning.keys())
+	resolvers = [KerningResolver(kerning.get(m, {}), leftGroups=index.leftSideGroup, rightGroups=index.rightSideGroup) for m in masterIds]
+
+	# group pairs with exceptions:
+	groupPairs = set()
+	for masterKerning in kerning.values():
+		for leftKey, rightDict in masterKerning.items():
+			for rightKey in rightDict:
+				leftGroupKey = leftKey if _isGroup(leftKey) else index.groupKey(leftKey, isLeftSide=True)
+				rightGroupKey = rightKey if _isGroup(rightKey) else index.groupKey(rightKey, isLeftSide=False)
+				if leftGroupKey and rightGroupKey and (leftGroupKey, rightGroupKey) != (leftKey, rightKey):
+					groupPairs.add((leftGroupKey, rightGroupKey))
+
+	proposals = []
+	for leftGroupKey, rightGroupKey in sorted(groupPairs):
+		leftMembers, rightMembers = index.membersForKey(leftGroupKey), index.membersForKey(rightGroupKey)
+		if not leftMembers or not rightMembers:
+			continue
+		rows = [resolver.kerningMatrix(leftMembers, rightMembers) for resolver in resolvers]
+		vectors = Counter()
+		for i in range(len(leftMembers)):
+			for j in range(len(rightMembers)):
+				vectors[tuple(matrix[i][j] for matrix in rows)] += 1
+		currentValues = tuple(kerning.get(m, {}).get(leftGroupKey, {}).get(rightGroupKey, 0.0) for m in masterIds)
+
+		def recordsNeeded(groupValues):
+			# member pairs that need an exception if the group pair had groupValues
+			return sum(count for vector, count in vectors.items() if not all(_isClose(v, g, threshold) for v, g in zip(vector, groupValues)))
+
+		proposedValues, _ = vectors.most_common(1)[0]
+		recordsBefore, recordsAfter = recordsNeeded(currentValues), recordsNeeded(proposedValues)
+		if recordsAfter < recordsBefore:
+			proposals.append(
+				GroupValueProposal(
+					leftGroupKey,
+					rightGroupKey,
+					dict(zip(masterIds, currentValues)),
+					dict(zip(masterIds, proposedValues)),
+					recordsBefore,
+					recordsAfter,
+					PAIR_RECORD_SIZE * (recordsBefore - recordsAfter),
+					)
+				)
+	proposals.sort(key=lambda p: -p.bytesSaved)
+	return proposals
+
+def optimizeKerning(kerning, index, threshold=1, pairFilter=None):
+	"""
+	Redundant exceptions in all masters, then group value proposals for what remains.
+	Byte counts are per compiled font (one master or instance), for PairPos Format 1 records.
+	"""
+	redundant, remaining = redundantExceptions(kerning, index, threshold=threshold, pairFilter=pairFilter)
+	proposals = groupValueProposals(remaining, index, threshold=threshold)
+	return KerningOptimization(redundant, proposals, sum(r.bytes for r in redundant))
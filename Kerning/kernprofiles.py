@@ -0,0 +1,601 @@
+# -*- coding: utf-8 -*-
+"""
+Sampled sidebearing profiles for kerning analysis.
+Does not need the Glyphs API, so the same code can be used by scripts inside the app
+(see kernanalysis.py) and by helpers running outside of it.
+
+A profile holds the left and right margins of a layer, measured every step units.
+A pair is measured at the same heights as the per-pair measuring the scripts used before:
+from the higher of the two bounds bottoms upwards, as long as a full step fits below the lower top.
+All heights of a pair therefore lie on one grid, height = phase + index * step, the phase
+being the bottom of the higher glyph modulo step (see samplePhase). A profile keeps
+the margins on its own grid and on the grids of all partners with a higher bottom
+(see phasesForPairings), so any two profiles line up without resampling, and the distance
+between two glyphs boils down to a min() over two margin sequences. Heights without
+outline (like between the dot and stem of i) are stored as INF.
+"""
+from __future__ import division, print_function
+
+import os, sys, json, time, tempfile
+from hashlib import md5
+from math import ceil, floor
+from operator import add
+from functools import lru_cache
+from collections import OrderedDict, namedtuple
+from timeit import default_timer as timer
+
+# import from enclosing folder:
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from workerprocesses import HiddenMainModule
+try:
+	import numpy
+except ImportError:
+	numpy = None # falls back to pure Python
+
+INF = float("inf")
+_gridTolerance = 1e-5 # in steps, for heights that fall on a grid line
+
+def samplePhase(height, step):
+	"""
+	Position of height within one step, 0 <= phase < step: the grid of heights phase + index * step
+	that starts at height. Rounded to a millionth of a unit, so that float noise does not open a new grid.
+	"""
+	phase = round(height % step, 6)
+	return float(phase) if phase < step else 0.0
+
+def gridIndexRange(bottom, top, step, phase=0.0):
+	"""
+	Returns (start, end) grid indexes for all heights phase + index * step
+	with bottom <= height and height + step <= top. end is exclusive.
+	"""
+	start = int(ceil((bottom - phase) / step - _gridTolerance))
+	end = int(floor((top - phase) / step + _gridTolerance))
+	return start, max(start, end)
+
+class ProfileGrid(namedtuple("ProfileGrid", ("start", "lsbs", "rsbs"))):
+	"""
+	Margins at the heights phase + index * step for start <= index < end, INF where there is no outline.
+	"""
+	__slots__ = ()
+
+	@property
+	def end(self):
+		return self.start + len(self.lsbs)
+
+class SidebearingProfile(object):
+	__slots__ = ("step", "bottom", "top", "grids")
+
+	def __init__(self, step, bottom, top, grids=None):
+		self.step = step # distance between two measurements
+		self.bottom = bottom # bottom of the layer bounds
+		self.top = top # top of the layer bounds
+		self.grids = dict(grids or {}) # phase: ProfileGrid
+
+	def __len__(self):
+		return sum(len(grid.lsbs) for grid in self.grids.values())
+
+	def __repr__(self):
+		return "<SidebearingProfile step=%s bounds=%s..%s phases=%s>" % (self.step, self.bottom, self.top, sorted(self.grids))
+
+	@property
+	def phase(self):
+		# phase of the grid starting at the bottom of the layer
+		return samplePhase(self.bottom, self.step)
+
+	def grid(self, phase):
+		grid = self.grids.get(phase)
+		if grid is None:
+			raise ValueError("Profile not measured at phase %s, see phasesForPairings()." % phase)
+		return grid
+
+	def gridHeights(self, phase):
+		start, end = gridIndexRange(self.bottom, self.top, self.step, phase)
+		return [phase + index * self.step for index in range(start, end)]
+
+	def addPhases(self, phases, measure):
+		"""
+		Measures the grids of phases that are not measured yet.
+		measure(height) must return (lsb, rsb), either of them None for gaps.
+		"""
+		for phase in phases:
+			if phase in self.grids:
+				continue
+			start, end = gridIndexRange(self.bottom, self.top, self.step, phase)
+			lsbs, rsbs = [], []
+			for index in range(start, end):
+				lsb, rsb = measure(phase + index * self.step)
+				lsbs.append(INF if lsb is None else lsb)
+				rsbs.append(INF if rsb is None else rsb)
+			self.grids[phase] = ProfileGrid(start, tuple(lsbs), tuple(rsbs))
+
+def isHeightInIntervals(height, ignoreIntervals):
+	if ignoreIntervals:
+		for interval in ignoreIntervals:
+			if height <= interval[1] and height >= interval[0]:
+				return True
+	return False
+
+def profileFromMeasurements(bottom, top, step, measure, phases=None):
+	"""
+	Builds a SidebearingProfile for a layer with the bounds bottom and top, measured on the
+	grids of phases, by default on its own grid only (the one starting at bottom).
+	measure(height) must return (lsb, rsb), either of them None for gaps.
+	"""
+	profile = SidebearingProfile(step, bottom, top)
+	profile.addPhases((profile.phase, ) if phases is None else phases, measure)
+	return profile
+
+def pairPhase(leftProfile, rightProfile):
+	"""
+	Phase of the heights at which a pair is measured: the grid starting at the higher of the two bottoms.
+	"""
+	return leftProfile.phase if leftProfile.bottom >= rightProfile.bottom else rightProfile.phase
+
+def phasesForPairings(leftProfiles, rightProfiles):
+	"""
+	The phases every profile needs for measuring all pairings of leftProfiles and rightProfiles:
+	its own one, and those of all partners with a higher bottom.
+	Returns two lists of sets, one for leftProfiles, one for rightProfiles.
+	"""
+
+	def neededPhases(profiles, partners):
+		highestBottoms = {} # phase: highest bottom of a partner with that phase
+		for partner in partners:
+			highestBottoms[partner.phase] = max(highestBottoms.get(partner.phase, partner.bottom), partner.bottom)
+		lowestBottom = min((partner.bottom for partner in partners), default=None)
+		phases = []
+		for profile in profiles:
+			needed = set(phase for phase, bottom in highestBottoms.items() if bottom > profile.bottom)
+			if lowestBottom is not None and lowestBottom <= profile.bottom:
+				needed.add(profile.phase)
+			phases.append(needed)
+		return phases
+
+	return neededPhases(leftProfiles, rightProfiles), neededPhases(rightProfiles, leftProfiles)
+
+@lru_cache(maxsize=1024)
+def _ignoredIndexes(start, end, step, phase, ignoreIntervals):
+	return frozenset(i - start for i in range(start, end) if isHeightInIntervals(phase + i * step, ignoreIntervals))
+
+def minDistanceBetweenProfiles(leftProfile, rightProfile, kerning=0.0, ignoreIntervals=()):
+	"""
+	Smallest horizontal distance between the glyph of leftProfile (measured at its right side)
+	and the glyph of rightProfile (measured at its left side), including kerning.
+	Both profiles must be measured at the phase of the pair (see pairPhase).
+	Returns None if the two glyphs do not share a single measured height.
+	"""
+	if leftProfile.step != rightProfile.step:
+		raise ValueError("Cannot compare profiles with different step sizes (%s and %s)." % (leftProfile.step, rightProfile.step))
+
+	if min(leftProfile.top, rightProfile.top) - max(leftProfile.bottom, rightProfile.bottom) < leftProfile.step:
+		return None
+	phase = pairPhase(leftProfile, rightProfile)
+	leftGrid, rightGrid = leftProfile.grid(phase), rightProfile.grid(phase)
+	start = max(leftGrid.start, rightGrid.start)
+	end = min(leftGrid.end, rightGrid.end)
+	if end <= start:
+		return None
+
+	rsbs = leftGrid.rsbs[start - leftGrid.start:end - leftGrid.start]
+	lsbs = rightGrid.lsbs[start - rightGrid.start:end - rightGrid.start]
+	if ignoreIntervals:
+		ignored = _ignoredIndexes(start, end, leftProfile.step, phase, tuple(tuple(i) for i in ignoreIntervals))
+		if ignored:
+			totals = [total for i, total in enumerate(map(add, rsbs, lsbs)) if not i in ignored]
+			minDist = min(totals, default=INF)
+		else:
+			minDist = min(map(add, rsbs, lsbs))
+	else:
+		minDist = min(map(add, rsbs, lsbs))
+
+	if minDist == INF:
+		return None
+	return minDist + kerning
+
+def _maskedRows(grids, leftSide, start, end, step, phase, ignoreIntervals):
+	"""
+	Stacks the margins of profile grids into a (grids × heights) numpy array
+	covering grid indexes start..end, padded with INF. Ignored heights are INF as well.
+	"""
+	rows = numpy.full((len(grids), end - start), INF)
+	for i, grid in enumerate(grids):
+		margins = grid.lsbs if leftSide else grid.rsbs
+		rows[i, grid.start - start:grid.end - start] = margins
+	if ignoreIntervals:
+		ignored = _ignoredIndexes(start, end, step, phase, tuple(tuple(i) for i in ignoreIntervals))
+		if ignored:
+			rows[:, sorted(ignored)] = INF
+	return rows
+
+def _phaseDistanceMatrix(leftProfiles, rightProfiles, phase, ignoreIntervals, maxChunkSize):
+	# min distances without kerning for all pairings, on the grid of one phase, INF where there is no shared height
+	leftGrids = [p.grid(phase) for p in leftProfiles]
+	rightGrids = [p.grid(phase) for p in rightProfiles]
+	start = min(grid.start for grid in leftGrids + rightGrids)
+	end = max(grid.end for grid in leftGrids + rightGrids)
+	if end <= start:
+		return numpy.full((len(leftProfiles), len(rightProfiles)), INF)
+
+	step = leftProfiles[0].step
+	leftRows = _maskedRows(leftGrids, False, start, end, step, phase, ignoreIntervals) # rsbs of left glyphs
+	rightRows = _maskedRows(rightGrids, True, start, end, step, phase, ignoreIntervals) # lsbs of right glyphs
+	chunkSize = max(1, maxChunkSize // (len(rightProfiles) * (end - start)))
+	distances = numpy.empty((len(leftProfiles), len(rightProfiles)))
+	for chunkStart in range(0, len(leftProfiles), chunkSize):
+		chunk = leftRows[chunkStart:chunkStart + chunkSize]
+		distances[chunkStart:chunkStart + chunkSize] = (chunk[:, None, :] + rightRows[None, :, :]).min(axis=2)
+	return distances
+
+def minDistanceMatrix(leftProfiles, rightProfiles, kerningMatrix=None, ignoreIntervals=(), maxChunkSize=4000000):
+	"""
+	Min distances for all pairings of leftProfiles (M) and rightProfiles (N),
+	measured at the phases returned by phasesForPairings().
+	kerningMatrix is an M×N nested sequence of kerning values, or None for no kerning.
+	Returns an M×N list of lists, None where two glyphs do not share a measured height.
+	Uses numpy if available: all heights of all pairings of one phase are added in one broadcast,
+	chunked by left glyphs so that memory stays below maxChunkSize values.
+	"""
+	if not leftProfiles or not rightProfiles:
+		return [[] for p in leftProfiles]
+
+	steps = set(p.step for p in leftProfiles) | set(p.step for p in rightProfiles)
+	if len(steps) > 1:
+		raise ValueError("Cannot compare profiles with different step sizes (%s)." % ", ".join(str(s) for s in sorted(steps)))
+
+	if numpy is None:
+		matrix = []
+		for i, leftProfile in enumerate(leftProfiles):
+			row = []
+			for j, rightProfile in enumerate(rightProfiles):
+				kerning = kerningMatrix[i][j] if kerningMatrix is not None else 0.0
+				row.append(minDistanceBetweenProfiles(leftProfile, rightProfile, kerning=kerning, ignoreIntervals=ignoreIntervals))
+			matrix.append(row)
+		return matrix
+
+	# every pair is measured on the grid of the glyph with the higher bottom:
+	phases = sorted(set(p.phase for p in leftProfiles) | set(p.phase for p in rightProfiles))
+	codeForPhase = {phase: code for code, phase in enumerate(phases)}
+	leftBottoms = numpy.array([p.bottom for p in leftProfiles], dtype=float)
+	rightBottoms = numpy.array([p.bottom for p in rightProfiles], dtype=float)
+	leftCodes = numpy.array([codeForPhase[p.phase] for p in leftProfiles])
+	rightCodes = numpy.array([codeForPhase[p.phase] for p in rightProfiles])
+	pairCodes = numpy.where(leftBottoms[:, None] >= rightBottoms[None, :], leftCodes[:, None], rightCodes[None, :])
+
+	distances = numpy.full((len(leftProfiles), len(rightProfiles)), INF)
+	for code, phase in enumerate(phases):
+		inPhase = pairCodes == code
+		rows = numpy.flatnonzero(inPhase.any(axis=1))
+		columns = numpy.flatnonzero(inPhase.any(axis=0))
+		if not rows.size:
+			continue
+		block = numpy.ix_(rows, columns)
+		phaseDistances = _phaseDistanceMatrix([leftProfiles[i] for i in rows], [rightProfiles[j] for j in columns], phase, ignoreIntervals, maxChunkSize)
+		distances[block] = numpy.where(inPhase[block], phaseDistances, distances[block])
+
+	if kerningMatrix is not None:
+		distances += numpy.asarray(kerningMatrix, dtype=float)
+	return [[None if d == INF else d for d in row] for row in distances.tolist()]
+
+def pairsInMatrix(distanceMatrix, below=None, above=None):
+	"""
+	Yields (i, j, distance) for all measured distances smaller than below or larger than above.
+	"""
+	for i, row in enumerate(distanceMatrix):
+		for j, distance in enumerate(row):
+			if distance is None:
+				continue
+			if (below is not None and distance < below) or (above is not None and distance > above):
+				yield i, j, distance
+
+# ADAPTIVE SAMPLING
+
+class AdaptiveProfile(object):
+	"""
+	A coarse SidebearingProfile plus fine measurements that are only taken where needed.
+	measure(height) must return (lsb, rsb), either of them None for gaps.
+	keyHeights are heights of outline extrema (e.g., on-curve nodes), where thin features can hide
+	between two coarse measurements. coarseStep must be a multiple of fineStep.
+	"""
+
+	def __init__(self, measure, bottom, top, fineStep=1.0, coarseStep=10.0, keyHeights=()):
+		self.measure = measure
+		self.fineStep = fineStep
+		self.coarseStep = coarseStep
+		self.ratio = max(1, int(round(coarseStep / fineStep)))
+		self.fineStart, self.fineEnd = gridIndexRange(bottom, top, fineStep)
+		self.fine = {} # fine grid index -> (lsb, rsb), INF for gaps
+		self.coarse = profileFromMeasurements(bottom, top, self.ratio * fineStep, lambda height: self._measured(int(round(height / fineStep))), phases=(0.0, ))
+		self.keyIndexes = frozenset(int(round(h / fineStep)) // self.ratio for h in keyHeights)
+
+	def _measured(self, index):
+		if not index in self.fine:
+			lsb, rsb = self.measure(index * self.fineStep)
+			self.fine[index] = (INF if lsb is None else lsb, INF if rsb is None else rsb)
+		return self.fine[index]
+
+	def lsb(self, index):
+		return self._measured(index)[0]
+
+	def rsb(self, index):
+		return self._measured(index)[1]
+
+def minDistanceBetweenAdaptiveProfiles(leftProfile, rightProfile, kerning=0.0, tolerance=None, ignoreIntervals=()):
+	"""
+	Like minDistanceBetweenProfiles() at the fine step, but only measures finely around coarse heights
+	that come within tolerance of the coarse minimum, and around outline extrema of either glyph.
+	tolerance defaults to twice the coarse step, i.e., margins steeper than about 60° between two coarse measurements.
+	"""
+	if leftProfile.fineStep != rightProfile.fineStep or leftProfile.ratio != rightProfile.ratio:
+		raise ValueError("Cannot compare adaptive profiles with different step sizes.")
+	if tolerance is None:
+		tolerance = 2 * leftProfile.coarseStep
+
+	# coarse pass:
+	coarseLeft, coarseRight = leftProfile.coarse.grid(0.0), rightProfile.coarse.grid(0.0)
+	start, end = max(coarseLeft.start, coarseRight.start), min(coarseLeft.end, coarseRight.end)
+	totals = list(map(add, coarseLeft.rsbs[start - coarseLeft.start:end - coarseLeft.start], coarseRight.lsbs[start - coarseRight.start:end - coarseRight.start]))
+	coarseMin = min(totals, default=INF)
+
+	# coarse bands worth refining:
+	keyIndexes = leftProfile.keyIndexes | rightProfile.keyIndexes
+	bands = set()
+	for offset, total in enumerate(totals):
+		if total <= coarseMin + tolerance or start + offset in keyIndexes:
+			bands.add(start + offset)
+	bands.update(i for i in keyIndexes if start - 1 <= i <= end)
+
+	# fine pass around candidate bands:
+	ratio, fineStep = leftProfile.ratio, leftProfile.fineStep
+	fineStart = max(leftProfile.fineStart, rightProfile.fineStart)
+	fineEnd = min(leftProfile.fineEnd, rightProfile.fineEnd)
+	minDist = INF
+	visited = set()
+	for band in bands:
+		# the topmost band also covers the fine heights above the last coarse one:
+		bandEnd = fineEnd if band >= end - 1 else min(fineEnd, (band + 1) * ratio + 1)
+		for index in range(max(fineStart, (band - 1) * ratio), bandEnd):
+			if index in visited:
+				continue
+			visited.add(index)
+			if ignoreIntervals and isHeightInIntervals(index * fineStep, ignoreIntervals):
+				continue
+			total = leftProfile.rsb(index) + rightProfile.lsb(index)
+			if total < minDist:
+				minDist = total
+
+	if minDist == INF:
+		return None
+	return minDist + kerning
+
+class ProfileCache(object):
+	"""
+	Profiles stored with a fingerprint of the layer they were measured on.
+	A profile is only returned as long as the fingerprint is the same.
+	Keeps the maxSize most recently used profiles.
+	"""
+
+	def __init__(self, maxSize=20000):
+		self.maxSize = maxSize
+		self.entries = OrderedDict() # key: (fingerprint, profile)
+
+	def __len__(self):
+		return len(self.entries)
+
+	def get(self, key, fingerprint):
+		cached = self.entries.get(key)
+		if cached is None or cached[0] != fingerprint:
+			return None
+		self.entries.move_to_end(key)
+		return cached[1]
+
+	def set(self, key, fingerprint, profile):
+		self.entries[key] = (fingerprint, profile)
+		self.entries.move_to_end(key)
+		while len(self.entries) > self.maxSize:
+			self.entries.popitem(last=False)
+
+	def clear(self):
+		self.entries.clear()
+
+# SHARDED BATCH RUNS
+
+def measurementShards(fontName, masterName, leftNames, leftProfiles, rightNames, rightProfiles, kerningMatrix, below=None, above=None, ignoreIntervals=(), chunkSize=50):
+	"""
+	Splits the pairings of one master into shards of at most chunkSize left glyphs.
+	Shards only contain plain Python data, so they can be sent to other processes.
+	"""
+	shards = []
+	for chunkIndex, chunkStart in enumerate(range(0, len(leftNames), chunkSize)):
+		chunkEnd = chunkStart + chunkSize
+		shards.append({
+			"font": fontName,
+			"master": masterName,
+			"chunk": chunkIndex,
+			"leftNames": list(leftNames[chunkStart:chunkEnd]),
+			"leftProfiles": list(leftProfiles[chunkStart:chunkEnd]),
+			"rightNames": list(rightNames),
+			"rightProfiles": list(rightProfiles),
+			"kerningMatrix": [list(row) for row in kerningMatrix[chunkStart:chunkEnd]],
+			"below": below,
+			"above": above,
+			"ignoreIntervals": [tuple(i) for i in ignoreIntervals or ()],
+			})
+	return shards
+
+def measureShard(shard):
+	"""
+	Returns (font, master, chunk, pairs, seconds) for a shard, pairs being (leftName, rightName, distance) tuples.
+	"""
+	start = timer()
+	distanceMatrix = minDistanceMatrix(shard["leftProfiles"], shard["rightProfiles"], kerningMatrix=shard["kerningMatrix"], ignoreIntervals=shard["ignoreIntervals"])
+	pairs = [(shard["leftNames"][i], shard["rightNames"][j], distance) for i, j, distance in pairsInMatrix(distanceMatrix, below=shard["below"], above=shard["above"])]
+	return shard["font"], shard["master"], shard["chunk"], pairs, timer() - start
+
+def _canSpawnProcesses(executable=None):
+	# inside the Glyphs app, sys.executable is the app, so the workers need an interpreter passed as executable:
+	return bool(executable) or os.path.basename(sys.executable or "").lower().startswith("python")
+
+def runShards(shards, processes=None, executable=None):
+	"""
+	Measures all shards, in a process pool if possible, otherwise one after the other.
+	executable: Python interpreter for the workers, needed inside the app where sys.executable is the app.
+	Results are returned in the order of the shards, independent of which process finished first.
+	"""
+	if processes != 1 and len(shards) > 1 and _canSpawnProcesses(executable):
+		try:
+			import multiprocessing
+			from concurrent.futures import ProcessPoolExecutor
+			context = multiprocessing.get_context("spawn")
+			if executable:
+				context.set_executable(executable)
+			with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+				with HiddenMainModule():
+					futures = [pool.submit(measureShard, shard) for shard in shards]
+				return [future.result() for future in futures]
+		except Exception as e:
+			print("⚠️ Could not measure in parallel, falling back to a single process: %s" % e)
+	return [measureShard(shard) for shard in shards]
+
+def mergedShardResults(results):
+	"""
+	Merges shard results into an ordered dict of (font, master) -> list of pairs,
+	and a list of (font, master, chunk, seconds) timings.
+	"""
+	merged = OrderedDict()
+	timings = []
+	for fontName, masterName, chunkIndex, pairs, seconds in results:
+		merged.setdefault((fontName, masterName), []).extend(pairs)
+		timings.append((fontName, masterName, chunkIndex, seconds))
+	return merged, timings
+
+# PERSISTENT RESULTS
+
+def measurementStoreFile(folder, fontPath, masterId):
+	"""
+	Path of the MeasurementStore file for one master of a font inside folder.
+	"""
+	fileName = md5(("%s|%s" % (fontPath, masterId)).encode("utf-8")).hexdigest()
+	return os.path.join(folder, fileName + ".json")
+
+def pruneMeasurementStores(folder, maxFiles=50, maxAge=30 * 24 * 3600):
+	"""
+	Deletes store files not used for maxAge seconds, and the least recently used ones beyond maxFiles.
+	"""
+	if not os.path.isdir(folder):
+		return
+	now = time.time()
+	storeFiles = []
+	for fileName in os.listdir(folder):
+		if fileName.endswith(".json"):
+			path = os.path.join(folder, fileName)
+			storeFiles.append((os.path.getmtime(path), path))
+	storeFiles.sort(reverse=True)
+	for i, (modified, path) in enumerate(storeFiles):
+		if i >= maxFiles or now - modified > maxAge:
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+
+class MeasurementStore(object):
+	"""
+	Remembers measured distances of one font master per settings and pair, in one JSON file
+	per master (see measurementStoreFile), together with a content hash of every glyph involved
+	and the kerning value used. A distance can be reused as long as neither glyph changed
+	and the kerning is the same. Only the maxSettings most recently used settings are kept.
+	"""
+
+	def __init__(self, folder, fontPath, masterId, maxSettings=3):
+		self.path = measurementStoreFile(folder, fontPath, masterId)
+		self.fontPath = str(fontPath)
+		self.masterId = str(masterId)
+		self.maxSettings = maxSettings
+		self.settings = {}
+		if os.path.exists(self.path):
+			try:
+				with open(self.path, encoding="utf-8") as storeFile:
+					data = json.load(storeFile)
+				if data.get("font") == self.fontPath and data.get("master") == self.masterId:
+					self.settings = data.get("settings", {})
+			except Exception as e:
+				print("⚠️ Could not read stored measurements, starting from scratch: %s" % e)
+				self.settings = {}
+
+	def save(self):
+		"""
+		Writes the most recently used settings to a temporary file and moves it in place,
+		so an interrupted run never leaves a broken store behind.
+		"""
+		keptKeys = sorted(self.settings, key=lambda key: self.settings[key].get("used", 0), reverse=True)[:self.maxSettings]
+		data = {"font": self.fontPath, "master": self.masterId, "settings": {key: self.settings[key] for key in keptKeys}}
+		folder = os.path.dirname(self.path)
+		if folder and not os.path.exists(folder):
+			os.makedirs(folder)
+		handle, temporaryPath = tempfile.mkstemp(dir=folder or None, suffix=".tmp")
+		try:
+			with os.fdopen(handle, "w", encoding="utf-8") as storeFile:
+				json.dump(data, storeFile)
+			os.replace(temporaryPath, self.path)
+		except:
+			if os.path.exists(temporaryPath):
+				os.remove(temporaryPath)
+			raise
+
+	def entry(self, settingsKey):
+		entry = self.settings.setdefault(str(settingsKey), {"glyphs": {}, "pairs": {}})
+		entry["used"] = time.time()
+		return entry
+
+	def updateGlyphHashes(self, entry, glyphHashes):
+		"""
+		Stores the current hashes and forgets all pairs with glyphs that changed since the last run.
+		Returns the set of changed glyph names.
+		"""
+		storedHashes = entry["glyphs"]
+		pairs = entry["pairs"]
+		changed = set(name for name, glyphHash in glyphHashes.items() if storedHashes.get(name) != glyphHash)
+		if changed:
+			for leftName in changed:
+				pairs.pop(leftName, None)
+			for rightDict in pairs.values():
+				for rightName in changed.intersection(rightDict):
+					del rightDict[rightName]
+			storedHashes.update(glyphHashes)
+		return changed
+
+	def distanceMatrix(self, entry, leftNames, rightNames, kerningMatrix, profileForName, ignoreIntervals=()):
+		"""
+		Returns (distanceMatrix, number of measured pairs).
+		Only pairs that are not stored, or whose kerning changed, are measured.
+		profileForName(glyphName, phases) must return the SidebearingProfile of a glyph, measured
+		at least at phases (may be empty), it is only called when needed.
+		"""
+		pairs = entry["pairs"]
+		profiles = {}
+
+		def profile(glyphName, phases=()):
+			glyphProfile = profiles.get(glyphName)
+			if glyphProfile is None or not all(phase in glyphProfile.grids for phase in phases):
+				glyphProfile = profiles[glyphName] = profileForName(glyphName, phases)
+			return glyphProfile
+
+		def measuredPair(leftName, rightName):
+			phase = pairPhase(profile(leftName), profile(rightName))
+			return profile(leftName, (phase, )), profile(rightName, (phase, ))
+
+		matrix = []
+		measuredCount = 0
+		for leftName, kerningRow in zip(leftNames, kerningMatrix):
+			storedRow = pairs.setdefault(leftName, {})
+			row = []
+			for rightName, kerning in zip(rightNames, kerningRow):
+				stored = storedRow.get(rightName)
+				if stored is not None and stored[0] == kerning:
+					distance = stored[1]
+				else:
+					distance = minDistanceBetweenProfiles(*measuredPair(leftName, rightName), kerning=kerning, ignoreIntervals=ignoreIntervals)
+					storedRow[rightName] = (kerning, distance)
+					measuredCount += 1
+				row.append(distance)
+			matrix.append(row)
+		return matrix, measuredCount
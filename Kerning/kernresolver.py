@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Resolves effective kerning for many pairs at once from plain dicts.
+Does not need the Glyphs API: kernanalysis.py feeds it from the open font,
+outlinesampler.py from a .glyphs file.
+
+Precedence is the same as in the app (LTR):
+glyph-glyph exception > glyph-group exception > group-glyph exception > group-group kerning.
+"""
+from __future__ import division, print_function
+
+import csv, json
+from collections import namedtuple
+
+class KerningResolver(object):
+	"""
+	kerning: {leftKey: {rightKey: value}} for one master, keys are glyph names or @MMK_L_/@MMK_R_ groups
+	leftGroups: {glyphName: name of its group when on the LEFT side of a pair} (i.e., its right kerning group)
+	rightGroups: {glyphName: name of its group when on the RIGHT side of a pair} (i.e., its left kerning group)
+	glyphNameForKey: optional {key: glyphName} for kerning dicts that use glyph IDs instead of names
+	"""
+
+	def __init__(self, kerning, leftGroups=None, rightGroups=None, glyphNameForKey=None):
+		self.kerning = {}
+		for leftKey, rightDict in (kerning or {}).items():
+			if glyphNameForKey and not leftKey.startswith("@"):
+				leftKey = glyphNameForKey.get(leftKey, leftKey)
+			if glyphNameForKey:
+				rightDict = {(k if k.startswith("@") else glyphNameForKey.get(k, k)): v for k, v in rightDict.items()}
+			self.kerning[leftKey] = dict(rightDict)
+		self.leftGroupKeys = {name: "@MMK_L_%s" % group for name, group in (leftGroups or {}).items() if group}
+		self.rightGroupKeys = {name: "@MMK_R_%s" % group for name, group in (rightGroups or {}).items() if group}
+		self._empty = {}
+
+	def _rows(self, leftName):
+		# kerning rows that apply to a left glyph: (exception row, group row)
+		groupKey = self.leftGroupKeys.get(leftName)
+		return (
+			self.kerning.get(leftName, self._empty),
+			self.kerning.get(groupKey, self._empty) if groupKey else self._empty,
+			)
+
+	def kerningForPair(self, leftName, rightName, default=0.0):
+		glyphRow, groupRow = self._rows(leftName)
+		rightGroupKey = self.rightGroupKeys.get(rightName)
+		if rightName in glyphRow:
+			return glyphRow[rightName]
+		if rightGroupKey in glyphRow:
+			return glyphRow[rightGroupKey]
+		if rightName in groupRow:
+			return groupRow[rightName]
+		if rightGroupKey in groupRow:
+			return groupRow[rightGroupKey]
+		return default
+
+	def keysForPair(self, leftName, rightName):
+		"""
+		(leftKey, rightKey) of the kerning entry that applies to the glyph pair, None if there is none.
+		"""
+		glyphRow, groupRow = self._rows(leftName)
+		rightGroupKey = self.rightGroupKeys.get(rightName)
+		if rightName in glyphRow:
+			return leftName, rightName
+		if rightGroupKey in glyphRow:
+			return leftName, rightGroupKey
+		leftGroupKey = self.leftGroupKeys.get(leftName)
+		if rightName in groupRow:
+			return leftGroupKey, rightName
+		if rightGroupKey in groupRow:
+			return leftGroupKey, rightGroupKey
+		return None
+
+	def kerningRow(self, leftName, rightNames, default=0.0):
+		glyphRow, groupRow = self._rows(leftName)
+		if not glyphRow and not groupRow:
+			return [default] * len(rightNames)
+		row = []
+		rightGroupKeys = self.rightGroupKeys
+		for rightName in rightNames:
+			rightGroupKey = rightGroupKeys.get(rightName)
+			if rightName in glyphRow:
+				row.append(glyphRow[rightName])
+			elif rightGroupKey in glyphRow:
+				row.append(glyphRow[rightGroupKey])
+			elif rightName in groupRow:
+				row.append(groupRow[rightName])
+			elif rightGroupKey in groupRow:
+				row.append(groupRow[rightGroupKey])
+			else:
+				row.append(default)
+		return row
+
+	def kerningMatrix(self, leftNames, rightNames, default=0.0):
+		"""
+		Dense M×N list of lists of effective kerning values, e.g. for kernprofiles.minDistanceMatrix().
+		"""
+		rightNames = list(rightNames)
+		return [self.kerningRow(leftName, rightNames, default=default) for leftName in leftNames]
+
+	def setKerningForPair(self, leftKey, rightKey, value):
+		"""
+		Updates the in-memory kerning, e.g. with planned values, so that following lookups take it into account.
+		"""
+		self.kerning.setdefault(leftKey, {})[rightKey] = value
+
+# KERNING PLANS
+
+PlannedKerning = namedtuple("PlannedKerning", ("leftSide", "rightSide", "oldValue", "newValue", "reason", "apply"))
+
+def writeKerningPlan(plan, path):
+	"""
+	Writes a list of PlannedKerning rows into a CSV or JSON file, depending on the file suffix.
+	"""
+	if path.lower().endswith(".json"):
+		with open(path, "w", encoding="utf-8") as planFile:
+			json.dump([row._asdict() for row in plan], planFile, indent=1, ensure_ascii=False)
+	else:
+		with open(path, "w", encoding="utf-8", newline="") as planFile:
+			writer = csv.writer(planFile)
+			writer.writerow(PlannedKerning._fields)
+			for row in plan:
+				writer.writerow(row)
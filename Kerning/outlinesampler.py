@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Headless counterpart of the measuring functions in kernanalysis.py.
+Measures sidebearings on outlines read from .glyphs files, UFOs or fontTools glyph sets,
+so KernCrasher, GapFinder and Auto Bumper logic can run without the app, e.g. on a build server:
+
+python3 outlinesampler.py -h
+python3 outlinesampler.py MyFont.glyphs --left A V T --right A V o --min 10
+python3 outlinesampler.py *.glyphs --min 10 --max 250 --processes 8
+python3 outlinesampler.py MyFont.ufo --min 10
+"""
+from __future__ import division, print_function
+
+import os, sys
+from argparse import ArgumentParser
+
+# import from enclosing folder:
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from glyphsfile import readFont, decomposedPaths
+from outlinegeometry import flattenContour, lineSegments, boundsOfLines, extremaAtHeight, extremaAtHeights, monotonePieces, exactMinDistance
+from kernprofiles import *
+from kernresolver import KerningResolver
+
+class SampledLayer(object):
+	"""
+	Decomposed, flattened outline of a glyph layer, ready for measuring.
+	Offers lsbAtHeight_() and rsbAtHeight_() like a GSLayer, returning None instead of NSNotFound.
+	"""
+
+	def __init__(self, glyphName, layerId, width, lines, pieces=()):
+		self.glyphName = glyphName
+		self.layerId = layerId
+		self.width = width
+		self.lines = lines
+		self.pieces = pieces # unflattened, for exactMinDistance()
+		self.bounds = boundsOfLines(lines) # (xMin, yMin, xMax, yMax)
+
+	def __repr__(self):
+		return "<SampledLayer %s (%s)>" % (self.glyphName, self.layerId)
+
+	def lsbAtHeight_(self, height):
+		left, right = extremaAtHeight(self.lines, height)
+		return left
+
+	def rsbAtHeight_(self, height):
+		left, right = extremaAtHeight(self.lines, height)
+		if right is None:
+			return None
+		return self.width - right
+
+def sampledLayerFromHeadlessLayer(font, layer, tolerance=0.5):
+	paths = decomposedPaths(font, layer)
+	polylines = [(flattenContour(nodes, closed=closed, tolerance=tolerance), closed) for nodes, closed in paths]
+	pieces = [piece for nodes, closed in paths for piece in monotonePieces(nodes, closed=closed)]
+	return SampledLayer(layer.glyphName, layer.layerId, layer.width, lineSegments(polylines), pieces)
+
+# sampled layers, keyed by (font path, glyph name, master id):
+sampledLayerCache = {}
+
+def sampledLayer(font, glyphName, masterId, tolerance=0.5):
+	key = (font.path or id(font), glyphName, masterId, tolerance)
+	if not key in sampledLayerCache:
+		layer = font.layer(glyphName, masterId)
+		sampledLayerCache[key] = None if layer is None else sampledLayerFromHeadlessLayer(font, layer, tolerance=tolerance)
+	return sampledLayerCache[key]
+
+def measureLayerAtHeightFromLeftOrRight(thisLayer, height, leftSide=True):
+	if leftSide:
+		return thisLayer.lsbAtHeight_(height)
+	else:
+		return thisLayer.rsbAtHeight_(height)
+
+def layerProfile(thisLayer, step=5.0, phases=()):
+	"""
+	SidebearingProfile of thisLayer, measured from its bottom and on the grids of phases.
+	All heights are intersected with the outline in one batch.
+	"""
+	if thisLayer.bounds is None:
+		return SidebearingProfile(step, 0.0, 0.0)
+	xMin, yMin, xMax, yMax = thisLayer.bounds
+	profile = SidebearingProfile(step, yMin, yMax)
+	phases = [profile.phase] + [phase for phase in phases if phase != profile.phase]
+	heights = [height for phase in phases for height in profile.gridHeights(phase)]
+	extrema = dict(zip(heights, extremaAtHeights(thisLayer.lines, heights)))
+
+	def measure(height):
+		left, right = extrema[height]
+		if left is None:
+			return None, None
+		return left, thisLayer.width - right
+
+	profile.addPhases(phases, measure)
+	return profile
+
+def pairingProfiles(leftLayers, rightLayers, step=5.0):
+	"""
+	Returns (leftProfiles, rightProfiles), measured at all heights needed
+	for the pairings of leftLayers with rightLayers (see phasesForPairings). Layers of missing glyphs may be None.
+	"""
+	emptyProfile = SidebearingProfile(step, 0.0, 0.0)
+	leftProfiles = [layerProfile(thisLayer, step=step) if thisLayer else emptyProfile for thisLayer in leftLayers]
+	rightProfiles = [layerProfile(thisLayer, step=step) if thisLayer else emptyProfile for thisLayer in rightLayers]
+	leftPhases, rightPhases = phasesForPairings(leftProfiles, rightProfiles)
+	return (
+		[layerProfile(thisLayer, step=step, phases=phases) if thisLayer else emptyProfile for thisLayer, phases in zip(leftLayers, leftPhases)],
+		[layerProfile(thisLayer, step=step, phases=phases) if thisLayer else emptyProfile for thisLayer, phases in zip(rightLayers, rightPhases)],
+		)
+
+def minDistanceBetweenTwoLayers(leftLayer, rightLayer, interval=5.0, kerning=0.0, report=False, ignoreIntervals=[], exact=False):
+	if exact:
+		return exactMinDistance(leftLayer.pieces, leftLayer.width, rightLayer.pieces, kerning=kerning, ignoreIntervals=ignoreIntervals)
+	leftProfiles, rightProfiles = pairingProfiles([leftLayer], [rightLayer], step=interval)
+	return minDistanceBetweenProfiles(leftProfiles[0], rightProfiles[0], kerning=kerning, ignoreIntervals=ignoreIntervals)
+
+# kerning resolvers, keyed by (font path, master id):
+kerningResolverCache = {}
+
+def kerningResolver(font, masterId):
+	key = (font.path or id(font), masterId)
+	if not key in kerningResolverCache:
+		leftGroups = {name: glyph.rightKerningGroup for name, glyph in font.glyphs.items()}
+		rightGroups = {name: glyph.leftKerningGroup for name, glyph in font.glyphs.items()}
+		kerningResolverCache[key] = KerningResolver(font.kerning.get(masterId, {}), leftGroups=leftGroups, rightGroups=rightGroups)
+	return kerningResolverCache[key]
+
+def effectiveKerning(font, masterId, leftGlyphName, rightGlyphName):
+	return kerningResolver(font, masterId).kerningForPair(leftGlyphName, rightGlyphName)
+
+def masterShards(font, fontName, masterId, leftGlyphNames, rightGlyphNames, below=None, above=None, step=5.0, ignoreIntervals=(), chunkSize=50):
+	"""
+	Measurement shards (see kernprofiles.measurementShards) for one master of a font.
+	"""
+	leftProfiles, rightProfiles = pairingProfiles(
+		[sampledLayer(font, glyphName, masterId) for glyphName in leftGlyphNames], [sampledLayer(font, glyphName, masterId) for glyphName in rightGlyphNames], step=step
+		)
+	kerningMatrix = kerningResolver(font, masterId).kerningMatrix(leftGlyphNames, rightGlyphNames)
+	return measurementShards(
+		fontName, masterId, leftGlyphNames, leftProfiles, rightGlyphNames, rightProfiles, kerningMatrix, below=below, above=above, ignoreIntervals=ignoreIntervals, chunkSize=chunkSize
+		)
+
+def kernCrashes(font, masterId, leftGlyphNames, rightGlyphNames, minDistance=0.0, step=5.0, ignoreIntervals=()):
+	"""
+	Returns a list of (leftGlyphName, rightGlyphName, distance) for all pairings closer than minDistance.
+	"""
+	shards = masterShards(font, font.path, masterId, leftGlyphNames, rightGlyphNames, below=minDistance, step=step, ignoreIntervals=ignoreIntervals)
+	crashes = []
+	for result in runShards(shards, processes=1):
+		crashes.extend(result[3])
+	return crashes
+
+parser = ArgumentParser(description="Report kerning crashes (or gaps) in .glyphs files, .glyphspackages or UFOs, without the Glyphs app.")
+parser.add_argument("fonts", nargs="+", metavar="font", help="One or more .glyphs files, .glyphspackages or .ufo folders")
+parser.add_argument("--left", nargs="+", metavar="glyph", help="Glyph names for the left side of the pairs (default: all exporting glyphs)")
+parser.add_argument("--right", nargs="+", metavar="glyph", help="Glyph names for the right side of the pairs (default: all exporting glyphs)")
+parser.add_argument("--min", type=float, default=0.0, dest="minDistance", help="Report pairs closer than this distance (default: 0)")
+parser.add_argument("--max", type=float, default=None, dest="maxDistance", help="Also report pairs further apart than this distance, like GapFinder")
+parser.add_argument("--step", type=float, default=5.0, help="Measure every STEP units (default: 5)")
+parser.add_argument("--master", action="append", metavar="ID", help="Only check this master ID (can be used multiple times, default: all masters)")
+parser.add_argument("--processes", type=int, default=None, help="Number of processes (default: one per processor core)")
+parser.add_argument("--chunk", type=int, default=50, help="Left glyphs per shard (default: 50)")
+
+def main(arguments=None):
+	arguments = parser.parse_args(arguments)
+
+	# collect shards for all masters of all fonts:
+	shards = []
+	fonts = [readFont(path) for path in arguments.fonts]
+	for fontIndex, font in enumerate(fonts):
+		allGlyphNames = [name for name, glyph in font.glyphs.items() if glyph.export]
+		leftGlyphNames = [n for n in arguments.left or allGlyphNames if n in font.glyphs]
+		rightGlyphNames = [n for n in arguments.right or allGlyphNames if n in font.glyphs]
+		for masterId, masterName in font.masters:
+			if arguments.master and not masterId in arguments.master:
+				continue
+			shards.extend(
+				masterShards(
+					font, fontIndex, masterId, leftGlyphNames, rightGlyphNames, below=arguments.minDistance, above=arguments.maxDistance, step=arguments.step, chunkSize=arguments.chunk
+					)
+				)
+
+	# measure in parallel, merge in order of fonts, masters and chunks:
+	results, timings = mergedShardResults(runShards(shards, processes=arguments.processes))
+	pairCount = 0
+	for (fontIndex, masterId), pairs in results.items():
+		font = fonts[fontIndex]
+		print("%s, master %s:" % (os.path.basename(font.path), dict(font.masters)[masterId]))
+		for leftGlyphName, rightGlyphName, distance in pairs:
+			print("- %s %s: %i" % (leftGlyphName, rightGlyphName, distance))
+		pairCount += len(pairs)
+
+	print("\nTimings per shard:")
+	for fontIndex, masterId, chunkIndex, seconds in timings:
+		print("- %s, master %s, chunk %i: %.2f seconds" % (os.path.basename(fonts[fontIndex].path), masterId, chunkIndex + 1, seconds))
+	print("\n%i problematic pairs found." % pairCount)
+	return 1 if pairCount else 0
+
+if __name__ == "__main__":
+	sys.exit(main())
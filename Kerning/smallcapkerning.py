@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Derives smallcap kerning from cap kerning as one dict transform per master.
+Does not need the Glyphs API: the script decides which caps have smallcaps
+(that needs glyph info), builds a SmallcapMap once, and every kerning key is then
+translated with a dict lookup. The result is compared with the existing smallcap
+kerning, so only pairs that change need to be written back.
+"""
+from __future__ import division, print_function
+
+from collections import namedtuple
+from groupindex import LEFT_PREFIX, RIGHT_PREFIX, groupNameForKey
+
+KerningChange = namedtuple("KerningChange", ("masterId", "leftKey", "rightKey", "oldValue", "newValue", "sourceLeftKey", "sourceRightKey"))
+GroupChange = namedtuple("GroupChange", ("glyphName", "isLeftSide", "oldGroup", "newGroup"))
+
+def smallcapName(glyphName="scGlyph", suffix=".sc", lowercase=True, includeNonLetters=False, figureSuffix=".lf"):
+	"""Returns the appropriate smallcap name, e.g. A-->a.sc or a-->a.sc"""
+	particles = glyphName.split(".")
+	if lowercase:
+		particles[0] = particles[0].lower()
+	if len(particles) > 1 and includeNonLetters and figureSuffix:
+		undottedFigureSuffix = figureSuffix[1:] if figureSuffix[0] == "." else figureSuffix
+		if undottedFigureSuffix in particles:
+			particles.remove(undottedFigureSuffix)
+	return ".".join(particles) + suffix
+
+class SmallcapMap(object):
+	"""
+	Cap -> smallcap table for glyphs and kerning groups.
+	glyphMap: {capGlyphName: smallcapGlyphName} for all caps (and other glyphs) with a smallcap in the font.
+	index: KerningGroupIndex of the font.
+	renameGroup: function turning a cap group name into the smallcap group name, e.g. with smallcapName().
+	"""
+
+	def __init__(self, glyphMap, index, renameGroup):
+		self.glyphMap = dict(glyphMap)
+		self.keyMap = {}
+		self.groupChanges = [] # smallcap glyphs without a group on a side where their cap has one
+		self.groupConflicts = [] # smallcap glyphs with a different group than expected, left unchanged
+		for capName, smallcapGlyphName in self.glyphMap.items():
+			self.keyMap[capName] = smallcapGlyphName
+			for isLeftSide, prefix, groups in ((True, LEFT_PREFIX, index.leftSideGroup), (False, RIGHT_PREFIX, index.rightSideGroup)):
+				capGroup = groups.get(capName)
+				if not capGroup:
+					continue
+				smallcapGroup = renameGroup(capGroup)
+				self.keyMap[prefix + capGroup] = prefix + smallcapGroup
+				currentGroup = groups.get(smallcapGlyphName)
+				if not currentGroup:
+					self.groupChanges.append(GroupChange(smallcapGlyphName, isLeftSide, currentGroup, smallcapGroup))
+				elif currentGroup != smallcapGroup:
+					self.groupConflicts.append(GroupChange(smallcapGlyphName, isLeftSide, currentGroup, smallcapGroup))
+
+	def smallcapKey(self, key):
+		"""
+		Smallcap counterpart of a kerning key (glyph name or @MMK group), None if there is none.
+		"""
+		return self.keyMap.get(key)
+
+	def deriveKerning(self, kerning, scale=1.0, rounding=None):
+		"""
+		kerning: {leftKey: {rightKey: value}} with glyph names and @MMK keys.
+		Returns {smallcapLeftKey: {smallcapRightKey: (value, sourceLeftKey, sourceRightKey)}} for all pairs
+		with a smallcap counterpart on at least one side. The other side stays as it is (AV -> a.sc v).
+		scale: factor for all values, rounding: round scaled values to multiples of it.
+		"""
+		derived = {}
+		keyMap = self.keyMap
+		for leftKey, rightDict in kerning.items():
+			smallcapLeftKey = keyMap.get(leftKey)
+			for rightKey, value in rightDict.items():
+				smallcapRightKey = keyMap.get(rightKey)
+				if smallcapLeftKey is None and smallcapRightKey is None:
+					continue
+				if scale != 1.0:
+					value *= scale
+					if rounding:
+						value = rounding * round(value / rounding)
+				derived.setdefault(smallcapLeftKey or leftKey, {})[smallcapRightKey or rightKey] = (value, leftKey, rightKey)
+		return derived
+
+	def changes(self, kerning, masterId=None, scale=1.0, rounding=None, tolerance=0.0):
+		"""
+		KerningChanges needed to bring the smallcap kerning in line with the cap kerning of one master:
+		derived pairs that are missing or differ by more than tolerance. Other smallcap pairs are left alone.
+		"""
+		changes = []
+		for smallcapLeftKey, rightDict in self.deriveKerning(kerning, scale=scale, rounding=rounding).items():
+			existingRow = kerning.get(smallcapLeftKey, {})
+			for smallcapRightKey, (value, sourceLeftKey, sourceRightKey) in rightDict.items():
+				oldValue = existingRow.get(smallcapRightKey)
+				if oldValue is None or abs(oldValue - value) > tolerance:
+					changes.append(KerningChange(masterId, smallcapLeftKey, smallcapRightKey, oldValue, value, sourceLeftKey, sourceRightKey))
+		return changes
+
+	def fontChanges(self, kerning, masterIds=None, scale=1.0, rounding=None, tolerance=0.0):
+		"""
+		kerning: {masterId: {leftKey: {rightKey: value}}}. KerningChanges for all (or the given) masters.
+		"""
+		changes = []
+		for masterId in masterIds if masterIds is not None else kerning.keys():
+			changes.extend(self.changes(kerning.get(masterId, {}), masterId=masterId, scale=scale, rounding=rounding, tolerance=tolerance))
+		return changes
+
+def displayKey(key):
+	"""
+	'@MMK_L_A' -> '@A', glyph names stay as they are.
+	"""
+	groupName = groupNameForKey(key)
+	return key if groupName is None else "@" + groupName
@@ -5,10 +5,13 @@ __doc__ = """
 Finds all kinds of potential problems in outlines, and opens a new tab with affected layers.
 """
 
-import vanilla, math
+import vanilla, os, sys
 from timeit import default_timer as timer
-from GlyphsApp import QCURVE
-from AppKit import NSPoint
+
+# import from enclosing folder:
+sys.path.insert(1, os.path.realpath(os.path.pardir))
+from outlinelint import CHECKS, checksForNames, checksForGlyph, lintLayers
+from workerprocesses import pythonExecutable
 
 def reportTimeInNaturalLanguage(seconds):
 	if seconds > 60.0:
@@ -21,318 +24,12 @@ def reportTimeInNaturalLanguage(seconds):
 		timereport = f"{int(seconds)} seconds"
 	return timereport
 
-canHaveOpenOutlines = (
-	"_cap",
-	"_corner",
-	"_line",
-	"_segment",
-	)
-
-def hasStrayPoints(thisLayer):
-	for p in thisLayer.paths:
-		if len(p.nodes) == 1:
-			return True
-	return False
-
-def hasDecimalCoordinates(thisLayer):
-	for p in thisLayer.paths:
-		for n in p.nodes:
-			for coord in (n.x, n.y):
-				if coord % 1.0 != 0.0:
-					return True
-	return False
-
-def hasQuadraticCurves(thisLayer):
-	for p in thisLayer.paths:
-		for n in p.nodes:
-			if n.type is QCURVE:
-				return True
-	return False
-
-def hasOffcurveAsStartPoint(Layer):
-	for p in Layer.paths:
-		scenario1 = p.nodes[0].type == OFFCURVE and p.nodes[1].type != OFFCURVE
-		scenario2 = p.nodes[0].type == CURVE and p.nodes[-1].type == OFFCURVE
-		if scenario1 or scenario2:
-			return True
-	return False
-
-def hasShallowCurveSegment(thisLayer, minSize):
-	for thisPath in thisLayer.paths:
-		for thisNode in thisPath.nodes:
-			if thisNode.type == CURVE:
-				thisSegment = (
-					thisNode.prevNode.prevNode.prevNode,
-					thisNode.prevNode.prevNode,
-					thisNode.prevNode,
-					thisNode,
-					)
-				xCoords = [p.x for p in thisSegment]
-				yCoords = [p.y for p in thisSegment]
-				xDist = abs(min(xCoords) - max(xCoords))
-				yDist = abs(min(yCoords) - max(yCoords))
-				if xDist < minSize or yDist < minSize:
-					for affectedNode in thisSegment:
-						thisLayer.selection.append(affectedNode)
-					return True
-	return False
-
-def hasZeroHandles(thisLayer):
-	for thisPath in thisLayer.paths:
-		numberOfNodes = len(thisPath.nodes)
-		for i in range(numberOfNodes - 1):
-			thisNode = thisPath.nodes[i]
-			if thisNode.type == GSOFFCURVE:
-				prevNodeIndex = (i - 1) % numberOfNodes
-				nextNodeIndex = (i + 1) % numberOfNodes
-				prevNode = thisPath.nodes[prevNodeIndex]
-				nextNode = thisPath.nodes[nextNodeIndex]
-				if thisNode.position == prevNode.position or thisNode.position == nextNode.position:
-					return True
-	return False
-
-def hasTwoPointOutlines(thisLayer):
-	for thisPath in thisLayer.paths:
-		onCurveNodes = [n for n in thisPath.nodes if n.type != OFFCURVE]
-		if len(onCurveNodes) < 3:
-			return True
-	return False
-
-def hasOpenPaths(thisLayer):
-	for thisPath in thisLayer.paths:
-		if not thisPath.closed:
-			return True
-	return False
-
-def hasBadOutlineOrder(thisLayer):
-	firstPath = None
-	if Glyphs.versionNumber >= 3:
-		# GLYPHS 3
-		if thisLayer.shapes:
-			for thisShape in thisLayer.shapes:
-				if type(thisShape) is GSPath:
-					firstPath = thisShape
-					break
-	else:
-		# GLYPHS 2
-		if thisLayer.paths:
-			firstPath = thisLayer.paths[0]
-
-	if firstPath and firstPath.direction != -1 and len(thisLayer.paths) > 1:
-		return True
-	else:
-		return False
-
-def hasAlmostOrthogonalLines(thisLayer, threshold=3.0):
-	for thisPath in thisLayer.paths:
-		for i, thisNode in enumerate(thisPath.nodes):
-			if thisNode.type == GSLINE:
-				prevNodeIndex = (i - 1) % len(thisPath.nodes)
-				prevNode = thisPath.nodes[prevNodeIndex]
-				xDiff = abs(thisNode.x - prevNode.x)
-				yDiff = abs(thisNode.y - prevNode.y)
-				if (0.1 < xDiff and xDiff < threshold) or (0.1 < yDiff and threshold > yDiff):
-					return True
-	return False
-
-def hasShortSegment(thisLayer, threshold=8.0):
-	for thisPath in thisLayer.paths:
-		for thisSegment in thisPath.segments:
-			if thisSegment.length() < threshold:
-				return True
-	return False
-
-def hasShallowCurve(thisLayer, threshold=5.0):
-	for thisPath in thisLayer.paths:
-		for i, thisNode in enumerate(thisPath.nodes):
-			if thisNode.type == GSCURVE:
-				pointA = thisNode.position
-				pointB = thisPath.nodes[(i - 1) % len(thisPath.nodes)].position
-				pointC = thisPath.nodes[(i - 2) % len(thisPath.nodes)].position
-				pointD = thisPath.nodes[(i - 3) % len(thisPath.nodes)].position
-				for handle in (pointC, pointD):
-					dist, vect = distanceAndRelativePosition(pointA, pointB, handle)
-					if 0.0 < vect < 1.0 and dist < threshold:
-						return True
-	return False
-
-def hasBadPathDirections(thisLayer):
-	copyLayer = thisLayer.copy()
-	copyLayer.correctPathDirection()
-	for i in range(len(copyLayer.paths)):
-		originalPath = thisLayer.paths[i]
-		copyPath = copyLayer.paths[i]
-		if copyPath.direction != originalPath.direction:
-			return True
-	return False
-
-def hasShallowCurveBBox(thisLayer, threshold=10.0):
-	for thisPath in thisLayer.paths:
-		for i, thisNode in enumerate(thisPath.nodes):
-			if thisNode.type == GSCURVE:
-				pointA = thisNode.position
-				pointD = thisPath.nodes[(i - 3) % len(thisPath.nodes)].position
-				if abs(pointA.x - pointD.x) < threshold or abs(pointA.y - pointD.y) < threshold:
-					minX, maxX = sorted((pointA.x, pointD.x))
-					minY, maxY = sorted((pointA.y, pointD.y))
-					pointB = thisPath.nodes[(i - 1) % len(thisPath.nodes)].position
-					pointC = thisPath.nodes[(i - 2) % len(thisPath.nodes)].position
-					horizontallyWithin = minX - 1 < min(pointB.x, pointC.x) and maxX + 1 > max(pointB.x, pointC.x)
-					verticallyWithin = minY - 1 < min(pointB.y, pointC.y) and maxY + 1 > max(pointB.y, pointC.y)
-					if horizontallyWithin and verticallyWithin:
-						return True
-	return False
-
-def angleBetweenPoints(firstPoint, secondPoint):
+def layerPaths(thisLayer):
 	"""
-	Returns the angle (in degrees) of the straight line between firstPoint and secondPoint,
-	0 degrees being the second point to the right of first point.
-	firstPoint, secondPoint: must be NSPoint or GSNode
+	Reads all nodes of the layer in one go, as plain (paths, closedPaths) for the checks in outlinelint.py.
 	"""
-	xDiff = secondPoint.x - firstPoint.x
-	yDiff = secondPoint.y - firstPoint.y
-	return math.degrees(math.atan2(yDiff, xDiff))
-
-def hasAngledHandles(thisLayer, threshold=8):
-	for thisPath in thisLayer.paths:
-		for i, handle in enumerate(thisPath.nodes):
-			if handle.type == GSOFFCURVE:
-				onCurveNodeIndex = (i - 1) % len(thisPath.nodes)
-				onCurveNode = thisPath.nodes[onCurveNodeIndex]
-				if onCurveNode.type == GSOFFCURVE:
-					onCurveNodeIndex = (i + 1) % len(thisPath.nodes)
-					onCurveNode = thisPath.nodes[onCurveNodeIndex]
-				handleIsOrthogonal = handle.x == onCurveNode.x or handle.y == onCurveNode.y
-				if not handleIsOrthogonal:
-					angle = math.fabs(math.fmod(angleBetweenPoints(handle.position, onCurveNode.position), 90.0))
-					if angle < threshold or angle > (90 - threshold):
-						return True
-	return False
-
-def hasShortHandles(thisLayer, threshold=10.0):
-	for thisPath in thisLayer.paths:
-		for i, handle in enumerate(thisPath.nodes):
-			if handle.type == GSOFFCURVE:
-				onCurveNodeIndex = (i - 1) % len(thisPath.nodes)
-				onCurveNode = thisPath.nodes[onCurveNodeIndex]
-				if onCurveNode.type == GSOFFCURVE:
-					onCurveNodeIndex = (i + 1) % len(thisPath.nodes)
-					onCurveNode = thisPath.nodes[onCurveNodeIndex]
-				if 0.0 < distance(handle.position, onCurveNode.position) < threshold:
-					return True
-	return False
-
-def hasEmptyPaths(thisLayer):
-	for thisShape in thisLayer.shapes:
-		if thisShape.shapeType==GSShapeTypePath and len(thisShape.nodes)==0:
-			return True
-	return False
-
-def intersect(pointA, pointB, pointC, pointD):
-	"""
-	Returns an NSPoint of the intersection AB with CD,
-	or None if there is no intersection.
-	pointA, pointB: NSPoints or GSNodes representing the first line AB,
-	pointC, pointD: NSPoints or GSNodes representing the second line CD.
-	"""
-	xA, yA = pointA.x, pointA.y
-	xB, yB = pointB.x, pointB.y
-	xC, yC = pointC.x, pointC.y
-	xD, yD = pointD.x, pointD.y
-
-	try:
-		slopeAB = (float(yB) - float(yA)) / (float(xB) - float(xA))
-	except:
-		slopeAB = None # division by zero if vertical
-
-	try:
-		slopeCD = (float(yD) - float(yC)) / (float(xD) - float(xC))
-	except:
-		slopeCD = None # division by zero if vertical
-
-	if slopeAB == slopeCD: # parallel, no intersection
-		return None
-	elif slopeAB is None: # first line is vertical
-		x = xA
-		y = slopeCD * (x - xC) + yC
-	elif slopeCD is None: # second line is vertical
-		x = xC
-		y = slopeAB * (x - xA) + yA
-	else: # both lines have different angles other than vertical
-		x = (slopeAB * xA - yA - slopeCD * xC + yC) / (slopeAB - slopeCD)
-		y = slopeAB * (x - xA) + yA
-	return NSPoint(x, y)
-
-def hasLargeHandles(thisLayer):
-	for thisPath in thisLayer.paths:
-		for i, thisNode in enumerate(thisPath.nodes):
-			if thisNode.type == GSCURVE:
-				pointA = thisNode.position
-				pointB = thisPath.nodes[(i - 1) % len(thisPath.nodes)].position
-				pointC = thisPath.nodes[(i - 2) % len(thisPath.nodes)].position
-				pointD = thisPath.nodes[(i - 3) % len(thisPath.nodes)].position
-				intersection = intersect(pointA, pointB, pointC, pointD)
-				if intersection:
-					firstHandleTooLong = distance(pointA, pointB) > distance(pointA, intersection)
-					secondHandleTooLong = distance(pointD, pointC) > distance(pointD, intersection)
-					if firstHandleTooLong or secondHandleTooLong:
-						return True
-	return False
-
-def hasOutwardHandles(thisLayer):
-	for thisPath in thisLayer.paths:
-		for i, thisNode in enumerate(thisPath.nodes):
-			if thisNode.type == GSCURVE:
-				pointA = thisNode.position
-				pointB = thisPath.nodes[(i - 1) % len(thisPath.nodes)].position
-				pointC = thisPath.nodes[(i - 2) % len(thisPath.nodes)].position
-				pointD = thisPath.nodes[(i - 3) % len(thisPath.nodes)].position
-				if isOutside(pointA, pointD, pointB) or isOutside(pointA, pointD, pointC):
-					return True
-	return False
-
-def hasCuspingHandles(thisLayer):
-	for thisPath in thisLayer.paths:
-		for n in thisPath.nodes:
-			if n.type == OFFCURVE and n.nextNode.type == OFFCURVE:
-				distAC = distance(n.prevNode.position, n.nextNode.position)
-				distAB = distance(n.prevNode.position, n.position)
-				distBD = distance(n.position, n.nextNode.nextNode.position)
-				distCD = distance(n.nextNode.position, n.nextNode.nextNode.position)
-				if distAC < distAB and distBD < distCD:
-					thisLayer.selection = (n, n.nextNode)
-					return True
-
-def isOutside(p1, p2, p3):
-	"""
-	Returns True if p3 is outside p1-p2.
-	"""
-	deviation, nx = distanceAndRelativePosition(p1, p2, p3)
-	if nx < 0.0 or nx > 1.0:
-		return True
-	return False
-
-def distanceAndRelativePosition(p1, p2, p3):
-	"""
-	Returns:
-	1. distance from p3 to nearest point of p1-p2
-	2. relative position (0...1) of p3 between p1 & p2
-	"""
-	x1, y1 = p1.x, p1.y
-	x2, y2 = p2.x, p2.y
-	x3, y3 = p3.x, p3.y
-
-	dx = x2 - x1
-	dy = y2 - y1
-	d2 = dx * dx + dy * dy
-	try:
-		nx = ((x3 - x1) * dx + (y3 - y1) * dy) / d2
-	except:
-		# division by zero
-		nx = 0.0
-
-	deviation = distance(p3, NSPoint(dx * nx + x1, dy * nx + y1))
-	return deviation, nx
+	paths = thisLayer.paths
+	return [[(n.x, n.y, n.type) for n in p.nodes] for p in paths], [p.closed for p in paths]
 
 class PathProblemFinder(object):
 	prefID = "com.mekkablue.PathProblemFinder"
@@ -368,6 +65,7 @@ class PathProblemFinder(object):
 		"includeAllFonts": 0,
 		"includeNonExporting": 0,
 		"reuseTab": 1,
+		"parallelFonts": 1,
 	}
 
 	def __init__(self):
@@ -525,6 +223,8 @@ class PathProblemFinder(object):
 
 		self.w.reuseTab = vanilla.CheckBox((inset, linePos, 125, 20), "Reuse existing tab", value=True, callback=self.SavePreferences, sizeStyle='small')
 		self.w.reuseTab.getNSButton().setToolTip_("If enabled, will only open a new tab if none is open. Recommended.")
+		self.w.parallelFonts = vanilla.CheckBox((secondColumn, linePos, -inset, 20), "Use all CPU cores", value=True, callback=self.SavePreferences, sizeStyle='small')
+		self.w.parallelFonts.getNSButton().setToolTip_("Only for ALL fonts: reads the outlines of all fonts first, then runs the checks in parallel processes, one per CPU core. Much faster for many fonts.")
 		linePos += lineHeight
 
 		# Progress Bar and Status text:
@@ -581,7 +281,7 @@ class PathProblemFinder(object):
 
 	def updateUI(self, sender=None):
 		if sender in (self.w.checkALL, self.w.checkNONE, self.w.checkDEFAULT):
-			excludedCheckSettings = ("includeAllGlyphs", "includeNonExporting", "reuseTab")
+			excludedCheckSettings = ("includeAllGlyphs", "includeNonExporting", "reuseTab", "parallelFonts")
 			checkSettings = [
 					k for k in self.prefDict.keys() 
 					if not k in excludedCheckSettings
@@ -602,6 +302,7 @@ class PathProblemFinder(object):
 		self.w.shortHandlesThreshold.enable(self.w.shortHandles.get())
 		self.w.angledHandlesAngle.enable(self.w.angledHandles.get())
 		self.w.shortSegmentThreshold.enable(self.w.shortSegment.get())
+		self.w.parallelFonts.enable(self.w.includeAllFonts.get())
 
 		anyOptionIsOn = (
 			self.w.zeroHandles.get() or self.w.outwardHandles.get() or self.w.cuspingHandles.get() or self.w.largeHandles.get() or self.w.shortHandles.get() or self.w.angledHandles.get()
@@ -624,35 +325,20 @@ class PathProblemFinder(object):
 			print(f"Note: ‘{self.title}’ could not write preferences.")
 		
 		# Query user settings:
-		zeroHandles = self.pref("zeroHandles")
-		outwardHandles = self.pref("outwardHandles")
-		cuspingHandles = self.pref("cuspingHandles")
-		largeHandles = self.pref("largeHandles")
-		offcurveAsStartPoint = self.pref("offcurveAsStartPoint")
-		shortHandles = self.pref("shortHandles")
-		shortHandlesThreshold = self.pref("shortHandlesThreshold")
-		angledHandles = self.pref("angledHandles")
-		angledHandlesAngle = self.pref("angledHandlesAngle")
-		shallowCurveBBox = self.pref("shallowCurveBBox")
-		shallowCurveBBoxThreshold = self.pref("shallowCurveBBoxThreshold")
-		shallowCurve = self.pref("shallowCurve")
-		shallowCurveThreshold = self.pref("shallowCurveThreshold")
-		almostOrthogonalLines = self.pref("almostOrthogonalLines")
-		almostOrthogonalLinesThreshold = self.pref("almostOrthogonalLinesThreshold")
-		shortSegment = self.pref("shortSegment")
-		shortSegmentThreshold = self.pref("shortSegmentThreshold")
-		badOutlineOrder = self.pref("badOutlineOrder")
-		badPathDirections = self.pref("badPathDirections")
-		strayPoints = self.pref("strayPoints")
-		twoPointOutlines = self.pref("twoPointOutlines")
-		openPaths = self.pref("openPaths")
-		emptyPaths = self.pref("emptyPaths")
-		quadraticCurves = self.pref("quadraticCurves")
-		decimalCoordinates = self.pref("decimalCoordinates")
+		checks = checksForNames([prefName for bit, prefName, title, finding in CHECKS if self.pref(prefName)])
+		thresholds = {
+			"shortHandles": float(self.pref("shortHandlesThreshold")),
+			"angledHandles": float(self.pref("angledHandlesAngle")),
+			"shallowCurveBBox": float(self.pref("shallowCurveBBoxThreshold")),
+			"shallowCurve": float(self.pref("shallowCurveThreshold")),
+			"almostOrthogonalLines": float(self.pref("almostOrthogonalLinesThreshold")),
+			"shortSegment": float(self.pref("shortSegmentThreshold")),
+			}
 		includeAllGlyphs = self.pref("includeAllGlyphs")
 		includeAllFonts = self.pref("includeAllFonts")
 		includeNonExporting = self.pref("includeNonExporting")
 		reuseTab = self.pref("reuseTab")
+		parallelFonts = self.pref("parallelFonts")
 		
 		theseFonts = Glyphs.fonts # frontmost font
 		countOfFontsWithIssues = 0
@@ -669,179 +355,113 @@ class PathProblemFinder(object):
 		if not includeAllFonts:
 			theseFonts = (Glyphs.font,)
 		
-		for fontIndex, thisFont in enumerate(theseFonts):
-			try:
+		try:
+			for thisFont in theseFonts:
 				thisFont.disableUpdateInterface() # suppresses UI updates in Font View
+
+			# read the outlines of all fonts, every layer only once:
+			self.lastProgressUpdate = 0
+			fontGlyphs = []
+			fontLayers = []
+			layerItems = []
+			for fontIndex, thisFont in enumerate(theseFonts):
+				glyphs, layers = [], []
+				try:
+					# determine the glyphs to work through:
+					if includeAllGlyphs or includeAllFonts:
+						glyphs = [g for g in thisFont.glyphs if includeNonExporting or g.export]
+					else:
+						glyphs = [l.parent for l in thisFont.selectedLayers]
+
+					glyphCount = len(glyphs)
+					for i, thisGlyph in enumerate(glyphs):
+						self.updateProgress(50 * (fontIndex + i / glyphCount) / len(theseFonts), f"{fontIndex}. {thisGlyph.name}...")
+						# no open path check for glyphs that are supposed to have open paths:
+						glyphChecks = checksForGlyph(thisGlyph.name, checks)
+						for thisLayer in thisGlyph.layers:
+							if thisLayer.isMasterLayer or thisLayer.isSpecialLayer:
+								paths, closedPaths = layerPaths(thisLayer)
+								layers.append(thisLayer)
+								layerItems.append((paths, closedPaths, glyphChecks))
+				except Exception:
+					Glyphs.showMacroWindow()
+					print("\n⚠️ Error reading outlines: \n")
+					import traceback
+					print(traceback.format_exc())
+					print(thisFont)
+					print()
+					del layerItems[len(layerItems) - len(layers):]
+					glyphs, layers = [], []
+				fontGlyphs.append(glyphs)
+				fontLayers.append(layers)
+
+			# run the checks, in parallel processes if there are many fonts:
+			def lintProgress(done, total):
+				self.updateProgress(50 + 50 * done / total, f"Checking layers: {done}/{total}...")
+
+			executable = pythonExecutable()
+			jobs = (os.cpu_count() or 1) if includeAllFonts and parallelFonts and executable else 1
+			try:
+				findings = lintLayers(layerItems, thresholds, jobs=jobs, progress=lintProgress, executable=executable)
+			except Exception as e:
+				print(f"⚠️ Could not run checks in parallel ({e}), checking one by one.")
+				findings = lintLayers(layerItems, thresholds, progress=lintProgress)
+			findings = iter(findings)
+
+			# report per font:
+			for fontIndex, thisFont in enumerate(theseFonts):
+				try:
+					print(f"\n🪐 {self.title} Report for {thisFont.familyName}")
+					if thisFont.filepath:
+						print(thisFont.filepath)
+					else:
+						print("⚠️ The font file has not been saved yet.")
+					print()
+
+					glyphCount = len(fontGlyphs[fontIndex])
+					print(f"Processing {glyphCount} glyphs:")
+
+					allTestLayers = [[] for check in CHECKS]
+					allTestReports = [title for bit, prefName, title, finding in CHECKS]
+					for thisLayer in fontLayers[fontIndex]:
+						layerFindings = next(findings)
+						for (bit, prefName, title, finding), affectedLayers in zip(CHECKS, allTestLayers):
+							if layerFindings & bit:
+								affectedLayers.append(thisLayer)
+								print(f"  ❌ {finding} in {thisLayer.parent.name}, layer: {thisLayer.name}")
+
+					anyIssueFound = any(allTestLayers)
+					countOfLayers = 0
+					if anyIssueFound:
+						countOfFontsWithIssues += 1
+						tab = thisFont.currentTab
+						if not tab or not reuseTab:
+							# opens new Edit tab:
+							tab = thisFont.newTab()
+						tab.direction = 0 # force LTR
+						layers = []
+
+						currentMaster = thisFont.masters[tab.masterIndex]
+						masterID = currentMaster.id
 			
-				print(f"\n🪐 {self.title} Report for {thisFont.familyName}")
-				if thisFont.filepath:
-					print(thisFont.filepath)
-				else:
-					print("⚠️ The font file has not been saved yet.")
-				print()
-
-				# determine the glyphs to work through:
-				if includeAllGlyphs or includeAllFonts:
-					glyphs = [g for g in thisFont.glyphs if includeNonExporting or g.export]
-				else:
-					glyphs = [l.parent for l in thisFont.selectedLayers]
-
-				glyphCount = len(glyphs)
-				print(f"Processing {glyphCount} glyphs:")
-		
-				allTestLayers = []
-				allTestReports = []
-		
-				layersWithZeroHandles = []; allTestLayers.append(layersWithZeroHandles); allTestReports.append("Zero Handles")
-				layersWithOutwardHandles = []; allTestLayers.append(layersWithOutwardHandles); allTestReports.append("Outward Handles")
-				layersWithCuspingHandles = []; allTestLayers.append(layersWithCuspingHandles); allTestReports.append("Cusping Handles")
-				layersWithLargeHandles = []; allTestLayers.append(layersWithLargeHandles); allTestReports.append("Large Handles")
-				layersWithShortHandles = []; allTestLayers.append(layersWithShortHandles); allTestReports.append("Short Handles")
-				layersWithAngledHandles = []; allTestLayers.append(layersWithAngledHandles); allTestReports.append("Angled Handles")
-				layersWithShallowCurve = []; allTestLayers.append(layersWithShallowCurve); allTestReports.append("Shallow Curve")
-				layersWithShallowCurveBBox = []; allTestLayers.append(layersWithShallowCurveBBox); allTestReports.append("Small Curve BBox")
-				layersWithAlmostOrthogonalLines = []; allTestLayers.append(layersWithAlmostOrthogonalLines); allTestReports.append("Almost Orthogonal Lines")
-				layersWithshortSegments = []; allTestLayers.append(layersWithshortSegments); allTestReports.append("Short Line Segments")
-				layersWithBadOutlineOrder = []; allTestLayers.append(layersWithBadOutlineOrder); allTestReports.append("Bad Outline Order")
-				layersWithBadPathDirections = []; allTestLayers.append(layersWithBadPathDirections); allTestReports.append("Bad Path Orientation")
-				layersWithOffcurveAsStartpoint = []; allTestLayers.append(layersWithOffcurveAsStartpoint); allTestReports.append("Off-curve as start point")
-				layersWithStrayPoints = []; allTestLayers.append(layersWithStrayPoints); allTestReports.append("Stray Points")
-				layersWithTwoPointOutlines = []; allTestLayers.append(layersWithTwoPointOutlines); allTestReports.append("Two-Point Outlines")
-				layersWithOpenPaths = []; allTestLayers.append(layersWithOpenPaths); allTestReports.append("Open Paths")
-				layersWithQuadraticCurves = []; allTestLayers.append(layersWithQuadraticCurves); allTestReports.append("Quadratic Curves")
-				layersWithDecimalCoordinates = []; allTestLayers.append(layersWithDecimalCoordinates); allTestReports.append("Decimal Coordinates")
-				layersWithEmptyPaths = []; allTestLayers.append(layersWithEmptyPaths); allTestReports.append("Empty Paths")
-
-				progressSteps = glyphCount / 10
-				progressCounter = 0
-				stepsPerFont = 100/len(theseFonts)
-				firstStepPerFont = stepsPerFont*fontIndex
-				for i, thisGlyph in enumerate(glyphs):
-					# status update:
-					if progressCounter > progressSteps:
-						self.w.progress.set(firstStepPerFont + stepsPerFont * (i/glyphCount))
-						progressCounter = 0
-					progressCounter += 1
-					self.w.status.set(f"{fontIndex}. {thisGlyph.name}...")
-					# print(f"{i+1}. {thisGlyph.name}")
-
-					# step through layers
-					for thisLayer in thisGlyph.layers:
-						if thisLayer.isMasterLayer or thisLayer.isSpecialLayer:
-
-							if zeroHandles and hasZeroHandles(thisLayer):
-								layersWithZeroHandles.append(thisLayer)
-								print(f"  ❌ Zero handle(s) on layer: {thisLayer.name}")
-
-							if outwardHandles and hasOutwardHandles(thisLayer):
-								layersWithOutwardHandles.append(thisLayer)
-								print(f"  ❌ Outward handle(s) on layer: {thisLayer.name}")
-						
-							if cuspingHandles and hasCuspingHandles(thisLayer):
-								layersWithCuspingHandles.append(thisLayer)
-								print(f"  ❌ Cusping handle(s) on layer: {thisLayer.name}")
-						
-							if largeHandles and hasLargeHandles(thisLayer):
-								layersWithLargeHandles.append(thisLayer)
-								print(f"  ❌ Large handle(s) on layer: {thisLayer.name}")
-
-							if offcurveAsStartPoint and hasOffcurveAsStartPoint(thisLayer):
-								layersWithOffcurveAsStartpoint.append(thisLayer)
-								print(f"  ❌ Off-curve as start point on layer: {thisLayer.name}")
-
-							if shortHandles and hasShortHandles(thisLayer, threshold=float(shortHandlesThreshold)):
-								layersWithShortHandles.append(thisLayer)
-								print(f"  ❌ Short handle(s) on layer: {thisLayer.name}")
-
-							if angledHandles and hasAngledHandles(thisLayer):
-								layersWithAngledHandles.append(thisLayer)
-								print(f"  ❌ Angled handle(s) on layer: {thisLayer.name}")
-
-							if shallowCurve and hasShallowCurve(thisLayer, threshold=float(shallowCurveThreshold)):
-								layersWithShallowCurve.append(thisLayer)
-								print(f"  ❌ Shallow curve(s) on layer: {thisLayer.name}")
-
-							if shallowCurveBBox and hasShallowCurveBBox(thisLayer, threshold=float(shallowCurveBBoxThreshold)):
-								layersWithShallowCurveBBox.append(thisLayer)
-								print(f"  ❌ Shallow curve bbox(es) on layer: {thisLayer.name}")
-
-							if almostOrthogonalLines and hasAlmostOrthogonalLines(thisLayer, threshold=float(almostOrthogonalLinesThreshold)):
-								layersWithAlmostOrthogonalLines.append(thisLayer)
-								print(f"  ❌ Almost orthogonal line(s) on layer: {thisLayer.name}")
-
-							if shortSegment and hasShortSegment(thisLayer, threshold=float(shortSegmentThreshold)):
-								layersWithshortSegments.append(thisLayer)
-								print(f"  ❌ Short line(s) on layer: {thisLayer.name}")
-
-							if badOutlineOrder and hasBadOutlineOrder(thisLayer):
-								layersWithBadOutlineOrder.append(thisLayer)
-								print(f"  ❌ Bad outline order(s) on layer: {thisLayer.name}")
-
-							if badPathDirections and hasBadPathDirections(thisLayer):
-								layersWithBadPathDirections.append(thisLayer)
-								print(f"  ❌ Bad path direction(s) on layer: {thisLayer.name}")
-
-							if strayPoints and hasStrayPoints(thisLayer):
-								layersWithStrayPoints.append(thisLayer)
-								print(f"  ❌ Stray points on layer: {thisLayer.name}")
-
-							if twoPointOutlines and hasTwoPointOutlines(thisLayer):
-								layersWithTwoPointOutlines.append(thisLayer)
-								print(f"  ❌ Two-point outline(s) on layer: {thisLayer.name}")
-
-							if openPaths:
-								shouldProcess = True
-								for nameStart in canHaveOpenOutlines:
-									if nameStart in thisGlyph.name:
-										shouldProcess = False
-								if shouldProcess and hasOpenPaths(thisLayer):
-									layersWithOpenPaths.append(thisLayer)
-									print(f"  ❌ Open path(s) on layer: {thisLayer.name}")
-
-							if decimalCoordinates and hasDecimalCoordinates(thisLayer):
-								layersWithDecimalCoordinates.append(thisLayer)
-								print(f"  ❌ Decimal coordinates in layer: {thisLayer.name}")
-
-							if quadraticCurves and hasQuadraticCurves(thisLayer):
-								layersWithQuadraticCurves.append(thisLayer)
-								print(f"  ❌ Quadratic curves in layer: {thisLayer.name}")
-
-							if emptyPaths and hasEmptyPaths(thisLayer):
-								layersWithEmptyPaths.append(thisLayer)
-								print(f"  ❌ Empty paths in layer: {thisLayer.name}")
-
-
-				anyIssueFound = any(allTestLayers)
-				countOfLayers = 0
-				if anyIssueFound:
-					countOfFontsWithIssues += 1
-					tab = thisFont.currentTab
-					if not tab or not reuseTab:
-						# opens new Edit tab:
-						tab = thisFont.newTab()
-					tab.direction = 0 # force LTR
-					layers = []
-
-					currentMaster = thisFont.masters[tab.masterIndex]
-					masterID = currentMaster.id
-			
-					# collect reports:
-					for affectedLayers, reportTitle in zip(allTestLayers, allTestReports):
-						countOfLayers += self.reportInTabAndMacroWindow(affectedLayers, reportTitle, layers, thisFont, masterID)
+						# collect reports:
+						for affectedLayers, reportTitle in zip(allTestLayers, allTestReports):
+							countOfLayers += self.reportInTabAndMacroWindow(affectedLayers, reportTitle, layers, thisFont, masterID)
 
-					tab.layers = layers
+						tab.layers = layers
 			
-				totalLayerCount += countOfLayers
-				totalGlyphCount += glyphCount
+					totalLayerCount += countOfLayers
+					totalGlyphCount += glyphCount
 				
-			except Exception as e:
-				Glyphs.showMacroWindow()
-				print("\n⚠️ Error in script: \n")
-				import traceback
-				print(traceback.format_exc())
-				print(thisFont)
-				print()
-			finally:
+				except Exception as e:
+					Glyphs.showMacroWindow()
+					print("\n⚠️ Error in script: \n")
+					import traceback
+					print(traceback.format_exc())
+					print(thisFont)
+					print()
+		finally:
+			for thisFont in theseFonts:
 				thisFont.enableUpdateInterface() # re-enables UI updates in Font View
 		
 		# take time:
@@ -877,6 +497,14 @@ class PathProblemFinder(object):
 					)
 
 
+	def updateProgress(self, percent, status, interval=0.2):
+		# updating the window for every glyph would take longer than the checks:
+		now = timer()
+		if now - self.lastProgressUpdate > interval:
+			self.w.progress.set(percent)
+			self.w.status.set(status)
+			self.lastProgressUpdate = now
+
 	def reportInTabAndMacroWindow(self, layerList, title, layers, font, masterID):
 		if layerList and font:
 			# report in Tab:
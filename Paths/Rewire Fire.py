@@ -5,28 +5,11 @@ __doc__ = """
 Finds, selects and marks duplicate coordinates. Two nodes on the same position typically can be rewired with Reconnect Nodes.
 """
 
-import vanilla
-from Foundation import NSPoint, NSIntersectsRect
-
-def isOnLine(p1, p2, p3, threshold=2.01**0.5):
-	"""
-	Returns True if p3 is on and within p1-p2.
-	And not off more than threshold.
-	"""
-	x1, y1 = p1.x, p1.y
-	x2, y2 = p2.x, p2.y
-	x3, y3 = p3.x, p3.y
-
-	dx = x2 - x1
-	dy = y2 - y1
-	d2 = dx**2 + dy**2
-	nx = ((x3 - x1) * dx + (y3 - y1) * dy) / d2
-	offset = distance(p3, NSPoint(dx * nx + x1, dy * nx + y1))
-	if offset < threshold:
-		if 0.0 < nx < 1.0:
-			return True
+import vanilla, os, sys
 
-	return False
+# import from enclosing folder:
+sys.path.insert(1, os.path.realpath(os.path.pardir))
+from outlinegeometry import PointGrid
 
 class RewireFire(object):
 	prefID = "com.mekkablue.RewireFire"
@@ -183,32 +166,37 @@ class RewireFire(object):
 		circle.width = width
 		layer.annotations.append(circle)
 
-	def findNodesOnLines(self, l, dynamiteForOnSegment=True, shouldSelect=True):
-		affectedNodes = []
-
-		# find line segments:
+	def findNodesOnLines(self, l, dynamiteForOnSegment=True, shouldSelect=True, threshold=2.01**0.5):
+		# all on-curve nodes of closed paths in one grid, so every line segment only looks at the nodes around it:
+		grid = PointGrid()
+		onCurveNodes = []
+		pathIndexes = [] # per closed path: grid index of every node, None for off-curves
 		for p in l.paths:
 			if p.closed:
-				firstPathBounds = p.bounds
-				for n1 in p.nodes:
-					n2 = n1.nextNode
-					if n2 and n1.type != GSOFFCURVE and n2.type != GSOFFCURVE:
-						p1 = n1.position
-						p2 = n2.position
-
-						# make sure it is not a zero-lenth segment:
-						if p1 != p2:
-
-							# find other nodes that are exactly on the line segment:
-							for pp in l.paths:
-								secondPathBounds = pp.bounds
-								if pp.closed and NSIntersectsRect(firstPathBounds, secondPathBounds):
-									for n3 in pp.nodes:
-										if n3 != n1 and n3 != n2 and n3.type != GSOFFCURVE:
-											p3 = n3.position
-											# find projection with threshold:
-											if isOnLine(p1, p2, p3):
-												affectedNodes.append(n3)
+				indexes = []
+				for n in p.nodes:
+					if n.type != GSOFFCURVE:
+						indexes.append(grid.add(n.position.x, n.position.y))
+						onCurveNodes.append(n)
+					else:
+						indexes.append(None)
+				pathIndexes.append(indexes)
+
+		# find other nodes that are on line segments, within threshold:
+		affectedIndexes = []
+		found = set()
+		for indexes in pathIndexes:
+			for j, i1 in enumerate(indexes):
+				i2 = indexes[(j + 1) % len(indexes)]
+				if i1 is not None and i2 is not None:
+					x1, y1 = grid.points[i1]
+					x2, y2 = grid.points[i2]
+					# zero-length segments find nothing:
+					for i3 in grid.nearSegment(x1, y1, x2, y2, threshold):
+						if i3 != i1 and i3 != i2 and not i3 in found:
+							found.add(i3)
+							affectedIndexes.append(i3)
+		affectedNodes = [onCurveNodes[i] for i in affectedIndexes]
 
 		if affectedNodes:
 			thisGlyph = l.parent
@@ -227,12 +215,13 @@ class RewireFire(object):
 			return False
 
 	def findDuplicates(self, thisLayer, setFireToNode=True, markWithCircle=False, shouldSelect=True, tolerateZeroSegments=False):
-		allCoordinates = []
+		allCoordinates = PointGrid()
 		duplicateCoordinates = []
 		for thisPath in thisLayer.paths:
 			for thisNode in thisPath.nodes:
 				if thisNode.type != OFFCURVE:
-					if thisNode.position in allCoordinates:
+					x, y = thisNode.position.x, thisNode.position.y
+					if allCoordinates.near(x, y):
 						if not tolerateZeroSegments or not thisNode.position in (thisNode.nextNode.position, thisNode.prevNode.position):
 							# select node:
 							if shouldSelect and not thisNode in thisLayer.selection:
@@ -241,7 +230,7 @@ class RewireFire(object):
 							if setFireToNode:
 								thisNode.name = self.duplicateMarker
 					else:
-						allCoordinates.append(thisNode.position)
+						allCoordinates.add(x, y)
 						if thisNode.name == self.duplicateMarker:
 							thisNode.name = None
 
@@ -2,10 +2,15 @@
 # -*- coding: utf-8 -*-
 from __future__ import division, print_function, unicode_literals
 __doc__ = """
-Looks for cap kerning pairs and reduplicates their kerning for corresponding .sc glyphs, if they are available in the font. Please be careful: Will overwrite existing SC kerning pairs.
+Looks for cap kerning pairs and reduplicates their kerning for corresponding .sc glyphs, if they are available in the font. Optionally scales the values. Only writes SC pairs that are missing or different. Please be careful: Will overwrite existing SC kerning pairs.
 """
 
-import vanilla
+import vanilla, os, sys
+
+# import from the Kerning folder:
+sys.path.insert(1, os.path.realpath(os.path.join(os.path.pardir, "Kerning")))
+from kernanalysis import kernSizeWarnings, kerningByName, groupIndex
+from smallcapkerning import SmallcapMap, smallcapName, displayKey
 
 if Glyphs.versionNumber >= 3:
 	from GlyphsApp import GSUppercase, GSSmallcaps
@@ -44,31 +49,6 @@ def glyphNameIsSCconvertible(glyphName, font, includeNonLetters=False, suffix=".
 		print("Error: %s" % e)
 		return False
 
-def smallcapName(glyphName="scGlyph", suffix=".sc", lowercase=True, includeNonLetters=False, figureSuffix=".lf"):
-	"""Returns the appropriate smallcap name, e.g. A-->a.sc or a-->a.sc"""
-	try:
-		returnName = glyphName
-
-		# make lowercase if requested:
-		particles = returnName.split(".")
-		if lowercase:
-			particles[0] = particles[0].lower()
-
-		if len(particles) > 1:
-			if includeNonLetters and figureSuffix:
-				undottedFigureSuffix = figureSuffix
-				if undottedFigureSuffix[0] == ".":
-					undottedFigureSuffix = undottedFigureSuffix[1:]
-				if undottedFigureSuffix in particles:
-					particles.remove(undottedFigureSuffix)
-
-		returnName = ".".join(particles) + suffix
-		return returnName
-	except Exception as e:
-		print("Cannot compute smallcap name for: %s" % glyphName)
-		print("Error: %s" % e)
-		return None
-
 def isCapFigure(glyph, suffix=".lf"):
 	if glyph.category == "Number":
 		if glyph.name.endswith(suffix):
@@ -111,7 +91,7 @@ class CopyKerningFromCapsToSmallcaps(object):
 	def __init__(self):
 		# Window 'self.w':
 		windowWidth = 400
-		windowHeight = 180
+		windowHeight = 202
 		windowWidthResize = 200 # user can resize width by this value
 		windowHeightResize = 0 # user can resize height by this value
 		self.w = vanilla.FloatingWindow(
@@ -151,6 +131,12 @@ class CopyKerningFromCapsToSmallcaps(object):
 		self.w.figureSuffix = vanilla.EditText((inset + 110, linePos, -inset, 19), ".lf", callback=self.SavePreferences, sizeStyle='small')
 		linePos += lineHeight
 
+		self.w.scaleText = vanilla.TextBox((inset, linePos + 2, 110, 14), "Scale kerning by:", sizeStyle='small', selectable=True)
+		self.w.scale = vanilla.EditText((inset + 110, linePos, 50, 19), "100", callback=self.SavePreferences, sizeStyle='small')
+		self.w.scale.getNSTextField().setToolTip_("Percentage of the cap kerning for the smallcap pairs, e.g. 80 if smallcaps are 80% of the cap height. Scaled values are rounded to full units.")
+		self.w.scalePercent = vanilla.TextBox((inset + 165, linePos + 2, -inset, 14), "%", sizeStyle='small', selectable=True)
+		linePos += lineHeight
+
 		# Run Button:
 		self.w.runButton = vanilla.Button((-100 - inset, -20 - inset, -inset, -inset), "Copy", sizeStyle='regular', callback=self.CopyKerningFromCapsToSmallcapsMain)
 		self.w.setDefaultButton(self.w.runButton)
@@ -186,6 +172,7 @@ class CopyKerningFromCapsToSmallcaps(object):
 			# Glyphs.defaults[self.domain("copyCapCapToCapSC")] = self.w.copyCapCapToCapSC.get()
 			Glyphs.defaults[self.domain("figureSuffix")] = self.w.figureSuffix.get()
 			Glyphs.defaults[self.domain("includeAllMasters")] = self.w.includeAllMasters.get()
+			Glyphs.defaults[self.domain("scale")] = self.w.scale.get()
 			self.updateUI()
 			return True
 		except:
@@ -202,6 +189,7 @@ class CopyKerningFromCapsToSmallcaps(object):
 			# Glyphs.registerDefault(self.domain("copyCapCapToCapSC"), 1)
 			Glyphs.registerDefault(self.domain("figureSuffix"), ".lf")
 			Glyphs.registerDefault(self.domain("includeAllMasters"), 0)
+			Glyphs.registerDefault(self.domain("scale"), "100")
 
 			# load previously written prefs:
 			self.w.smallcapSuffix.set(self.pref("smallcapSuffix"))
@@ -210,6 +198,7 @@ class CopyKerningFromCapsToSmallcaps(object):
 			# self.w.copyCapCapToCapSC.set( self.pref("copyCapCapToCapSC") )
 			self.w.figureSuffix.set(self.pref("figureSuffix"))
 			self.w.includeAllMasters.set(self.pref("includeAllMasters"))
+			self.w.scale.set(self.pref("scale"))
 
 			self.updateUI()
 			return True
@@ -245,44 +234,41 @@ class CopyKerningFromCapsToSmallcaps(object):
 				figureSuffix = self.pref("figureSuffix")
 				includeAllMasters = self.pref("includeAllMasters")
 
-				# Sync left and right Kerning Groups between UC and SC:
-				print("Kerning Groups:")
-				UppercaseGroups = set()
+				try:
+					scale = float(self.pref("scale")) / 100.0
+				except:
+					Message(title="Value Error", message="The scale percentage you entered is invalid", OKButton="Oops")
+					return
+
+				def scName(name):
+					return smallcapName(name, suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix)
+
+				# map caps to smallcaps once, for glyphs and their kerning groups:
+				glyphMap = {}
 				for g in thisFont.glyphs:
 					if glyphNameIsSCconvertible(g.name, thisFont, includeNonLetters=includeNonLetters, suffix=smallcapSuffix, figureSuffix=figureSuffix):
-						ucGlyphName = g.name
-						scGlyphName = smallcapName(
-							ucGlyphName, suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix
-							)
-						scGlyph = thisFont.glyphs[scGlyphName]
-						if scGlyph == None:
-							print("  ⚠️ SC %s not found in font (UC %s exists)" % (scGlyphName, ucGlyphName))
+						scGlyphName = scName(g.name)
+						if thisFont.glyphs[scGlyphName] == None:
+							print("  ⚠️ SC %s not found in font (UC %s exists)" % (scGlyphName, g.name))
 							continue
+						glyphMap[g.name] = scGlyphName
+				smallcapMap = SmallcapMap(glyphMap, groupIndex(thisFont), scName)
 
-						LeftKey = g.leftKerningGroupId()
-						if LeftKey:
-							UppercaseGroups.add(LeftKey)
-							scLeftKey = LeftKey[:7] + smallcapName(
-								LeftKey[7:], suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix
-								)
-							if scGlyph.leftKerningGroupId() == None:
-								scGlyph.setLeftKerningGroupId_(scLeftKey)
-								print("  %s: set LEFT group to @%s (was empty)." % (scGlyphName, scLeftKey[7:]))
-							elif scGlyph.leftKerningGroupId() != scLeftKey:
-								print("  %s: unexpected LEFT group: @%s (should be @%s), not changed." % (scGlyphName, scGlyph.leftKerningGroupId()[7:], scLeftKey[7:]))
-
-						RightKey = g.rightKerningGroupId()
-						if RightKey:
-							UppercaseGroups.add(RightKey)
-							scRightKey = RightKey[:7] + smallcapName(
-								RightKey[7:], suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix
-								)
-							if scGlyph.rightKerningGroupId() == None:
-								scGlyph.setRightKerningGroupId_(scRightKey)
-								print("  %s: set RIGHT group to @%s (was empty)." % (scGlyphName, scRightKey[7:]))
-							elif scGlyph.rightKerningGroupId() != scRightKey:
-								print("  %s: unexpected RIGHT group: @%s (should be @%s), not changed." % (scGlyphName, scGlyph.rightKerningGroupId()[7:], scRightKey[7:]))
-
+				# Sync left and right Kerning Groups between UC and SC:
+				print("Kerning Groups:")
+				for groupChange in smallcapMap.groupChanges:
+					scGlyph = thisFont.glyphs[groupChange.glyphName]
+					if groupChange.isLeftSide:
+						scGlyph.rightKerningGroup = groupChange.newGroup
+						print("  %s: set RIGHT group to @%s (was empty)." % (groupChange.glyphName, groupChange.newGroup))
+					else:
+						scGlyph.leftKerningGroup = groupChange.newGroup
+						print("  %s: set LEFT group to @%s (was empty)." % (groupChange.glyphName, groupChange.newGroup))
+				for groupConflict in smallcapMap.groupConflicts:
+					print(
+						"  %s: unexpected %s group: @%s (should be @%s), not changed." %
+						(groupConflict.glyphName, "RIGHT" if groupConflict.isLeftSide else "LEFT", groupConflict.oldGroup, groupConflict.newGroup)
+						)
 				print("  ✅ Kerning group conversion done.\n")
 
 				if includeAllMasters:
@@ -290,104 +276,56 @@ class CopyKerningFromCapsToSmallcaps(object):
 				else:
 					masters = (thisFont.selectedFontMaster, )
 
+				# derive the SC kerning of all masters in one go, keep only what changes:
+				masterIDs = [m.id for m in masters]
+				changes = smallcapMap.fontChanges(kerningByName(thisFont, masterIDs), masterIds=masterIDs, scale=scale, rounding=1 if scale != 1.0 else None)
+
 				for selectedFontMaster in masters:
-					fontMasterID = selectedFontMaster.id
-					fontMasterName = selectedFontMaster.name
-					masterKernDict = thisFont.kerning[fontMasterID]
-					scKerningList = []
 					# Report in the Macro Window:
-					print("\n🔠 Master: %s\n" % (fontMasterName))
-
-					# Sync Kerning Values between UC and SC:
+					print("\n🔠 Master: %s\n" % (selectedFontMaster.name))
 					print("Kerning Values:")
-					kerningToBeAdded = []
-					LeftKeys = masterKernDict.keys()
-					for LeftKey in LeftKeys:
-						# is left key a class?
-						leftKeyIsGroup = (LeftKey[0] == "@")
-						# prepare SC left key:
-						scLeftKey = None
-						# determine the SC leftKey:
-						if leftKeyIsGroup: # a kerning group
-							leftKeyName = "@%s" % LeftKey[7:]
-							if LeftKey in UppercaseGroups:
-								scLeftKey = LeftKey[:7] + smallcapName(
-									LeftKey[7:], suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix
-									)
-						else: # a single glyph (exception)
-							leftGlyphName = thisFont.glyphForId_(LeftKey).name
-							leftKeyName = leftGlyphName
-							if glyphNameIsSCconvertible(leftGlyphName, font=thisFont, includeNonLetters=includeNonLetters, suffix=smallcapSuffix, figureSuffix=figureSuffix):
-								scLeftGlyphName = smallcapName(
-									leftGlyphName, suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix
-									)
-								scLeftGlyph = thisFont.glyphs[scLeftGlyphName]
-								if scLeftGlyph:
-									scLeftKey = scLeftGlyph.name
-
-						RightKeys = masterKernDict[LeftKey].keys()
-						for RightKey in RightKeys:
-							# is right key a class?
-							rightKeyIsGroup = (RightKey[0] == "@")
-							# prepare SC right key:
-							scRightKey = None
-							# determine the SC rightKey:
-							if rightKeyIsGroup: # a kerning group
-								rightKeyName = "@%s" % RightKey[7:]
-								if RightKey in UppercaseGroups:
-									scRightKey = RightKey[:7] + smallcapName(
-										RightKey[7:], suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix
-										)
-							else: # a single glyph (exception)
-								rightGlyphName = thisFont.glyphForId_(RightKey).name
-								rightKeyName = rightGlyphName
-								if glyphNameIsSCconvertible(rightGlyphName, font=thisFont, includeNonLetters=includeNonLetters, suffix=smallcapSuffix, figureSuffix=figureSuffix):
-									scRightGlyphName = smallcapName(
-										rightGlyphName, suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix
-										)
-									scRightGlyph = thisFont.glyphs[scRightGlyphName]
-									if scRightGlyph:
-										scRightKey = scRightGlyph.name
-
-							# If we have one of the left+right keys, create a pair:
-							if scRightKey != None or scLeftKey != None:
-
-								# fallback:
-								if scLeftKey == None:
-									scLeftKey = leftKeyName.replace("@", "@MMK_L_")
-								if scRightKey == None:
-									scRightKey = rightKeyName.replace("@", "@MMK_R_")
-
-								scKernValue = masterKernDict[LeftKey][RightKey]
-								print(
-									"  Set kerning: %s %s %.1f (derived from %s %s)" %
-									(scLeftKey.replace("MMK_L_", ""), scRightKey.replace("MMK_R_", ""), scKernValue, leftKeyName, rightKeyName)
-									)
-								kerningToBeAdded.append((fontMasterID, scLeftKey, scRightKey, scKernValue))
-
-					# go through the list of SC kern pairs, and add them to the font:
-					thisFont.disableUpdateInterface()
-					try:
-						for thisKernInfo in kerningToBeAdded:
-							fontMasterID = thisKernInfo[0]
-							scLeftKey = thisKernInfo[1]
-							scRightKey = thisKernInfo[2]
-							scKernValue = thisKernInfo[3]
-							thisFont.setKerningForPair(fontMasterID, scLeftKey, scRightKey, scKernValue)
-
-					except Exception as e:
-						Glyphs.showMacroWindow()
-						print("\n⚠️ Script Error:\n")
-						import traceback
-						print(traceback.format_exc())
-						print()
-						raise e
-
-					finally:
-						thisFont.enableUpdateInterface() # re-enables UI updates in Font View
+					masterChanges = [change for change in changes if change.masterId == selectedFontMaster.id]
+					for change in masterChanges:
+						print(
+							"  Set kerning: %s %s %.1f (derived from %s %s%s)" % (
+								displayKey(change.leftKey),
+								displayKey(change.rightKey),
+								change.newValue,
+								displayKey(change.sourceLeftKey),
+								displayKey(change.sourceRightKey),
+								"" if change.oldValue is None else ", was %.1f" % change.oldValue,
+								)
+							)
+					if not masterChanges:
+						print("  SC kerning is already up to date.")
+
+				# go through the list of SC kern pairs, and add them to the font:
+				thisFont.disableUpdateInterface()
+				try:
+					for change in changes:
+						thisFont.setKerningForPair(change.masterId, change.leftKey, change.rightKey, change.newValue)
+
+				except Exception as e:
+					Glyphs.showMacroWindow()
+					print("\n⚠️ Script Error:\n")
+					import traceback
+					print(traceback.format_exc())
+					print()
+					raise e
+
+				finally:
+					thisFont.enableUpdateInterface() # re-enables UI updates in Font View
 
 				print("  Done.")
 
+				# warn before export if the kern lookup gets too big:
+				sizeWarnings = kernSizeWarnings(thisFont)
+				if sizeWarnings:
+					Glyphs.showMacroWindow()
+					print("\n⚠️ Kerning may overflow GPOS at export:")
+					for sizeWarning in sizeWarnings:
+						print("  %s" % sizeWarning)
+
 				self.w.close() # delete if you want window to stay open
 
 			# Final report:
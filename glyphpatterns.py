@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Glyph name patterns, compiled once and matched in a single pass over the glyph list.
+Does not need the Glyphs app. A pattern is one of:
+
+A.sc          a glyph name
+*.sc, ?.ss0*  a glob: * matches any run of characters, ? one character, [ab] one of a, b, [!ab] any other
+re:^a\\..*     a regular expression, after the prefix re:
+@Letter:Uppercase  a category, optionally with subcategory or case, as in stringToListOfGlyphsForFont
+              (only for the categories in GLYPH_CATEGORIES, @MMK_L_A etc. are names or globs)
+
+partial: names and globs may match anywhere in the glyph name (like 'contains'),
+otherwise they have to match the whole name. Regular expressions are searched in either case.
+"""
+from __future__ import division, print_function
+
+import re
+from fnmatch import translate
+from functools import lru_cache
+
+REGEX_PREFIX = "re:"
+GLYPH_CATEGORIES = ("Letter", "Number", "Punctuation", "Symbol", "Separator", "Mark", "Icon", "Other")
+
+def parseCategoryToken(token):
+	"""
+	'@Letter:Uppercase' -> ('Letter', 'Uppercase'), '@Letter' -> ('Letter', None).
+	"""
+	token = token.lstrip("@")
+	if ":" in token:
+		category, subCategory = token.split(":", 1)
+		return category.strip(), subCategory.strip() or None
+	return token.strip(), None
+
+def isCategoryPattern(pattern):
+	"""
+	True for '@Category' and '@Category:Subcategory' with a known category.
+	"""
+	return pattern.startswith("@") and parseCategoryToken(pattern)[0] in GLYPH_CATEGORIES
+
+def isWildcardPattern(pattern):
+	"""
+	True if pattern is more than a plain glyph name.
+	"""
+	return pattern.startswith(REGEX_PREFIX) or isCategoryPattern(pattern) or any(character in pattern for character in "*?[")
+
+class PatternSet(object):
+	"""
+	Any number of patterns (see above), combined into one set of names, a list of compiled matchers and one list of categories.
+	"""
+
+	def __init__(self, patterns, partial=False):
+		self.names = set()
+		self.categories = []
+		self.partial = partial
+		self.matchers = [] # compiled one by one, so inline flags like (?i) stay valid
+		for pattern in patterns:
+			pattern = pattern.strip()
+			if not pattern:
+				continue
+			if pattern.startswith(REGEX_PREFIX):
+				self.matchers.append(re.compile(pattern[len(REGEX_PREFIX):]).search)
+			elif isCategoryPattern(pattern):
+				self.categories.append(parseCategoryToken(pattern))
+			elif isWildcardPattern(pattern) or partial:
+				# fnmatch translates * without nested backtracking, so many wildcards stay linear:
+				self.matchers.append(re.compile(translate("*%s*" % pattern if partial else pattern)).match)
+			else:
+				self.names.add(pattern)
+
+	def __bool__(self):
+		return bool(self.names or self.categories or self.matchers)
+
+	__nonzero__ = __bool__
+
+	def matchesName(self, name):
+		"""
+		True if name matches a glyph name, glob or regex of the set. Categories are ignored.
+		"""
+		return name in self.names or any(matcher(name) for matcher in self.matchers)
+
+	def select(self, names, categoryMembers=None):
+		"""
+		All of names (in their order) matching any pattern of the set.
+		categoryMembers: function (category, subCategory) -> names in that category,
+		needed for @Category patterns, e.g. GlyphAttributeIndex.select.
+		"""
+		inCategories = set()
+		if categoryMembers:
+			for category, subCategory in self.categories:
+				inCategories.update(categoryMembers(category, subCategory))
+		return [name for name in names if name in inCategories or self.matchesName(name)]
+
+@lru_cache(maxsize=256)
+def compiledPattern(pattern, partial=False):
+	return PatternSet((pattern, ), partial=partial)
+
+def match(pattern, name):
+	"""
+	True if name matches the (glob, regex or plain) pattern.
+	"""
+	return compiledPattern(pattern).matchesName(name)
@@ -0,0 +1,530 @@
+# -*- coding: utf-8 -*-
+"""
+Minimal reader for .glyphs files (Glyphs 2 and 3 format), .glyphspackage folders and
+UFO sources, plus an adapter for fontTools glyph sets. Does not need the Glyphs app, so it can run on
+build servers. Only reads what the headless helpers need: masters, glyphs, layers with
+their outlines and components, kerning groups and kerning.
+"""
+from __future__ import division, print_function
+
+import os
+import re
+import plistlib
+from math import cos, sin, radians
+from xml.etree import ElementTree
+
+# OPENSTEP PLIST PARSER
+
+_tokenPattern = re.compile(
+	r'''\s*(?:
+	(?P<comment>//[^\n]*|/\*.*?\*/)
+	|(?P<punctuation>[{}()=;,])
+	|"(?P<quoted>(?:[^"\\]|\\.)*)"
+	|(?P<data><[0-9A-Fa-f\s]*>)
+	|(?P<bare>[^\s{}()=;,"]+)
+	)''', re.VERBOSE | re.DOTALL
+	)
+_numberPattern = re.compile(r"^-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?$")
+_escapes = {
+	"n": "\n",
+	"t": "\t",
+	'"': '"',
+	"\\": "\\",
+	}
+
+def _unescape(string):
+	if not "\\" in string:
+		return string
+
+	def replace(match):
+		code = match.group(1)
+		if code[0] in "Uu":
+			return chr(int(code[1:], 16))
+		return _escapes.get(code, code)
+
+	return re.sub(r"\\(U[0-9A-Fa-f]{4}|u[0-9A-Fa-f]{4}|.)", replace, string)
+
+def _tokens(text):
+	position, length = 0, len(text)
+	while position < length:
+		match = _tokenPattern.match(text, position)
+		if not match or match.end() == position:
+			if text[position:].strip():
+				raise ValueError("Cannot parse plist at position %i: %r" % (position, text[position:position + 20]))
+			return
+		position = match.end()
+		if match.group("comment"):
+			continue
+		elif match.group("punctuation"):
+			yield match.group("punctuation"), None
+		elif match.group("quoted") is not None:
+			yield "string", _unescape(match.group("quoted"))
+		elif match.group("data"):
+			yield "string", match.group("data")
+		else:
+			bare = match.group("bare")
+			# numbers with leading zeros (Glyphs 2 unicodes like 0041) stay strings:
+			if _numberPattern.match(bare) and not (bare.startswith("0") and bare[1:2].isdigit()):
+				yield "string", float(bare) if ("." in bare or "e" in bare or "E" in bare) else int(bare)
+			else:
+				yield "string", bare
+
+def parsePlist(text):
+	"""
+	Parses an OpenStep-style property list (the format of .glyphs files) into dicts, lists, strings and numbers.
+	"""
+	tokens = _tokens(text)
+	stack = []
+	root = None
+	pendingKey = []
+
+	def add(value):
+		nonlocal root
+		if not stack:
+			root = value
+			return
+		container = stack[-1]
+		if isinstance(container, list):
+			container.append(value)
+		else:
+			pendingKey.append(value)
+
+	for kind, value in tokens:
+		if kind == "{":
+			newDict = {}
+			if stack and isinstance(stack[-1], dict):
+				stack[-1][pendingKey.pop()] = newDict
+			else:
+				add(newDict)
+			stack.append(newDict)
+		elif kind == "(":
+			newList = []
+			if stack and isinstance(stack[-1], dict):
+				stack[-1][pendingKey.pop()] = newList
+			else:
+				add(newList)
+			stack.append(newList)
+		elif kind in "})":
+			stack.pop()
+		elif kind == "=":
+			continue
+		elif kind == ";":
+			# key = value; with a scalar value:
+			if stack and isinstance(stack[-1], dict) and len(pendingKey) == 2:
+				value = pendingKey.pop()
+				key = pendingKey.pop()
+				stack[-1][key] = value
+		elif kind == ",":
+			continue
+		else:
+			add(value)
+	return root
+
+def readPlist(path):
+	with open(path, encoding="utf-8") as plistFile:
+		return parsePlist(plistFile.read())
+
+# FONT STRUCTURES
+
+class HeadlessLayer(object):
+	"""
+	A glyph layer outside of the app.
+	Nodes are (x, y, type) tuples, type being one of "line", "curve", "qcurve", "offcurve".
+	Components are (glyphName, transform) tuples with a 6-number affine transform.
+	"""
+
+	def __init__(self, glyphName, layerId, associatedMasterId=None, name=None, width=0, paths=(), closedPaths=None, components=(), isSpecialLayer=False):
+		self.glyphName = glyphName
+		self.layerId = layerId
+		self.associatedMasterId = associatedMasterId or layerId
+		self.name = name
+		self.width = width
+		self.paths = [list(nodes) for nodes in paths]
+		self.closedPaths = list(closedPaths) if closedPaths is not None else [True] * len(self.paths)
+		self.components = list(components)
+		self.isSpecialLayer = isSpecialLayer
+		self.parent = None
+
+	def __repr__(self):
+		return "<HeadlessLayer %s (%s)>" % (self.glyphName, self.name or self.layerId)
+
+	@property
+	def isMasterLayer(self):
+		return self.layerId == self.associatedMasterId
+
+class HeadlessGlyph(object):
+
+	def __init__(self, name, layers=(), leftKerningGroup=None, rightKerningGroup=None, export=True, unicodes=(), category=None, subCategory=None, case=None, script=None):
+		self.name = name
+		self.layers = list(layers)
+		self.leftKerningGroup = leftKerningGroup
+		self.rightKerningGroup = rightKerningGroup
+		self.export = export
+		self.unicodes = tuple(unicodes)
+		self.category = category
+		self.subCategory = subCategory
+		self.case = case
+		self.script = script
+		for layer in self.layers:
+			layer.parent = self
+
+	def __repr__(self):
+		return "<HeadlessGlyph %s>" % self.name
+
+	def layerForId(self, layerId):
+		for layer in self.layers:
+			if layer.layerId == layerId:
+				return layer
+		return None
+
+class HeadlessFont(object):
+	"""
+	masters: list of (masterId, masterName) tuples
+	glyphs: dict of glyph name -> HeadlessGlyph (in font order)
+	kerning: dict of masterId -> {leftKey: {rightKey: value}}, keys are glyph names or @MMK_L_/@MMK_R_ groups
+	"""
+
+	def __init__(self, path=None, familyName=None, masters=(), glyphs=(), kerning=None):
+		self.path = path
+		self.familyName = familyName
+		self.masters = list(masters)
+		self.glyphs = {}
+		for glyph in glyphs:
+			self.glyphs[glyph.name] = glyph
+		self.kerning = kerning or {}
+
+	def __repr__(self):
+		return "<HeadlessFont %s: %i masters, %i glyphs>" % (self.familyName, len(self.masters), len(self.glyphs))
+
+	@property
+	def masterIds(self):
+		return [masterId for masterId, masterName in self.masters]
+
+	def layer(self, glyphName, masterId):
+		glyph = self.glyphs.get(glyphName)
+		if glyph:
+			return glyph.layerForId(masterId)
+		return None
+
+# READING .glyphs FILES
+
+_nodeTypes = {
+	"l": "line",
+	"c": "curve",
+	"q": "qcurve",
+	"o": "offcurve",
+	"LINE": "line",
+	"CURVE": "curve",
+	"QCURVE": "qcurve",
+	"OFFCURVE": "offcurve",
+	}
+
+def _nodeFromGlyphs3(node):
+	nodeType = str(node[2])
+	return (float(node[0]), float(node[1]), _nodeTypes.get(nodeType[0], "line"))
+
+def _nodeFromGlyphs2(node):
+	parts = node.split()
+	return (float(parts[0]), float(parts[1]), _nodeTypes.get(parts[2], "line"))
+
+def _numbersFromString(string):
+	return [float(n) for n in re.findall(r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?", str(string))]
+
+def _componentTransform(shape):
+	if "transform" in shape:
+		# Glyphs 2: "{1, 0, 0, 1, 100, 0}"
+		return tuple(_numbersFromString(shape["transform"]))
+	# Glyphs 3: pos, scale, angle
+	x, y = (list(shape.get("pos", (0, 0))) + [0, 0])[:2]
+	scaleX, scaleY = (list(shape.get("scale", (1, 1))) + [1, 1])[:2]
+	angle = radians(float(shape.get("angle", 0)))
+	return (
+		scaleX * cos(angle),
+		scaleX * sin(angle),
+		-scaleY * sin(angle),
+		scaleY * cos(angle),
+		float(x),
+		float(y),
+		)
+
+def _isSpecialLayerDict(layerDict):
+	attributes = layerDict.get("attr", {})
+	if "coordinates" in attributes or "axisRules" in attributes:
+		return True
+	name = str(layerDict.get("name", ""))
+	return ("[" in name and "]" in name) or ("{" in name and "}" in name)
+
+def _layerFromDict(glyphName, layerDict):
+	paths, closedPaths, components = [], [], []
+	shapes = layerDict.get("shapes")
+	if shapes is None:
+		# Glyphs 2
+		for pathDict in layerDict.get("paths", ()):
+			paths.append([_nodeFromGlyphs2(n) for n in pathDict.get("nodes", ())])
+			closedPaths.append(bool(pathDict.get("closed", 1)))
+		for componentDict in layerDict.get("components", ()):
+			components.append((componentDict["name"], _componentTransform(componentDict)))
+	else:
+		# Glyphs 3
+		for shape in shapes:
+			if "ref" in shape:
+				components.append((shape["ref"], _componentTransform(shape)))
+			else:
+				paths.append([_nodeFromGlyphs3(n) for n in shape.get("nodes", ())])
+				closedPaths.append(bool(shape.get("closed", 1)))
+	return HeadlessLayer(
+		glyphName,
+		layerDict.get("layerId"),
+		associatedMasterId=layerDict.get("associatedMasterId"),
+		name=layerDict.get("name"),
+		width=float(layerDict.get("width", 0)),
+		paths=paths,
+		closedPaths=closedPaths,
+		components=components,
+		isSpecialLayer=_isSpecialLayerDict(layerDict),
+		)
+
+def _glyphFromDict(glyphDict, formatVersion=2):
+	name = str(glyphDict["glyphname"])
+	unicodes = glyphDict.get("unicode", ())
+	if not isinstance(unicodes, (list, tuple)):
+		unicodes = [unicodes] if formatVersion >= 3 else str(unicodes).split(",")
+	if formatVersion >= 3:
+		# Glyphs 3 stores decimal numbers
+		unicodes = ["%04X" % int(u) for u in unicodes]
+	return HeadlessGlyph(
+		name,
+		layers=[_layerFromDict(name, layerDict) for layerDict in glyphDict.get("layers", ())],
+		leftKerningGroup=glyphDict.get("kernLeft", glyphDict.get("leftKerningGroup")),
+		rightKerningGroup=glyphDict.get("kernRight", glyphDict.get("rightKerningGroup")),
+		export=bool(glyphDict.get("export", 1)),
+		unicodes=[str(u) for u in unicodes if str(u)],
+		category=glyphDict.get("category"),
+		subCategory=glyphDict.get("subCategory"),
+		case=glyphDict.get("case"),
+		script=glyphDict.get("script"),
+		)
+
+def _kerningFromDict(kerningDict, glyphNameForId):
+	kerning = {}
+	for masterId, masterKerning in (kerningDict or {}).items():
+		kerning[masterId] = {}
+		for leftKey, rightDict in masterKerning.items():
+			leftKey = glyphNameForId.get(leftKey, leftKey)
+			kerning[masterId][leftKey] = {glyphNameForId.get(rightKey, rightKey): float(value) for rightKey, value in rightDict.items()}
+	return kerning
+
+def fontFromDict(fontDict, path=None):
+	masters = [(m["id"], m.get("name", m.get("custom", m["id"]))) for m in fontDict.get("fontMaster", ())]
+	formatVersion = fontDict.get(".formatVersion", 2)
+	glyphs = [_glyphFromDict(g, formatVersion) for g in fontDict.get("glyphs", ())]
+	glyphNameForId = {}
+	for glyphDict in fontDict.get("glyphs", ()):
+		if "id" in glyphDict:
+			glyphNameForId[glyphDict["id"]] = str(glyphDict["glyphname"])
+	kerning = _kerningFromDict(fontDict.get("kerningLTR", fontDict.get("kerning")), glyphNameForId)
+	return HeadlessFont(path=path, familyName=fontDict.get("familyName"), masters=masters, glyphs=glyphs, kerning=kerning)
+
+def readGlyphsPackage(path):
+	fontDict = readPlist(os.path.join(path, "fontinfo.plist"))
+	glyphsFolder = os.path.join(path, "glyphs")
+	glyphFiles = {}
+	for fileName in os.listdir(glyphsFolder):
+		if fileName.endswith(".glyph"):
+			glyphDict = readPlist(os.path.join(glyphsFolder, fileName))
+			glyphFiles[str(glyphDict["glyphname"])] = glyphDict
+	orderPath = os.path.join(path, "order.plist")
+	order = [str(n) for n in readPlist(orderPath)] if os.path.exists(orderPath) else []
+	orderedNames = [n for n in order if n in glyphFiles] + sorted(n for n in glyphFiles if not n in order)
+	fontDict["glyphs"] = [glyphFiles[n] for n in orderedNames]
+	return fontDict
+
+def readFont(path):
+	"""
+	Returns a HeadlessFont for a .glyphs file, a .glyphspackage folder or a .ufo folder.
+	"""
+	path = os.path.abspath(os.path.expanduser(path.rstrip("/\\")))
+	if path.endswith(".ufo"):
+		return readUFO(path)
+	elif path.endswith(".glyphspackage"):
+		fontDict = readGlyphsPackage(path)
+	else:
+		fontDict = readPlist(path)
+	return fontFromDict(fontDict, path=path)
+
+# READING UFO SOURCES
+
+def _readUFOPlist(ufoPath, fileName, default=None):
+	path = os.path.join(ufoPath, fileName)
+	if not os.path.exists(path):
+		return default
+	with open(path, "rb") as plistFile:
+		return plistlib.load(plistFile)
+
+def _pathFromContour(contour):
+	# UFO contours start with their first on-curve, Glyphs lists it last
+	nodes, closed = [], True
+	for point in contour.iter("point"):
+		nodeType = point.get("type", "offcurve")
+		if nodeType == "move":
+			nodeType, closed = "line", False
+		nodes.append((float(point.get("x", 0)), float(point.get("y", 0)), nodeType))
+	if closed and nodes:
+		nodes = nodes[1:] + nodes[:1]
+	return nodes, closed
+
+def _layerFromGlif(path, layerId):
+	glyphElement = ElementTree.parse(path).getroot()
+	glyphName = glyphElement.get("name")
+	paths, closedPaths, components = [], [], []
+	outline = glyphElement.find("outline")
+	for element in outline if outline is not None else ():
+		if element.tag == "contour":
+			points = element.findall("point")
+			if len(points) == 1 and points[0].get("name") and points[0].get("type") == "move":
+				continue # anchor in format 1
+			nodes, closed = _pathFromContour(element)
+			paths.append(nodes)
+			closedPaths.append(closed)
+		elif element.tag == "component":
+			transform = tuple(float(element.get(key, default)) for key, default in (("xScale", 1), ("xyScale", 0), ("yxScale", 0), ("yScale", 1), ("xOffset", 0), ("yOffset", 0)))
+			components.append((element.get("base"), transform))
+	advance = glyphElement.find("advance")
+	layer = HeadlessLayer(
+		glyphName,
+		layerId,
+		width=float(advance.get("width", 0)) if advance is not None else 0.0,
+		paths=paths,
+		closedPaths=closedPaths,
+		components=components,
+		)
+	unicodes = ["%04X" % int(u.get("hex"), 16) for u in glyphElement.findall("unicode") if u.get("hex")]
+	return layer, unicodes
+
+def readUFO(path):
+	"""
+	Returns a HeadlessFont for a UFO (version 2 or 3), with the default layer as its only master.
+	Kerning groups and kerning are converted into Glyphs-style @MMK_L_/@MMK_R_ keys.
+	"""
+	fontInfo = _readUFOPlist(path, "fontinfo.plist", {})
+	lib = _readUFOPlist(path, "lib.plist", {})
+	layerContents = _readUFOPlist(path, "layercontents.plist", [["public.default", "glyphs"]])
+	defaultLayerName, glyphsFolder = layerContents[0]
+	contents = _readUFOPlist(os.path.join(path, glyphsFolder), "contents.plist", {})
+	masterId = defaultLayerName
+
+	# kerning groups: public.kern1 is the first glyph of a pair, i.e. the right side of the glyph
+	rightGroups, leftGroups, groupKeys = {}, {}, {}
+	for groupName, members in _readUFOPlist(path, "groups.plist", {}).items():
+		for prefix, groups, keyPrefix in (("public.kern1.", rightGroups, "@MMK_L_"), ("public.kern2.", leftGroups, "@MMK_R_")):
+			if groupName.startswith(prefix):
+				groupKeys[groupName] = keyPrefix + groupName[len(prefix):]
+				for member in members:
+					groups[member] = groupName[len(prefix):]
+
+	skipExport = set(lib.get("public.skipExportGlyphs", ()))
+	order = [name for name in lib.get("public.glyphOrder", ()) if name in contents]
+	orderedNames = set(order)
+	glyphNames = order + sorted(name for name in contents if not name in orderedNames)
+	glyphs = []
+	for glyphName in glyphNames:
+		layer, unicodes = _layerFromGlif(os.path.join(path, glyphsFolder, contents[glyphName]), masterId)
+		glyphs.append(
+			HeadlessGlyph(
+				glyphName,
+				layers=[layer],
+				leftKerningGroup=leftGroups.get(glyphName),
+				rightKerningGroup=rightGroups.get(glyphName),
+				export=not glyphName in skipExport,
+				unicodes=unicodes,
+				)
+			)
+
+	kerning = {masterId: {}}
+	for leftKey, rightDict in _readUFOPlist(path, "kerning.plist", {}).items():
+		kerning[masterId][groupKeys.get(leftKey, leftKey)] = {groupKeys.get(rightKey, rightKey): float(value) for rightKey, value in rightDict.items()}
+
+	masterName = fontInfo.get("styleName", "Regular")
+	return HeadlessFont(path=path, familyName=fontInfo.get("familyName"), masters=[(masterId, masterName)], glyphs=glyphs, kerning=kerning)
+
+# FONTTOOLS GLYPH SETS
+
+def layerFromGlyphSet(glyphSet, glyphName, masterId="default"):
+	"""
+	Converts a glyph of a fontTools glyph set (TTFont.getGlyphSet(), UFO glyph set, ...)
+	into a HeadlessLayer. Components are kept as components.
+	"""
+	from fontTools.pens.recordingPen import RecordingPen
+	pen = RecordingPen()
+	glyph = glyphSet[glyphName]
+	glyph.draw(pen)
+	paths, closedPaths, components, nodes = [], [], [], []
+	for operator, operands in pen.value:
+		if operator == "moveTo":
+			nodes = [(operands[0][0], operands[0][1], "line")]
+		elif operator == "lineTo":
+			nodes.append((operands[0][0], operands[0][1], "line"))
+		elif operator in ("curveTo", "qCurveTo"):
+			nodeType = "curve" if operator == "curveTo" else "qcurve"
+			points = [p for p in operands if p is not None]
+			for x, y in points[:-1]:
+				nodes.append((x, y, "offcurve"))
+			if operands[-1] is None:
+				# TrueType contour without on-curve points
+				paths.append(nodes)
+				closedPaths.append(True)
+				nodes = []
+			else:
+				nodes.append((points[-1][0], points[-1][1], nodeType))
+		elif operator in ("closePath", "endPath"):
+			if nodes:
+				if operator == "closePath" and len(nodes) > 1 and nodes[0][:2] == nodes[-1][:2]:
+					# first node is repeated at the end, keep the closing one for its type:
+					nodes = nodes[1:]
+				paths.append(nodes)
+				closedPaths.append(operator == "closePath")
+			nodes = []
+		elif operator == "addComponent":
+			components.append(operands)
+	return HeadlessLayer(glyphName, masterId, width=getattr(glyph, "width", 0), paths=paths, closedPaths=closedPaths, components=components)
+
+def fontFromGlyphSet(glyphSet, glyphOrder=None, masterId="default", familyName=None):
+	glyphNames = glyphOrder or sorted(glyphSet.keys())
+	glyphs = [HeadlessGlyph(name, layers=[layerFromGlyphSet(glyphSet, name, masterId=masterId)]) for name in glyphNames]
+	return HeadlessFont(familyName=familyName, masters=[(masterId, masterId)], glyphs=glyphs)
+
+# DECOMPOSITION
+
+def _transformPoint(transform, x, y):
+	a, b, c, d, dx, dy = transform
+	return (a * x + c * y + dx, b * x + d * y + dy)
+
+def _combineTransforms(outer, inner):
+	a1, b1, c1, d1, dx1, dy1 = outer
+	a2, b2, c2, d2, dx2, dy2 = inner
+	return (
+		a1 * a2 + c1 * b2,
+		b1 * a2 + d1 * b2,
+		a1 * c2 + c1 * d2,
+		b1 * c2 + d1 * d2,
+		a1 * dx2 + c1 * dy2 + dx1,
+		b1 * dx2 + d1 * dy2 + dy1,
+		)
+
+def decomposedPaths(font, layer, transform=(1, 0, 0, 1, 0, 0), depth=0):
+	"""
+	Returns a list of (nodes, closed) for all paths of the layer, including those of (nested) components.
+	Component layers are looked up in the same master as the layer.
+	"""
+	result = []
+	for nodes, closed in zip(layer.paths, layer.closedPaths):
+		if transform == (1, 0, 0, 1, 0, 0):
+			result.append((nodes, closed))
+		else:
+			result.append(([_transformPoint(transform, x, y) + (nodeType,) for x, y, nodeType in nodes], closed))
+	if depth < 10 and font is not None:
+		for componentName, componentTransform in layer.components:
+			componentLayer = font.layer(componentName, layer.associatedMasterId)
+			if componentLayer is not None:
+				result.extend(decomposedPaths(font, componentLayer, _combineTransforms(transform, tuple(componentTransform)), depth + 1))
+	return result
@@ -0,0 +1,599 @@
+# -*- coding: utf-8 -*-
+"""
+Plain Python outline geometry for the headless helpers: flattening of cubic and
+quadratic contours into line segments, and horizontal scanline intersections.
+Contours are lists of (x, y, type) nodes as produced by glyphsfile.py,
+type being one of "line", "curve", "qcurve", "offcurve".
+"""
+from __future__ import division, print_function
+
+from math import ceil, floor, hypot
+try:
+	import numpy
+except ImportError:
+	numpy = None # falls back to pure Python
+
+def _startIndex(nodes):
+	# index of first on-curve node, None for contours consisting of off-curves only
+	for i, node in enumerate(nodes):
+		if node[2] != "offcurve":
+			return i
+	return None
+
+def contourSegments(nodes, closed=True):
+	"""
+	Splits a contour into segments, each a tuple of points (x, y):
+	2 points for lines, 4 for cubic curves, 3 or more for (TrueType) quadratic splines.
+	"""
+	if not nodes:
+		return []
+
+	start = _startIndex(nodes)
+	if start is None:
+		# quadratic contour without on-curve points: insert an implied one
+		(x0, y0), (x1, y1) = nodes[-1][:2], nodes[0][:2]
+		nodes = [((x0 + x1) * 0.5, (y0 + y1) * 0.5, "qcurve")] + list(nodes)
+		start = 0
+
+	if closed:
+		ordered = list(nodes[start + 1:]) + list(nodes[:start + 1])
+	else:
+		ordered = list(nodes[start + 1:])
+
+	segments = []
+	previous = nodes[start][:2]
+	offcurves = []
+	for x, y, nodeType in ordered:
+		if nodeType == "offcurve":
+			offcurves.append((x, y))
+			continue
+		segments.append(tuple([previous] + offcurves + [(x, y)]))
+		previous = (x, y)
+		offcurves = []
+	return segments
+
+def _cubicPoint(p0, p1, p2, p3, t):
+	mt = 1.0 - t
+	a, b, c, d = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+	return (
+		a * p0[0] + b * p1[0] + c * p2[0] + d * p3[0],
+		a * p0[1] + b * p1[1] + c * p2[1] + d * p3[1],
+		)
+
+def _quadraticPoint(p0, p1, p2, t):
+	mt = 1.0 - t
+	a, b, c = mt * mt, 2 * mt * t, t * t
+	return (
+		a * p0[0] + b * p1[0] + c * p2[0],
+		a * p0[1] + b * p1[1] + c * p2[1],
+		)
+
+def _stepCount(points, tolerance):
+	# number of line segments so that the flattening error stays below tolerance:
+	length = sum(hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(points, points[1:]))
+	return max(1, int(ceil((length / max(tolerance, 0.001))**0.5)))
+
+def quadraticSplineSegments(points):
+	"""
+	Splits a TrueType quadratic spline (on, off, off, ..., on) into (p0, p1, p2) quadratic Béziers
+	with implied on-curve points between consecutive off-curves.
+	"""
+	if len(points) == 3:
+		return [tuple(points)]
+	quadratics = []
+	start = points[0]
+	offcurves = points[1:-1]
+	for i, offcurve in enumerate(offcurves):
+		if i < len(offcurves) - 1:
+			nextOffcurve = offcurves[i + 1]
+			end = ((offcurve[0] + nextOffcurve[0]) * 0.5, (offcurve[1] + nextOffcurve[1]) * 0.5)
+		else:
+			end = points[-1]
+		quadratics.append((start, offcurve, end))
+		start = end
+	return quadratics
+
+def flattenSegment(segment, tolerance=0.5):
+	"""
+	Returns a list of points approximating the segment, first point excluded.
+	"""
+	if len(segment) == 2:
+		return [segment[1]]
+	elif len(segment) == 4:
+		steps = _stepCount(segment, tolerance)
+		return [_cubicPoint(segment[0], segment[1], segment[2], segment[3], i / steps) for i in range(1, steps + 1)]
+	points = []
+	for p0, p1, p2 in quadraticSplineSegments(segment):
+		steps = _stepCount((p0, p1, p2), tolerance)
+		points.extend(_quadraticPoint(p0, p1, p2, i / steps) for i in range(1, steps + 1))
+	return points
+
+def flattenContour(nodes, closed=True, tolerance=0.5):
+	"""
+	Returns the contour as a polyline (list of (x, y) points).
+	For closed contours, the last point connects back to the first one.
+	"""
+	segments = contourSegments(nodes, closed=closed)
+	if not segments:
+		return [tuple(n[:2]) for n in nodes]
+	points = [segments[0][0]]
+	for segment in segments:
+		points.extend(flattenSegment(segment, tolerance=tolerance))
+	if closed and len(points) > 1 and points[-1] == points[0]:
+		points.pop()
+	return points
+
+def lineSegments(polylines):
+	"""
+	polylines: list of (points, closed) tuples.
+	Returns a list of (x0, y0, x1, y1) line segments.
+	"""
+	lines = []
+	for points, closed in polylines:
+		count = len(points)
+		if count < 2:
+			continue
+		pairs = zip(points, points[1:] + points[:1]) if closed else zip(points, points[1:])
+		lines.extend((a[0], a[1], b[0], b[1]) for a, b in pairs)
+	return lines
+
+def boundsOfLines(lines):
+	"""
+	Returns (xMin, yMin, xMax, yMax) or None if there are no lines.
+	"""
+	if not lines:
+		return None
+	xs = [l[0] for l in lines] + [l[2] for l in lines]
+	ys = [l[1] for l in lines] + [l[3] for l in lines]
+	return min(xs), min(ys), max(xs), max(ys)
+
+def extremaAtHeight(lines, height):
+	"""
+	Returns (leftmost x, rightmost x) of the outline at height,
+	or (None, None) if the height does not cross the outline.
+	"""
+	left = right = None
+	for x0, y0, x1, y1 in lines:
+		if y0 == y1:
+			if y0 != height:
+				continue
+			xs = (x0, x1)
+		elif min(y0, y1) <= height <= max(y0, y1):
+			xs = (x0 + (height - y0) * (x1 - x0) / (y1 - y0),)
+		else:
+			continue
+		for x in xs:
+			if left is None or x < left:
+				left = x
+			if right is None or x > right:
+				right = x
+	return left, right
+
+def extremaAtHeights(lines, heights):
+	"""
+	extremaAtHeight() for many heights at once.
+	Returns a list of (left, right) tuples, vectorized with numpy if available.
+	"""
+	if numpy is None or not lines:
+		return [extremaAtHeight(lines, height) for height in heights]
+
+	segments = numpy.asarray(lines, dtype=float)
+	x0, y0, x1, y1 = (segments[:, i][:, None] for i in range(4))
+	ys = numpy.asarray(heights, dtype=float)[None, :]
+	yMin, yMax = numpy.minimum(y0, y1), numpy.maximum(y0, y1)
+	crossing = (yMin <= ys) & (ys <= yMax)
+	dy = y1 - y0
+	flat = dy == 0
+	with numpy.errstate(divide="ignore", invalid="ignore"):
+		x = numpy.where(flat, x0, x0 + (ys - y0) * (x1 - x0) / numpy.where(flat, 1.0, dy))
+	xFlatRight = numpy.where(flat, x1, x)
+	lefts = numpy.where(crossing, numpy.minimum(x, xFlatRight), numpy.inf).min(axis=0)
+	rights = numpy.where(crossing, numpy.maximum(x, xFlatRight), -numpy.inf).max(axis=0)
+	return [(None, None) if numpy.isinf(l) else (float(l), float(r)) for l, r in zip(lefts.tolist(), rights.tolist())]
+
+# EXACT ENVELOPES
+
+def _splitCubic(p0, p1, p2, p3, t):
+	# de Casteljau subdivision, returns the two halves
+	def lerp(a, b):
+		return (a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t)
+	p01, p12, p23 = lerp(p0, p1), lerp(p1, p2), lerp(p2, p3)
+	p012, p123 = lerp(p01, p12), lerp(p12, p23)
+	p0123 = lerp(p012, p123)
+	return (p0, p01, p012, p0123), (p0123, p123, p23, p3)
+
+def _cubicExtremaParameters(a, b, c, d):
+	# parameters t in ]0, 1[ where the 1D cubic a, b, c, d has a zero derivative
+	qa = -a + 3 * b - 3 * c + d
+	qb = 2 * (a - 2 * b + c)
+	qc = b - a
+	if abs(qa) < 1e-12:
+		roots = [-qc / qb] if abs(qb) > 1e-12 else []
+	else:
+		discriminant = qb * qb - 4 * qa * qc
+		if discriminant < 0:
+			return []
+		root = discriminant**0.5
+		roots = [(-qb + root) / (2 * qa), (-qb - root) / (2 * qa)]
+	return [t for t in roots if 1e-9 < t < 1 - 1e-9]
+
+class MonotonePiece(object):
+	"""
+	Part of a line or cubic segment that is monotone in both x and y,
+	so it can be treated as a function x(y) between yMin and yMax.
+	"""
+	__slots__ = ("points", "yMin", "yMax", "increasing")
+
+	def __init__(self, points):
+		self.points = points
+		y0, y1 = points[0][1], points[-1][1]
+		self.yMin, self.yMax = min(y0, y1), max(y0, y1)
+		self.increasing = y1 >= y0
+
+	def __repr__(self):
+		return "<MonotonePiece %s>" % (self.points, )
+
+	def isHorizontal(self):
+		return self.yMin == self.yMax
+
+	def xRange(self):
+		x0, x1 = self.points[0][0], self.points[-1][0]
+		return min(x0, x1), max(x0, x1)
+
+	def xAtY(self, y):
+		points = self.points
+		if self.yMin == self.yMax:
+			return points[0][0]
+		if len(points) == 2:
+			(x0, y0), (x1, y1) = points
+			return x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+		# Newton iteration on t, safeguarded by bisection, y(t) is monotone:
+		(x0, y0), (x1, y1), (x2, y2), (x3, y3) = points
+		low, high = 0.0, 1.0
+		t = (y - y0) / (y3 - y0)
+		for i in range(32):
+			mt = 1.0 - t
+			yt = mt * mt * mt * y0 + 3 * mt * mt * t * y1 + 3 * mt * t * t * y2 + t * t * t * y3
+			delta = yt - y
+			if abs(delta) < 1e-9:
+				break
+			if (delta < 0) == self.increasing:
+				low = t
+			else:
+				high = t
+			slope = 3 * (mt * mt * (y1 - y0) + 2 * mt * t * (y2 - y1) + t * t * (y3 - y2))
+			nextT = t - delta / slope if slope else -1.0
+			t = nextT if low < nextT < high else (low + high) * 0.5
+		mt = 1.0 - t
+		return mt * mt * mt * x0 + 3 * mt * mt * t * x1 + 3 * mt * t * t * x2 + t * t * t * x3
+
+def monotonePieces(nodes, closed=True):
+	"""
+	Splits a contour ((x, y, type) nodes) into MonotonePieces.
+	Quadratic segments are converted into cubics first.
+	"""
+	pieces = []
+	for segment in contourSegments(nodes, closed=closed):
+		if len(segment) == 2:
+			cubics = []
+			if segment[0] != segment[1]:
+				pieces.append(MonotonePiece(segment))
+		elif len(segment) == 4:
+			cubics = [segment]
+		else:
+			cubics = [
+				(p0, (p0[0] + (p1[0] - p0[0]) * 2 / 3, p0[1] + (p1[1] - p0[1]) * 2 / 3), (p2[0] + (p1[0] - p2[0]) * 2 / 3, p2[1] + (p1[1] - p2[1]) * 2 / 3), p2)
+				for p0, p1, p2 in quadraticSplineSegments(segment)
+				]
+		for cubic in cubics:
+			ts = sorted(set(
+				_cubicExtremaParameters(*[p[0] for p in cubic]) + _cubicExtremaParameters(*[p[1] for p in cubic])
+				))
+			rest, previousT = cubic, 0.0
+			for t in ts:
+				# rescale t to the remaining part of the curve:
+				first, rest = _splitCubic(*rest, t=(t - previousT) / (1.0 - previousT))
+				pieces.append(MonotonePiece(first))
+				previousT = t
+			pieces.append(MonotonePiece(rest))
+	return pieces
+
+def _outerX(pieces, y, rightmost):
+	# leftmost or rightmost x of all pieces at height y, None if y does not cross any of them
+	xs = []
+	for piece in pieces:
+		if piece.yMin <= y <= piece.yMax:
+			if piece.yMin == piece.yMax:
+				xs.extend(piece.xRange())
+			else:
+				xs.append(piece.xAtY(y))
+	if not xs:
+		return None
+	return max(xs) if rightmost else min(xs)
+
+def _intervalBounds(leftPieces, rightPieces, leftXs, rightXs):
+	# lower bound of the gap within an interval, and the pieces that can still matter in it;
+	# leftXs/rightXs: x of each piece at both ends of the interval
+	leftRanges = [(min(xs), max(xs)) for xs in leftXs]
+	rightRanges = [(min(xs), max(xs)) for xs in rightXs]
+	leftFloor = max(r[0] for r in leftRanges)
+	rightCeiling = min(r[1] for r in rightRanges)
+	leftKeep = [i for i, r in enumerate(leftRanges) if r[1] >= leftFloor]
+	rightKeep = [i for i, r in enumerate(rightRanges) if r[0] <= rightCeiling]
+	lowerBound = min(rightRanges[i][0] for i in rightKeep) - max(leftRanges[i][1] for i in leftKeep)
+	return lowerBound, [leftPieces[i] for i in leftKeep], [rightPieces[i] for i in rightKeep]
+
+def exactMinDistance(leftPieces, leftWidth, rightPieces, kerning=0.0, ignoreIntervals=(), tolerance=0.01):
+	"""
+	Smallest horizontal distance between the right envelope of the left glyph and the left envelope
+	of the right glyph, computed on the outline segments (see monotonePieces) rather than on samples,
+	accurate within tolerance. Sweeps over the y ranges between segment ends, then narrows down on
+	the ranges that can still contain the minimum (branch and bound).
+	ignoreIntervals: (bottom, top) height intervals to skip.
+	Returns None if the two glyphs do not share any height.
+	"""
+	from heapq import heappush, heappop
+
+	def ignored(y):
+		for bottom, top in ignoreIntervals or ():
+			if bottom <= y <= top:
+				return True
+		return False
+
+	if not leftPieces or not rightPieces:
+		return None
+	bottom = max(min(p.yMin for p in leftPieces), min(p.yMin for p in rightPieces))
+	top = min(max(p.yMax for p in leftPieces), max(p.yMax for p in rightPieces))
+	if bottom > top:
+		return None
+
+	best = None
+	breakpoints = set([bottom, top])
+	for piece in leftPieces + rightPieces:
+		for y in (piece.yMin, piece.yMax):
+			if bottom < y < top:
+				breakpoints.add(y)
+	for interval in ignoreIntervals or ():
+		for y in interval:
+			if bottom < y < top:
+				breakpoints.add(y)
+	breakpoints = sorted(breakpoints)
+
+	# exact values at the breakpoints (including horizontal segments):
+	for y in breakpoints:
+		if ignored(y):
+			continue
+		rightX, leftX = _outerX(rightPieces, y, False), _outerX(leftPieces, y, True)
+		if rightX is not None and leftX is not None and (best is None or rightX - leftX < best):
+			best = rightX - leftX
+
+	# sweep over the ranges between breakpoints, collect the pieces spanning each range:
+	candidates = []
+	leftSlanted = sorted((p for p in leftPieces if p.yMin < p.yMax), key=lambda p: p.yMin)
+	rightSlanted = sorted((p for p in rightPieces if p.yMin < p.yMax), key=lambda p: p.yMin)
+	for a, b in zip(breakpoints, breakpoints[1:]):
+		if ignored((a + b) * 0.5):
+			continue
+		leftActive = [p for p in leftSlanted if p.yMin <= a and p.yMax >= b]
+		rightActive = [p for p in rightSlanted if p.yMin <= a and p.yMax >= b]
+		if not leftActive or not rightActive:
+			continue
+		leftXs = [(p.xAtY(a), p.xAtY(b)) for p in leftActive]
+		rightXs = [(p.xAtY(a), p.xAtY(b)) for p in rightActive]
+		lowerBound, leftActive, rightActive = _intervalBounds(leftActive, rightActive, leftXs, rightXs)
+		heappush(candidates, (lowerBound, a, b, len(candidates), leftActive, rightActive))
+
+	# narrow down on ranges that may still contain a smaller gap:
+	counter = len(candidates)
+	while candidates:
+		lowerBound, a, b, index, leftActive, rightActive = heappop(candidates)
+		if best is not None and lowerBound >= best - tolerance:
+			break
+		if b - a < 1e-6:
+			best = lowerBound if best is None else min(best, lowerBound)
+			continue
+		m = (a + b) * 0.5
+		leftAtM = [p.xAtY(m) for p in leftActive]
+		rightAtM = [p.xAtY(m) for p in rightActive]
+		gap = min(rightAtM) - max(leftAtM)
+		if best is None or gap < best:
+			best = gap
+		for y0, y1 in ((a, m), (m, b)):
+			leftXs = [(p.xAtY(y0 if y1 == m else y1), x) for p, x in zip(leftActive, leftAtM)]
+			rightXs = [(p.xAtY(y0 if y1 == m else y1), x) for p, x in zip(rightActive, rightAtM)]
+			childBound, childLeft, childRight = _intervalBounds(leftActive, rightActive, leftXs, rightXs)
+			if childBound < best - tolerance:
+				counter += 1
+				heappush(candidates, (childBound, y0, y1, counter, childLeft, childRight))
+
+	if best is None:
+		return None
+	return leftWidth + best + kerning
+
+# CONTOUR NESTING
+
+def polygonArea(points):
+	"""
+	Signed (shoelace) area of a closed polyline: positive if counterclockwise, negative if clockwise.
+	"""
+	count = len(points)
+	if count < 3:
+		return 0.0
+	if numpy is not None and count > 32:
+		xy = numpy.asarray(points, dtype=float)
+		x, y = xy[:, 0], xy[:, 1]
+		return 0.5 * float(numpy.dot(x, numpy.roll(y, -1)) - numpy.dot(numpy.roll(x, -1), y))
+	area = 0.0
+	x0, y0 = points[-1]
+	for x1, y1 in points:
+		area += x0 * y1 - x1 * y0
+		x0, y0 = x1, y1
+	return 0.5 * area
+
+def polygonBounds(points):
+	"""
+	Returns (xMin, yMin, xMax, yMax) of a polyline, None if it has no points.
+	"""
+	if not points:
+		return None
+	xs = [p[0] for p in points]
+	ys = [p[1] for p in points]
+	return min(xs), min(ys), max(xs), max(ys)
+
+def pointInPolygon(x, y, points):
+	"""
+	True if x, y is inside the closed polyline (even-odd rule).
+	"""
+	inside = False
+	x0, y0 = points[-1]
+	for x1, y1 in points:
+		if (y0 > y) != (y1 > y) and x < x0 + (y - y0) * (x1 - x0) / (y1 - y0):
+			inside = not inside
+		x0, y0 = x1, y1
+	return inside
+
+def _boundsContain(outer, inner):
+	return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+class ContourNesting(object):
+	"""
+	Which closed contour lies inside which, computed on the flattened contours:
+	signed areas for the directions, bounding boxes as prefilter, point-in-polygon
+	tests for containment. Open and empty contours are not part of the tree.
+	paths: lists of (x, y, type) nodes, closedPaths: one bool per path (default: all closed).
+	parents: index of the innermost contour around each contour, -1 if there is none.
+	depths: number of contours around each contour, counters have an odd depth.
+	"""
+
+	def __init__(self, paths, closedPaths=None, tolerance=1.0, samples=5):
+		if closedPaths is None:
+			closedPaths = [True] * len(paths)
+		self.polygons = [flattenContour(nodes, closed=True, tolerance=tolerance) if closed and len(nodes) > 2 else [] for nodes, closed in zip(paths, closedPaths)]
+		self.areas = [polygonArea(points) for points in self.polygons]
+		self.bounds = [polygonBounds(points) for points in self.polygons]
+		count = len(self.polygons)
+		self.parents = [-1] * count
+		self.depths = [0] * count
+
+		# largest first, so every contour is placed after all contours that can contain it:
+		order = sorted((i for i in range(count) if self.areas[i]), key=lambda i: -abs(self.areas[i]))
+		for position, i in enumerate(order):
+			# containers sorted by size, the first one found is the innermost:
+			for j in reversed(order[:position]):
+				if _boundsContain(self.bounds[j], self.bounds[i]) and self._isInside(i, j, samples):
+					self.parents[i] = j
+					self.depths[i] = self.depths[j] + 1
+					break
+
+	def _isInside(self, inner, outer, samples):
+		# majority vote of a few points along the inner contour, in case the contours touch
+		points = self.polygons[inner]
+		step = max(1, len(points) // samples)
+		votes = [pointInPolygon(x, y, self.polygons[outer]) for x, y in points[::step][:samples]]
+		return sum(votes) * 2 > len(votes)
+
+	def isCounter(self, index):
+		return self.depths[index] % 2 == 1
+
+	def isClockwise(self, index):
+		return self.areas[index] < 0
+
+	def hasWrongDirection(self, index):
+		"""
+		True if a closed contour does not have the expected direction:
+		counterclockwise for outer contours, clockwise for counters.
+		"""
+		if not self.areas[index]:
+			return False
+		return self.isClockwise(index) != self.isCounter(index)
+
+	def wrongDirections(self):
+		"""
+		Indexes of all contours with an unexpected direction.
+		"""
+		return [i for i in range(len(self.areas)) if self.hasWrongDirection(i)]
+
+# SPATIAL GRID
+
+class PointGrid(object):
+	"""
+	Uniform grid hash for points: cells of cellSize units, keyed by quantized coordinates.
+	Finds points near a position or near a line segment by looking only at the cells
+	around it, so finding all duplicates or all points on lines takes near-linear time.
+	"""
+
+	def __init__(self, points=(), cellSize=16.0):
+		self.cellSize = float(cellSize)
+		self.cells = {}
+		self.points = []
+		for x, y in points:
+			self.add(x, y)
+
+	def __len__(self):
+		return len(self.points)
+
+	def _cellIndex(self, value):
+		return int(floor(value / self.cellSize))
+
+	def add(self, x, y):
+		"""
+		Adds a point, returns its index.
+		"""
+		index = len(self.points)
+		self.points.append((x, y))
+		self.cells.setdefault((self._cellIndex(x), self._cellIndex(y)), []).append(index)
+		return index
+
+	def _indexesInCells(self, columns, rows):
+		cells = self.cells
+		for column in columns:
+			for row in rows:
+				for index in cells.get((column, row), ()):
+					yield index
+
+	def near(self, x, y, tolerance=0.0):
+		"""
+		Indexes of all points within tolerance of x, y (0 for the exact position).
+		"""
+		columns = range(self._cellIndex(x - tolerance), self._cellIndex(x + tolerance) + 1)
+		rows = range(self._cellIndex(y - tolerance), self._cellIndex(y + tolerance) + 1)
+		points = self.points
+		return [i for i in self._indexesInCells(columns, rows) if hypot(points[i][0] - x, points[i][1] - y) <= tolerance]
+
+	def _cellsAlongSegment(self, x0, y0, x1, y1, tolerance):
+		# cells within tolerance of the segment, one column (or row) of cells at a time along its longer axis
+		transposed = abs(y1 - y0) > abs(x1 - x0)
+		if transposed:
+			x0, y0, x1, y1 = y0, x0, y1, x1
+		if x0 > x1:
+			x0, y0, x1, y1 = x1, y1, x0, y0
+		slope = (y1 - y0) / (x1 - x0) if x1 != x0 else 0.0
+		margin = tolerance * (1.0 + slope * slope)**0.5 # tolerance measured along the shorter axis
+		size = self.cellSize
+		for column in range(self._cellIndex(x0 - tolerance), self._cellIndex(x1 + tolerance) + 1):
+			# part of the segment that can be within tolerance of a point in this column:
+			left = min(max(column * size - tolerance, x0), x1)
+			right = min(max((column + 1) * size + tolerance, x0), x1)
+			yLeft, yRight = y0 + (left - x0) * slope, y0 + (right - x0) * slope
+			rows = range(self._cellIndex(min(yLeft, yRight) - margin), self._cellIndex(max(yLeft, yRight) + margin) + 1)
+			for row in rows:
+				yield (row, column) if transposed else (column, row)
+
+	def nearSegment(self, x0, y0, x1, y1, tolerance):
+		"""
+		Indexes of all points within tolerance of the line segment whose projection falls
+		strictly between its two ends, i.e. points lying on the segment rather than next to its ends.
+		"""
+		dx, dy = x1 - x0, y1 - y0
+		d2 = dx * dx + dy * dy
+		if not d2:
+			return []
+		cells, points = self.cells, self.points
+		found = []
+		for cell in self._cellsAlongSegment(x0, y0, x1, y1, tolerance):
+			for i in cells.get(cell, ()):
+				x, y = points[i]
+				position = ((x - x0) * dx + (y - y0) * dy) / d2
+				if 0.0 < position < 1.0 and hypot(x0 + dx * position - x, y0 + dy * position - y) <= tolerance:
+					found.append(i)
+		return found
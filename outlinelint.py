@@ -0,0 +1,672 @@
+# -*- coding: utf-8 -*-
+"""
+Outline checks for Path Problem Finder, run on flat node arrays: the nodes of a
+layer are extracted once into a LayerOutline (coordinates, node types and the
+indexes of neighbouring nodes), and every enabled check is one pass over these
+arrays (vectorized with numpy if available). lintOutline() returns a bitmask
+of the checks that found a problem.
+Paths are lists of (x, y, type) nodes as produced by glyphsfile.py,
+type being one of "line", "curve", "qcurve", "offcurve".
+
+Also runs without the Glyphs app, e.g. on a build server, on all master and
+special layers of .glyphs files, .glyphspackage folders and UFOs:
+
+python3 outlinelint.py MyFont.glyphs MyFont-Bold.ufo --format sarif -o outlines.sarif
+
+Exits with 1 if problems were found, so it can gate merges.
+"""
+from __future__ import division, print_function
+
+import os, sys, json
+from argparse import ArgumentParser
+from collections import namedtuple
+from math import atan2, degrees, fmod, hypot
+from outlinegeometry import ContourNesting
+from workerprocesses import HiddenMainModule
+try:
+	import numpy
+except ImportError:
+	numpy = None # falls back to pure Python
+
+# node type codes in the flat arrays:
+LINE, CURVE, QCURVE, OFFCURVE = 0, 1, 2, 3
+_typeCodes = {"line": LINE, "curve": CURVE, "qcurve": QCURVE, "offcurve": OFFCURVE}
+_typeNames = {code: name for name, code in _typeCodes.items()}
+
+# check bits, in report order:
+ZERO_HANDLES = 1 << 0
+OUTWARD_HANDLES = 1 << 1
+CUSPING_HANDLES = 1 << 2
+LARGE_HANDLES = 1 << 3
+SHORT_HANDLES = 1 << 4
+ANGLED_HANDLES = 1 << 5
+SHALLOW_CURVE = 1 << 6
+SHALLOW_CURVE_BBOX = 1 << 7
+ALMOST_ORTHOGONAL_LINES = 1 << 8
+SHORT_SEGMENT = 1 << 9
+BAD_OUTLINE_ORDER = 1 << 10
+BAD_PATH_DIRECTIONS = 1 << 11
+OFFCURVE_AS_START_POINT = 1 << 12
+STRAY_POINTS = 1 << 13
+TWO_POINT_OUTLINES = 1 << 14
+OPEN_PATHS = 1 << 15
+QUADRATIC_CURVES = 1 << 16
+DECIMAL_COORDINATES = 1 << 17
+EMPTY_PATHS = 1 << 18
+
+CHECKS = (
+	# (bit, pref name, report title, finding)
+	(ZERO_HANDLES, "zeroHandles", "Zero Handles", "Zero handle(s)"),
+	(OUTWARD_HANDLES, "outwardHandles", "Outward Handles", "Outward handle(s)"),
+	(CUSPING_HANDLES, "cuspingHandles", "Cusping Handles", "Cusping handle(s)"),
+	(LARGE_HANDLES, "largeHandles", "Large Handles", "Large handle(s)"),
+	(SHORT_HANDLES, "shortHandles", "Short Handles", "Short handle(s)"),
+	(ANGLED_HANDLES, "angledHandles", "Angled Handles", "Angled handle(s)"),
+	(SHALLOW_CURVE, "shallowCurve", "Shallow Curve", "Shallow curve(s)"),
+	(SHALLOW_CURVE_BBOX, "shallowCurveBBox", "Small Curve BBox", "Shallow curve bbox(es)"),
+	(ALMOST_ORTHOGONAL_LINES, "almostOrthogonalLines", "Almost Orthogonal Lines", "Almost orthogonal line(s)"),
+	(SHORT_SEGMENT, "shortSegment", "Short Line Segments", "Short line(s)"),
+	(BAD_OUTLINE_ORDER, "badOutlineOrder", "Bad Outline Order", "Bad outline order(s)"),
+	(BAD_PATH_DIRECTIONS, "badPathDirections", "Bad Path Orientation", "Bad path direction(s)"),
+	(OFFCURVE_AS_START_POINT, "offcurveAsStartPoint", "Off-curve as start point", "Off-curve as start point"),
+	(STRAY_POINTS, "strayPoints", "Stray Points", "Stray points"),
+	(TWO_POINT_OUTLINES, "twoPointOutlines", "Two-Point Outlines", "Two-point outline(s)"),
+	(OPEN_PATHS, "openPaths", "Open Paths", "Open path(s)"),
+	(QUADRATIC_CURVES, "quadraticCurves", "Quadratic Curves", "Quadratic curves"),
+	(DECIMAL_COORDINATES, "decimalCoordinates", "Decimal Coordinates", "Decimal coordinates"),
+	(EMPTY_PATHS, "emptyPaths", "Empty Paths", "Empty paths"),
+	)
+
+ALL_CHECKS = (1 << len(CHECKS)) - 1
+
+# same as the defaults of Path Problem Finder:
+DEFAULT_CHECKS = ZERO_HANDLES | OFFCURVE_AS_START_POINT | ANGLED_HANDLES | ALMOST_ORTHOGONAL_LINES | BAD_OUTLINE_ORDER | BAD_PATH_DIRECTIONS | STRAY_POINTS | EMPTY_PATHS
+
+DEFAULT_THRESHOLDS = {
+	# pref name of the check: threshold
+	"shortHandles": 12.0, # units
+	"angledHandles": 8.0, # degrees
+	"shallowCurveBBox": 5.0, # units
+	"shallowCurve": 10.0, # units
+	"almostOrthogonalLines": 3.0, # units
+	"shortSegment": 8.0, # units
+	}
+
+def checksForNames(prefNames):
+	"""
+	Bitmask for a list of check pref names, e.g. ["zeroHandles", "openPaths"].
+	"""
+	checks = 0
+	for bit, prefName, title, finding in CHECKS:
+		if prefName in prefNames:
+			checks |= bit
+	return checks
+
+# glyph names containing these are supposed to have open paths:
+canHaveOpenOutlines = (
+	"_cap",
+	"_corner",
+	"_line",
+	"_segment",
+	)
+
+def checksForGlyph(glyphName, checks):
+	"""
+	The checks that apply to the glyph: no open path check for corner and cap components and the like.
+	"""
+	if any(nameStart in glyphName for nameStart in canHaveOpenOutlines):
+		return checks & ~OPEN_PATHS
+	return checks
+
+def checkTitles(findings):
+	"""
+	Report titles of all bits set in findings, in report order.
+	"""
+	return [title for bit, prefName, title, finding in CHECKS if findings & bit]
+
+class LayerOutline(object):
+	"""
+	All nodes of a layer in flat lists, extracted once and shared by all checks.
+	xs, ys, types: one entry per node, types as LINE, CURVE, QCURVE, OFFCURVE codes.
+	starts: index of the first node of every path, plus the total node count.
+	closed: one bool per path.
+	previous, following: index of the neighbouring nodes in the same path (wrapping around, like in Glyphs).
+	segmentStarts: for on-curve nodes that end a segment, index of the on-curve node the segment starts with, -1 for all other nodes.
+	segmentEnds: index of the on-curve node ending the segment the line into the node belongs to, -1 if there is none.
+	"""
+	__slots__ = ("xs", "ys", "types", "starts", "closed", "previous", "following", "segmentStarts", "segmentEnds")
+
+	def __init__(self, paths=(), closedPaths=None):
+		self.xs, self.ys, self.types = [], [], []
+		self.starts, self.closed = [], []
+		self.previous, self.following = [], []
+		self.segmentStarts, self.segmentEnds = [], []
+		if closedPaths is None:
+			closedPaths = [True] * len(paths)
+		for nodes, closed in zip(paths, closedPaths):
+			self._addPath(nodes, bool(closed))
+		self.starts.append(len(self.xs))
+
+	def __repr__(self):
+		return "<LayerOutline: %i paths, %i nodes>" % (self.pathCount, len(self.xs))
+
+	def _addPath(self, nodes, closed):
+		start, count = len(self.xs), len(nodes)
+		self.starts.append(start)
+		self.closed.append(closed)
+		onCurves = []
+		for i, (x, y, nodeType) in enumerate(nodes):
+			self.xs.append(x)
+			self.ys.append(y)
+			nodeCode = _typeCodes.get(nodeType, LINE)
+			self.types.append(nodeCode)
+			self.previous.append(start + (i - 1) % count)
+			self.following.append(start + (i + 1) % count)
+			if nodeCode != OFFCURVE:
+				onCurves.append(start + i)
+
+		segmentStarts = [-1] * count
+		segmentEnds = [-1] * count
+		if onCurves:
+			lastOnCurve = onCurves[-1] if closed else None
+			pending = [] # off-curves waiting for the end of their segment
+			for index in range(start, start + count):
+				if self.types[index] == OFFCURVE:
+					pending.append(index)
+					continue
+				if lastOnCurve is not None:
+					segmentStarts[index - start] = lastOnCurve
+					for offcurve in pending + [index]:
+						segmentEnds[offcurve - start] = index
+				lastOnCurve = index
+				pending = []
+			if closed:
+				# off-curves after the last on-curve continue the first segment:
+				for offcurve in pending:
+					segmentEnds[offcurve - start] = onCurves[0]
+		self.segmentStarts.extend(segmentStarts)
+		self.segmentEnds.extend(segmentEnds)
+
+	@property
+	def pathCount(self):
+		return len(self.closed)
+
+	def pathNodeCount(self, pathIndex):
+		return self.starts[pathIndex + 1] - self.starts[pathIndex]
+
+	def pathNodes(self, pathIndex):
+		"""
+		The nodes of one path as (x, y, type) tuples again.
+		"""
+		start, end = self.starts[pathIndex], self.starts[pathIndex + 1]
+		return [(self.xs[i], self.ys[i], _typeNames[self.types[i]]) for i in range(start, end)]
+
+	def signedArea(self, pathIndex):
+		"""
+		Shoelace area of the polygon through all nodes of the path (on- and off-curves):
+		positive for counterclockwise, negative for clockwise paths.
+		"""
+		start, end = self.starts[pathIndex], self.starts[pathIndex + 1]
+		xs, ys = self.xs[start:end], self.ys[start:end]
+		if len(xs) < 3:
+			return 0.0
+		if numpy is not None:
+			x, y = numpy.array(xs, dtype=float), numpy.array(ys, dtype=float)
+			return 0.5 * float(numpy.sum(x * numpy.roll(y, -1) - numpy.roll(x, -1) * y))
+		return 0.5 * sum(x0 * y1 - x1 * y0 for x0, y0, x1, y1 in zip(xs, ys, xs[1:] + xs[:1], ys[1:] + ys[:1]))
+
+def lintOutline(outline, checks=ALL_CHECKS, thresholds=None):
+	"""
+	Runs the checks (bitmask of the constants above) on a LayerOutline and
+	returns the bitmask of the checks that found a problem.
+	thresholds: {pref name of the check: value}, see DEFAULT_THRESHOLDS.
+	"""
+	limits = dict(DEFAULT_THRESHOLDS)
+	limits.update(thresholds or {})
+	findings = _pathFindings(outline, checks)
+	nodeChecks = checks & ~findings & ~_PATH_CHECKS
+	if nodeChecks and outline.xs:
+		if numpy is not None:
+			findings |= _vectorFindings(outline, nodeChecks, limits)
+		else:
+			findings |= _plainFindings(outline, nodeChecks, limits)
+	return findings
+
+# PER PATH
+
+_PATH_CHECKS = BAD_OUTLINE_ORDER | BAD_PATH_DIRECTIONS | OFFCURVE_AS_START_POINT | STRAY_POINTS | TWO_POINT_OUTLINES | OPEN_PATHS | EMPTY_PATHS
+
+def _pathFindings(outline, checks):
+	findings = 0
+	if not checks & _PATH_CHECKS:
+		return findings
+	types = outline.types
+	for pathIndex in range(outline.pathCount):
+		start, end = outline.starts[pathIndex], outline.starts[pathIndex + 1]
+		count = end - start
+		if count == 0:
+			findings |= EMPTY_PATHS
+		elif count == 1:
+			findings |= STRAY_POINTS
+		if not outline.closed[pathIndex]:
+			findings |= OPEN_PATHS
+		if sum(1 for nodeType in types[start:end] if nodeType != OFFCURVE) < 3:
+			findings |= TWO_POINT_OUTLINES
+		if count > 1:
+			startsWithHandle = types[start] == OFFCURVE and types[start + 1] != OFFCURVE
+			curveAfterHandle = types[start] == CURVE and types[end - 1] == OFFCURVE
+			if startsWithHandle or curveAfterHandle:
+				findings |= OFFCURVE_AS_START_POINT
+	# the first path should be counterclockwise, otherwise paths are probably in the wrong order:
+	if outline.pathCount > 1 and outline.signedArea(0) < 0:
+		findings |= BAD_OUTLINE_ORDER
+	# outer contours counterclockwise, counters clockwise:
+	if checks & BAD_PATH_DIRECTIONS and outline.pathCount:
+		nesting = ContourNesting([outline.pathNodes(i) for i in range(outline.pathCount)], outline.closed)
+		if nesting.wrongDirections():
+			findings |= BAD_PATH_DIRECTIONS
+	return findings & checks
+
+# PER NODE, VECTORIZED
+
+def _vectorFindings(outline, checks, limits):
+	findings = 0
+	x = numpy.array(outline.xs, dtype=float)
+	y = numpy.array(outline.ys, dtype=float)
+	types = numpy.array(outline.types, dtype=numpy.int8)
+	previous = numpy.array(outline.previous, dtype=int)
+	following = numpy.array(outline.following, dtype=int)
+	segmentStarts = numpy.array(outline.segmentStarts, dtype=int)
+	isOffcurve = types == OFFCURVE
+
+	if checks & DECIMAL_COORDINATES and (numpy.any(x % 1.0 != 0.0) or numpy.any(y % 1.0 != 0.0)):
+		findings |= DECIMAL_COORDINATES
+
+	if checks & QUADRATIC_CURVES and numpy.any(types == QCURVE):
+		findings |= QUADRATIC_CURVES
+
+	handles = numpy.flatnonzero(isOffcurve)
+	if handles.size:
+		if checks & ZERO_HANDLES:
+			before, after = previous[handles], following[handles]
+			zeroBefore = (x[handles] == x[before]) & (y[handles] == y[before])
+			zeroAfter = (x[handles] == x[after]) & (y[handles] == y[after])
+			if numpy.any((zeroBefore | zeroAfter) & (before != handles)): # a single node is its own neighbour
+				findings |= ZERO_HANDLES
+
+		if checks & (SHORT_HANDLES | ANGLED_HANDLES):
+			# every handle with its on-curve node:
+			anchors = numpy.where(isOffcurve[previous[handles]], following[handles], previous[handles])
+			dx, dy = x[anchors] - x[handles], y[anchors] - y[handles]
+			if checks & SHORT_HANDLES:
+				lengths = numpy.hypot(dx, dy)
+				if numpy.any((lengths > 0.0) & (lengths < limits["shortHandles"])):
+					findings |= SHORT_HANDLES
+			if checks & ANGLED_HANDLES:
+				threshold = limits["angledHandles"]
+				angles = numpy.abs(numpy.fmod(numpy.degrees(numpy.arctan2(dy, dx)), 90.0))
+				if numpy.any((dx != 0.0) & (dy != 0.0) & ((angles < threshold) | (angles > 90.0 - threshold))):
+					findings |= ANGLED_HANDLES
+
+		if checks & CUSPING_HANDLES:
+			# A-B-C-D with two consecutive handles B and C:
+			b = handles[isOffcurve[following[handles]]]
+			a, c = previous[b], following[b]
+			d = following[c]
+			distAC = numpy.hypot(x[c] - x[a], y[c] - y[a])
+			distAB = numpy.hypot(x[b] - x[a], y[b] - y[a])
+			distBD = numpy.hypot(x[d] - x[b], y[d] - y[b])
+			distCD = numpy.hypot(x[d] - x[c], y[d] - y[c])
+			if numpy.any((distAC < distAB) & (distBD < distCD)):
+				findings |= CUSPING_HANDLES
+
+	if checks & (OUTWARD_HANDLES | LARGE_HANDLES | SHALLOW_CURVE | SHALLOW_CURVE_BBOX):
+		# cubic segments D-C-B-A, A being the curve node:
+		a = numpy.flatnonzero((types == CURVE) & (segmentStarts >= 0))
+		a = a[isOffcurve[previous[a]] & isOffcurve[previous[previous[a]]]]
+		b = previous[a]
+		c = previous[b]
+		d = previous[c]
+		xA, yA, xB, yB, xC, yC, xD, yD = x[a], y[a], x[b], y[b], x[c], y[c], x[d], y[d]
+
+		if checks & (OUTWARD_HANDLES | SHALLOW_CURVE):
+			# handles relative to the line A-D:
+			dx, dy = xD - xA, yD - yA
+			d2 = dx * dx + dy * dy
+			safeD2 = numpy.where(d2 == 0.0, 1.0, d2)
+			positionB = numpy.where(d2 == 0.0, 0.0, ((xB - xA) * dx + (yB - yA) * dy) / safeD2)
+			positionC = numpy.where(d2 == 0.0, 0.0, ((xC - xA) * dx + (yC - yA) * dy) / safeD2)
+			if checks & OUTWARD_HANDLES:
+				if numpy.any((positionB < 0.0) | (positionB > 1.0) | (positionC < 0.0) | (positionC > 1.0)):
+					findings |= OUTWARD_HANDLES
+			if checks & SHALLOW_CURVE:
+				threshold = limits["shallowCurve"]
+				deviationB = numpy.hypot(xA + dx * positionB - xB, yA + dy * positionB - yB)
+				deviationC = numpy.hypot(xA + dx * positionC - xC, yA + dy * positionC - yC)
+				shallowB = (positionB > 0.0) & (positionB < 1.0) & (deviationB < threshold)
+				shallowC = (positionC > 0.0) & (positionC < 1.0) & (deviationC < threshold)
+				if numpy.any(shallowB & shallowC):
+					findings |= SHALLOW_CURVE
+
+		if checks & LARGE_HANDLES:
+			# intersection X = A + t*(B-A) = D + u*(C-D) of the handle lines,
+			# a handle is longer than 100% if it reaches beyond X, i.e. |t| < 1 or |u| < 1:
+			rx, ry, sx, sy = xB - xA, yB - yA, xC - xD, yC - yD
+			denominator = rx * sy - ry * sx
+			crossing = denominator != 0.0
+			safeDenominator = numpy.where(crossing, denominator, 1.0)
+			t = ((xD - xA) * sy - (yD - yA) * sx) / safeDenominator
+			u = ((xD - xA) * ry - (yD - yA) * rx) / safeDenominator
+			if numpy.any(crossing & ((numpy.abs(t) < 1.0) | (numpy.abs(u) < 1.0))):
+				findings |= LARGE_HANDLES
+
+		if checks & SHALLOW_CURVE_BBOX:
+			threshold = limits["shallowCurveBBox"]
+			flat = (numpy.abs(xA - xD) < threshold) | (numpy.abs(yA - yD) < threshold)
+			minX, maxX = numpy.minimum(xA, xD), numpy.maximum(xA, xD)
+			minY, maxY = numpy.minimum(yA, yD), numpy.maximum(yA, yD)
+			horizontallyWithin = (minX - 1 < numpy.minimum(xB, xC)) & (maxX + 1 > numpy.maximum(xB, xC))
+			verticallyWithin = (minY - 1 < numpy.minimum(yB, yC)) & (maxY + 1 > numpy.maximum(yB, yC))
+			if numpy.any(flat & horizontallyWithin & verticallyWithin):
+				findings |= SHALLOW_CURVE_BBOX
+
+	if checks & (ALMOST_ORTHOGONAL_LINES | SHORT_SEGMENT):
+		ends = numpy.flatnonzero(segmentStarts >= 0)
+		starts = segmentStarts[ends]
+		dx, dy = numpy.abs(x[ends] - x[starts]), numpy.abs(y[ends] - y[starts])
+
+		if checks & ALMOST_ORTHOGONAL_LINES:
+			threshold = limits["almostOrthogonalLines"]
+			isLine = types[ends] == LINE
+			almost = ((dx > 0.1) & (dx < threshold)) | ((dy > 0.1) & (dy < threshold))
+			if numpy.any(isLine & almost):
+				findings |= ALMOST_ORTHOGONAL_LINES
+
+		if checks & SHORT_SEGMENT:
+			# curve length estimated as the mean of chord and control polygon:
+			segmentEnds = numpy.array(outline.segmentEnds, dtype=int)
+			inSegment = segmentEnds >= 0
+			steps = numpy.hypot(x - x[previous], y - y[previous])
+			polygons = numpy.bincount(segmentEnds[inSegment], weights=steps[inSegment], minlength=len(x))[ends]
+			chords = numpy.hypot(dx, dy)
+			lengths = numpy.where(types[ends] == LINE, chords, (chords + polygons) * 0.5)
+			if numpy.any(lengths < limits["shortSegment"]):
+				findings |= SHORT_SEGMENT
+
+	return findings
+
+# PER NODE, PURE PYTHON
+
+def _relativePosition(xA, yA, xD, yD, x, y):
+	# relative position (0...1) of the point x, y between A and D, and its distance from the line A-D
+	dx, dy = xD - xA, yD - yA
+	d2 = dx * dx + dy * dy
+	position = ((x - xA) * dx + (y - yA) * dy) / d2 if d2 else 0.0
+	return position, hypot(xA + dx * position - x, yA + dy * position - y)
+
+def _plainFindings(outline, checks, limits):
+	findings = 0
+	xs, ys, types = outline.xs, outline.ys, outline.types
+	previous, following, segmentStarts = outline.previous, outline.following, outline.segmentStarts
+
+	if checks & DECIMAL_COORDINATES and (any(x % 1.0 != 0.0 for x in xs) or any(y % 1.0 != 0.0 for y in ys)):
+		findings |= DECIMAL_COORDINATES
+
+	if checks & QUADRATIC_CURVES and QCURVE in types:
+		findings |= QUADRATIC_CURVES
+
+	handleChecks = checks & (ZERO_HANDLES | SHORT_HANDLES | ANGLED_HANDLES | CUSPING_HANDLES)
+	curveChecks = checks & (OUTWARD_HANDLES | LARGE_HANDLES | SHALLOW_CURVE | SHALLOW_CURVE_BBOX)
+	lineChecks = checks & (ALMOST_ORTHOGONAL_LINES | SHORT_SEGMENT)
+	polygons = {}
+	if checks & SHORT_SEGMENT:
+		for index, end in enumerate(outline.segmentEnds):
+			if end >= 0:
+				before = previous[index]
+				polygons[end] = polygons.get(end, 0.0) + hypot(xs[index] - xs[before], ys[index] - ys[before])
+
+	for i, nodeType in enumerate(types):
+		x, y = xs[i], ys[i]
+		if nodeType == OFFCURVE and handleChecks:
+			before, after = previous[i], following[i]
+			if handleChecks & ZERO_HANDLES and before != i and ((x, y) == (xs[before], ys[before]) or (x, y) == (xs[after], ys[after])):
+				findings |= ZERO_HANDLES
+			if handleChecks & (SHORT_HANDLES | ANGLED_HANDLES):
+				anchor = after if types[before] == OFFCURVE else before
+				dx, dy = xs[anchor] - x, ys[anchor] - y
+				if handleChecks & SHORT_HANDLES and 0.0 < hypot(dx, dy) < limits["shortHandles"]:
+					findings |= SHORT_HANDLES
+				if handleChecks & ANGLED_HANDLES and dx != 0.0 and dy != 0.0:
+					angle = abs(fmod(degrees(atan2(dy, dx)), 90.0))
+					if angle < limits["angledHandles"] or angle > 90.0 - limits["angledHandles"]:
+						findings |= ANGLED_HANDLES
+			if handleChecks & CUSPING_HANDLES and types[after] == OFFCURVE:
+				a, c = before, after
+				d = following[c]
+				distAC = hypot(xs[c] - xs[a], ys[c] - ys[a])
+				distAB = hypot(x - xs[a], y - ys[a])
+				distBD = hypot(xs[d] - x, ys[d] - y)
+				distCD = hypot(xs[d] - xs[c], ys[d] - ys[c])
+				if distAC < distAB and distBD < distCD:
+					findings |= CUSPING_HANDLES
+			handleChecks &= ~findings
+
+		elif nodeType == CURVE and curveChecks and segmentStarts[i] >= 0:
+			b = previous[i]
+			c = previous[b]
+			if types[b] == OFFCURVE and types[c] == OFFCURVE:
+				d = previous[c]
+				xA, yA, xB, yB, xC, yC, xD, yD = x, y, xs[b], ys[b], xs[c], ys[c], xs[d], ys[d]
+				positionB, deviationB = _relativePosition(xA, yA, xD, yD, xB, yB)
+				positionC, deviationC = _relativePosition(xA, yA, xD, yD, xC, yC)
+				if curveChecks & OUTWARD_HANDLES and not (0.0 <= positionB <= 1.0 and 0.0 <= positionC <= 1.0):
+					findings |= OUTWARD_HANDLES
+				if curveChecks & SHALLOW_CURVE:
+					threshold = limits["shallowCurve"]
+					if 0.0 < positionB < 1.0 and deviationB < threshold and 0.0 < positionC < 1.0 and deviationC < threshold:
+						findings |= SHALLOW_CURVE
+				if curveChecks & LARGE_HANDLES:
+					rx, ry, sx, sy = xB - xA, yB - yA, xC - xD, yC - yD
+					denominator = rx * sy - ry * sx
+					if denominator:
+						t = ((xD - xA) * sy - (yD - yA) * sx) / denominator
+						u = ((xD - xA) * ry - (yD - yA) * rx) / denominator
+						if abs(t) < 1.0 or abs(u) < 1.0:
+							findings |= LARGE_HANDLES
+				if curveChecks & SHALLOW_CURVE_BBOX:
+					threshold = limits["shallowCurveBBox"]
+					if abs(xA - xD) < threshold or abs(yA - yD) < threshold:
+						minX, maxX = sorted((xA, xD))
+						minY, maxY = sorted((yA, yD))
+						horizontallyWithin = minX - 1 < min(xB, xC) and maxX + 1 > max(xB, xC)
+						verticallyWithin = minY - 1 < min(yB, yC) and maxY + 1 > max(yB, yC)
+						if horizontallyWithin and verticallyWithin:
+							findings |= SHALLOW_CURVE_BBOX
+				curveChecks &= ~findings
+
+		if nodeType != OFFCURVE and lineChecks and segmentStarts[i] >= 0:
+			start = segmentStarts[i]
+			dx, dy = abs(x - xs[start]), abs(y - ys[start])
+			if lineChecks & ALMOST_ORTHOGONAL_LINES and nodeType == LINE:
+				threshold = limits["almostOrthogonalLines"]
+				if 0.1 < dx < threshold or 0.1 < dy < threshold:
+					findings |= ALMOST_ORTHOGONAL_LINES
+			if lineChecks & SHORT_SEGMENT:
+				chord = hypot(dx, dy)
+				length = chord if nodeType == LINE else (chord + polygons.get(i, 0.0)) * 0.5
+				if length < limits["shortSegment"]:
+					findings |= SHORT_SEGMENT
+			lineChecks &= ~findings
+
+		if not (handleChecks or curveChecks or lineChecks):
+			break
+
+	return findings & checks
+
+# MANY LAYERS
+
+def _lintChunk(chunk):
+	thresholds, layers = chunk
+	return [lintOutline(LayerOutline(paths, closedPaths), checks, thresholds) for paths, closedPaths, checks in layers]
+
+def lintLayers(layers, thresholds=None, jobs=1, chunkSize=200, progress=None, executable=None):
+	"""
+	Lints many layers at once, spread over a process pool if jobs > 1.
+	layers: list of (paths, closedPaths, checks) tuples, paths being lists of (x, y, type) nodes.
+	progress: function called with (number of layers done, number of layers) after every chunk.
+	executable: Python interpreter for the workers, needed inside an app where sys.executable is the app.
+	Returns one findings bitmask per layer, in the same order.
+	"""
+	chunks = [(thresholds, layers[i:i + chunkSize]) for i in range(0, len(layers), chunkSize)]
+	results = [None] * len(chunks)
+	done = 0
+	if jobs > 1 and len(chunks) > 1:
+		import multiprocessing
+		from concurrent.futures import ProcessPoolExecutor, as_completed
+		context = multiprocessing.get_context("spawn")
+		if executable:
+			context.set_executable(executable)
+		# the workers import this module by name, also when it runs as a script:
+		worker = _lintChunk if __name__ != "__main__" else __import__("outlinelint")._lintChunk
+		with ProcessPoolExecutor(max_workers=min(jobs, len(chunks)), mp_context=context) as executor:
+			with HiddenMainModule():
+				futures = {executor.submit(worker, chunk): i for i, chunk in enumerate(chunks)}
+			for future in as_completed(futures):
+				i = futures[future]
+				results[i] = future.result()
+				done += len(results[i])
+				if progress:
+					progress(done, len(layers))
+	else:
+		for i, chunk in enumerate(chunks):
+			results[i] = _lintChunk(chunk)
+			done += len(results[i])
+			if progress:
+				progress(done, len(layers))
+	return [findings for chunkFindings in results for findings in chunkFindings]
+
+# LINTING WITHOUT THE APP
+
+Finding = namedtuple("Finding", ("fontPath", "glyphName", "layerId", "layerName", "check", "title", "message"))
+
+def lintFonts(fonts, checks=DEFAULT_CHECKS, thresholds=None, includeNonExporting=False, jobs=1):
+	"""
+	Lints all master and special layers of HeadlessFonts (see glyphsfile.py).
+	Returns a list of Findings, one per layer and check that found a problem.
+	"""
+	layers, records = [], []
+	for font in fonts:
+		masterNames = dict(font.masters)
+		for glyph in font.glyphs.values():
+			if not (includeNonExporting or glyph.export):
+				continue
+			glyphChecks = checksForGlyph(glyph.name, checks)
+			for layer in glyph.layers:
+				if layer.isMasterLayer or layer.isSpecialLayer:
+					layers.append((layer.paths, layer.closedPaths, glyphChecks))
+					records.append((font.path, glyph.name, layer.layerId, layer.name or masterNames.get(layer.layerId, layer.layerId)))
+
+	findings = []
+	for (fontPath, glyphName, layerId, layerName), layerFindings in zip(records, lintLayers(layers, thresholds, jobs=jobs)):
+		for bit, prefName, title, finding in CHECKS:
+			if layerFindings & bit:
+				message = "%s on layer ‘%s’ of glyph %s" % (finding, layerName, glyphName)
+				findings.append(Finding(fontPath, glyphName, layerId, layerName, prefName, title, message))
+	return findings
+
+def _relativeURI(path):
+	return os.path.relpath(path).replace(os.sep, "/")
+
+def sarifReport(findings, checks):
+	"""
+	SARIF 2.1.0 log (as a dict) for code scanning tools, one rule per check.
+	"""
+	rules = [{"id": prefName, "name": title, "shortDescription": {"text": title}} for bit, prefName, title, finding in CHECKS if checks & bit]
+	results = []
+	for finding in findings:
+		results.append({
+			"ruleId": finding.check,
+			"level": "warning",
+			"message": {"text": finding.message},
+			"locations": [{
+				"physicalLocation": {"artifactLocation": {"uri": _relativeURI(finding.fontPath)}},
+				"logicalLocations": [{"name": finding.glyphName, "fullyQualifiedName": "%s/%s" % (finding.glyphName, finding.layerName), "kind": "member"}],
+				}],
+			})
+	return {
+		"$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+		"version": "2.1.0",
+		"runs": [{"tool": {"driver": {"name": "Path Problem Finder", "informationUri": "https://github.com/mekkablue/Glyphs-Scripts", "rules": rules}}, "results": results}],
+		}
+
+def jsonReport(findings, checks):
+	return {
+		"checks": [prefName for bit, prefName, title, finding in CHECKS if checks & bit],
+		"findings": [finding._asdict() for finding in findings],
+		}
+
+def textReport(findings, checks):
+	lines = ["%s: %s" % (_relativeURI(finding.fontPath), finding.message) for finding in findings]
+	lines.append("%i problem%s found." % (len(findings), "" if len(findings) == 1 else "s"))
+	return "\n".join(lines)
+
+parser = ArgumentParser(description="Find path problems like Path Problem Finder does, without the Glyphs app.")
+parser.add_argument("fonts", nargs="+", metavar="font", help="A .glyphs file, .glyphspackage or .ufo")
+parser.add_argument("--checks", help="Comma-separated checks, or 'all' (default: %s)" % ",".join(prefName for bit, prefName, title, finding in CHECKS if DEFAULT_CHECKS & bit))
+parser.add_argument("--threshold", action="append", default=[], metavar="CHECK=VALUE", help="Threshold for a check, e.g. shortHandles=12, can be repeated (defaults: %s)" % ", ".join("%s=%g" % item for item in sorted(DEFAULT_THRESHOLDS.items())))
+parser.add_argument("--include-non-exporting", action="store_true", help="Also check glyphs that do not export")
+parser.add_argument("--format", choices=("text", "json", "sarif"), default="text", help="Report format (default: text)")
+parser.add_argument("-o", "--output", help="Write the report to this file instead of the standard output")
+parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Number of worker processes (default: number of CPUs)")
+
+def main(arguments=None):
+	arguments = parser.parse_args(arguments)
+	prefNames = [prefName for bit, prefName, title, finding in CHECKS]
+	if arguments.checks is None:
+		checks = DEFAULT_CHECKS
+	elif arguments.checks.strip() == "all":
+		checks = ALL_CHECKS
+	else:
+		names = [name.strip() for name in arguments.checks.split(",") if name.strip()]
+		unknown = [name for name in names if not name in prefNames]
+		if unknown:
+			parser.error("unknown check(s): %s" % ", ".join(unknown))
+		checks = checksForNames(names)
+
+	thresholds = {}
+	for setting in arguments.threshold:
+		name, _, value = setting.partition("=")
+		if not name in DEFAULT_THRESHOLDS:
+			parser.error("no threshold for check: %s" % name)
+		try:
+			thresholds[name] = float(value)
+		except ValueError:
+			parser.error("not a number: %s" % setting)
+
+	sys.path.insert(1, os.path.dirname(os.path.abspath(__file__)))
+	from glyphsfile import readFont
+	fonts = []
+	for path in arguments.fonts:
+		try:
+			fonts.append(readFont(path))
+		except Exception as e:
+			print("Cannot read %s: %s" % (path, e), file=sys.stderr)
+			return 2
+
+	findings = lintFonts(fonts, checks=checks, thresholds=thresholds, includeNonExporting=arguments.include_non_exporting, jobs=arguments.jobs)
+	if arguments.format == "sarif":
+		report = json.dumps(sarifReport(findings, checks), indent=2, ensure_ascii=False)
+	elif arguments.format == "json":
+		report = json.dumps(jsonReport(findings, checks), indent=2, ensure_ascii=False)
+	else:
+		report = textReport(findings, checks)
+
+	if arguments.output:
+		with open(arguments.output, "w", encoding="utf-8") as reportFile:
+			reportFile.write(report + "\n")
+	else:
+		print(report)
+	return 1 if findings else 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the modules that do not need the Glyphs API. Run from the repo root:
+
+python3 -m pytest tests
+
+Modules with a numpy path and a pure-Python fallback are tested both ways
+with the withNumpy fixture.
+"""
+import os, sys
+import pytest
+
+repoFolder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in (repoFolder, os.path.join(repoFolder, "Kerning")):
+	if not folder in sys.path:
+		sys.path.insert(0, folder)
+
+import outlinegeometry, outlinelint, kernprofiles, kerningtable
+
+@pytest.fixture(params=(True, False), ids=("numpy", "plain"))
+def withNumpy(request, monkeypatch):
+	"""
+	Runs a test once with numpy (skipped if it is not installed), once with the pure-Python fallback.
+	"""
+	if request.param:
+		if outlinelint.numpy is None:
+			pytest.skip("numpy is not installed")
+	else:
+		for module in (outlinegeometry, outlinelint, kernprofiles, kerningtable):
+			monkeypatch.setattr(module, "numpy", None)
+	return request.param
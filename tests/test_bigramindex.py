@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Building and reading bigramindex.py index files from tiny corpora.
+"""
+import pytest
+from bigramindex import *
+
+def corpus(folder, name, text):
+	path = folder / name
+	path.write_text(text, encoding="utf-8")
+	return str(path)
+
+def testCountBigrams(tmp_path):
+	paths = [corpus(tmp_path, "one.txt", "Tavo Tavo\n"), corpus(tmp_path, "two.txt", "Tø")]
+	counts = countBigrams(paths, chunkSize=3)
+	assert counts == {("T", "a"): 2, ("a", "v"): 2, ("v", "o"): 2, ("T", "ø"): 1}
+	assert countBigrams(paths, characters=set("Tav")) == {("T", "a"): 2, ("a", "v"): 2}
+	assert countTextBigrams("AV A") == {("A", "V"): 1}
+
+def testBigramIndex(tmp_path):
+	path = str(tmp_path / "corpus.bigrams")
+	index = buildBigramIndex([corpus(tmp_path, "corpus.txt", "Tavo Tavo Tø 𝒜𝒜")], path)
+	assert len(index) == 5
+	assert index.frequency("T", "a") == 2
+	assert index.frequency("𝒜", "𝒜") == 1
+	assert index.frequency("a", "T") == index.frequency("", "T") == 0
+	assert index.mostCommon(1)[0][2] == 2
+	assert index.glyphFrequency({"T": "T", "o.sc": "ø"})("T", "o.sc") == 1
+	index.close()
+
+def testReplacedIndexStaysReadable(tmp_path):
+	path = str(tmp_path / "corpus.bigrams")
+	oldIndex = buildBigramIndex([corpus(tmp_path, "old.txt", "AV")], path)
+	newIndex = buildBigramIndex([corpus(tmp_path, "new.txt", "AT AT")], path)
+	# callers still holding the old index read the old counts:
+	assert oldIndex.frequency("A", "V") == 1
+	assert newIndex.frequency("A", "T") == 2
+	assert newIndex.frequency("A", "V") == 0
+	oldIndex.close()
+	newIndex.close()
+
+def testNotAnIndex(tmp_path):
+	with pytest.raises(ValueError):
+		BigramIndex(corpus(tmp_path, "corpus.txt", "not an index"))
+	emptyPath = str(tmp_path / "empty.bigrams")
+	writeBigramIndex(Counter(), emptyPath)
+	index = BigramIndex(emptyPath)
+	assert len(index) == 0
+	assert index.frequency("A", "V") == 0
+	index.close()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+import pytest
+from feakerning import *
+
+def testTokenizer():
+	tokens = list(tokenizeLine(r"pos \T [o e] -80; # comment"))
+	assert tokens == [("name", "pos"), ("name", "T"), ("punctuation", "["), ("name", "o"), ("name", "e"), ("punctuation", "]"), ("number", "-80"), ("punctuation", ";")]
+	with pytest.raises(ValueError):
+		list(tokenizeLine("pos T o -80 $;"))
+
+def testGroupNamesAndRanges():
+	assert groupNameForClass("@MMK_L_A") == "A"
+	assert groupNameForClass("@public.kern2.O") == "O"
+	assert groupNameForClass("@T_1ST") == "T"
+	assert glyphRange("a", "e") == ["a", "b", "c", "d", "e"]
+	assert glyphRange("A.sc", "C.sc") == ["A.sc", "B.sc", "C.sc"]
+	assert glyphRange("one.001", "one.003") == ["one.001", "one.002", "one.003"]
+	assert glyphRange("A", "b") is None
+
+def testClassKerning():
+	result = parseFeaKerning("""
+		@MMK_L_T = [T Tcaron];
+		@MMK_R_o = [o odieresis];
+		feature kern {
+			pos @MMK_L_T @MMK_R_o -80;
+			pos T odieresis -40;
+			pos [V W] a <0 0 -30 0>;
+			pos A V <-50>;
+			} kern;
+		""")
+	assert result.kerning == {
+		"@MMK_L_T": {"@MMK_R_o": -80},
+		"T": {"odieresis": -40},
+		"V": {"a": -30},
+		"W": {"a": -30},
+		"A": {"V": -50},
+		}
+	assert result.leftGroups == {"T": "T", "Tcaron": "T"}
+	assert result.rightGroups == {"o": "o", "odieresis": "o"}
+	assert result.classes["@MMK_R_o"] == ["o", "odieresis"]
+	assert result.skipped == []
+
+def testFirstStatementWins():
+	result = parseFeaKerning("""
+		feature kern {
+			pos T o -80;
+			pos T o -20;
+			} kern;
+		""")
+	assert result.kerning == {"T": {"o": -80}}
+
+def testDistinctClassNames():
+	# both classes would be group A:
+	result = parseFeaKerning("""
+		@MMK_L_A = [A Aacute];
+		@A_1ST = [Agrave];
+		feature kern {
+			pos @MMK_L_A V -50;
+			pos @A_1ST V -40;
+			} kern;
+		""")
+	assert result.kerning == {"@MMK_L_A": {"V": -50}, "@MMK_L_A_1ST": {"V": -40}}
+	assert result.leftGroups == {"A": "A", "Aacute": "A", "Agrave": "A_1ST"}
+
+def testGlyphInTwoClasses():
+	result = parseFeaKerning("""
+		@MMK_L_A = [A Aacute];
+		@MMK_L_Aacute = [Aacute];
+		feature kern {
+			pos @MMK_L_A V -50;
+			pos @MMK_L_Aacute V -40;
+			} kern;
+		""")
+	# Aacute stays in group A, the second class becomes glyph kerning, and loses against the first statement:
+	assert result.leftGroups == {"A": "A", "Aacute": "A"}
+	assert result.kerning == {"@MMK_L_A": {"V": -50}, "Aacute": {"V": -40}}
+
+def testExistingGroups():
+	result = parseFeaKerning("""
+		@MMK_L_A = [A Aacute Agrave];
+		feature kern {
+			pos @MMK_L_A V -50;
+			} kern;
+		""", existingLeftGroups={"A": "A", "Agrave": "Agrave"})
+	# Agrave keeps its group and gets glyph kerning, Aacute joins A:
+	assert result.kerning == {"@MMK_L_A": {"V": -50}, "Agrave": {"V": -50}}
+	assert result.leftGroups == {"Aacute": "A"}
+
+def testEnumAndSkipped():
+	result = parseFeaKerning("""
+		@MMK_L_T = [T Tcaron];
+		feature kern {
+			enum pos @MMK_L_T o -10;
+			pos T' o -20;
+			pos T o <0 0 -30>;
+			} kern;
+		feature liga {
+			pos T a -99;
+			} liga;
+		""")
+	assert result.kerning == {"T": {"o": -10}, "Tcaron": {"o": -10}}
+	assert result.leftGroups == {}
+	assert len(result.skipped) == 2
+
+def testLookups():
+	result = parseFeaKerning("""
+		lookup kernLatin {
+			pos T o -80;
+			} kernLatin;
+		feature kern {
+			lookup kernLatin;
+			pos V o -30;
+			} kern;
+		""")
+	assert result.kerning == {"T": {"o": -80}, "V": {"o": -30}}
+	standalone = parseFeaKerning("""
+		lookup kernLatin {
+			pos T o -80;
+			} kernLatin;
+		""")
+	assert standalone.kerning == {"T": {"o": -80}}
+
+def testGlyphNamesAndRenaming():
+	text = """
+		feature kern {
+			pos [a-c] T -10;
+			pos a-b T -20;
+			pos uni0054 x -30;
+			} kern;
+		"""
+	result = parseFeaKerning(text, glyphNames={"a", "b", "a-b", "T", "x"}, renameGlyph=lambda name: "T" if name == "uni0054" else name)
+	assert result.kerning == {"a": {"T": -10}, "b": {"T": -10}, "a-b": {"T": -20}, "T": {"x": -30}}
+
+def testIncludeFiles(tmp_path):
+	(tmp_path / "classes.fea").write_text("@MMK_R_o = [o oslash];\n", encoding="utf-8")
+	(tmp_path / "kern.fea").write_text("include(classes.fea)\nfeature kern {\npos T @MMK_R_o -50;\n} kern;\n", encoding="utf-8")
+	result = readFeaKerning(str(tmp_path / "kern.fea"))
+	assert result.kerning == {"T": {"@MMK_R_o": -50}}
+	assert result.rightGroups == {"o": "o", "oslash": "o"}
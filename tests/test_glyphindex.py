@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+A small glyph set for glyphindex.py, like the one kernanalysis.glyphIndex() builds from a font.
+"""
+from glyphindex import *
+
+records = [
+	GlyphRecord("A", "Letter", "Uppercase", "Uppercase", "latin", True),
+	GlyphRecord("a", "Letter", "Lowercase", "Lowercase", "latin", True),
+	GlyphRecord("a.sc", "Letter", "Smallcaps", "Smallcaps", "latin", True),
+	GlyphRecord("Alpha", "Letter", "Uppercase", "Uppercase", "greek", True),
+	GlyphRecord("A.alt", "Letter", "Uppercase", "Uppercase", "latin", False),
+	GlyphRecord("ring", "Letter", "Modifier", "NoCase", None, True),
+	GlyphRecord("period", "Punctuation", None, None, None, True),
+	GlyphRecord("_part.bar", "Letter", None, None, None, True),
+	]
+index = GlyphAttributeIndex(records, hasPaths=lambda name: name != "ring")
+
+def testCategories():
+	assert index.select(category="Letter", subCategory="Uppercase") == ["A", "Alpha"]
+	assert index.select(category="Letter", subCategory="NoCase") == ["ring"]
+	assert index.select(category="Punctuation", subCategory="Other") == ["period"]
+	assert index.select(category="Letter", subCategory="Uppercase", excludeNonExporting=False) == ["A", "Alpha", "A.alt"]
+
+def testScripts():
+	assert index.select(category="Letter", script="greek", includeScriptless=False) == ["Alpha"]
+	assert index.select(category="Letter", script="greek") == ["Alpha", "ring", "_part.bar"]
+	# an empty script is a filter too, only glyphs without script match:
+	assert index.select(category="Letter", script="") == ["ring", "_part.bar"]
+	assert len(index.select(category="Letter", script=None)) == 6
+
+def testNames():
+	assert index.select(category="Letter", excludedNameParts=("_", ".sc"), pathsOnly=True) == ["A", "a", "Alpha"]
+	assert index.select(mustContain=("pha", "per")) == ["Alpha", "period"]
+	assert index.select(suffix=".sc") == ["a.sc"]
+	assert index.sorted({"period", "A"}) == ["A", "period"]
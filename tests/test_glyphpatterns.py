@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Glyph name patterns of glyphpatterns.py, matched against a short glyph list.
+"""
+from glyphpatterns import *
+
+names = ["A", "a", "a.sc", "Aacute", "aacute.ss01", "b", "one", "one.numr", "@MMK_L_A", "@MMK_R_a"]
+
+def categoryMembers(category, subCategory):
+	if (category, subCategory) == ("Number", None):
+		return ["one", "one.numr"]
+	if (category, subCategory) == ("Letter", "Smallcaps"):
+		return ["a.sc"]
+	return []
+
+def testNamesAndGlobs():
+	assert PatternSet(["A", "b*"]).select(names) == ["A", "b"]
+	assert PatternSet(["?.sc", "*.ss0[12]"]).select(names) == ["a.sc", "aacute.ss01"]
+	assert PatternSet(["acute"], partial=True).select(names) == ["Aacute", "aacute.ss01"]
+	assert match("one.*", "one.numr")
+	assert not match("one.*", "one")
+
+def testRegexes():
+	assert PatternSet(["re:\\.s"]).select(names) == ["a.sc", "aacute.ss01"]
+	# inline flags of one regex do not affect the others:
+	assert PatternSet(["re:(?i)^a$", "b*"]).select(names) == ["A", "a", "b"]
+	assert PatternSet(["re:^A", "re:(?i)SC$"]).select(names) == ["A", "a.sc", "Aacute"]
+
+def testCategories():
+	patterns = PatternSet(["@Number", "@Letter:Smallcaps", "b"])
+	assert patterns.categories == [("Number", None), ("Letter", "Smallcaps")]
+	assert patterns.select(names, categoryMembers) == ["a.sc", "b", "one", "one.numr"]
+	assert parseCategoryToken("@Letter: Uppercase") == ("Letter", "Uppercase")
+
+def testGroupNamesAreNotCategories():
+	assert not isCategoryPattern("@MMK_L_A")
+	assert PatternSet(["@MMK_L_A"]).select(names, categoryMembers) == ["@MMK_L_A"]
+	assert PatternSet(["@MMK"], partial=True).select(names, categoryMembers) == ["@MMK_L_A", "@MMK_R_a"]
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Compares the estimates of gposestimate.py with kern lookups compiled by fontTools feaLib,
+for fonts of empty glyphs g00, g01, ... with kerning groups.
+"""
+import pytest
+from groupindex import GroupRecord, KerningGroupIndex
+from gposestimate import *
+
+fontTools = pytest.importorskip("fontTools")
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.feaLib.builder import addOpenTypeFeaturesFromString
+from fontTools.ttLib.tables.otBase import OTTableWriter, CountReference
+
+glyphOrder = ["g%02i" % i for i in range(60)]
+
+# group name: members, on the left side of a pair (right kerning groups) and on the right side (left kerning groups):
+leftGroups = {"L1": glyphOrder[0:5], "L2": ["g10", "g12", "g14"], "L3": glyphOrder[40:50]}
+rightGroups = {"R1": glyphOrder[5:10], "R2": glyphOrder[20:26], "R3": ["g41", "g43", "g45", "g51"]}
+
+kernings = {
+	"groupsAndExceptions": {
+		"@MMK_L_L1": {"@MMK_R_R1": -50, "@MMK_R_R2": -30, "g30": -7},
+		"@MMK_L_L2": {"@MMK_R_R1": -20},
+		"g31": {"g32": -11, "g33": -12, "@MMK_R_R2": -13},
+		"g00": {"g20": -14},
+		},
+	"glyphPairsOnly": {"g%02i" % i: {"g%02i" % j: -(i + j) for j in range(30, 30 + i % 7)} for i in range(0, 60, 2)},
+	"classesOnly": {
+		"@MMK_L_L1": {"@MMK_R_R1": -50, "@MMK_R_R3": 10},
+		"@MMK_L_L2": {"@MMK_R_R2": -20, "@MMK_R_R3": -5},
+		"@MMK_L_L3": {"@MMK_R_R1": -15, "@MMK_R_R2": -25, "@MMK_R_R3": -35},
+		},
+	}
+
+def groupIndex():
+	records = []
+	for name in glyphOrder:
+		rightKerningGroup = next((group for group, members in leftGroups.items() if name in members), None)
+		leftKerningGroup = next((group for group, members in rightGroups.items() if name in members), None)
+		records.append(GroupRecord(name, None, leftKerningGroup, rightKerningGroup, True))
+	return KerningGroupIndex(records)
+
+def compiledKernLookup(kerning):
+	"""
+	Compiles kerning like Glyphs exports it: exceptions first, as enum pos, then class kerning.
+	"""
+	builder = FontBuilder(1000, isTTF=True)
+	builder.setupGlyphOrder(glyphOrder)
+	builder.setupCharacterMap({})
+	pen = TTGlyphPen(None)
+	builder.setupGlyf({name: pen.glyph() for name in glyphOrder})
+	builder.setupHorizontalMetrics({name: (500, 0) for name in glyphOrder})
+	builder.setupHorizontalHeader()
+	builder.setupPost()
+
+	lines = ["@MMK_L_%s = [%s];" % (group, " ".join(members)) for group, members in leftGroups.items()]
+	lines += ["@MMK_R_%s = [%s];" % (group, " ".join(members)) for group, members in rightGroups.items()]
+	glyphRules, classRules = [], []
+	for leftKey, rightDict in kerning.items():
+		for rightKey, value in rightDict.items():
+			if leftKey.startswith("@") and rightKey.startswith("@"):
+				classRules.append("pos %s %s %i;" % (leftKey, rightKey, value))
+			else:
+				glyphRules.append("enum pos %s %s %i;" % (leftKey, rightKey, value))
+	lines += ["feature kern {"] + glyphRules + classRules + ["} kern;"]
+	addOpenTypeFeaturesFromString(builder.font, "\n".join(lines))
+	return builder.font, builder.font["GPOS"].table.LookupList.Lookup[0]
+
+def compiledSize(table, font, localState=None):
+	writer = OTTableWriter(localState=localState, tableTag="GPOS")
+	table.compile(writer, font)
+	return len(writer.getAllData())
+
+@pytest.mark.parametrize("name", sorted(kernings))
+def testSizesMatchFontTools(name):
+	kerning = kernings[name]
+	estimate = estimateKernSize([kerning], groupIndex(), glyphOrder=glyphOrder)
+	font, lookup = compiledKernLookup(kerning)
+	assert [(s.format, s.bytes) for s in estimate.subtables] == [
+		(subtable.Format, compiledSize(subtable, font, {"LookupType": CountReference({"LookupType": None}, "LookupType")})) for subtable in lookup.SubTable
+		]
+	assert estimate.bytes == compiledSize(lookup, font)
+	assert estimate.risk == RISK_OK
+
+def testFontEstimate():
+	kerning = {"m1": kernings["groupsAndExceptions"], "m2": kernings["classesOnly"]}
+	estimates = estimateFontKernSize(kerning, groupIndex())
+	assert list(estimates) == ["m1", "m2", VARIABLE]
+	# the variable font has the pairs of both masters:
+	assert estimates[VARIABLE].classRecords >= max(estimates["m1"].classRecords, estimates["m2"].classRecords)
+	assert describeEstimate("m2", estimates["m2"]).startswith("m2: 1 subtable (1× Format 2), ")
+	assert worstRisk(estimates) == RISK_OK
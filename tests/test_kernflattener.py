@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Flattening a little group kerning with kernflattener.py, ranked by made-up bigram counts.
+"""
+from groupindex import GroupRecord, KerningGroupIndex
+from kernflattener import *
+
+# A and Aacute share the group A, on both sides; V, T and o have no groups:
+index = KerningGroupIndex([
+	GroupRecord("A", "id1", "A", "A", True),
+	GroupRecord("Aacute", "id2", "A", "A", True),
+	GroupRecord("V", "id3", None, None, True),
+	GroupRecord("T", "id4", None, None, True),
+	GroupRecord("o", "id5", None, None, True),
+	])
+characterForGlyph = {"A": "A", "Aacute": "Á", "V": "V", "T": "T", "o": "o"}
+
+def testBigramTable(tmp_path):
+	table = BigramTable()
+	previous = table.addText("AV A")
+	table.addText("VAT", previous)
+	# the pair across the two chunks counts, pairs with spaces do not:
+	assert table.counts == {"AV": 2, "VA": 1, "AT": 1}
+	path = tmp_path / "corpus.txt"
+	path.write_text("AV A\nVAT", encoding="utf-8")
+	assert BigramTable.fromFile(str(path), chunkSize=3).counts == {"AV": 1, "VA": 1, "AT": 1}
+	ranked = BigramTable.fromPairList("AVTo\nAT")
+	assert ranked.frequency("A", "V") > ranked.frequency("T", "o") > ranked.frequency("A", "T") > ranked.frequency("o", "A") == 0
+
+def testGlyphPairs():
+	kerning = {"@MMK_L_A": {"V": -80, "T": 0}, "Aacute": {"V": -60}}
+	assert sorted(glyphPairs(kerning, index)) == [("A", "V", -80), ("Aacute", "V", -60)]
+	assert sorted(glyphPairs(kerning, index, glyphs={"A", "V"})) == [("A", "V", -80)]
+
+def testFlattenKerning():
+	kerning = {"m1": {"@MMK_L_A": {"V": -80, "T": -70}, "T": {"o": -90}}, "m2": {"@MMK_L_A": {"V": -60}, "T": {"o": -100}}}
+	bigrams = BigramTable({"AV": 10, "AT": 10, "ÁV": 5, "To": 8, "ÁT": 1})
+	flattened = flattenKerning(kerning, index, bigrams.glyphFrequency(characterForGlyph))
+	assert flattened.pairs == [("A", "V"), ("A", "T"), ("T", "o"), ("Aacute", "V"), ("Aacute", "T")]
+	assert flattened.kerning["m2"] == {"A": {"V": -60}, "T": {"o": -100}, "Aacute": {"V": -60}}
+	assert flattened.bytes == kernTableSize(5)
+	flattened = flattenKerning(kerning, index, bigrams.glyphFrequency(characterForGlyph), maxPairs=2, minFrequency=6)
+	assert flattened.pairs == [("A", "V"), ("A", "T")]
+
+def testRankedByLargestValueInAnyMaster():
+	# same frequency: A-V is small in m1, but larger than A-T in m2
+	kerning = {"m1": {"A": {"V": -10, "T": -50}}, "m2": {"A": {"V": -100, "T": -50}}}
+	bigrams = BigramTable({"AV": 10, "AT": 10})
+	assert flattenKerning(kerning, index, bigrams.glyphFrequency(characterForGlyph), maxPairs=1).pairs == [("A", "V")]
+
+def testPairBudget():
+	assert pairBudget() == KERN_MAX_PAIRS
+	assert pairBudget(maxPairs=100) == 100
+	assert pairBudget(byteBudget=kernTableSize(42) + 5) == 42
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from math import isnan
+from kerningtable import *
+
+kerning = {
+	"light": {
+		"@MMK_L_T": {"@MMK_R_o": -80, "a": 0},
+		"T": {"o": -90},
+		},
+	"bold": {
+		"@MMK_L_T": {"@MMK_R_o": -60},
+		"V": {"@MMK_R_o": -30, "a": -10},
+		},
+	"black": {
+		"V": {"a": 0},
+		},
+	}
+
+def testRowsAndValues(withNumpy):
+	table = KerningTable(kerning, masterIds=["light", "bold", "black"])
+	assert len(table) == 5
+	assert table.pair(0) == ("@MMK_L_T", "@MMK_R_o")
+	assert table.value("light", "T", "o") == -90
+	assert table.value("bold", "T", "o") is None
+	assert table.value("black", "nonexistent", "o") is None
+	assert list(table.kinds) == [GROUP_GROUP, GROUP_GLYPH, GLYPH_GLYPH, GLYPH_GROUP, GLYPH_GLYPH]
+
+def testMissingMask(withNumpy):
+	table = KerningTable(kerning, masterIds=["light", "bold", "black"])
+	assert sorted(table.pairsInMask(table.missingMask("black"))) == [
+		("@MMK_L_T", "@MMK_R_o"),
+		("@MMK_L_T", "a"),
+		("T", "o"),
+		("V", "@MMK_R_o"),
+		]
+	assert table.pairsInMask(table.missingMask("light", kinds=[GLYPH_GLYPH])) == [("V", "a")]
+	# V a is zero in black, but not in bold:
+	assert table.pairsInMask(table.missingMask("light", otherMasterIds=["black"], nonZeroOnly=True)) == []
+	assert table.pairsInMask(table.missingMask("light", otherMasterIds=["bold"], nonZeroOnly=True)) == [("V", "@MMK_R_o"), ("V", "a")]
+
+def testZeroMask(withNumpy):
+	table = KerningTable(kerning)
+	assert table.pairsInMask(table.zeroMask("light")) == [("@MMK_L_T", "a")]
+	assert table.pairsInMask(table.zeroMask("black", kinds=[GROUP_GLYPH])) == []
+	assert table.pairsInMask(table.zeroMask("black", kinds=[GLYPH_GLYPH])) == [("V", "a")]
+
+def testDelta(withNumpy):
+	table = KerningTable(kerning)
+	delta = list(table.delta("light", "bold"))
+	assert delta[0] == 20
+	assert all(isnan(value) for value in delta[1:])
+
+def testMasterOrder(withNumpy):
+	table = KerningTable(kerning, masterIds=["black", "light"])
+	assert table.masterIds == ["black", "light"]
+	assert table.pair(0) == ("V", "a")
+	assert not "bold" in table.columns
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Two masters of kerning between the groups A (A, Aacute) and V (V, W),
+with glyph-group and glyph-glyph exceptions, for kernoptimizer.py.
+"""
+from groupindex import GroupRecord, KerningGroupIndex
+from kernoptimizer import *
+
+index = KerningGroupIndex([
+	GroupRecord("A", "id1", "A", "A", True),
+	GroupRecord("Aacute", "id2", "A", "A", True),
+	GroupRecord("V", "id3", "V", "V", True),
+	GroupRecord("W", "id4", "V", "V", True),
+	])
+
+def kerning(m1, m2):
+	"""
+	Group kerning @A-@V -50/-60, plus the exceptions, {(left, right): value} per master.
+	"""
+	masterKerning = {}
+	for masterId, exceptions in (("m1", m1), ("m2", m2)):
+		masterKerning[masterId] = {"@MMK_L_A": {"@MMK_R_V": -50 if masterId == "m1" else -60}}
+		for (leftKey, rightKey), value in exceptions.items():
+			masterKerning[masterId].setdefault(leftKey, {})[rightKey] = value
+	return masterKerning
+
+def redundantPairs(masterKerning, **kwargs):
+	redundant, remaining = redundantExceptions(masterKerning, index, **kwargs)
+	return sorted((r.leftKey, r.rightKey) for r in redundant)
+
+def testRedundantInAllMasters():
+	masterKerning = kerning({("Aacute", "@MMK_R_V"): -50, ("A", "V"): -20}, {("Aacute", "@MMK_R_V"): -60, ("A", "V"): -60})
+	# A-V differs in m1:
+	assert redundantPairs(masterKerning) == [("Aacute", "@MMK_R_V")]
+	redundant, remaining = redundantExceptions(masterKerning, index)
+	assert redundant[0].bytes == 2 * PAIR_RECORD_SIZE
+	assert remaining["m2"]["Aacute"] == {}
+	assert remaining["m2"]["A"] == {"V": -60}
+	# input stays untouched:
+	assert masterKerning["m2"]["Aacute"] == {"@MMK_R_V": -60}
+
+def testGlyphGroupExceptionsFirst():
+	# within the threshold of Aacute-@V, but not of the group value Aacute-@V falls back to:
+	masterKerning = kerning({("Aacute", "@MMK_R_V"): -46, ("Aacute", "V"): -42}, {("Aacute", "@MMK_R_V"): -56, ("Aacute", "V"): -52})
+	assert redundantPairs(masterKerning, threshold=5) == [("Aacute", "@MMK_R_V")]
+	# both go when the glyph-glyph exception is close to the group value as well:
+	masterKerning = kerning({("Aacute", "@MMK_R_V"): -46, ("Aacute", "V"): -48}, {("Aacute", "@MMK_R_V"): -56, ("Aacute", "V"): -58})
+	assert redundantPairs(masterKerning, threshold=5) == [("Aacute", "@MMK_R_V"), ("Aacute", "V")]
+
+def testPairsInSomeMasters():
+	# A-W only in m1, same as the group: redundant; A-V only in m2, different: kept
+	masterKerning = kerning({("A", "W"): -50}, {("A", "V"): -10})
+	assert redundantPairs(masterKerning) == [("A", "W")]
+	redundant, remaining = redundantExceptions(masterKerning, index)
+	assert remaining["m1"]["A"] == {}
+	assert remaining["m2"]["A"] == {"V": -10}
+
+def testPairFilter():
+	masterKerning = kerning({("Aacute", "@MMK_R_V"): -50, ("A", "W"): -50}, {("Aacute", "@MMK_R_V"): -60})
+	assert redundantPairs(masterKerning, pairFilter=lambda leftKey, rightKey: rightKey == "W") == [("A", "W")]
+
+def testGroupValueProposals():
+	exceptions = {("A", "V"): -80, ("A", "W"): -80, ("Aacute", "V"): -80}
+	masterKerning = kerning(exceptions, {pair: value - 10 for pair, value in exceptions.items()})
+	proposals = groupValueProposals(masterKerning, index)
+	assert len(proposals) == 1
+	proposal = proposals[0]
+	assert (proposal.leftKey, proposal.rightKey) == ("@MMK_L_A", "@MMK_R_V")
+	assert proposal.currentValues == {"m1": -50, "m2": -60}
+	assert proposal.proposedValues == {"m1": -80, "m2": -90}
+	# only Aacute-W needs an exception with the proposed values:
+	assert (proposal.recordsBefore, proposal.recordsAfter, proposal.bytesSaved) == (3, 1, 2 * PAIR_RECORD_SIZE)
+
+def testNoProposalForMixedMasters():
+	# the exceptions agree in m1 only, so no single group value vector covers them:
+	masterKerning = kerning({("A", "V"): -80, ("A", "W"): -80, ("Aacute", "V"): -80}, {("A", "V"): -90, ("A", "W"): -70, ("Aacute", "V"): -100})
+	assert groupValueProposals(masterKerning, index) == []
+
+def testOptimizeKerning():
+	masterKerning = kerning({("Aacute", "@MMK_R_V"): -50}, {("Aacute", "@MMK_R_V"): -60})
+	optimization = optimizeKerning(masterKerning, index)
+	assert [(r.leftKey, r.rightKey) for r in optimization.redundant] == [("Aacute", "@MMK_R_V")]
+	assert optimization.proposals == []
+	assert optimization.bytesSaved == 2 * PAIR_RECORD_SIZE
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic glyphs for kernprofiles.py: every glyph is a measure(height) function
+returning (lsb, rsb), or (None, None) where it has no outline, plus its bounds.
+"""
+import os, time
+import pytest
+from kernprofiles import *
+
+class Glyph(object):
+
+	def __init__(self, bottom, top, lsb=10.0, rsb=10.0, slant=0.0, gap=None):
+		self.bottom, self.top = bottom, top
+		self.lsb, self.rsb, self.slant, self.gap = lsb, rsb, slant, gap
+		self.measured = []
+
+	def measure(self, height):
+		self.measured.append(height)
+		if self.gap and self.gap[0] <= height <= self.gap[1]:
+			return None, None
+		return self.lsb + self.slant * height, self.rsb - self.slant * height
+
+	def profile(self, step, phases=None):
+		return profileFromMeasurements(self.bottom, self.top, step, self.measure, phases=phases)
+
+def baselineDistance(leftGlyph, rightGlyph, step, kerning=0.0, ignoreIntervals=()):
+	"""
+	The per-pair loop of KernCrasher and GapFinder before the profiles.
+	"""
+	topY = min(leftGlyph.top, rightGlyph.top)
+	bottomY = max(leftGlyph.bottom, rightGlyph.bottom)
+	minDist = None
+	for i in range(int((topY - bottomY) / step)):
+		height = bottomY + i * step
+		if not isHeightInIntervals(height, ignoreIntervals):
+			left = leftGlyph.measure(height)[1]
+			right = rightGlyph.measure(height)[0]
+			if left is not None and right is not None:
+				total = left + right + kerning
+				if minDist is None or minDist > total:
+					minDist = total
+	return minDist
+
+glyphs = {
+	"H": Glyph(0, 700),
+	"V": Glyph(0, 700, lsb=0, rsb=200, slant=0.25),
+	"A": Glyph(0, 700, lsb=200, rsb=0, slant=-0.25),
+	"o": Glyph(-12, 512, lsb=30, rsb=25, slant=0.05),
+	"i": Glyph(0, 720.5, lsb=40, rsb=40, gap=(500, 600)),
+	"comma": Glyph(-121.3, 96.7, lsb=60, rsb=20, slant=-0.2),
+	"quote": Glyph(450.25, 710, lsb=70, rsb=70),
+	"dash": Glyph(233, 299, lsb=20, rsb=20),
+	}
+names = sorted(glyphs)
+
+@pytest.mark.parametrize("step", (5.0, 3.0, 7.5))
+def testSameHeightsAsBaseline(withNumpy, step):
+	leftProfiles = [glyphs[name].profile(step) for name in names]
+	rightProfiles = [glyphs[name].profile(step) for name in names]
+	leftPhases, rightPhases = phasesForPairings(leftProfiles, rightProfiles)
+	for name, profile, phases in zip(names, leftProfiles, leftPhases):
+		profile.addPhases(phases, glyphs[name].measure)
+	for name, profile, phases in zip(names, rightProfiles, rightPhases):
+		profile.addPhases(phases, glyphs[name].measure)
+
+	kerningMatrix = [[-10.0 * i + j for j in range(len(names))] for i in range(len(names))]
+	ignoreIntervals = ((480, 520), )
+	matrix = minDistanceMatrix(leftProfiles, rightProfiles, kerningMatrix=kerningMatrix, ignoreIntervals=ignoreIntervals)
+	assert minDistanceMatrix(leftProfiles, rightProfiles, kerningMatrix=kerningMatrix, ignoreIntervals=ignoreIntervals, maxChunkSize=100) == matrix
+	for i, leftName in enumerate(names):
+		for j, rightName in enumerate(names):
+			expected = baselineDistance(glyphs[leftName], glyphs[rightName], step, kerningMatrix[i][j], ignoreIntervals)
+			single = minDistanceBetweenProfiles(leftProfiles[i], rightProfiles[j], kerning=kerningMatrix[i][j], ignoreIntervals=ignoreIntervals)
+			assert single == pytest.approx(expected), (leftName, rightName)
+			assert matrix[i][j] == pytest.approx(expected), (leftName, rightName)
+
+def testNoSharedHeights(withNumpy):
+	comma, quote = glyphs["comma"].profile(5.0), glyphs["quote"].profile(5.0)
+	assert minDistanceBetweenProfiles(comma, quote) is None
+	comma.addPhases(phasesForPairings([comma], [quote])[0][0], glyphs["comma"].measure)
+	assert minDistanceMatrix([comma], [quote]) == [[None]]
+	assert minDistanceMatrix([], [quote]) == []
+
+def testGaps(withNumpy):
+	i = Glyph(0, 720, gap=(0, 720)).profile(10.0)
+	H = glyphs["H"].profile(10.0)
+	assert minDistanceBetweenProfiles(i, H) is None
+	assert minDistanceMatrix([i, H], [H]) == [[None], [20.0]]
+
+def testMissingPhase():
+	comma, H = glyphs["comma"].profile(5.0), glyphs["H"].profile(5.0)
+	with pytest.raises(ValueError):
+		minDistanceBetweenProfiles(comma, H)
+	comma.addPhases((H.phase, ), glyphs["comma"].measure)
+	assert minDistanceBetweenProfiles(comma, H) == pytest.approx(baselineDistance(glyphs["comma"], glyphs["H"], 5.0))
+
+def testDifferentSteps():
+	with pytest.raises(ValueError):
+		minDistanceBetweenProfiles(glyphs["H"].profile(5.0), glyphs["H"].profile(10.0))
+
+def testGridIndexRange():
+	assert samplePhase(-121.3, 5.0) == pytest.approx(3.7)
+	assert samplePhase(700.0, 5.0) == 0.0
+	# heights 0, 5, ... 695, the last one a full step below the top:
+	assert gridIndexRange(0, 700, 5.0) == (0, 140)
+	assert gridIndexRange(1, 4, 5.0) == (1, 1)
+	assert gridIndexRange(-12, 512, 5.0, phase=3.0) == (-3, 101)
+
+def testPairsInMatrix():
+	matrix = [[5.0, None], [-3.0, 12.0]]
+	assert list(pairsInMatrix(matrix, below=6.0)) == [(0, 0, 5.0), (1, 0, -3.0)]
+	assert list(pairsInMatrix(matrix, above=10.0)) == [(1, 1, 12.0)]
+
+def testProfileFromMeasurements(withNumpy):
+	i = glyphs["i"]
+	profile = i.profile(10.0)
+	grid = profile.grid(profile.phase)
+	assert (grid.start, grid.end) == (0, 72)
+	assert grid.lsbs[50:61] == (INF, ) * 11
+	assert grid.lsbs[49] == grid.rsbs[61] == 40
+	H = glyphs["H"].profile(10.0)
+	assert minDistanceMatrix([H], [profile]) == [[50.0]]
+	# the top of the stem and the dot are still measured:
+	assert minDistanceMatrix([H], [profile], ignoreIntervals=((0, 400), )) == [[50.0]]
+	assert minDistanceMatrix([H], [profile], ignoreIntervals=((0, 720), )) == [[None]]
+
+def testProfileCache():
+	cache = ProfileCache(maxSize=2)
+	H, o = glyphs["H"].profile(5.0), glyphs["o"].profile(5.0)
+	cache.set("H", 1, H)
+	cache.set("o", 1, o)
+	assert cache.get("H", 1) is H
+	# outdated fingerprint:
+	assert cache.get("o", 2) is None
+	# o was used least recently:
+	cache.set("V", 1, glyphs["V"].profile(5.0))
+	assert len(cache) == 2
+	assert cache.get("o", 1) is None
+	assert cache.get("H", 1) is H
+
+def storeMatrix(store, entry, leftNames, rightNames, kerningMatrix, measuredNames):
+
+	def profileForName(glyphName, phases):
+		measuredNames.append(glyphName)
+		profile = glyphs[glyphName].profile(5.0)
+		profile.addPhases(phases, glyphs[glyphName].measure)
+		return profile
+
+	return store.distanceMatrix(entry, leftNames, rightNames, kerningMatrix, profileForName)
+
+def testMeasurementStore(tmp_path):
+	leftNames, rightNames = ["V", "comma"], ["A", "o"]
+	kerningMatrix = [[-40.0, 0.0], [0.0, -10.0]]
+	hashes = {name: "1" for name in leftNames + rightNames}
+	store = MeasurementStore(str(tmp_path), "MyFont.glyphs", "m01")
+	entry = store.entry("step=5")
+	assert store.updateGlyphHashes(entry, hashes) == set(hashes)
+	measuredNames = []
+	matrix, measuredCount = storeMatrix(store, entry, leftNames, rightNames, kerningMatrix, measuredNames)
+	assert measuredCount == 4
+	for i, leftName in enumerate(leftNames):
+		for j, rightName in enumerate(rightNames):
+			assert matrix[i][j] == pytest.approx(baselineDistance(glyphs[leftName], glyphs[rightName], 5.0, kerningMatrix[i][j]))
+	store.save()
+
+	# next run: nothing changed, nothing measured:
+	store = MeasurementStore(str(tmp_path), "MyFont.glyphs", "m01")
+	entry = store.entry("step=5")
+	assert store.updateGlyphHashes(entry, hashes) == set()
+	measuredNames = []
+	assert storeMatrix(store, entry, leftNames, rightNames, kerningMatrix, measuredNames) == (matrix, 0)
+	assert measuredNames == []
+
+	# changed glyph and changed kerning:
+	assert store.updateGlyphHashes(entry, dict(hashes, o="2")) == {"o"}
+	kerningMatrix[0][0] = -50.0
+	newMatrix, measuredCount = storeMatrix(store, entry, leftNames, rightNames, kerningMatrix, measuredNames)
+	assert measuredCount == 3
+	assert newMatrix[0][0] == pytest.approx(matrix[0][0] - 10.0)
+	assert newMatrix[1][0] == matrix[1][0]
+
+def testMeasurementStoreSettings(tmp_path):
+	store = MeasurementStore(str(tmp_path), "MyFont.glyphs", "m01", maxSettings=2)
+	for settingsKey in ("step=1", "step=5", "step=10"):
+		store.entry(settingsKey)
+		time.sleep(0.01)
+	store.save()
+	assert sorted(MeasurementStore(str(tmp_path), "MyFont.glyphs", "m01").settings) == ["step=10", "step=5"]
+	# another master, another file:
+	assert MeasurementStore(str(tmp_path), "MyFont.glyphs", "m02").settings == {}
+	pruneMeasurementStores(str(tmp_path), maxFiles=0)
+	assert os.listdir(str(tmp_path)) == []
+
+class SpikyGlyph(Glyph):
+	"""
+	Slanted right side with a thin spike between two coarse heights, like a serif.
+	"""
+
+	def measure(self, height):
+		lsb, rsb = Glyph.measure(self, height)
+		if 333 <= height <= 334 and rsb is not None:
+			rsb -= 80
+		return lsb, rsb
+
+def adaptiveProfile(glyph, keyHeights=()):
+	return AdaptiveProfile(glyph.measure, glyph.bottom, glyph.top, fineStep=1.0, coarseStep=10.0, keyHeights=keyHeights)
+
+def fineDistance(leftGlyph, rightGlyph, kerning=0.0, ignoreIntervals=()):
+	leftProfile = leftGlyph.profile(1.0, phases=(0.0, ))
+	rightProfile = rightGlyph.profile(1.0, phases=(0.0, ))
+	leftProfile.bottom = rightProfile.bottom = 0.0 # pair on the grid of multiples of 1, like AdaptiveProfile
+	return minDistanceBetweenProfiles(leftProfile, rightProfile, kerning=kerning, ignoreIntervals=ignoreIntervals)
+
+@pytest.mark.parametrize("leftName, rightName", (("V", "A"), ("A", "V"), ("o", "comma"), ("i", "H"), ("comma", "quote")))
+def testAdaptiveProfiles(leftName, rightName):
+	leftGlyph, rightGlyph = glyphs[leftName], glyphs[rightName]
+	distance = minDistanceBetweenAdaptiveProfiles(adaptiveProfile(leftGlyph), adaptiveProfile(rightGlyph), kerning=-5.0, ignoreIntervals=((480, 520), ))
+	assert distance == pytest.approx(fineDistance(leftGlyph, rightGlyph, kerning=-5.0, ignoreIntervals=((480, 520), )))
+
+def testAdaptiveProfileKeyHeights():
+	spiky, H = SpikyGlyph(0, 700, slant=-0.1), glyphs["H"]
+	assert fineDistance(spiky, H) == pytest.approx(-26.7)
+	# the spike hides between two coarse heights:
+	assert minDistanceBetweenAdaptiveProfiles(adaptiveProfile(spiky), adaptiveProfile(H), tolerance=5.0) == 20.0
+	spiky.measured = []
+	assert minDistanceBetweenAdaptiveProfiles(adaptiveProfile(spiky, keyHeights=(333, )), adaptiveProfile(H), tolerance=5.0) == pytest.approx(-26.7)
+	# only a fraction of the 700 fine heights was measured:
+	assert len(set(spiky.measured)) < 200
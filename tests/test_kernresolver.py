@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import csv, json
+from kernresolver import *
+
+kerning = {
+	"@MMK_L_T": {"@MMK_R_o": -80, "odieresis": -40, "@MMK_R_a": -70},
+	"Tcaron": {"@MMK_R_o": -20, "oslash": -10},
+	"T": {"o": -90},
+	}
+leftGroups = {"T": "T", "Tcaron": "T", "Tbar": "T"}
+rightGroups = {"o": "o", "odieresis": "o", "oslash": "o", "a": "a"}
+
+def resolver():
+	return KerningResolver(kerning, leftGroups, rightGroups)
+
+def testPrecedence():
+	thisResolver = resolver()
+	assert thisResolver.kerningForPair("T", "o") == -90 # glyph-glyph
+	assert thisResolver.kerningForPair("Tcaron", "odieresis") == -20 # glyph-group before group-glyph
+	assert thisResolver.kerningForPair("Tcaron", "oslash") == -10 # glyph-glyph
+	assert thisResolver.kerningForPair("Tbar", "odieresis") == -40 # group-glyph
+	assert thisResolver.kerningForPair("Tbar", "o") == -80 # group-group
+	assert thisResolver.kerningForPair("Tbar", "a") == -70
+	assert thisResolver.kerningForPair("o", "T") == 0.0
+	assert thisResolver.kerningForPair("o", "T", default=None) is None
+
+def testKeysForPair():
+	thisResolver = resolver()
+	assert thisResolver.keysForPair("T", "o") == ("T", "o")
+	assert thisResolver.keysForPair("Tcaron", "odieresis") == ("Tcaron", "@MMK_R_o")
+	assert thisResolver.keysForPair("Tbar", "odieresis") == ("@MMK_L_T", "odieresis")
+	assert thisResolver.keysForPair("Tbar", "oslash") == ("@MMK_L_T", "@MMK_R_o")
+	assert thisResolver.keysForPair("a", "a") is None
+
+def testMatrixMatchesSinglePairs():
+	thisResolver = resolver()
+	names = ["T", "Tcaron", "Tbar", "o", "odieresis", "oslash", "a", "x"]
+	matrix = thisResolver.kerningMatrix(names, names)
+	assert matrix == [[thisResolver.kerningForPair(left, right) for right in names] for left in names]
+
+def testGlyphIds():
+	thisResolver = KerningResolver({"id-T": {"id-o": -50, "@MMK_R_a": -30}}, glyphNameForKey={"id-T": "T", "id-o": "o"})
+	assert thisResolver.kerningForPair("T", "o") == -50
+	assert thisResolver.keysForPair("T", "o") == ("T", "o")
+
+def testSetKerningForPair():
+	thisResolver = resolver()
+	thisResolver.setKerningForPair("@MMK_L_T", "@MMK_R_a", -60)
+	assert thisResolver.kerningForPair("Tbar", "a") == -60
+	assert kerning["@MMK_L_T"]["@MMK_R_a"] == -70 # the input stays untouched
+
+def testWriteKerningPlan(tmp_path):
+	plan = [PlannedKerning("T", "@MMK_R_o", -80, -100, "too close", True), PlannedKerning("@MMK_L_V", "A", None, -20, "new", False)]
+	csvPath, jsonPath = str(tmp_path / "plan.csv"), str(tmp_path / "plan.json")
+	writeKerningPlan(plan, csvPath)
+	writeKerningPlan(plan, jsonPath)
+	with open(csvPath, encoding="utf-8") as planFile:
+		rows = list(csv.reader(planFile))
+	assert rows[0] == list(PlannedKerning._fields)
+	assert rows[1] == ["T", "@MMK_R_o", "-80", "-100", "too close", "True"]
+	with open(jsonPath, encoding="utf-8") as planFile:
+		assert json.load(planFile)[1] == {"leftSide": "@MMK_L_V", "rightSide": "A", "oldValue": None, "newValue": -20, "reason": "new", "apply": False}
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Contour nesting of outlinegeometry.py on small synthetic outlines: counters,
+islands inside counters, and paths drawn in the wrong direction. PointGrid
+lookups are compared with a brute force search over random points.
+"""
+import random
+from math import hypot
+import pytest
+from outlinegeometry import *
+from test_outlinelint import circle, rectangle, reversedPath
+
+def testContourNesting(withNumpy):
+	paths = [
+		rectangle(0, 0, 400, 400),
+		rectangle(100, 100, 300, 300, clockwise=True), # counter
+		rectangle(150, 150, 250, 250), # island inside the counter
+		rectangle(500, 0, 600, 100), # second outer contour
+		]
+	nesting = ContourNesting(paths)
+	assert nesting.parents == [-1, 0, 1, -1]
+	assert nesting.depths == [0, 1, 2, 0]
+	assert [nesting.isCounter(i) for i in range(4)] == [False, True, False, False]
+	assert nesting.wrongDirections() == []
+
+def testContourNestingWrongDirections(withNumpy):
+	paths = [
+		rectangle(0, 0, 400, 400, clockwise=True),
+		rectangle(100, 100, 300, 300), # counter drawn counterclockwise
+		]
+	assert ContourNesting(paths).wrongDirections() == [0, 1]
+
+def testContourNestingCurves(withNumpy):
+	# flattened curves, more than 32 points for the numpy area:
+	paths = [circle(), reversedPath(circle(radius=50, handle=28))]
+	nesting = ContourNesting(paths)
+	assert len(nesting.polygons[0]) > 32
+	assert nesting.parents == [-1, 0]
+	assert nesting.areas[0] == pytest.approx(31416, rel=0.01) # pi*r*r
+	assert nesting.wrongDirections() == []
+
+def testContourNestingSkipsOpenAndEmptyPaths():
+	paths = [rectangle(0, 0, 400, 400), rectangle(100, 100, 300, 300), []]
+	nesting = ContourNesting(paths, closedPaths=[True, False, True])
+	assert nesting.parents == [-1, -1, -1]
+	assert nesting.wrongDirections() == []
+
+def randomPoints(count, seed=0):
+	generator = random.Random(seed)
+	return [(generator.uniform(-100, 500), generator.uniform(-100, 500)) for i in range(count)]
+
+def testPointGridNear():
+	points = randomPoints(2000)
+	grid = PointGrid(points, cellSize=16.0)
+	assert len(grid) == len(points)
+	for x, y, tolerance in ((0, 0, 0.0), (250, 250, 10.0), (17.5, -3, 40.0), (499, 499, 5.0)):
+		expected = [i for i, (px, py) in enumerate(points) if hypot(px - x, py - y) <= tolerance]
+		assert sorted(grid.near(x, y, tolerance)) == expected
+	index = grid.add(33.0, 44.0)
+	assert index in grid.near(33.0, 44.0)
+
+@pytest.mark.parametrize("segment", (
+	(0, 0, 400, 0), # horizontal
+	(0, 0, 0, 400), # vertical
+	(0, 0, 400, 380), # diagonal
+	(10, 0, 30, 400), # steep
+	(400, 390, 0, 10), # backwards
+	(-50, 300, 450, 290), # shallow
+	))
+def testPointGridNearSegment(segment):
+	points = randomPoints(3000, seed=1)
+	grid = PointGrid(points, cellSize=16.0)
+	x0, y0, x1, y1 = segment
+	dx, dy = x1 - x0, y1 - y0
+	d2 = dx * dx + dy * dy
+	for tolerance in (0.5, 3.0, 25.0):
+		expected = []
+		for i, (x, y) in enumerate(points):
+			position = ((x - x0) * dx + (y - y0) * dy) / d2
+			if 0.0 < position < 1.0 and hypot(x0 + dx * position - x, y0 + dy * position - y) <= tolerance:
+				expected.append(i)
+		assert sorted(grid.nearSegment(x0, y0, x1, y1, tolerance)) == expected
+
+def testPointGridNearSegmentEnds():
+	grid = PointGrid([(0, 0), (50, 0), (100, 0), (100, 0.5)])
+	# points on the ends do not count as on the segment:
+	assert grid.nearSegment(0, 0, 100, 0, 1.0) == [1]
+	assert grid.nearSegment(5, 5, 5, 5, 1.0) == []
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+One synthetic outline per check of outlinelint.py, each with the problem the
+corresponding check of Path Problem Finder looks for. Paths are lists of (x, y, type)
+nodes, closed paths with the start node last, like in Glyphs.
+"""
+import pytest
+from outlinelint import *
+
+def circle(x=100, y=100, radius=100, handle=55):
+	"""
+	Clean counterclockwise circle: four curve segments, starting at the bottom.
+	"""
+	left, bottom, right, top = x - radius, y - radius, x + radius, y + radius
+	return [
+		(x + handle, bottom, "offcurve"), (right, y - handle, "offcurve"), (right, y, "curve"),
+		(right, y + handle, "offcurve"), (x + handle, top, "offcurve"), (x, top, "curve"),
+		(x - handle, top, "offcurve"), (left, y + handle, "offcurve"), (left, y, "curve"),
+		(left, y - handle, "offcurve"), (x - handle, bottom, "offcurve"), (x, bottom, "curve"),
+		]
+
+def rectangle(left, bottom, right, top, clockwise=False):
+	nodes = [(right, bottom, "line"), (right, top, "line"), (left, top, "line"), (left, bottom, "line")]
+	return nodes[::-1] if clockwise else nodes
+
+def reversedPath(nodes):
+	"""
+	Same path in the other direction, the start node staying last.
+	"""
+	nodes = nodes[::-1]
+	return nodes[1:] + nodes[:1]
+
+def replaced(nodes, index, x, y):
+	nodes = list(nodes)
+	nodes[index] = (x, y, nodes[index][2])
+	return nodes
+
+# clean outlines, no check may fire:
+cleanOutlines = {
+	"circle": [circle()],
+	"rectangle": [rectangle(0, 0, 200, 300)],
+	"rectangleWithCounter": [rectangle(0, 0, 200, 300), rectangle(50, 50, 150, 250, clockwise=True)],
+	"circleWithCounter": [circle(), reversedPath(circle(radius=50, handle=28))],
+	}
+
+# check: (paths, closedPaths)
+problemOutlines = {
+	# first handle of the segment on top of the bottom node:
+	ZERO_HANDLES: ([replaced(circle(), 0, 100, 0)], None),
+	# handle next to the bottom node projects beyond the other end of its segment:
+	OUTWARD_HANDLES: ([replaced(circle(), 0, 80, 0)], None),
+	# handles of the first segment swapped, so they cross:
+	CUSPING_HANDLES: ([replaced(replaced(circle(), 0, 200, 45), 1, 155, 0)], None),
+	# first handle reaches beyond the intersection of the handle lines at 200, 0:
+	LARGE_HANDLES: ([replaced(circle(), 0, 220, 0)], None),
+	SHORT_HANDLES: ([replaced(circle(), 1, 200, 92)], None),
+	ANGLED_HANDLES: ([replaced(circle(), 1, 203, 45)], None),
+	# top of the rectangle is a curve with both handles on the line between its nodes:
+	SHALLOW_CURVE: ([[(0, 0, "line"), (200, 0, "line"), (200, 100, "line"), (140, 100, "offcurve"), (60, 100, "offcurve"), (0, 100, "curve")]], None),
+	# top curve less than 5 units high:
+	SHALLOW_CURVE_BBOX: ([[(0, 0, "line"), (200, 0, "line"), (200, 103, "line"), (140, 102, "offcurve"), (60, 101, "offcurve"), (0, 100, "curve")]], None),
+	ALMOST_ORTHOGONAL_LINES: ([replaced(rectangle(0, 0, 200, 300), 1, 202, 300)], None),
+	SHORT_SEGMENT: ([rectangle(0, 0, 200, 300) + [(0, 4, "line")]], None),
+	# counter drawn first:
+	BAD_OUTLINE_ORDER: ([rectangle(50, 50, 150, 250, clockwise=True), rectangle(0, 0, 200, 300)], None),
+	BAD_PATH_DIRECTIONS: ([rectangle(0, 0, 200, 300, clockwise=True)], None),
+	# curve node first, so the path starts with its last handle:
+	OFFCURVE_AS_START_POINT: ([circle()[-1:] + circle()[:-1]], None),
+	STRAY_POINTS: ([rectangle(0, 0, 200, 300), [(300, 100, "line")]], None),
+	TWO_POINT_OUTLINES: ([rectangle(0, 0, 200, 300), [(300, 0, "line"), (300, 100, "line")]], None),
+	OPEN_PATHS: ([rectangle(0, 0, 200, 300)], [False]),
+	QUADRATIC_CURVES: ([[(200, 0, "line"), (200, 300, "line"), (0, 300, "offcurve"), (0, 0, "qcurve")]], None),
+	DECIMAL_COORDINATES: ([replaced(rectangle(0, 0, 200, 300), 1, 200, 300.5)], None),
+	EMPTY_PATHS: ([rectangle(0, 0, 200, 300), []], None),
+	}
+
+def testEveryCheckHasAnOutline():
+	assert sorted(problemOutlines) == sorted(bit for bit, prefName, title, finding in CHECKS)
+
+@pytest.mark.parametrize("name", sorted(cleanOutlines))
+def testCleanOutline(withNumpy, name):
+	outline = LayerOutline(cleanOutlines[name])
+	assert checkTitles(lintOutline(outline)) == []
+
+@pytest.mark.parametrize("check", sorted(problemOutlines), ids=lambda check: checkTitles(check)[0])
+def testProblemOutline(withNumpy, check):
+	paths, closedPaths = problemOutlines[check]
+	outline = LayerOutline(paths, closedPaths)
+	assert lintOutline(outline, check) == check
+	assert lintOutline(outline) & check
+
+@pytest.mark.parametrize("check", sorted(problemOutlines), ids=lambda check: checkTitles(check)[0])
+def testNumpyAndPlainAgree(monkeypatch, check):
+	import outlinegeometry, outlinelint
+	if outlinelint.numpy is None:
+		pytest.skip("numpy is not installed")
+	paths, closedPaths = problemOutlines[check]
+	numpyFindings = lintOutline(LayerOutline(paths, closedPaths))
+	monkeypatch.setattr(outlinelint, "numpy", None)
+	monkeypatch.setattr(outlinegeometry, "numpy", None)
+	assert lintOutline(LayerOutline(paths, closedPaths)) == numpyFindings
+
+def testThresholds(withNumpy):
+	paths, closedPaths = problemOutlines[SHORT_HANDLES]
+	outline = LayerOutline(paths, closedPaths)
+	assert lintOutline(outline, SHORT_HANDLES, thresholds={"shortHandles": 5.0}) == 0
+	paths, closedPaths = problemOutlines[ALMOST_ORTHOGONAL_LINES]
+	outline = LayerOutline(paths, closedPaths)
+	assert lintOutline(outline, ALMOST_ORTHOGONAL_LINES, thresholds={"almostOrthogonalLines": 1.0}) == 0
+
+def testOnlyRequestedChecks(withNumpy):
+	paths, closedPaths = problemOutlines[OPEN_PATHS]
+	assert lintOutline(LayerOutline(paths, closedPaths), ZERO_HANDLES | DECIMAL_COORDINATES) == 0
+
+def testChecksForGlyph():
+	assert checksForGlyph("_corner.serif", ALL_CHECKS) == ALL_CHECKS & ~OPEN_PATHS
+	assert checksForGlyph("A", ALL_CHECKS) == ALL_CHECKS
+	assert checksForNames(["zeroHandles", "openPaths"]) == ZERO_HANDLES | OPEN_PATHS
+
+def testSegments():
+	outline = LayerOutline([circle()])
+	# the bottom node (last) ends the segment from the left node, its handles belong to it:
+	assert outline.segmentStarts[11] == 8
+	assert outline.segmentEnds[9] == outline.segmentEnds[10] == 11
+	assert outline.pathNodes(0) == circle()
+	assert outline.signedArea(0) > 0
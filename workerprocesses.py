@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for running the headless helpers (outlinelint.py, Kerning/kernprofiles.py)
+in spawned worker processes, also from inside the app.
+"""
+from __future__ import division, print_function
+
+import os, sys
+
+class HiddenMainModule(object):
+	"""
+	Spawned worker processes run the __main__ module again. Inside an app, that is
+	the calling script (with its UI), so it is swapped for an empty module while
+	the workers start. The workers only need the module of the function they run.
+	"""
+
+	def __enter__(self):
+		self.mainModule = sys.modules.get("__main__")
+		sys.modules["__main__"] = type(sys)("__main__")
+
+	def __exit__(self, *exception):
+		sys.modules["__main__"] = self.mainModule
+
+def pythonExecutable():
+	"""
+	Python interpreter for worker processes. Inside the app, sys.executable is the app itself.
+	"""
+	for name in ("python3", "python"):
+		path = os.path.join(sys.exec_prefix, "bin", name)
+		if os.path.exists(path):
+			return path
+	return None